@@ -0,0 +1,29 @@
+import os
+import secrets
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "生成与前端共享的令牌签名密钥文件（settings.JWT_SIGNING_KEY_FILE，仅所有者可读），生成后需重启后端"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="覆盖已有的密钥（已签发的令牌全部失效）")
+
+    def handle(self, *args, **options):
+        path = settings.JWT_SIGNING_KEY_FILE
+        if path.exists() and not options["force"]:
+            self.stdout.write(f"密钥文件已存在：{path}（更换密钥请加 --force）")
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，运行中的前端不会读到写了一半的密钥
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(secrets.token_urlsafe(48))
+            tmp_path.replace(path)
+        except OSError as e:
+            raise CommandError(f"密钥文件 {path} 写入失败：{e}")
+        self.stdout.write(f"已生成密钥文件：{path}，请重启后端")
@@ -60,6 +60,12 @@ class UserLoginIn(UserRegisterIn):
 
 class UserLogoutIn(serializers.Serializer):
     refresh_token = serializers.CharField(max_length=1000)
+    # 同时提前过期 access_token（前端在本地校验令牌，按同步的撤销列表拒绝）
+    access_token = serializers.CharField(max_length=1000, required=False)
+
+
+class RevokedTokensOut(serializers.Serializer):
+    jtis = serializers.ListField(child=serializers.CharField())
 
 
 class UserRegisterOut(serializers.ModelSerializer):
@@ -1,3 +1,85 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import models
+from .views import revocation_secret
+
+
+class LogoutRevocationTestCase(TestCase):
+    """登出后 access_token 进入撤销列表（前端本地校验令牌时据此拒绝）"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = models.User.objects.create_user(username="tester", password="secret")
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = self.refresh.access_token
+
+    def _revoked_jtis(self):
+        response = self.client.get("/authentication/revoked_tokens/",
+                                   HTTP_X_REVOCATION_SECRET=revocation_secret(jwt_settings.SIGNING_KEY))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["jtis"]
+
+    def test_revoked_tokens_requires_secret(self):
+        self.assertEqual(self.client.get("/authentication/revoked_tokens/").status_code, 403)
+        response = self.client.get("/authentication/revoked_tokens/", HTTP_X_REVOCATION_SECRET="guess")
+        self.assertEqual(response.status_code, 403)
+        # 登录用户的令牌同样不能访问
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        self.assertEqual(self.client.get("/authentication/revoked_tokens/").status_code, 403)
+
+    def test_logout_revokes_access_token(self):
+        self.assertEqual(self._revoked_jtis(), [])
+
+        response = self.client.post("/authentication/logout/",
+                                    {"refresh_token": str(self.refresh), "access_token": str(self.access)},
+                                    format="json")
+        self.assertEqual(response.status_code, 200)
+
+        jtis = set(self._revoked_jtis())
+        self.assertEqual(jtis, {self.refresh["jti"], self.access["jti"]})
+        # 后端的 verify 接口同样拒绝
+        response = self.client.post("/authentication/login/verify/", {"token": str(self.access)}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_logout_without_access_token(self):
+        response = self.client.post("/authentication/logout/", {"refresh_token": str(self.refresh)}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._revoked_jtis(), [self.refresh["jti"]])
+
+
+class SigningKeyCommandTestCase(SimpleTestCase):
+    def test_settings_read_without_writing(self):
+        # 加载设置时只读取密钥，目录不存在（或只读）时不报错也不创建文件
+        from backend.settings import _read_signing_key
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "missing" / "jwt_signing_key"
+            with mock.patch.dict(os.environ, {"JWT_SIGNING_KEY": ""}):
+                self.assertIsNone(_read_signing_key(path))
+            self.assertFalse(path.parent.exists())
+            with mock.patch.dict(os.environ, {"JWT_SIGNING_KEY": "from-env"}):
+                self.assertEqual(_read_signing_key(path), "from-env")
+
+    def test_create_jwt_signing_key(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "conf" / "jwt_signing_key"
+            with override_settings(JWT_SIGNING_KEY_FILE=path):
+                call_command("create_jwt_signing_key", stdout=io.StringIO())
+                key = path.read_text(encoding="utf-8")
+                self.assertGreaterEqual(len(key), 64)
+                self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+                # 已存在时不覆盖，--force 时更换
+                call_command("create_jwt_signing_key", stdout=io.StringIO())
+                self.assertEqual(path.read_text(encoding="utf-8"), key)
+                call_command("create_jwt_signing_key", "--force", stdout=io.StringIO())
+                self.assertNotEqual(path.read_text(encoding="utf-8"), key)
@@ -1,3 +1,5 @@
+import hashlib
+import hmac
 import traceback
 from typing import Annotated
 
@@ -8,13 +10,46 @@ from django.contrib.auth import authenticate
 from rest_framework import views, generics, viewsets, filters, decorators, status, permissions
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
 from drf_spectacular.utils import extend_schema
 
 from . import schemas, serializers, models
 
 
+def _blacklist_access_token(access_token: str, user=None):
+    """
+    将 access_token 加入黑名单（simplejwt 只支持撤销 refresh_token），已过期或无效的令牌忽略
+
+    verify 接口与前端同步的撤销列表都按 jti 查 BlacklistedToken，登出后 access_token 随即失效
+    """
+    try:
+        access = AccessToken(access_token)
+    except TokenError:
+        return
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=access["jti"],
+        defaults={"user": user, "created_at": aware_utcnow(), "token": access_token,
+                  "expires_at": datetime_from_epoch(access["exp"])})
+    BlacklistedToken.objects.get_or_create(token=outstanding)
+
+
+def revocation_secret(signing_key: str) -> str:
+    """同步撤销列表的请求头 X-Revocation-Secret：由共享的签名密钥派生（前端 tokens.py 按同样方式计算）"""
+    return hmac.new(signing_key.encode(), b"revoked_tokens", hashlib.sha256).hexdigest()
+
+
+class HasRevocationSecret(permissions.BasePermission):
+    """只允许持有签名密钥的前端进程访问"""
+
+    def has_permission(self, request, view):
+        secret = request.headers.get("X-Revocation-Secret", "")
+        return hmac.compare_digest(secret, revocation_secret(jwt_settings.SIGNING_KEY))
+
+
 # todo: 构造一个类型，Union[Request, HttpRequest]，因为 drf 使用的不是继承，ide 检测不到，还是说就是不要你用 django Request？
 
 class LoginViewSet(viewsets.ViewSet):
@@ -28,13 +63,25 @@ class LoginViewSet(viewsets.ViewSet):
         refresh_token = user_logout_in.validated_data["refresh_token"]
         try:
             refresh = RefreshToken(refresh_token)
-            refresh.blacklist()
+            blacklisted, _ = refresh.blacklist()
+            access_token = user_logout_in.validated_data.get("access_token")
+            if access_token:
+                _blacklist_access_token(access_token, user=blacklisted.token.user)
             return Response({"detail": "登出成功"}, status=status.HTTP_200_OK)
         except TokenError as e:
             # 目前遇到的情况是：TokenError 令牌类型错误，既然 token 格式都有问题，那自然不需要加入黑名单
             logger.error("{}\n{}", e, traceback.format_exc())
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(responses=schemas.RevokedTokensOut)
+    @decorators.action(detail=False, methods=["GET"], authentication_classes=[],
+                       permission_classes=[HasRevocationSecret])
+    def revoked_tokens(self, request: Request):
+        """未过期的已撤销令牌的 jti，前端定期同步后在本地校验令牌（需携带由签名密钥派生的 X-Revocation-Secret）"""
+        jtis = (BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow())
+                .values_list("token__jti", flat=True))
+        return Response(schemas.RevokedTokensOut({"jtis": list(jtis)}).data, status=status.HTTP_200_OK)
+
     @extend_schema(request=schemas.UserRegisterIn, responses=schemas.UserRegisterOut)
     @decorators.action(detail=False, methods=["POST"], permission_classes=[permissions.AllowAny])
     @transaction.atomic
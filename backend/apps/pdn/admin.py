@@ -8,5 +8,7 @@ from . import models
 admin.site.register(models.BusData)
 admin.site.register(models.GeneratorData)
 admin.site.register(models.BranchData)
+admin.site.register(models.Plan)
+admin.site.register(models.Job)
 
 # 【知识点】再搭配 apps.py#label 和 models.py#model#class Meta#verbose_name&verbose_name_plural，即可让 admin 后台汉化
\ No newline at end of file
@@ -5,3 +5,6 @@ class PdnConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.pdn'
     label = "配电网络"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,230 @@
+"""
+计算结果缓存（两级）
+
+    1. 进程内 LRU：命中时不需要任何 IO；
+    2. 共享的 SQLite 文件（PDN_RUNTIME_DIR/cache.sqlite3）：同一台机器上的所有 django worker、进程池子进程都能读到
+       彼此的计算结果。
+
+缓存键 = 网络内容哈希 + 数据版本号 + 命名空间 + 求解参数：
+    - csv 变化后网络模型会被重建，内容哈希随之变化，旧结果自然不再命中；
+    - BusData/BranchData 变化时（见 signals.py）递增 SQLite 中的数据版本号，所有进程的旧结果同时失效。
+      数据版本号在进程内缓存 version_ttl 秒：本进程的失效立即生效，其他进程的失效最多延迟 version_ttl 秒。
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from loguru import logger
+
+from django.conf import settings
+
+
+class ResultCache:
+    """两级结果缓存，进程内 LRU + 共享 SQLite"""
+
+    def __init__(self, path: Path | None = None, maxsize: int = 256, max_disk_entries: int = 100000,
+                 version_ttl: float = 1.0):
+        # path 缺省为 PDN_RUNTIME_DIR/cache.sqlite3，使用时读取设置（测试中可以 override_settings）
+        self._path = path
+        self._version_ttl = version_ttl
+        # 进程内缓存的数据版本号：(SQLite 文件, 过期时间, 版本号)
+        self._version: Tuple[Path, float, int] | None = None
+        self._maxsize = maxsize
+        self._max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        # SQLite 不可用时使用的进程内数据版本号
+        self._fallback_version = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path or settings.PDN_RUNTIME_DIR / "cache.sqlite3"
+
+    # ------ SQLite ------ #
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """每个线程一个连接；SQLite 不可用时（只读目录等）退化为仅进程内缓存"""
+        path = self.path
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.owner == (os.getpid(), path):
+            return conn
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS result (key TEXT PRIMARY KEY, value BLOB, created REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        except sqlite3.Error as e:
+            logger.warning("结果缓存 {} 不可用，仅使用进程内缓存：{}", path, e)
+            conn = None
+        self._local.conn, self._local.owner = conn, (os.getpid(), path)
+        return conn
+
+    def _read_data_version(self) -> int:
+        conn = self._connect()
+        if conn is None:
+            return self._fallback_version
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'data_version'").fetchone()
+        except sqlite3.Error as e:
+            logger.warning("结果缓存版本号读取失败：{}", e)
+            return self._fallback_version
+        return row[0] if row else 0
+
+    def data_version(self) -> int:
+        """BusData/BranchData 的数据版本号，所有进程共享（进程内缓存 version_ttl 秒）"""
+        path, now = self.path, time.monotonic()
+        cached = self._version
+        if cached is not None and cached[0] == path and cached[1] > now:
+            return cached[2]
+        if cached is not None and cached[0] != path:
+            # 换了 SQLite 文件，进程内的结果不再对应
+            with self._lock:
+                self._memory.clear()
+        version = self._read_data_version()
+        self._version = (path, now + self._version_ttl, version)
+        return version
+
+    def invalidate(self):
+        """使所有缓存结果失效（所有进程）"""
+        with self._lock:
+            self._memory.clear()
+        self._version = None
+        conn = self._connect()
+        if conn is None:
+            self._fallback_version += 1
+            return
+        try:
+            conn.execute("INSERT INTO meta (name, value) VALUES ('data_version', 1) "
+                         "ON CONFLICT(name) DO UPDATE SET value = value + 1")
+            conn.execute("DELETE FROM result")
+        except sqlite3.Error as e:
+            logger.warning("结果缓存失效失败：{}", e)
+
+    # ------ 读写 ------ #
+
+    def make_key(self, content_hash: str, namespace: str, params: Dict[str, Hashable]) -> str:
+        payload = json.dumps([content_hash, self.data_version(), namespace, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _get_disk(self, key: str):
+        conn = self._connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute("SELECT value FROM result WHERE key = ?", (key,)).fetchone()
+            return None if row is None else pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            logger.warning("结果缓存读取失败：{}", e)
+            return None
+
+    def _set_disk(self, key: str, value):
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            conn.execute("INSERT OR REPLACE INTO result (key, value, created) VALUES (?, ?, ?)",
+                         (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time()))
+            # 粗略控制文件大小：超出上限时删除最早的 10%
+            count = conn.execute("SELECT COUNT(*) FROM result").fetchone()[0]
+            if count > self._max_disk_entries:
+                conn.execute("DELETE FROM result WHERE key IN (SELECT key FROM result ORDER BY created LIMIT ?)",
+                             (count - int(self._max_disk_entries * 0.9),))
+        except sqlite3.Error as e:
+            logger.warning("结果缓存写入失败：{}", e)
+
+    def _lookup(self, key: str):
+        """先查进程内 LRU，再查 SQLite（命中后放入 LRU），未命中返回 None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return self._memory[key]
+        value = self._get_disk(key)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+            else:
+                self._counters["disk_hits"] += 1
+                self._put_memory(key, value)
+        return value
+
+    def _put_memory(self, key: str, value):
+        """调用方需持有 self._lock"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, content_hash: str, namespace: str, params: Dict[str, Hashable]):
+        """只查询缓存，未命中返回 None（用于批量计算前找出需要计算的部分）"""
+        return self._lookup(self.make_key(content_hash, namespace, params))
+
+    def set(self, content_hash: str, namespace: str, params: Dict[str, Hashable], value):
+        key = self.make_key(content_hash, namespace, params)
+        self._set_disk(key, value)
+        with self._lock:
+            self._put_memory(key, value)
+
+    def get_or_compute(self, content_hash: str, namespace: str, params: Dict[str, Hashable],
+                       compute: Callable[[], Any], cacheable: Callable[[Any], bool] = lambda value: True):
+        """
+        先查进程内 LRU，再查 SQLite，都未命中时调用 compute 计算并写入两级缓存
+
+        :param content_hash: 网络内容哈希（NetworkModel.content_hash）
+        :param namespace: 结果种类，如 powerflow
+        :param params: 求解参数，需可以 json 序列化
+        :param compute: 计算函数
+        :param cacheable: 结果是否可以缓存（如未收敛的结果不缓存）
+        """
+        key = self.make_key(content_hash, namespace, params)
+        value = self._lookup(key)
+        if value is not None:
+            return value
+        value = compute()
+        if cacheable(value):
+            self._set_disk(key, value)
+            with self._lock:
+                self._put_memory(key, value)
+        return value
+
+    def stats(self) -> Dict:
+        """命中/未命中计数（当前进程）及两级缓存的条目数"""
+        with self._lock:
+            counters = dict(self._counters)
+            memory_entries = len(self._memory)
+        total = sum(counters.values())
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        disk_entries = None
+        conn = self._connect()
+        if conn is not None:
+            try:
+                disk_entries = conn.execute("SELECT COUNT(*) FROM result").fetchone()[0]
+            except sqlite3.Error as e:
+                logger.warning("结果缓存条目数读取失败：{}", e)
+        return {
+            "pid": os.getpid(),
+            **counters,
+            "hit_rate": round(hits / total, 4) if total else None,
+            "memory_entries": memory_entries,
+            "disk_entries": disk_entries,
+            "data_version": self.data_version(),
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+result_cache = ResultCache(maxsize=settings.PDN_RESULT_CACHE_SIZE)
@@ -0,0 +1,368 @@
+"""
+N-1 静态安全分析
+
+逐条断开投运线路，校核断线后的电压与线路负载率，汇总为 N-1 通过率（indicator_scores.csv 中的 safety.LN1_pass_pct）。
+
+不对每条线路都做一次完整潮流：
+    1. 先用 Tarjan 算法找出桥（断开后会形成孤岛的线路），这些线路直接按孤岛处理；
+    2. 其余线路在基态 Y_pp 分解结果上做秩 1 修正（Sherman-Morrison），所有断线一次多右端项回代
+       即可得到断线后电压的估计（按块向量化），再复用同一分解做少量高斯迭代修正；
+    3. 估计值接近或超出限值（留有裕度）的断线，在同一分解上把秩 1 修正迭代到收敛（即完整交流潮流）；
+       只有孤岛断线需要重新组装、分解导纳矩阵。完整潮流按块分发到进程池并行。
+"""
+import math
+from concurrent.futures import as_completed
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from .cache import result_cache
+from .network import DEFAULT_NETWORK_ID, LOADING_MAX_PERCENT, VM_MAX_PU, VM_MIN_PU, NetworkModel, network_registry
+from .numerics import factorization_cache
+from .parallel import get_process_pool, max_workers
+
+# 线性估计的筛选裕度：估计值距离限值不足裕度的断线需做完整交流潮流
+SCREEN_VM_MARGIN_PU = 0.01
+SCREEN_LOADING_MARGIN_PERCENT = 5.0
+# 线性估计之后的高斯迭代次数
+SCREEN_ITERATIONS = 3
+# 线性估计每块的断线数（控制 (母线数 × 块大小) 稠密矩阵的内存）
+SCREEN_CHUNK_SIZE = 256
+
+
+class ContingencyConvergenceError(Exception):
+    """断线后潮流未收敛"""
+
+
+def find_bridges(n_bus: int, f: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """桥（割边）检测，返回每条边是否为桥；按边编号区分父边，平行线路不会被误判为桥"""
+    adjacency: List[List[tuple]] = [[] for _ in range(n_bus)]
+    for edge, (a, b) in enumerate(zip(f, t)):
+        adjacency[a].append((b, edge))
+        adjacency[b].append((a, edge))
+
+    is_bridge = np.zeros(len(f), dtype=bool)
+    disc = np.full(n_bus, -1)
+    low = np.zeros(n_bus, dtype=int)
+    timer = 0
+    for root in range(n_bus):
+        if disc[root] >= 0:
+            continue
+        disc[root] = low[root] = timer
+        timer += 1
+        # 迭代 DFS，栈元素：(节点, 进入该节点的边, 邻接表遍历位置)
+        stack = [(root, -1, 0)]
+        while stack:
+            node, parent_edge, i = stack[-1]
+            if i < len(adjacency[node]):
+                stack[-1] = (node, parent_edge, i + 1)
+                neighbor, edge = adjacency[node][i]
+                if edge == parent_edge:
+                    continue
+                if disc[neighbor] < 0:
+                    disc[neighbor] = low[neighbor] = timer
+                    timer += 1
+                    stack.append((neighbor, edge, 0))
+                else:
+                    low[node] = min(low[node], disc[neighbor])
+            else:
+                stack.pop()
+                if stack:
+                    parent = stack[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                    if low[node] > disc[parent]:
+                        is_bridge[parent_edge] = True
+    return is_bridge
+
+
+def solve_ac(model: NetworkModel, s_bus_pu: np.ndarray, r_scale: float, in_service: np.ndarray,
+             v_init: np.ndarray | None = None, tol: float = 1e-8, max_iteration: int = 200,
+             cache: bool = True) -> np.ndarray:
+    """
+    交流潮流（Z-bus 隐式高斯法），只求解与平衡节点连通的母线，孤岛母线电压为 0
+
+    :param s_bus_pu: 各母线注入功率（标幺值，复数，负荷为负）
+    :param cache: 是否缓存该拓扑的导纳矩阵分解
+    """
+    factorization = factorization_cache.factorize(model, r_scale, in_service, cache=cache)
+    pq = factorization.pq
+    v = np.zeros(model.n_bus, dtype=complex)
+    v[model.slack_pos] = 1.0
+    if len(pq) == 0:
+        return v
+    v_pq = np.ones(len(pq), dtype=complex) if v_init is None else np.asarray(v_init, dtype=complex)[pq].copy()
+    v_pq[v_pq == 0] = 1.0
+    s = s_bus_pu[pq]
+    for _ in range(max_iteration):
+        v_new = factorization.solve(np.conj(s / v_pq) - factorization.y_ps)
+        delta = np.abs(v_new - v_pq).max()
+        v_pq = v_new
+        if delta < tol:
+            break
+    else:
+        raise ContingencyConvergenceError(f"{max_iteration} 次迭代后未收敛（最大偏差 {delta:.3e}）")
+    v[pq] = v_pq
+    return v
+
+
+@dataclass
+class ContingencyCase:
+    """N-1 分析的基态：网络、运行参数与基态潮流解"""
+    model: NetworkModel
+    in_service: np.ndarray
+    load_scale: float
+    r_scale: float
+
+    def __post_init__(self):
+        model = self.model
+        self.s_bus_pu = -(model.base_load_p_mw + 1j * model.base_load_q_mvar) * self.load_scale / model.sn_mva
+        self.y_branch = 1 / model.branch_impedance_pu(self.r_scale)
+        self.current_base_ka = model.current_base_ka()
+        self.v = solve_ac(model, self.s_bus_pu, self.r_scale, self.in_service)
+
+    def loading_percent(self, v: np.ndarray, in_service: np.ndarray) -> np.ndarray:
+        """各线路负载率，v 可以是 (母线数[, 断线数])"""
+        model = self.model
+        i = (v[model.f_pos] - v[model.t_pos]) * self.y_branch.reshape(-1, *([1] * (v.ndim - 1)))
+        loading = np.abs(i) * (self.current_base_ka / model.max_i_ka * 100).reshape(-1, *([1] * (v.ndim - 1)))
+        loading[~in_service] = 0
+        return loading
+
+    def violations(self, v: np.ndarray, loading: np.ndarray, energized: np.ndarray) -> List[Dict]:
+        """越限明细（孤岛母线不参与电压校核）"""
+        model = self.model
+        vm = np.abs(v)
+        rows = []
+        for pos in np.flatnonzero(energized & (vm < VM_MIN_PU)):
+            rows.append({"type": "低电压", "element": f"Bus{model.bus_i[pos]}", "value": round(float(vm[pos]), 4),
+                         "limit": VM_MIN_PU})
+        for pos in np.flatnonzero(energized & (vm > VM_MAX_PU)):
+            rows.append({"type": "过电压", "element": f"Bus{model.bus_i[pos]}", "value": round(float(vm[pos]), 4),
+                         "limit": VM_MAX_PU})
+        for line in np.flatnonzero(loading > LOADING_MAX_PERCENT):
+            rows.append({"type": "过载", "element": f"线{line + 1}", "value": round(float(loading[line]), 2),
+                         "limit": LOADING_MAX_PERCENT})
+        return rows
+
+    def outage_result(self, line: int, v: np.ndarray, method: str) -> Dict:
+        model = self.model
+        in_service = self.in_service.copy()
+        in_service[line] = False
+        energized = np.abs(v) > 0
+        loading = self.loading_percent(v, in_service)
+        violations = self.violations(v, loading, energized)
+        islanded = np.flatnonzero(~energized)
+        lost_load_mw = float(model.base_load_p_mw[islanded].sum() * self.load_scale)
+        vm = np.abs(v[energized])
+        return {
+            "line": int(line),
+            "name": f"线{line + 1}",
+            "from": int(model.bus_i[model.f_pos[line]]),
+            "to": int(model.bus_i[model.t_pos[line]]),
+            "method": method,
+            "islanded_buses": [int(model.bus_i[pos]) for pos in islanded],
+            "lost_load_mw": round(lost_load_mw, 4),
+            "min_vm_pu": round(float(vm.min()), 4),
+            "max_vm_pu": round(float(vm.max()), 4),
+            "max_loading_pct": round(float(loading.max()), 2),
+            "violations": violations,
+            # 失负荷或任何越限即不通过
+            "passed": not violations and len(islanded) == 0,
+        }
+
+    def _factorize(self):
+        """基态 Y_pp 只分解一次，所有断线共用"""
+        if not hasattr(self, "_factorization"):
+            self._factorization = factorization_cache.factorize(self.model, self.r_scale, self.in_service)
+            self._pq = self._factorization.pq
+            self._y_ps = self._factorization.y_ps
+            self._row = np.full(self.model.n_bus, -1)
+            self._row[self._pq] = np.arange(len(self._pq))
+
+    def _rank_one(self, chunk: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """各断线的 z = Y_pp^-1 a（补齐平衡节点行）与 d = 1/y - a^T z"""
+        model, pq, row = self.model, self._pq, self._row
+        k = np.arange(len(chunk))
+        f_row, t_row = row[model.f_pos[chunk]], row[model.t_pos[chunk]]
+        a = np.zeros((len(pq), len(chunk)), dtype=complex)
+        a[f_row[f_row >= 0], k[f_row >= 0]] = 1
+        a[t_row[t_row >= 0], k[t_row >= 0]] -= 1
+        z = np.zeros((model.n_bus, len(chunk)), dtype=complex)
+        z[pq] = self._factorization.solve(a)
+        d = 1 / self.y_branch[chunk] - (z[model.f_pos[chunk], k] - z[model.t_pos[chunk], k])
+        return z, d
+
+    def _iterate(self, chunk: np.ndarray, z: np.ndarray, d: np.ndarray, v: np.ndarray,
+                 max_iteration: int, tol: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        断线后网络的高斯迭代，每次一个多右端项回代（复用基态分解）：
+
+            V' = W + z (W_f - W_t) / d，W = Y_pp^-1 (I(V') - y_ps)
+
+        tol 为 None 时固定迭代 max_iteration 次；返回 (电压, 各断线是否收敛)
+        """
+        model, pq, k = self.model, self._pq, np.arange(len(chunk))
+        converged = np.zeros(len(chunk), dtype=bool)
+        for _ in range(max_iteration):
+            w = np.empty_like(v)
+            w[model.slack_pos] = 1.0
+            w[pq] = self._factorization.solve(np.conj(self.s_bus_pu[pq, None] / v[pq]) - self._y_ps[:, None])
+            v_new = w + z * ((w[model.f_pos[chunk], k] - w[model.t_pos[chunk], k]) / d)
+            delta = np.abs(v_new - v).max(axis=0)
+            v = v_new
+            if tol is not None:
+                converged = delta < tol
+                if converged.all():
+                    break
+        return v, converged
+
+    def screen(self, lines: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        秩 1 修正的估计：先保持基态注入电流，
+
+            ΔV = z (V_f - V_t) / d，z = Y_pp^-1 a，d = 1/y - a^T z，a = e_f - e_t
+
+        再做 SCREEN_ITERATIONS 次高斯迭代修正注入电流。
+        返回 (断线后电压估计 (母线数, 断线数), 是否需要完整潮流校核)
+        """
+        self._factorize()
+        model = self.model
+        v_all = np.empty((model.n_bus, len(lines)), dtype=complex)
+        flagged = np.zeros(len(lines), dtype=bool)
+        for start in range(0, len(lines), SCREEN_CHUNK_SIZE):
+            chunk = lines[start:start + SCREEN_CHUNK_SIZE]
+            k = np.arange(len(chunk))
+            z, d = self._rank_one(chunk)
+            v = self.v[:, None] + z * ((self.v[model.f_pos[chunk]] - self.v[model.t_pos[chunk]]) / d)
+            v, _ = self._iterate(chunk, z, d, v, SCREEN_ITERATIONS)
+            v_all[:, start:start + len(chunk)] = v
+
+            loading = self.loading_percent(v, np.ones(model.n_line, dtype=bool))
+            loading[~self.in_service] = 0
+            loading[chunk, k] = 0
+            vm = np.abs(v)
+            flagged[start:start + len(chunk)] = (
+                    ~np.isfinite(vm).all(axis=0)
+                    | (vm.min(axis=0) < VM_MIN_PU + SCREEN_VM_MARGIN_PU)
+                    | (vm.max(axis=0) > VM_MAX_PU - SCREEN_VM_MARGIN_PU)
+                    | (loading.max(axis=0) > LOADING_MAX_PERCENT - SCREEN_LOADING_MARGIN_PERCENT)
+            )
+        return v_all, flagged
+
+    def solve_low_rank(self, lines: np.ndarray, v_init: np.ndarray, tol: float = 1e-8,
+                       max_iteration: int = 200) -> tuple[np.ndarray, np.ndarray]:
+        """非孤岛断线的完整交流潮流：秩 1 修正迭代到收敛，结果与重新分解求解相同，但不需要重新分解"""
+        self._factorize()
+        v_all = np.empty((self.model.n_bus, len(lines)), dtype=complex)
+        converged = np.zeros(len(lines), dtype=bool)
+        for start in range(0, len(lines), SCREEN_CHUNK_SIZE):
+            chunk = lines[start:start + SCREEN_CHUNK_SIZE]
+            z, d = self._rank_one(chunk)
+            v, ok = self._iterate(chunk, z, d, v_init[:, start:start + len(chunk)], max_iteration, tol)
+            v_all[:, start:start + len(chunk)] = v
+            converged[start:start + len(chunk)] = ok
+        return v_all, converged
+
+    def solve_outage(self, line: int, v_init: np.ndarray | None = None) -> np.ndarray:
+        """断线后重新组装、分解导纳矩阵求解（孤岛断线使用，分解只用一次，不缓存）"""
+        in_service = self.in_service.copy()
+        in_service[line] = False
+        return solve_ac(self.model, self.s_bus_pu, self.r_scale, in_service, v_init=v_init, cache=False)
+
+
+def _non_converged_result(line: int, error: str) -> Dict:
+    return {"line": int(line), "name": f"线{line + 1}", "method": "ac", "passed": False,
+            "violations": [{"type": "不收敛", "element": f"线{line + 1}", "value": None, "limit": None}],
+            "error": error}
+
+
+def _solve_outages(case: ContingencyCase, lines: List[int], v_inits: np.ndarray, bridges: List[int]) -> List[Dict]:
+    """对一块断线做完整交流潮流：非孤岛断线用秩 1 修正迭代，孤岛断线重新分解"""
+    results = []
+    if lines:
+        v, converged = case.solve_low_rank(np.asarray(lines), v_inits)
+        for i, line in enumerate(lines):
+            if converged[i]:
+                results.append(case.outage_result(line, v[:, i], method="ac"))
+            else:
+                results.append(_non_converged_result(line, "秩 1 修正迭代未收敛"))
+    for line in bridges:
+        try:
+            results.append(case.outage_result(line, case.solve_outage(line), method="ac"))
+        except ContingencyConvergenceError as e:
+            results.append(_non_converged_result(line, str(e)))
+    return results
+
+
+def _solve_outages_in_worker(network_id: str, in_service: List[bool], load_scale: float, r_scale: float,
+                             lines: List[int], v_inits: np.ndarray, bridges: List[int]) -> List[Dict]:
+    """进程池中执行：子进程中重建基态后求解一块断线"""
+    case = ContingencyCase(network_registry.get(network_id), np.asarray(in_service, dtype=bool), load_scale, r_scale)
+    return _solve_outages(case, lines, v_inits, bridges)
+
+
+def run_n1(model: NetworkModel, load_scale: float = 1.0, r_scale: float = 1.0,
+           in_service: np.ndarray | None = None) -> Dict:
+    """
+    N-1 分析
+
+    :param in_service: 基态线路投运状态，默认全部投运（与 run_powerflow 一致）
+    :return: 各断线的结果（per-outage 越限明细）、越限汇总表与 N-1 通过率
+    """
+    in_service = np.ones(model.n_line, dtype=bool) if in_service is None else np.asarray(in_service, dtype=bool)
+    case = ContingencyCase(model, in_service, load_scale, r_scale)
+
+    lines = np.flatnonzero(in_service)
+    bridges = lines[find_bridges(model.n_bus, model.f_pos[lines], model.t_pos[lines])]
+    screened = np.setdiff1d(lines, bridges)
+
+    v_screen, flagged = case.screen(screened) if len(screened) else (np.empty((model.n_bus, 0)), np.array([], bool))
+    results = [case.outage_result(line, v_screen[:, i], method="screen")
+               for i, line in enumerate(screened) if not flagged[i]]
+
+    # 需要完整潮流的断线：筛选标记的（以估计值为初值）+ 桥（孤岛）
+    full_lines = [int(line) for line in screened[flagged]]
+    v_inits = v_screen[:, flagged]
+    bridge_lines = [int(line) for line in bridges]
+    workers = max_workers()
+    n_full = len(full_lines) + len(bridge_lines)
+    if workers <= 1 or n_full <= SCREEN_CHUNK_SIZE:
+        results.extend(_solve_outages(case, full_lines, v_inits, bridge_lines))
+    else:
+        n_chunks = workers * 2
+        line_chunk = max(1, math.ceil(len(full_lines) / n_chunks))
+        bridge_chunk = max(1, math.ceil(len(bridge_lines) / n_chunks))
+        pool = get_process_pool()
+        futures = [pool.submit(_solve_outages_in_worker, model.network_id, in_service.tolist(), load_scale, r_scale,
+                               full_lines[i * line_chunk:(i + 1) * line_chunk],
+                               v_inits[:, i * line_chunk:(i + 1) * line_chunk],
+                               bridge_lines[i * bridge_chunk:(i + 1) * bridge_chunk])
+                   for i in range(n_chunks)]
+        for future in as_completed(futures):
+            results.extend(future.result())
+
+    results.sort(key=lambda r: r["line"])
+    passed = sum(r["passed"] for r in results)
+    violation_table = [{"outage": r["name"], **v} for r in results for v in r["violations"]]
+    return {
+        "n_outages": len(results),
+        "n_passed": passed,
+        "LN1_pass_pct": round(passed / len(results) * 100, 2) if results else 100.0,
+        "n_bridges": len(bridges),
+        "n_full_solves": n_full,
+        "limits": {"vm_min_pu": VM_MIN_PU, "vm_max_pu": VM_MAX_PU, "loading_max_pct": LOADING_MAX_PERCENT},
+        "outages": results,
+        "violations": violation_table,
+    }
+
+
+def compute_n1(load_scale: float = 1.0, r_scale: float = 1.0, close_ties: bool = True,
+               network_id: str = DEFAULT_NETWORK_ID) -> Dict:
+    """N-1 分析（结果缓存）；close_ties=False 时联络线按 line.csv 的 status 断开"""
+    model = network_registry.get(network_id)
+    in_service = None if close_ties else model.line_df["status"].to_numpy() == 1
+    params = {"load_scale": float(load_scale), "r_scale": float(r_scale), "close_ties": close_ties,
+              "limits": [VM_MIN_PU, VM_MAX_PU, LOADING_MAX_PERCENT]}
+    return result_cache.get_or_compute(model.content_hash, "n1", params,
+                                       lambda: run_n1(model, load_scale, r_scale, in_service))
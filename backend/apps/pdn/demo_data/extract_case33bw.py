@@ -1,3 +1,5 @@
+# 已由 `python manage.py import_network apps/pdn/demo_data/case33bw.txt --units raw` 取代（流式解析并写入数据库），此脚本仅作留档
+
 raise NotImplementedError
 
 import re
@@ -0,0 +1,52 @@
+"""
+曲线降采样（Largest-Triangle-Three-Buckets）
+
+长时间范围的曲线按图表的像素宽度降采样后再返回：LTTB 在每个桶中选取与前一个选中点、下一个桶均值点
+围成的三角形面积最大的点，峰谷都会被保留，折线形状与原始数据基本一致。
+"""
+from typing import Sequence
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    LTTB 降采样，返回选中点的下标（升序，包含首尾两点）
+
+    :param x: 升序的横坐标（如时间的 int64 ns）
+    :param y: 纵坐标，NaN 的点不参与降采样
+    :param n_out: 输出的点数，不小于 3
+    """
+    if n_out < 3:
+        raise ValueError("n_out 不能小于 3")
+    finite = np.flatnonzero(~np.isnan(y))
+    if len(finite) <= n_out:
+        return finite
+    x = np.asarray(x, dtype=np.float64)[finite]
+    y = np.asarray(y, dtype=np.float64)[finite]
+    n = len(finite)
+
+    # 首尾两点固定，中间的点均分为 n_out - 2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # 每个桶的均值点（作为下一个桶的三角形顶点），最后一个桶之后是末点
+    sums_x, sums_y = np.add.reduceat(x[1:n - 1], edges[:-1] - 1), np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        lo, hi = edges[k], edges[k + 1]
+        # 三角形面积的 2 倍（省去常数因子不影响比较）
+        area = np.abs((x[a] - avg_x[k + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[k + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[k + 1] = a
+    return finite[selected]
+
+
+def lttb_union(x: np.ndarray, columns: Sequence[np.ndarray], n_out: int) -> np.ndarray:
+    """多条曲线共用横坐标时，各自降采样后取下标的并集（点数不超过 曲线数 × n_out）"""
+    indices = [lttb(x, y, n_out) for y in columns]
+    return np.unique(np.concatenate(indices)) if indices else np.arange(0)
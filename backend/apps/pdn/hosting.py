@@ -0,0 +1,253 @@
+"""
+光伏承载力（hosting capacity）
+
+对每个区域（A~F）或每条母线，求在不越限（电压上限、线路载流量）的前提下可接入的最大光伏容量：
+    - 一次评估 = 典型日光伏出力时段的各时刻按列批量前推回代求解，以上一次评估的电压作为初值（热启动）；
+    - 先倍增找到越限的上界，再二分到给定精度；
+    - 各区域/母线相互独立，分块分发到进程池并行求解；
+    - 结果按 方案（参数内容哈希）/天气/季节 缓存（result_cache），重复刷新直接返回。
+"""
+import math
+from concurrent.futures import as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from . import radial
+from .cache import result_cache
+from .network import DB_NETWORK_ID, DEFAULT_NETWORK_ID, LOADING_MAX_PERCENT, VM_MAX_PU, NetworkModel, network_registry
+from .parallel import get_process_pool, max_workers
+from .plans import PlanDefinition, builtin_plan, get_plan
+from .timeseries import TYPICAL_DAILY_LOAD_SHAPE
+
+# 二分精度（MW）与容量搜索上限（MW）
+CAPACITY_TOLERANCE_MW = 0.005
+CAPACITY_SEARCH_LIMIT_MW = 100.0
+
+# 各网络的区域划分：区域 -> 母线编号（按馈线分段）
+NETWORK_REGIONS: Dict[str, Dict[str, List[int]]] = {
+    "case33bw": {
+        "A": [2, 3, 4, 5],
+        "B": [6, 7, 8, 9, 10, 11],
+        "C": [12, 13, 14, 15, 16, 17, 18],
+        "D": [19, 20, 21, 22],
+        "E": [23, 24, 25],
+        "F": [26, 27, 28, 29, 30, 31, 32, 33],
+    },
+}
+# 数据库中的网络缺省为导入的 IEEE 33 节点算例（迁移 0006），导入其他网络后需按母线计算
+NETWORK_REGIONS[DB_NETWORK_ID] = NETWORK_REGIONS["case33bw"]
+
+# 天气 -> 光伏出力系数
+WEATHER_PV_FACTORS = {"晴天": 1.0, "多云": 0.6, "阴天": 0.3}
+# 季节 -> (负荷系数, 光伏出力系数)
+SEASON_FACTORS = {"春季": (0.9, 0.9), "夏季": (1.0, 1.0), "秋季": (0.9, 0.85), "冬季": (1.1, 0.6)}
+
+HOURS = np.arange(24)
+# 光伏出力曲线（标幺值，6~18 时正弦），与 timeseries.Profiles.typical 一致
+PV_SHAPE = np.clip(np.sin((HOURS - 6) / 12 * np.pi), 0, None)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """方案 + 天气 + 季节；plan 可以传方案名称（从 Plan 表读取）"""
+    plan: PlanDefinition | str = field(default_factory=builtin_plan)
+    weather: str = "晴天"
+    season: str = "夏季"
+
+    def __post_init__(self):
+        if isinstance(self.plan, str):
+            object.__setattr__(self, "plan", get_plan(self.plan))
+        for value, choices in ((self.weather, WEATHER_PV_FACTORS), (self.season, SEASON_FACTORS)):
+            if value not in choices:
+                raise ValueError(f"未知的场景：{value}，可选：{'、'.join(choices)}")
+
+    @property
+    def load_factor(self) -> float:
+        return SEASON_FACTORS[self.season][0] * self.plan.load_scale
+
+    @property
+    def pv_factor(self) -> float:
+        return WEATHER_PV_FACTORS[self.weather] * SEASON_FACTORS[self.season][1]
+
+    def in_service(self, model: NetworkModel) -> np.ndarray:
+        return self.plan.in_service(model)
+
+    @property
+    def r_scale(self) -> float:
+        return self.plan.r_scale
+
+
+class HostingCapacityEvaluator:
+    """某一场景下的承载力评估：负荷固定，光伏按 容量 × 出力曲线 注入目标母线"""
+
+    def __init__(self, model: NetworkModel, scenario: Scenario):
+        self.model = model
+        self.scenario = scenario
+        self.solver = radial.get_sweep_solver(model, scenario.in_service(model))
+        # 只评估有光伏出力的时刻，每个时刻一列
+        self.hours = HOURS[PV_SHAPE > 0]
+        self.pv_shape = PV_SHAPE[self.hours] * scenario.pv_factor
+        load_shape = TYPICAL_DAILY_LOAD_SHAPE[self.hours] * scenario.load_factor
+        self.s_load_pu = np.outer(model.base_load_p_mw + 1j * model.base_load_q_mvar, load_shape) / model.sn_mva
+        # 方案中已配置的光伏作为背景出力，承载力为在此基础上还可接入的容量
+        self.s_load_pu -= np.outer(scenario.plan.pv_capacity(model), self.pv_shape) / model.sn_mva
+        self._current_base_ka = model.current_base_ka()[:, None]
+        self._max_i_ka = model.max_i_ka[:, None]
+
+    def evaluate(self, positions: np.ndarray, weights: np.ndarray, capacity_mw: float,
+                 v_init: np.ndarray | None = None):
+        """
+        接入 capacity_mw 光伏（按 weights 分配到 positions 母线）后的最高电压与最大线路负载率
+
+        :return: (是否越限, 最高电压, 最大负载率, 越限类型, 电压解)
+        """
+        s = self.s_load_pu.copy()
+        s[positions] -= np.outer(weights * capacity_mw, self.pv_shape) / self.model.sn_mva
+        try:
+            result = self.solver.solve(s, r_scale=self.scenario.r_scale, v_init=v_init)
+        except radial.SweepConvergenceError:
+            return True, math.nan, math.nan, "不收敛", None
+        max_vm = float(np.abs(result.v).max())
+        max_loading = float((np.abs(result.i_branch) * self._current_base_ka / self._max_i_ka).max() * 100)
+        limit = None
+        if max_vm > VM_MAX_PU:
+            limit = "电压越上限"
+        elif max_loading > LOADING_MAX_PERCENT:
+            limit = "线路过载"
+        return limit is not None, max_vm, max_loading, limit, result.v
+
+    def hosting_capacity(self, bus_i: List[int]) -> Dict:
+        """倍增 + 二分求最大可接入容量，多条母线时按基准负荷比例分配（无负荷时平均分配）"""
+        positions = self.model.bus_positions(bus_i)
+        base = self.model.base_load_p_mw[positions]
+        weights = base / base.sum() if base.sum() > 0 else np.full(len(positions), 1 / len(positions))
+
+        violated, max_vm, max_loading, limit, v = self.evaluate(positions, weights, 0.0)
+        if violated:
+            # 不接入光伏就已越限（如重负荷季节线路过载），承载力为 0
+            return {"hosting_capacity_mw": 0.0, "limit": limit, "max_vm_pu": max_vm,
+                    "max_loading_pct": max_loading, "evaluations": 1}
+        evaluations = 1
+        lo, lo_state = 0.0, (max_vm, max_loading, v)
+        hi, hi_limit = float(max(self.model.base_load_p_mw.sum(), CAPACITY_TOLERANCE_MW)), None
+        while True:
+            violated, max_vm, max_loading, limit, v_hi = self.evaluate(positions, weights, hi, v_init=lo_state[2])
+            evaluations += 1
+            if violated:
+                hi_limit = limit
+                break
+            lo, lo_state = hi, (max_vm, max_loading, v_hi)
+            if hi >= CAPACITY_SEARCH_LIMIT_MW:
+                break
+            hi = min(hi * 2, CAPACITY_SEARCH_LIMIT_MW)
+
+        while hi_limit is not None and hi - lo > CAPACITY_TOLERANCE_MW:
+            mid = (lo + hi) / 2
+            violated, max_vm, max_loading, limit, v_mid = self.evaluate(positions, weights, mid, v_init=lo_state[2])
+            evaluations += 1
+            if violated:
+                hi, hi_limit = mid, limit
+            else:
+                lo, lo_state = mid, (max_vm, max_loading, v_mid)
+
+        return {
+            "hosting_capacity_mw": round(float(lo), 4),
+            "limit": hi_limit or f"达到搜索上限 {CAPACITY_SEARCH_LIMIT_MW} MW",
+            "max_vm_pu": round(lo_state[0], 4),
+            "max_loading_pct": round(lo_state[1], 2),
+            "evaluations": evaluations,
+        }
+
+    def energy_summary(self, bus_i: List[int], capacity_mw: float) -> Dict:
+        """按承载力装机时的典型日发电量、就地消纳量（不超过区域负荷的部分视为就地消纳）"""
+        positions = self.model.bus_positions(bus_i)
+        pv = np.zeros(24)
+        pv[self.hours] = capacity_mw * self.pv_shape
+        load = TYPICAL_DAILY_LOAD_SHAPE * self.scenario.load_factor * self.model.base_load_p_mw[positions].sum()
+        consumed = np.minimum(pv, load)
+        gen = pv.sum()
+        return {
+            "current_gen_avg_MW": float(pv.mean()),
+            "E_region_pv_gen_MWh": float(gen),
+            "E_region_pv_consumed_MWh": float(consumed.sum()),
+            "consume_rate_pct": float(consumed.sum() / gen * 100) if gen > 0 else None,
+            "hourly_pv_MW": pv.tolist(),
+            "hourly_consumed_MW": consumed.tolist(),
+            "hourly_load_MW": load.tolist(),
+        }
+
+
+def _solve_targets(network_id: str, scenario: Scenario, targets: List[Tuple[str, List[int]]]) -> List[Dict]:
+    """进程池中执行：求解一块区域/母线的承载力"""
+    evaluator = HostingCapacityEvaluator(network_registry.get(network_id), scenario)
+    results = []
+    for name, bus_i in targets:
+        result = {"name": name, "buses": bus_i, **evaluator.hosting_capacity(bus_i)}
+        result.update(evaluator.energy_summary(bus_i, result["hosting_capacity_mw"]))
+        results.append(result)
+    return results
+
+
+def _solve_all(network_id: str, scenario: Scenario, targets: List[Tuple[str, List[int]]]) -> List[Dict]:
+    workers = max_workers()
+    if workers <= 1 or len(targets) <= 2:
+        return _solve_targets(network_id, scenario, targets)
+    chunk_size = max(1, math.ceil(len(targets) / workers))
+    pool = get_process_pool()
+    futures = [pool.submit(_solve_targets, network_id, scenario, targets[i:i + chunk_size])
+               for i in range(0, len(targets), chunk_size)]
+    results = [result for future in as_completed(futures) for result in future.result()]
+    order = {name: i for i, (name, _) in enumerate(targets)}
+    return sorted(results, key=lambda r: order[r["name"]])
+
+
+def compute_hosting_capacity(scenario: Scenario, by="region", network_id=DEFAULT_NETWORK_ID) -> Dict:
+    """
+    各区域（by="region"）或各母线（by="bus"）的光伏承载力，结果按场景缓存
+
+    区域结果的字段与 pv_region_distribution.csv 一致（installed_capacity_MW_approx 即承载力），
+    另有 hourly 汇总曲线供 发电量与消纳量曲线图 使用。
+    """
+    model = network_registry.get(network_id)
+    if by == "region":
+        regions = NETWORK_REGIONS.get(network_id, {})
+        if not regions or not set(sum(regions.values(), [])) <= set(model.bus_i.tolist()):
+            raise ValueError(f"网络 {network_id} 未划分区域，请按母线（by=bus）计算")
+        targets = [(region, buses) for region, buses in regions.items()]
+    else:
+        targets = [(f"Bus{i}", [int(i)]) for i in model.bus_i if model.bus_positions([i])[0] != model.slack_pos]
+
+    def compute():
+        results = _solve_all(network_id, scenario, targets)
+        rows = []
+        for r in results:
+            rows.append({
+                "region" if by == "region" else "bus": r["name"],
+                "buses": r["buses"],
+                "installed_capacity_MW_approx": r["hosting_capacity_mw"],
+                "current_gen_avg_MW": r["current_gen_avg_MW"],
+                "E_region_pv_gen_MWh": r["E_region_pv_gen_MWh"],
+                "E_region_pv_consumed_MWh": r["E_region_pv_consumed_MWh"],
+                "consume_rate_pct": r["consume_rate_pct"],
+                "limit": r["limit"],
+                "max_vm_pu": r["max_vm_pu"],
+                "max_loading_pct": r["max_loading_pct"],
+            })
+        # 各区域的承载力是单独接入时求得的，hourly 为各区域均按承载力接入时的合计（仅作展示）
+        return {
+            "scenario": {"plan": scenario.plan.name, "weather": scenario.weather, "season": scenario.season},
+            "by": by,
+            "limits": {"vm_max_pu": VM_MAX_PU, "loading_max_pct": LOADING_MAX_PERCENT},
+            "rows": rows,
+            "hourly": {
+                "hours": [f"{h}:00" for h in HOURS],
+                "gen": np.sum([r["hourly_pv_MW"] for r in results], axis=0).round(4).tolist(),
+                "use": np.sum([r["hourly_consumed_MW"] for r in results], axis=0).round(4).tolist(),
+            },
+        }
+
+    params = {"plan": scenario.plan.content_hash, "weather": scenario.weather, "season": scenario.season, "by": by,
+              "vm_max_pu": VM_MAX_PU, "loading_max_pct": LOADING_MAX_PERCENT}
+    return result_cache.get_or_compute(model.content_hash, "hosting_capacity", params, compute)
@@ -0,0 +1,368 @@
+"""
+网络数据导入：MATPOWER .m、pandapower JSON、CSV 目录 -> BusData / GeneratorData / BranchData
+
+各格式的读取器都是生成器，逐行产出 ("bus" | "gen" | "branch", 行数据)，不把整个文件读入内存：
+    - MATPOWER .m：逐行扫描，只解析 mpc.baseMVA 与 mpc.bus / mpc.gen / mpc.branch 矩阵，其余（gencost、注释等）跳过；
+    - CSV 目录：bus.csv、branch.csv（或 line.csv）、可选 gen.csv，按块读取，列名同 MATPOWER；
+    - pandapower JSON：表以字符串形式嵌在 JSON 中，无法流式解析，整体读入后转换为 MATPOWER 格式的数组再逐行产出。
+NetworkLoader 边读边校验（母线编号重复、线路引用不存在的母线、参数非法等，并用并查集增量维护连通分量），
+每攒够 batch_size 行批量写库；整个导入在一个事务中完成，校验失败时不会留下写了一半的数据。
+
+库中数据的单位与 demo_data 的 csv 一致：负荷 kW/kVAr、线路阻抗 Ω。units="matpower" 时按 MATPOWER 标准单位
+（MW/MVAr、标幺值）换算；units="raw" 时原样写入（如 case33bw.txt 的矩阵本身就是 kW 与 Ω）。
+"""
+import functools
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from django.db import connection, transaction
+
+from .cache import result_cache
+from .models import BranchData, BusData, GeneratorData
+from .reconfiguration import UnionFind
+
+FORMATS = ("matpower", "pandapower", "csv")
+UNITS = ("matpower", "raw")
+
+BUS_COLUMNS = ["bus_i", "type", "Pd", "Qd", "Gs", "Bs", "area", "Vm", "Va", "baseKV", "zone", "Vmax", "Vmin"]
+GEN_COLUMNS = ["bus", "Pg", "Qg", "Qmax", "Qmin", "Vg", "mBase", "status", "Pmax", "Pmin", "Pc1", "Pc2",
+               "Qc1min", "Qc1max", "Qc2min", "Qc2max"]
+BRANCH_COLUMNS = ["fbus", "tbus", "r", "x", "b", "rateA", "rateB", "rateC", "ratio", "angle", "status",
+                  "angmin", "angmax"]
+# 各矩阵至少需要的列数（MATPOWER 格式第 2 版）
+MIN_COLUMNS = {"bus": 13, "gen": 10, "branch": 11}
+
+Record = Tuple[str, List[float]]
+
+
+class NetworkImportError(Exception):
+    """网络数据格式错误或校验失败"""
+
+
+def detect_format(path: Path) -> str:
+    if path.is_dir():
+        return "csv"
+    if path.suffix.lower() in (".m", ".txt"):
+        return "matpower"
+    if path.suffix.lower() == ".json":
+        return "pandapower"
+    raise NetworkImportError(f"无法识别的文件格式：{path}，请指定 format")
+
+
+# ====== 读取器 ====== #
+
+_ASSIGNMENT = re.compile(r"^\s*mpc\.(\w+)\s*=\s*(.*)$")
+_POST_PROCESSING = re.compile(r"^\s*mpc\.(bus|gen|branch)\s*\(")
+
+
+def iter_matpower(path: Path, base_mva: List[float] | None = None, warnings: List[str] | None = None
+                  ) -> Iterator[Record]:
+    """
+    逐行解析 MATPOWER case 文件
+
+    :param base_mva: 读到 mpc.baseMVA 时写入 base_mva[0]（baseMVA 位于矩阵之前）
+    :param warnings: 收集警告（如文件末尾对矩阵的单位换算语句不会被执行）
+    """
+    matrix = None  # 正在读取的矩阵名称
+    skipping = None  # 正在跳过的矩阵/元胞数组的结束符
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.split("%", 1)[0].strip()
+            if not line:
+                continue
+            if skipping is not None:
+                if skipping in line:
+                    skipping = None
+                continue
+            if matrix is None:
+                if _POST_PROCESSING.match(line) and warnings is not None:
+                    warnings.append(f"第 {lineno} 行对 mpc 矩阵的修改语句未执行：{line}（请确认 units 参数）")
+                m = _ASSIGNMENT.match(line)
+                if m is None:
+                    continue
+                name, rhs = m.group(1), m.group(2).strip()
+                if name == "baseMVA":
+                    if base_mva is not None:
+                        base_mva[0] = float(rhs.rstrip(";").strip())
+                    continue
+                if rhs.startswith("{"):
+                    skipping = None if "}" in rhs else "}"
+                    continue
+                if not rhs.startswith("["):
+                    continue
+                if name not in MIN_COLUMNS:
+                    skipping = None if "]" in rhs else "]"
+                    continue
+                matrix, line = name, rhs[1:]
+
+            end = "]" in line
+            for row in line.split("]", 1)[0].split(";"):
+                values = row.replace(",", " ").split()
+                if not values:
+                    continue
+                if len(values) < MIN_COLUMNS[matrix]:
+                    raise NetworkImportError(f"{path.name} 第 {lineno} 行：mpc.{matrix} 至少需要 "
+                                             f"{MIN_COLUMNS[matrix]} 列，实际为 {len(values)} 列")
+                try:
+                    yield matrix, [float(v) for v in values]
+                except ValueError:
+                    raise NetworkImportError(f"{path.name} 第 {lineno} 行：无法解析的数值：{row.strip()}")
+            if end:
+                matrix = None
+
+
+def iter_csv_bundle(directory: Path, chunksize: int = 10000) -> Iterator[Record]:
+    """CSV 目录：bus.csv、branch.csv（或 line.csv）、可选 gen.csv，列名同 MATPOWER"""
+    branch_path = directory / "branch.csv"
+    if not branch_path.exists():
+        branch_path = directory / "line.csv"
+    sources = [("bus", directory / "bus.csv", BUS_COLUMNS), ("gen", directory / "gen.csv", GEN_COLUMNS),
+               ("branch", branch_path, BRANCH_COLUMNS)]
+    for kind, path, columns in sources:
+        if not path.exists():
+            if kind == "gen":
+                continue
+            raise NetworkImportError(f"缺少 {path.name}")
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            # 缺少的可选列补 0（与 MATPOWER 的省略列一致）
+            missing = [c for c in columns[:MIN_COLUMNS[kind]] if c not in chunk.columns]
+            if missing:
+                raise NetworkImportError(f"{path.name} 缺少列：{'、'.join(missing)}")
+            chunk = chunk.reindex(columns=columns, fill_value=0)
+            # 由 .m 文件直接转换的 csv 行尾可能带有分号（如 demo_data/line.csv）
+            for column in chunk.columns[chunk.dtypes == object]:
+                chunk[column] = chunk[column].astype(str).str.rstrip(";")
+            try:
+                values = chunk.to_numpy(dtype=float)
+            except ValueError as e:
+                raise NetworkImportError(f"{path.name}：无法解析的数值：{e}")
+            for row in values:
+                yield kind, row.tolist()
+
+
+def iter_pandapower_json(path: Path, base_mva: List[float] | None = None) -> Iterator[Record]:
+    """pandapower JSON：转换为 MATPOWER 格式的数组（单位为 MW、标幺值）后逐行产出"""
+    import pandapower as pp
+    import pandapower.converter as pc
+
+    try:
+        net = pp.from_json(str(path))
+    except (ValueError, json.JSONDecodeError) as e:
+        raise NetworkImportError(f"{path.name} 不是有效的 pandapower JSON：{e}")
+    # 停运的线路/变压器不会出现在 ppc 中，转换时先全部投运，再按原状态写回 status 列
+    in_service = {element: net[element]["in_service"].to_numpy(copy=True) for element in ("line", "trafo")}
+    for element in in_service:
+        net[element]["in_service"] = True
+    ppc = pc.to_ppc(net, init="flat", calculate_voltage_angles=False)
+    if base_mva is not None:
+        base_mva[0] = float(ppc["baseMVA"])
+    arrays = {kind: np.real(np.asarray(ppc[kind])).astype(float) for kind in ("bus", "gen", "branch")}
+    for element, status in in_service.items():
+        if element in net._pd2ppc_lookups["branch"]:
+            start, end = net._pd2ppc_lookups["branch"][element]
+            arrays["branch"][start:end, 10] = status
+    # ppc 的母线编号从 0 开始
+    for kind, array in arrays.items():
+        columns = {"bus": [0], "gen": [0], "branch": [0, 1]}[kind]
+        array[:, columns] += 1
+        for row in array:
+            yield kind, row.tolist()
+
+
+# ====== 写库 ====== #
+
+@dataclass
+class ImportStats:
+    buses: int = 0
+    generators: int = 0
+    branches: int = 0
+    slack_buses: int = 0
+    islands: int = 0
+    base_mva: float = 0.0
+    warnings: List[str] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+
+@functools.lru_cache(maxsize=None)
+def _insert_fields(model) -> Tuple[List[str], str]:
+    """
+    (字段 attname 列表, INSERT 语句)
+
+    大批量写入时 bulk_create 的开销主要在逐个字段的 SQL 编译，这里直接 executemany（不实例化模型，不触发信号）
+    """
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key or model is BusData]
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    return [f.attname for f in fields], \
+        f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+
+
+class NetworkLoader:
+    """边读边校验，按批写库（调用方负责事务）"""
+
+    def __init__(self, units: str = "matpower", base_mva: List[float] | None = None, batch_size: int = 5000,
+                 progress: Callable[[ImportStats], None] | None = None):
+        if units not in UNITS:
+            raise NetworkImportError(f"未知的单位：{units}，可选：{'、'.join(UNITS)}")
+        self.units = units
+        self.base_mva = base_mva if base_mva is not None else [100.0]
+        self.batch_size = batch_size
+        self.progress = progress
+        self.stats = ImportStats()
+        self._positions: Dict[int, int] = {}
+        self._base_kv: List[float] = []
+        self._slack: List[int] = []
+        self._uf: UnionFind | None = None
+        self._pending: Dict[type, list] = {BusData: [], GeneratorData: [], BranchData: []}
+
+    def _position(self, bus: float, what: str) -> int:
+        try:
+            return self._positions[int(bus)]
+        except KeyError:
+            raise NetworkImportError(f"{what}引用了不存在的母线 {int(bus)}")
+
+    def add(self, kind: str, row: List[float]):
+        if kind == "bus":
+            self._add_bus(row)
+        elif kind == "gen":
+            self._add_gen(row)
+        else:
+            self._add_branch(row)
+
+    def _add_bus(self, row: List[float]):
+        if self._uf is not None:
+            raise NetworkImportError("母线数据应位于线路数据之前")
+        values = dict(zip(BUS_COLUMNS, row))
+        bus_i, bus_type = int(values["bus_i"]), int(values["type"])
+        if bus_i in self._positions:
+            raise NetworkImportError(f"母线编号重复：{bus_i}")
+        if values["baseKV"] <= 0:
+            raise NetworkImportError(f"母线 {bus_i} 的基准电压应为正数")
+        if bus_type == 3:
+            self._slack.append(len(self._positions))
+        self._positions[bus_i] = len(self._positions)
+        self._base_kv.append(values["baseKV"])
+        if self.units == "matpower":
+            values["Pd"] *= 1000
+            values["Qd"] *= 1000
+        values.update(bus_i=bus_i, type=str(bus_type), area=int(values["area"]), zone=int(values["zone"]))
+        self._queue(BusData, values)
+        self.stats.buses += 1
+
+    def _add_gen(self, row: List[float]):
+        values = dict(zip(GEN_COLUMNS, row + [0.0] * (len(GEN_COLUMNS) - len(row))))
+        self._position(values["bus"], "发电机")
+        values["bus_id"] = int(values.pop("bus"))
+        values["status"] = int(values["status"])
+        self._queue(GeneratorData, values)
+        self.stats.generators += 1
+
+    def _add_branch(self, row: List[float]):
+        if self._uf is None:
+            self._uf = UnionFind(len(self._positions))
+        values = dict(zip(BRANCH_COLUMNS, row + [0.0] * (len(BRANCH_COLUMNS) - len(row))))
+        what = f"线路 {int(values['fbus'])}-{int(values['tbus'])} "
+        f, t = self._position(values["fbus"], what), self._position(values["tbus"], what)
+        if f == t:
+            raise NetworkImportError(f"{what}首末端为同一母线")
+        if self.units == "matpower":
+            # 标幺值 -> Ω（以首端母线电压为基准；b 不参与潮流计算，保留原值）
+            z_base = self._base_kv[f] ** 2 / self.base_mva[0]
+            values["r"] *= z_base
+            values["x"] *= z_base
+        if values["r"] == 0 and values["x"] == 0 and int(values["status"]):
+            raise NetworkImportError(f"{what}阻抗为 0")
+        if int(values["status"]):
+            self._uf.union(f, t)
+        values.update(fbus_id=int(values["fbus"]), tbus_id=int(values["tbus"]), status=int(values["status"]))
+        self._queue(BranchData, values)
+        self.stats.branches += 1
+
+    def _queue(self, model, values: Dict):
+        pending = self._pending[model]
+        pending.append(tuple(values[name] for name in _insert_fields(model)[0]))
+        if len(pending) >= self.batch_size:
+            self._flush(model)
+
+    def _flush(self, model):
+        # 线路/发电机引用母线，母线先写
+        order = [BusData, GeneratorData, BranchData]
+        with connection.cursor() as cursor:
+            for m in order[:order.index(model) + 1]:
+                if self._pending[m]:
+                    cursor.executemany(_insert_fields(m)[1], self._pending[m])
+                    self._pending[m] = []
+        if self.progress is not None:
+            self.progress(self.stats)
+
+    def finish(self, allow_islands: bool = False) -> ImportStats:
+        """写入剩余数据并做整体校验：有且只有一个平衡节点、所有母线都与平衡节点连通"""
+        self._flush(BranchData)
+        stats = self.stats
+        stats.base_mva = self.base_mva[0]
+        stats.slack_buses = len(self._slack)
+        if stats.buses == 0:
+            raise NetworkImportError("没有母线数据")
+        if stats.slack_buses != 1:
+            raise NetworkImportError(f"平衡节点（type=3）应有且只有 1 个，实际为 {stats.slack_buses} 个")
+        uf = self._uf or UnionFind(stats.buses)
+        roots = np.array([uf.find(k) for k in range(stats.buses)])
+        energized = roots == roots[self._slack[0]]
+        stats.islands = len(set(roots[~energized]))
+        if stats.islands and not allow_islands:
+            raise NetworkImportError(f"{int((~energized).sum())} 条母线（{stats.islands} 个孤岛）与平衡节点之间没有投运线路")
+        return stats
+
+
+def _clear_network_tables():
+    """清空拓扑表（直接执行 DELETE：逐行删除会为每一行触发信号，大网络很慢）"""
+    with connection.cursor() as cursor:
+        for model in (BranchData, GeneratorData, BusData):
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+
+
+def import_network(path: Path, format: str | None = None, units: str | None = None, replace: bool = False,
+                   allow_islands: bool = False, batch_size: int = 5000,
+                   progress: Callable[[ImportStats], None] | None = None) -> ImportStats:
+    """
+    导入网络数据到 BusData / GeneratorData / BranchData（单个事务）
+
+    :param units: 缺省时 CSV 为 raw（与 demo_data 相同），其余为 matpower
+    :param replace: 库中已有网络数据时是否覆盖
+    """
+    path = Path(path)
+    format = format or detect_format(path)
+    if format not in FORMATS:
+        raise NetworkImportError(f"未知的格式：{format}，可选：{'、'.join(FORMATS)}")
+    units = units or ("raw" if format == "csv" else "matpower")
+    started = time.perf_counter()
+    base_mva = [100.0]
+    warnings: List[str] = []
+    if format == "matpower":
+        records = iter_matpower(path, base_mva, warnings)
+    elif format == "pandapower":
+        records = iter_pandapower_json(path, base_mva)
+    else:
+        records = iter_csv_bundle(path)
+
+    with transaction.atomic():
+        if BusData.objects.exists():
+            if not replace:
+                raise NetworkImportError("数据库中已有网络数据，如需覆盖请指定 replace")
+            _clear_network_tables()
+        loader = NetworkLoader(units, base_mva, batch_size, progress)
+        for kind, row in records:
+            loader.add(kind, row)
+        stats = loader.finish(allow_islands)
+    # 直接 executemany 写库不触发信号，手动使计算结果缓存失效
+    result_cache.invalidate()
+    stats.warnings = warnings
+    stats.elapsed_s = round(time.perf_counter() - started, 3)
+    return stats
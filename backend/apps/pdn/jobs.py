@@ -0,0 +1,267 @@
+"""
+后台计算任务
+
+时序潮流、参数扫描等耗时计算不在请求中同步执行：提交后立即返回任务编号，由 JobRunner 在后台执行，
+客户端轮询状态（或订阅 SSE）获取进度，结果保存在 Job 表中。
+
+队列即 Job 表（SQLite），不依赖 redis/celery 等外部服务，打包后的桌面版同样可用：
+    - 默认在 django 进程内启动 JobRunner（PDN_JOB_RUNNER_AUTOSTART），第一次提交任务时启动；
+    - 也可以单独运行 `python manage.py run_jobs`，此时应关闭 PDN_JOB_RUNNER_AUTOSTART。
+多个 JobRunner 同时运行时通过条件更新认领任务，同一任务只会被一个 JobRunner 执行。
+"""
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict
+
+from loguru import logger
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from . import contingency, hosting, powerflow, probabilistic, scenarios
+from .models import Job
+from .network import DEFAULT_NETWORK_ID, network_registry
+from .timeseries import Profiles, run_time_series
+from .rollups import rollup_manager
+
+
+class JobCancelled(Exception):
+    """任务被取消"""
+
+
+class JobContext:
+    """传给任务处理函数的上下文，用于上报进度；上报进度时如发现任务已被请求取消，抛出 JobCancelled"""
+
+    # 进度写库的最小间隔（秒），避免高频上报时频繁写 SQLite
+    REPORT_INTERVAL = 0.5
+
+    def __init__(self, job: Job):
+        self.job = job
+        self._last_report = 0.0
+
+    def report(self, progress: float, message: str = "", force=False):
+        now = time.monotonic()
+        if not force and now - self._last_report < self.REPORT_INTERVAL:
+            return
+        self._last_report = now
+        Job.objects.filter(pk=self.job.pk).update(progress=min(max(progress, 0), 1), message=message[:255],
+                                                  heartbeat_at=timezone.now())
+        if Job.objects.filter(pk=self.job.pk, cancel_requested=True).exists():
+            raise JobCancelled()
+
+
+JobHandler = Callable[[Dict, JobContext], Dict]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def register_job(kind: str):
+    def decorator(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        return handler
+
+    return decorator
+
+
+@register_job("powerflow")
+def _run_powerflow_job(params: Dict, context: JobContext) -> Dict:
+    return powerflow.run_powerflow(load_scale=params["load_scale"], r_scale=params["r_scale"],
+                                   engine=params["engine"], network_id=params["network"])
+
+
+@register_job("time_series")
+def _run_time_series_job(params: Dict, context: JobContext) -> Dict:
+    model = network_registry.get(params["network"])
+    pv_capacity_mw = {int(bus): capacity for bus, capacity in params["pv_capacity_mw"].items()}
+    profiles = Profiles.typical(model, start=params["start"], periods=params["periods"], freq=params["freq"],
+                                load_scale=params["load_scale"], pv_capacity_mw=pv_capacity_mw)
+    result = run_time_series(model, profiles, r_scale=params["r_scale"],
+                             progress=lambda fraction: context.report(fraction * 0.9, "时序潮流求解中"))
+    context.report(0.9, "写入结果表", force=True)
+    paths = result.write_tables(settings.PDN_RUNTIME_DIR / "results" / str(context.job.pk))
+    series = result.write_store(rollup_manager, params["network"])
+    hourly = result.hourly_summary()
+    hourly["time"] = hourly["time"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    return {
+        "n_steps": len(profiles.times),
+        "non_converged": int((~result.converged).sum()),
+        "hourly_summary": hourly.to_dict(orient="records"),
+        "files": {name: str(path) for name, path in paths.items()},
+        "series": series,
+    }
+
+
+@register_job("sweep")
+def _run_sweep_job(params: Dict, context: JobContext) -> Dict:
+    points = params["expanded_points"]
+    results = []
+    for result in scenarios.iter_sweep(points, engine=params["engine"], network_id=params["network"]):
+        results.append(result)
+        context.report(len(results) / len(points), f"{len(results)}/{len(points)}")
+    results.sort(key=lambda r: r["index"])
+    return {"points": results, "surface": scenarios.build_surfaces(results)}
+
+
+@register_job("n1")
+def _run_n1_job(params: Dict, context: JobContext) -> Dict:
+    return contingency.compute_n1(load_scale=params["load_scale"], r_scale=params["r_scale"],
+                                  close_ties=params["close_ties"], network_id=params["network"])
+
+
+@register_job("probabilistic")
+def _run_probabilistic_job(params: Dict, context: JobContext) -> Dict:
+    scenario = hosting.Scenario(plan=params["plan"], weather=params["weather"], season=params["season"])
+    return probabilistic.compute_probabilistic_power_flow(
+        scenario, probabilistic.SamplingConfig.from_params(params), seed=params["seed"], network_id=params["network"],
+        progress=lambda fraction: context.report(fraction, "概率潮流抽样中"))
+
+
+def submit_job(kind: str, params: Dict, owner=None) -> Job:
+    """提交任务（参数需已校验），返回后任务处于排队中"""
+    if kind not in JOB_HANDLERS:
+        raise KeyError(f"未知的任务类型：{kind}")
+    params.setdefault("network", DEFAULT_NETWORK_ID)
+    job = Job.objects.create(kind=kind, params=params, owner=owner)
+    if settings.PDN_JOB_RUNNER_AUTOSTART:
+        job_runner.start()
+    job_runner.wake_up()
+    return job
+
+
+def cancel_job(job: Job) -> Job:
+    """排队中的任务直接取消；运行中的任务在下一次上报进度时中止"""
+    Job.objects.filter(pk=job.pk, status=Job.Status.PENDING).update(status=Job.Status.CANCELLED,
+                                                                    finished_at=timezone.now())
+    Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING).update(cancel_requested=True)
+    job.refresh_from_db()
+    return job
+
+
+class JobRunner:
+    """从 Job 表中认领并执行任务：一个调度线程 + 执行线程池（数值计算本身在 numpy/进程池中，线程足够）"""
+
+    def __init__(self, max_workers: int, poll_interval: float = 1.0, heartbeat_timeout: float = 120):
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._running = 0
+        self._lock = threading.Lock()
+        self._wake_up = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pdn-job")
+            self._thread = threading.Thread(target=self._dispatch_loop, name="pdn-job-dispatcher", daemon=True)
+            self._thread.start()
+            logger.info("JobRunner {} 已启动，并发数 {}", self.name, self.max_workers)
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._wake_up.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def wake_up(self):
+        """有新任务时立即调度，不必等到下一次轮询"""
+        self._wake_up.set()
+
+    def run_forever(self):
+        self.start()
+        try:
+            while self._thread.is_alive():
+                self._thread.join(timeout=1)
+        finally:
+            self.stop()
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._requeue_stale()
+                while self._running < self.max_workers:
+                    job = self._claim()
+                    if job is None:
+                        break
+                    with self._lock:
+                        self._running += 1
+                    self._executor.submit(self._execute, job)
+            except Exception as e:
+                logger.error("任务调度失败：{}\n{}", e, traceback.format_exc())
+            finally:
+                close_old_connections()
+            self._wake_up.wait(self.poll_interval)
+            self._wake_up.clear()
+
+    def _claim(self) -> Job | None:
+        """认领最早的排队任务，条件更新保证多个 JobRunner 之间不会重复认领"""
+        pending = Job.objects.filter(status=Job.Status.PENDING).order_by("created_at")
+        for job_id in pending.values_list("pk", flat=True)[:5]:
+            now = timezone.now()
+            claimed = Job.objects.filter(pk=job_id, status=Job.Status.PENDING).update(
+                status=Job.Status.RUNNING, worker=self.name, started_at=now, heartbeat_at=now)
+            if claimed:
+                return Job.objects.get(pk=job_id)
+        return None
+
+    def _requeue_stale(self):
+        """执行者进程已退出（心跳超时）的任务重新排队"""
+        deadline = timezone.now() - timedelta(seconds=self.heartbeat_timeout)
+        requeued = Job.objects.filter(status=Job.Status.RUNNING, heartbeat_at__lt=deadline).update(
+            status=Job.Status.PENDING, worker="", progress=0, message="执行者无响应，重新排队")
+        if requeued:
+            logger.warning("{} 个任务心跳超时，已重新排队", requeued)
+
+    def _execute(self, job: Job):
+        context = JobContext(job)
+        # 运行期间定时刷新心跳，长时间不上报进度的任务也不会被误判为执行者已退出
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job, heartbeat_stop), daemon=True)
+        heartbeat.start()
+        try:
+            handler = JOB_HANDLERS[job.kind]
+            result = handler(job.params, context)
+            self._finish(job, status=Job.Status.SUCCEEDED, progress=1, message="", result=result)
+        except JobCancelled:
+            self._finish(job, status=Job.Status.CANCELLED)
+        except Exception as e:
+            logger.error("任务 {} 执行失败：{}\n{}", job.pk, e, traceback.format_exc())
+            self._finish(job, status=Job.Status.FAILED, error=f"{type(e).__name__}: {e}")
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+            close_old_connections()
+            with self._lock:
+                self._running -= 1
+            self._wake_up.set()
+
+    def _owned(self, job: Job):
+        """本次认领的任务（已被取消、心跳超时后重新排队或被其他执行者认领时为空）"""
+        return Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, worker=self.name, started_at=job.started_at)
+
+    def _finish(self, job: Job, **fields):
+        if not self._owned(job).update(finished_at=timezone.now(), **fields):
+            logger.warning("任务 {} 已不属于本次执行（已取消或重新排队），忽略执行结果：{}", job.pk, fields["status"])
+
+    def _heartbeat_loop(self, job: Job, stop: threading.Event):
+        interval = self.heartbeat_timeout / 4
+        while not stop.wait(interval):
+            self._owned(job).update(heartbeat_at=timezone.now())
+        # 心跳线程每个任务新建一个，数据库连接需手动关闭
+        connection.close()
+
+
+job_runner = JobRunner(max_workers=settings.PDN_JOB_WORKERS)
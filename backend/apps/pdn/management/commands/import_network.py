@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.pdn.importers import FORMATS, UNITS, NetworkImportError, import_network
+
+
+class Command(BaseCommand):
+    help = "导入网络数据（MATPOWER .m、pandapower JSON、CSV 目录）到 BusData / GeneratorData / BranchData"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path, help="case 文件或 CSV 目录（bus.csv、branch.csv/line.csv、gen.csv）")
+        parser.add_argument("--format", choices=FORMATS, help="缺省按扩展名判断：.m/.txt、.json、目录")
+        parser.add_argument("--units", choices=UNITS,
+                            help="matpower：MW/MVAr、标幺值（换算为库中的 kW、Ω）；raw：与库中单位相同，原样写入。"
+                                 "缺省时 CSV 为 raw，其余为 matpower")
+        parser.add_argument("--replace", action="store_true", help="覆盖库中已有的网络数据")
+        parser.add_argument("--allow-islands", action="store_true", help="允许存在与平衡节点不连通的母线")
+        parser.add_argument("--batch-size", type=int, default=5000, help="每批写库的行数")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not path.exists():
+            raise CommandError(f"文件不存在：{path}")
+
+        def progress(stats):
+            self.stdout.write(f"  已写入 母线 {stats.buses}，发电机 {stats.generators}，线路 {stats.branches}")
+
+        try:
+            stats = import_network(path, format=options["format"], units=options["units"],
+                                   replace=options["replace"], allow_islands=options["allow_islands"],
+                                   batch_size=options["batch_size"], progress=progress)
+        except NetworkImportError as e:
+            raise CommandError(f"导入失败（未写入任何数据）：{e}")
+
+        for warning in stats.warnings:
+            self.stderr.write(self.style.WARNING(warning))
+        self.stdout.write(self.style.SUCCESS(
+            f"导入完成，耗时 {stats.elapsed_s} s：母线 {stats.buses}，发电机 {stats.generators}，线路 {stats.branches}，"
+            f"baseMVA {stats.base_mva}，孤岛 {stats.islands} 个"))
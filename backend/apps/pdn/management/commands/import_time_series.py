@@ -0,0 +1,38 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.pdn.rollups import rollup_manager
+from apps.pdn.tsdb import DTYPES, ts_store
+
+
+class Command(BaseCommand):
+    help = "将宽表 csv（每行一个时间步，如 frontend/demo_data/pf_bus_voltages.csv）导入时序数据存储并更新预聚合"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path, help="csv 文件")
+        parser.add_argument("series", help="数据集名称，如 case33bw.bus_vm_pu")
+        parser.add_argument("--time-column", help="时间列，缺省为第一列")
+        parser.add_argument("--freq", default="15min", help="新建数据集的时间分辨率，时间需对齐到该分辨率")
+        parser.add_argument("--dtype", choices=DTYPES, default="float32", help="新建数据集的数据类型")
+        parser.add_argument("--chunk-size", type=int, default=96 * 7, help="每次读取并写入的行数")
+
+    def handle(self, *args, **options):
+        path: Path = options["path"]
+        if not path.is_file():
+            raise CommandError(f"文件不存在：{path}")
+        time_column = options["time_column"] or pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns[0]
+
+        started = time.perf_counter()
+        rows = 0
+        try:
+            for chunk in pd.read_csv(path, parse_dates=[time_column], index_col=time_column, encoding="utf-8-sig",
+                                     chunksize=options["chunk_size"]):
+                rollup_manager.write_frame(options["series"], chunk, freq=options["freq"], dtype=options["dtype"])
+                rows += len(chunk)
+        except (KeyError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{rows} 个时间步写入 {ts_store.get(options['series'])}，耗时 {elapsed:.3f} s")
@@ -0,0 +1,35 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.pdn.network import DEFAULT_NETWORK_ID
+from apps.pdn.pipeline import Pipeline
+
+
+class Command(BaseCommand):
+    help = ("由时序数据集增量重算看板结果表（dashboard_hourly_curve、dashboard_daily_summary、indicator_scores、"
+            "dimension_scores），只重算输入有变化的日期")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--network", default=DEFAULT_NETWORK_ID, help="网络编号，数据源为 <网络编号>.summary 等时序数据集")
+        parser.add_argument("--day", action="append", dest="days", help="只检查这些日期，可以多次指定，缺省为全部日期")
+        parser.add_argument("--output-dir", type=Path, help="按天分区的结果目录，缺省为 PDN_RUNTIME_DIR/derived/<网络编号>")
+        parser.add_argument("--force", action="store_true", help="忽略已有结果，全部重算")
+        parser.add_argument("--workers", type=int, help="并行线程数，缺省为 PDN_MAX_WORKERS")
+        parser.add_argument("--publish-dir", type=Path, help="将某一天的结果复制为同名 csv 的目录，如 ../frontend/demo_data")
+        parser.add_argument("--publish-day", help="复制哪一天的结果，缺省为最后一天")
+
+    def handle(self, *args, **options):
+        try:
+            pipeline = Pipeline(options["network"], output_dir=options["output_dir"])
+            started = time.perf_counter()
+            report = pipeline.run(days=options["days"], force=options["force"], workers=options["workers"])
+        except KeyError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"重算 {len(report.computed)} 个（其中结果不变 {len(report.unchanged)} 个），"
+                          f"跳过 {len(report.skipped)} 个，耗时 {elapsed:.3f} s")
+        if options["publish_dir"]:
+            for path in pipeline.publish(options["publish_dir"], options["publish_day"]).values():
+                self.stdout.write(f"  -> {path}")
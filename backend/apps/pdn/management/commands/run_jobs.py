@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.pdn.jobs import JobRunner
+
+
+class Command(BaseCommand):
+    help = "运行后台计算任务执行者（独立于 web 进程时使用，此时应关闭 PDN_JOB_RUNNER_AUTOSTART）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="同时执行的任务数")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="轮询任务表的间隔（秒）")
+
+    def handle(self, *args, **options):
+        runner = JobRunner(max_workers=options["workers"], poll_interval=options["poll_interval"])
+        self.stdout.write(f"JobRunner {runner.name} 运行中，Ctrl+C 退出")
+        try:
+            runner.run_forever()
+        except KeyboardInterrupt:
+            pass
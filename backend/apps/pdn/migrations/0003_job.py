@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:08
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('配电网络', '0002_alter_branchdata_options_alter_busdata_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=32, verbose_name='任务类型')),
+                ('params', models.JSONField(default=dict, verbose_name='任务参数')),
+                ('status', models.CharField(choices=[('pending', '排队中'), ('running', '运行中'), ('succeeded', '已完成'), ('failed', '失败'), ('cancelled', '已取消')], default='pending', max_length=16, verbose_name='状态')),
+                ('progress', models.FloatField(default=0, verbose_name='进度')),
+                ('message', models.CharField(blank=True, default='', max_length=255, verbose_name='进度说明')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='结果')),
+                ('error', models.TextField(blank=True, default='', verbose_name='错误信息')),
+                ('cancel_requested', models.BooleanField(default=False, verbose_name='请求取消')),
+                ('worker', models.CharField(blank=True, default='', max_length=64, verbose_name='执行者')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='提交时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='心跳时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='提交人')),
+            ],
+            options={
+                'verbose_name': '计算任务',
+                'verbose_name_plural': '计算任务',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='配电网络_job_status_87d822_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+# 内置方案（与 plans.DEFAULT_PLANS 一致，迁移中不引用应用代码）
+DEFAULT_PLANS = [
+    ("方案一", "现状网架，联络开关断开（辐射状运行）", {"close_ties": False}),
+    ("方案二", "联络开关闭合（弱环网运行）", {"close_ties": True}),
+    ("方案三", "现状网架 + 线路增容改造", {"close_ties": False, "r_scale": 0.7}),
+]
+
+
+def seed_plans(apps, schema_editor):
+    Plan = apps.get_model("配电网络", "Plan")
+    for name, description, overrides in DEFAULT_PLANS:
+        Plan.objects.get_or_create(name=name, defaults={"description": description, "overrides": overrides})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('配电网络', '0003_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Plan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True, verbose_name='方案名称')),
+                ('description', models.CharField(blank=True, default='', max_length=255, verbose_name='方案说明')),
+                ('overrides', models.JSONField(blank=True, default=dict, verbose_name='参数覆盖')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='修改时间')),
+            ],
+            options={
+                'verbose_name': '规划方案',
+                'verbose_name_plural': '规划方案',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(seed_plans, migrations.RunPython.noop),
+    ]
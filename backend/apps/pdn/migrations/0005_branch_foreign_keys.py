@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('配电网络', '0004_plan'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='branchdata',
+            name='fbus',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fbus', to='配电网络.busdata'),
+        ),
+        migrations.AlterField(
+            model_name='branchdata',
+            name='tbus',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tbus', to='配电网络.busdata'),
+        ),
+        migrations.AlterField(
+            model_name='generatordata',
+            name='bus',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='配电网络.busdata'),
+        ),
+    ]
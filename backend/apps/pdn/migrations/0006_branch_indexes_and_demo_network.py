@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:39
+
+import csv
+from pathlib import Path
+
+from django.db import migrations, models
+
+DEMO_DATA_PATH = Path(__file__).resolve().parent.parent / "demo_data"
+
+
+def _read_demo_csv(name):
+    # demo_data 中的 csv 每行末尾带有分号
+    with open(DEMO_DATA_PATH / name, newline="") as f:
+        return [{k: v.rstrip(";") for k, v in row.items()} for row in csv.DictReader(f)]
+
+
+def seed_demo_network(apps, schema_editor):
+    """数据库中还没有网络时导入 IEEE 33 节点算例（与 demo_data 中的 csv 一致）"""
+    BusData = apps.get_model("配电网络", "BusData")
+    BranchData = apps.get_model("配电网络", "BranchData")
+    if BusData.objects.exists():
+        return
+    BusData.objects.bulk_create([
+        BusData(bus_i=int(row["bus_i"]), type=str(int(row["type"])), area=int(row["area"]), zone=int(row["zone"]),
+                **{k: float(row[k]) for k in ("Pd", "Qd", "Gs", "Bs", "Vm", "Va", "baseKV", "Vmax", "Vmin")})
+        for row in _read_demo_csv("bus.csv")
+    ])
+    BranchData.objects.bulk_create([
+        BranchData(fbus_id=int(row["fbus"]), tbus_id=int(row["tbus"]), status=int(row["status"]),
+                   **{k: float(row[k]) for k in ("r", "x", "b", "rateA", "rateB", "ratio", "angle", "angmin", "angmax")})
+        for row in _read_demo_csv("line.csv")
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('配电网络', '0005_branch_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='branchdata',
+            index=models.Index(fields=['fbus', 'tbus', 'status'], name='配电网络_branch_fbus_id_634db6_idx'),
+        ),
+        migrations.RunPython(seed_demo_network, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,7 @@
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.db import models
 
 
@@ -22,11 +26,12 @@ class BusData(models.Model):
         verbose_name = verbose_name_plural = "母线数据"
 
     def __str__(self):
-        return self.bus_i
+        return str(self.bus_i)
 
 
 class GeneratorData(models.Model):
-    bus = models.OneToOneField(BusData, on_delete=models.CASCADE)
+    # 一条母线可以接多台发电机
+    bus = models.ForeignKey(BusData, on_delete=models.CASCADE)
     Pg = models.FloatField(verbose_name="总功率")
     Qg = models.FloatField(verbose_name="总无功")
     Qmax = models.FloatField(verbose_name="总无功最大值")
@@ -51,8 +56,9 @@ class GeneratorData(models.Model):
 
 
 class BranchData(models.Model):
-    fbus = models.OneToOneField(BusData, on_delete=models.CASCADE, related_name="fbus")
-    tbus = models.OneToOneField(BusData, on_delete=models.CASCADE, related_name="tbus")
+    # 一条母线可以连接多条线路
+    fbus = models.ForeignKey(BusData, on_delete=models.CASCADE, related_name="fbus")
+    tbus = models.ForeignKey(BusData, on_delete=models.CASCADE, related_name="tbus")
     r = models.FloatField(verbose_name="resistance")
     x = models.FloatField(verbose_name="reactance")
     b = models.FloatField(verbose_name="susceptance")
@@ -66,6 +72,87 @@ class BranchData(models.Model):
 
     class Meta:
         verbose_name = verbose_name_plural = "分支数据"
+        # 按端点查找线路、按开关状态筛选（拓扑分析只取投运线路）
+        indexes = [models.Index(fields=["fbus", "tbus", "status"])]
 
     def __str__(self):
         return f"{self.fbus} - {self.tbus}"
+
+
+# ====== 规划方案 ====== #
+
+class Plan(models.Model):
+    """规划方案：基础网络上的一组参数覆盖（光伏配置、网络重构、负荷缩放等，见 plans.py）"""
+    name = models.CharField(verbose_name="方案名称", max_length=64, unique=True)
+    description = models.CharField(verbose_name="方案说明", max_length=255, blank=True, default="")
+    overrides = models.JSONField(verbose_name="参数覆盖", default=dict, blank=True)
+    created_at = models.DateTimeField(verbose_name="创建时间", auto_now_add=True)
+    updated_at = models.DateTimeField(verbose_name="修改时间", auto_now=True)
+
+    class Meta:
+        verbose_name = verbose_name_plural = "规划方案"
+        ordering = ["id"]
+
+    def __str__(self):
+        return self.name
+
+    def definition(self):
+        """校验后的方案参数 plans.PlanDefinition（参数不合法时抛出 ValueError）"""
+        from .plans import PlanDefinition
+
+        return PlanDefinition.from_overrides(self.name, self.overrides)
+
+    def clean(self):
+        from .network import network_registry
+
+        try:
+            self.definition().check(network_registry.get())
+        except ValueError as e:
+            raise ValidationError({"overrides": str(e)})
+
+
+# ====== 后台计算任务 ====== #
+
+class Job(models.Model):
+    """
+    后台计算任务（时序潮流、参数扫描等耗时计算）
+
+    任务队列就是这张表：提交即插入一条 pending 记录，由 jobs.JobRunner 认领执行，不依赖外部消息队列。
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "排队中"
+        RUNNING = "running", "运行中"
+        SUCCEEDED = "succeeded", "已完成"
+        FAILED = "failed", "失败"
+        CANCELLED = "cancelled", "已取消"
+
+    FINISHED_STATUSES = (Status.SUCCEEDED, Status.FAILED, Status.CANCELLED)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(verbose_name="任务类型", max_length=32)
+    params = models.JSONField(verbose_name="任务参数", default=dict)
+    status = models.CharField(verbose_name="状态", max_length=16, choices=Status.choices, default=Status.PENDING)
+    progress = models.FloatField(verbose_name="进度", default=0)  # 0 ~ 1
+    message = models.CharField(verbose_name="进度说明", max_length=255, blank=True, default="")
+    result = models.JSONField(verbose_name="结果", null=True, blank=True)
+    error = models.TextField(verbose_name="错误信息", blank=True, default="")
+    cancel_requested = models.BooleanField(verbose_name="请求取消", default=False)
+    owner = models.ForeignKey(User, verbose_name="提交人", null=True, blank=True, on_delete=models.SET_NULL)
+    worker = models.CharField(verbose_name="执行者", max_length=64, blank=True, default="")
+    created_at = models.DateTimeField(verbose_name="提交时间", auto_now_add=True)
+    started_at = models.DateTimeField(verbose_name="开始时间", null=True, blank=True)
+    heartbeat_at = models.DateTimeField(verbose_name="心跳时间", null=True, blank=True)
+    finished_at = models.DateTimeField(verbose_name="结束时间", null=True, blank=True)
+
+    class Meta:
+        verbose_name = verbose_name_plural = "计算任务"
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.kind} - {self.id}"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATUSES
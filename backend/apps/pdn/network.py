@@ -0,0 +1,287 @@
+"""
+配电网络模型（常驻内存）
+
+网络只在第一次使用时构建一次（批量创建元件，不再 iterrows 逐行创建），之后按 network_id 常驻于 registry 中；
+load_scale/r_scale 变化时只修补 net.load/net.line 的对应列。构建结果同时快照到磁盘，worker 重启后直接从快照恢复。
+数据源可以是 demo_data 中的 csv（NETWORK_SOURCES），也可以是数据库（DB_NETWORK_ID，见 repository.py），
+各接口统一使用 DEFAULT_NETWORK_ID（settings.PDN_NETWORK_ID）。
+"""
+import hashlib
+import pickle
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import pandapower as pp
+import scipy.sparse as sp
+from loguru import logger
+
+from django.conf import settings
+from django.db import connection
+
+DEMO_DATA_PATH = settings.BASE_DIR / "apps" / "pdn" / "demo_data"
+
+# 快照格式版本，NetworkModel 的结构变化后需要递增，旧快照会被自动丢弃
+SNAPSHOT_VERSION = 3
+
+# 各计算接口使用的网络（settings.PDN_NETWORK_ID）
+DEFAULT_NETWORK_ID = settings.PDN_NETWORK_ID
+# 数据库中的网络（BusData/BranchData，见 repository.py 与 manage.py import_network）
+DB_NETWORK_ID = "db"
+
+# 运行限值：电压上下限（GB/T 12325，10 kV 供电电压偏差 ±7%）、线路负载率上限
+VM_MIN_PU = 0.93
+VM_MAX_PU = 1.07
+LOADING_MAX_PERCENT = 100.0
+
+# network_id -> (母线数据, 线路数据)
+NETWORK_SOURCES: Dict[str, Tuple[Path, Path]] = {
+    "case33bw": (DEMO_DATA_PATH / "bus.csv", DEMO_DATA_PATH / "line.csv"),
+}
+
+
+def build_network(bus_df: pd.DataFrame, line_df: pd.DataFrame) -> pp.pandapowerNet:
+    """由母线/线路数据构建 pandapower 网络（load_scale = r_scale = 1 的基准网络）"""
+    net = pp.create_empty_network()
+
+    bus_i = bus_df["bus_i"].to_numpy(dtype=int)
+    bus_type = bus_df["type"].to_numpy(dtype=int)
+
+    # 添加母线，bus_i -1
+    pp.create_buses(
+        net,
+        nr_buses=len(bus_df),
+        vn_kv=bus_df["baseKV"].to_numpy(dtype=float),
+        name=[f"Bus{i}" for i in bus_i],
+        index=bus_i - 1,
+    )
+
+    # 添加平衡节点
+    slack_bus = int(bus_i[bus_type == 3][0]) - 1
+    pp.create_ext_grid(net, bus=slack_bus, vm_pu=1.0, name="Slack")
+
+    # 添加负荷（kW -> MW）
+    load_mask = bus_type != 3
+    pp.create_loads(
+        net,
+        buses=bus_i[load_mask] - 1,
+        p_mw=bus_df["Pd"].to_numpy(dtype=float)[load_mask] / 1000,
+        q_mvar=bus_df["Qd"].to_numpy(dtype=float)[load_mask] / 1000,
+    )
+
+    # 添加线路，fbus/tbus -1
+    pp.create_lines_from_parameters(
+        net,
+        from_buses=line_df["fbus"].to_numpy(dtype=int) - 1,
+        to_buses=line_df["tbus"].to_numpy(dtype=int) - 1,
+        length_km=1,
+        r_ohm_per_km=line_df["r"].to_numpy(dtype=float),
+        x_ohm_per_km=line_df["x"].to_numpy(dtype=float),
+        c_nf_per_km=0,
+        max_i_ka=0.5,
+    )
+    return net
+
+
+def content_hash(*dfs: pd.DataFrame) -> str:
+    """数据内容哈希（与文件修改时间无关，内容不变则哈希不变），用作计算结果缓存键的一部分"""
+    h = hashlib.sha256()
+    for df in dfs:
+        h.update(",".join(map(str, df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class NetworkModel:
+    """常驻内存的网络模型：原始数据 + pandapower 网络 + 基准参数列"""
+
+    def __init__(self, network_id: str, bus_df: pd.DataFrame, line_df: pd.DataFrame, fingerprint: Tuple):
+        self.network_id = network_id
+        self.bus_df = bus_df
+        self.line_df = line_df
+        self.fingerprint = fingerprint
+        self.content_hash = content_hash(bus_df, line_df)
+        self.net = build_network(bus_df, line_df)
+
+        # 基准列，load_scale/r_scale 都是在此基础上缩放，避免误差累积
+        self._base_p_mw = self.net.load["p_mw"].to_numpy(copy=True)
+        self._base_q_mvar = self.net.load["q_mvar"].to_numpy(copy=True)
+        self._base_r_ohm_per_km = self.net.line["r_ohm_per_km"].to_numpy(copy=True)
+        self._base_x_ohm_per_km = self.net.line["x_ohm_per_km"].to_numpy(copy=True)
+        self._params = (1.0, 1.0)
+
+        # 数值计算用的位置索引数组（母线按 bus_df 的行顺序编号，与 net.bus 的顺序一致）
+        bus_i = bus_df["bus_i"].to_numpy(dtype=int)
+        self.bus_i = bus_i
+        self._bus_lookup = pd.Series(np.arange(len(bus_i)), index=bus_i)
+        self.slack_pos = int(np.flatnonzero(bus_df["type"].to_numpy(dtype=int) == 3)[0])
+        self.vn_kv = bus_df["baseKV"].to_numpy(dtype=float)
+        self.f_pos = self.bus_positions(line_df["fbus"].to_numpy(dtype=int))
+        self.t_pos = self.bus_positions(line_df["tbus"].to_numpy(dtype=int))
+        self.max_i_ka = self.net.line["max_i_ka"].to_numpy(dtype=float)
+        self.sn_mva = float(self.net.sn_mva)
+        # 各母线的基准负荷（MW/MVAr），平衡节点不带负荷
+        self.base_load_p_mw = np.where(np.arange(len(bus_i)) == self.slack_pos, 0.0,
+                                       bus_df["Pd"].to_numpy(dtype=float) / 1000)
+        self.base_load_q_mvar = np.where(np.arange(len(bus_i)) == self.slack_pos, 0.0,
+                                         bus_df["Qd"].to_numpy(dtype=float) / 1000)
+
+        # net 会被原地修改和求解，同一时刻只允许一个调用方使用
+        self.lock = threading.RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def apply_parameters(self, load_scale: float = 1.0, r_scale: float = 1.0):
+        """只修补负荷和阻抗列，参数未变化时什么也不做（调用方需持有 self.lock）"""
+        if self._params == (load_scale, r_scale):
+            return
+        load_scale_changed = self._params[0] != load_scale
+        r_scale_changed = self._params[1] != r_scale
+        if load_scale_changed:
+            self.net.load["p_mw"] = self._base_p_mw * load_scale
+            self.net.load["q_mvar"] = self._base_q_mvar * load_scale
+        if r_scale_changed:
+            self.net.line["r_ohm_per_km"] = self._base_r_ohm_per_km * r_scale
+            self.net.line["x_ohm_per_km"] = self._base_x_ohm_per_km * r_scale
+        self._params = (load_scale, r_scale)
+
+    @property
+    def n_bus(self) -> int:
+        return len(self.bus_i)
+
+    @property
+    def n_line(self) -> int:
+        return len(self.f_pos)
+
+    def bus_positions(self, bus_i) -> np.ndarray:
+        """母线编号 -> 位置索引"""
+        return self._bus_lookup.loc[np.asarray(bus_i, dtype=int)].to_numpy()
+
+    def branch_impedance_pu(self, r_scale: float = 1.0) -> np.ndarray:
+        """各线路串联阻抗（标幺值，线路长度均为 1 km）"""
+        z_ohm = (self._base_r_ohm_per_km + 1j * self._base_x_ohm_per_km) * r_scale
+        z_base = self.vn_kv[self.f_pos] ** 2 / self.sn_mva
+        return z_ohm / z_base
+
+    def current_base_ka(self) -> np.ndarray:
+        """各线路的电流基准值（kA）"""
+        return self.sn_mva / (np.sqrt(3) * self.vn_kv[self.f_pos])
+
+    def build_ybus(self, r_scale: float = 1.0, in_service: np.ndarray | None = None) -> sp.csr_matrix:
+        """节点导纳矩阵（CSR，线路无对地电容）"""
+        y = 1 / self.branch_impedance_pu(r_scale)
+        f, t = self.f_pos, self.t_pos
+        if in_service is not None:
+            y, f, t = y[in_service], f[in_service], t[in_service]
+        n = self.n_bus
+        rows = np.concatenate([f, t, f, t])
+        cols = np.concatenate([f, t, t, f])
+        data = np.concatenate([y, y, -y, -y])
+        return sp.csr_matrix((data, (rows, cols)), shape=(n, n))
+
+
+class NetworkRegistry:
+    """网络模型注册表，按 network_id 常驻内存，并维护磁盘快照"""
+
+    def __init__(self, snapshot_dir: Path | None = None):
+        # snapshot_dir 缺省为 PDN_RUNTIME_DIR/snapshots，使用时读取设置（测试中可以 override_settings）
+        self._snapshot_dir = snapshot_dir
+        self._models: Dict[str, NetworkModel] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(network_id: str) -> Tuple:
+        """数据源指纹（文件修改时间 + 大小），数据源变化后常驻模型和快照都将失效"""
+        # pandapower 升级后 net 的表结构可能变化，旧快照不可再用
+        fingerprint = [SNAPSHOT_VERSION, pp.__version__]
+        if network_id == DB_NETWORK_ID:
+            # 数据库中的网络：库名 + 数据版本号（BusData/BranchData 变化时递增，见 signals.py）
+            # + 行数与最大主键（不触发信号的批量写入）
+            from .cache import result_cache
+            from .repository import network_stamp
+
+            fingerprint += [str(connection.settings_dict["NAME"]), result_cache.data_version(), network_stamp()]
+            return tuple(fingerprint)
+        if network_id not in NETWORK_SOURCES:
+            raise KeyError(f"未知的网络：{network_id}")
+        for path in NETWORK_SOURCES[network_id]:
+            stat = path.stat()
+            fingerprint.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(fingerprint)
+
+    @property
+    def snapshot_dir(self) -> Path:
+        return self._snapshot_dir or settings.PDN_RUNTIME_DIR / "snapshots"
+
+    def _snapshot_path(self, network_id: str) -> Path:
+        return self.snapshot_dir / f"{network_id}.pkl"
+
+    def _load_snapshot(self, network_id: str, fingerprint: Tuple) -> NetworkModel | None:
+        path = self._snapshot_path(network_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                model: NetworkModel = pickle.load(f)
+        except Exception as e:
+            logger.warning("网络快照 {} 读取失败，将重新构建：{}", path, e)
+            return None
+        if model.fingerprint != fingerprint:
+            return None
+        return model
+
+    def _dump_snapshot(self, model: NetworkModel):
+        path = self._snapshot_path(model.network_id)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免其他 worker 读到写了一半的快照
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning("网络快照 {} 写入失败：{}", path, e)
+
+    def _build(self, network_id: str, fingerprint: Tuple) -> NetworkModel:
+        if network_id == DB_NETWORK_ID:
+            from .repository import load_network_frames
+
+            bus_df, line_df = load_network_frames()
+        else:
+            bus_path, line_path = NETWORK_SOURCES[network_id]
+            bus_df = pd.read_csv(bus_path)
+            line_df = pd.read_csv(line_path)
+        model = NetworkModel(network_id, bus_df, line_df, fingerprint)
+        self._dump_snapshot(model)
+        logger.info("网络 {} 构建完成：{} 条母线，{} 条线路", network_id, len(bus_df), len(line_df))
+        return model
+
+    def get(self, network_id: str = DEFAULT_NETWORK_ID) -> NetworkModel:
+        """获得常驻的网络模型，依次尝试：内存 -> 磁盘快照 -> 重新构建"""
+        fingerprint = self._fingerprint(network_id)
+        model = self._models.get(network_id)
+        if model is not None and model.fingerprint == fingerprint:
+            return model
+        with self._lock:
+            model = self._models.get(network_id)
+            if model is None or model.fingerprint != fingerprint:
+                model = self._load_snapshot(network_id, fingerprint) or self._build(network_id, fingerprint)
+                self._models[network_id] = model
+        return model
+
+    def clear(self):
+        """清空常驻模型（磁盘快照保留）"""
+        with self._lock:
+            self._models.clear()
+
+
+network_registry = NetworkRegistry()
@@ -0,0 +1,171 @@
+"""
+数值计算核心：节点导纳矩阵与稀疏 LU 分解缓存
+
+拓扑（线路投运状态）不变、只有注入功率变化时，导纳矩阵和它的分解都不需要重新计算：
+    - 符号分析（与平衡节点连通的母线、填充消减排序）只与 网络版本 + 拓扑 有关；
+    - 导纳矩阵（CSR）与数值分解还与阻抗缩放系数 r_scale 有关。
+两者分别缓存（进程内 LRU），时序潮流、N-1、灵敏度分析等共用；网络数据变化后内容哈希随之变化，旧条目不再命中。
+
+SuperLU 不支持单独复用符号分解，这里以 "预先按排序置换 + NATURAL 列排序 + 不选主元" 的方式分解，
+数值分解时不再做列排序和主元搜索，效果等同于复用符号分析。
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from scipy.sparse.csgraph import breadth_first_order
+
+from django.conf import settings
+
+from .network import NetworkModel
+
+
+@dataclass
+class SymbolicFactorization:
+    """与数值无关的部分：参与求解的母线及其消元顺序"""
+    pq: np.ndarray  # 与平衡节点连通的非平衡母线（位置索引）
+    perm: np.ndarray  # 消元顺序（pq 内的下标）
+
+
+@dataclass
+class Factorization:
+    """Y_pp（pq 母线间的导纳子矩阵）的 LU 分解，solve 的右端项与解均按 pq 的顺序排列"""
+    ybus: sp.csr_matrix
+    symbolic: SymbolicFactorization
+    y_ps: np.ndarray  # pq 母线与平衡节点之间的导纳
+    lu: spla.SuperLU
+
+    @property
+    def pq(self) -> np.ndarray:
+        return self.symbolic.pq
+
+    @property
+    def energized(self) -> np.ndarray:
+        mask = np.zeros(self.ybus.shape[0], dtype=bool)
+        mask[self.pq] = True
+        return mask
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        perm = self.symbolic.perm
+        x = np.empty_like(rhs, dtype=complex)
+        x[perm] = self.lu.solve(np.ascontiguousarray(rhs[perm]))
+        return x
+
+
+def _topology_key(model: NetworkModel, in_service: np.ndarray | None) -> Tuple[str, bytes]:
+    in_service = np.ones(model.n_line, dtype=bool) if in_service is None else np.asarray(in_service, dtype=bool)
+    return model.content_hash, in_service.tobytes()
+
+
+def analyze(model: NetworkModel, ybus: sp.csr_matrix) -> SymbolicFactorization:
+    """
+    符号分析：从平衡节点出发广度优先搜索，逆序消元（先叶子后父节点）。
+    辐射状网络按此顺序消元没有任何填充，弱环网只在环路上产生少量填充。
+    """
+    pattern = sp.csr_matrix((np.ones(ybus.nnz), ybus.indices, ybus.indptr), shape=ybus.shape)
+    order = breadth_first_order(pattern, model.slack_pos, directed=False, return_predecessors=False)
+    order = order[order != model.slack_pos]
+    pq = np.sort(order)
+    row = np.full(model.n_bus, -1)
+    row[pq] = np.arange(len(pq))
+    return SymbolicFactorization(pq=pq, perm=row[order[::-1]])
+
+
+class FactorizationCache:
+    """导纳矩阵、符号分析与数值分解的进程内 LRU 缓存，附带复用计数"""
+
+    def __init__(self, maxsize: int = 32):
+        self._maxsize = maxsize
+        self._ybus: "OrderedDict[tuple, sp.csr_matrix]" = OrderedDict()
+        self._symbolic: "OrderedDict[tuple, SymbolicFactorization]" = OrderedDict()
+        self._numeric: "OrderedDict[tuple, Factorization]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._counters = dict.fromkeys(["ybus_builds", "ybus_reuses", "symbolic_analyses", "symbolic_reuses",
+                                        "numeric_factorizations", "numeric_reuses"], 0)
+
+    def _put(self, store: OrderedDict, key, value):
+        store[key] = value
+        while len(store) > self._maxsize:
+            store.popitem(last=False)
+
+    def _lookup(self, store: OrderedDict, key, compute, built: str, reused: str):
+        """调用方需持有 self._lock"""
+        if key in store:
+            store.move_to_end(key)
+            self._counters[reused] += 1
+            return store[key]
+        value = compute()
+        self._counters[built] += 1
+        self._put(store, key, value)
+        return value
+
+    def ybus(self, model: NetworkModel, r_scale: float = 1.0, in_service: np.ndarray | None = None) -> sp.csr_matrix:
+        """节点导纳矩阵（CSR），调用方不得原地修改"""
+        key = (*_topology_key(model, in_service), float(r_scale))
+        with self._lock:
+            return self._lookup(self._ybus, key, lambda: model.build_ybus(r_scale, in_service).tocsr(),
+                                "ybus_builds", "ybus_reuses")
+
+    def factorize(self, model: NetworkModel, r_scale: float = 1.0, in_service: np.ndarray | None = None,
+                  cache: bool = True) -> Factorization:
+        """
+        Y_pp 的 LU 分解
+
+        :param cache: 是否缓存数值分解（只用一次的拓扑，如 N-1 的孤岛断线，不必占用缓存）
+        """
+        topology = _topology_key(model, in_service)
+        key = (*topology, float(r_scale))
+        with self._lock:
+            if cache and key in self._numeric:
+                self._numeric.move_to_end(key)
+                self._counters["numeric_reuses"] += 1
+                return self._numeric[key]
+            if cache:
+                ybus = self.ybus(model, r_scale, in_service)
+                symbolic = self._lookup(self._symbolic, topology, lambda: analyze(model, ybus),
+                                        "symbolic_analyses", "symbolic_reuses")
+            else:
+                ybus = model.build_ybus(r_scale, in_service).tocsr()
+                symbolic = analyze(model, ybus)
+                self._counters["symbolic_analyses"] += 1
+            self._counters["numeric_factorizations"] += 1
+
+        pq, perm = symbolic.pq, symbolic.perm
+        y_pp = ybus[pq][:, pq][perm][:, perm].tocsc()
+        factorization = Factorization(
+            ybus=ybus,
+            symbolic=symbolic,
+            y_ps=ybus[pq][:, [model.slack_pos]].toarray().ravel(),
+            lu=spla.splu(y_pp, permc_spec="NATURAL", diag_pivot_thresh=0, options={"SymmetricMode": True}),
+        )
+        if cache:
+            with self._lock:
+                self._put(self._numeric, key, factorization)
+        return factorization
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = {"ybus_entries": len(self._ybus), "symbolic_entries": len(self._symbolic),
+                       "numeric_entries": len(self._numeric)}
+        total = counters["numeric_factorizations"] + counters["numeric_reuses"]
+        return {**counters, **entries,
+                "numeric_reuse_rate": round(counters["numeric_reuses"] / total, 4) if total else None}
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def clear(self):
+        with self._lock:
+            self._ybus.clear()
+            self._symbolic.clear()
+            self._numeric.clear()
+
+
+factorization_cache = FactorizationCache(maxsize=settings.PDN_FACTORIZATION_CACHE_SIZE)
@@ -0,0 +1,51 @@
+"""
+多核并行计算共用的进程池
+
+子进程使用 forkserver/spawn 启动（不 fork 当前进程，避免复制 django 运行中的线程和锁），
+子进程启动时初始化 django，之后网络模型从磁盘快照恢复，不需要重新构建。
+子进程与父进程使用同一个 PDN_RUNTIME_DIR（快照、结果缓存），父进程中覆盖的设置（如测试）同样生效。
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# 当前进程是否为进程池子进程
+_in_worker = False
+
+
+def _init_worker(runtime_dir):
+    global _in_worker
+    _in_worker = True
+    import django
+
+    django.setup()
+    settings.PDN_RUNTIME_DIR = runtime_dir
+
+
+def max_workers() -> int:
+    """可用的并行进程数；进程池子进程内为 1，子进程中的计算不再嵌套创建进程池"""
+    return 1 if _in_worker else settings.PDN_MAX_WORKERS
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """获得进程池（懒加载，进程内共享）"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=settings.PDN_MAX_WORKERS, mp_context=context,
+                                        initializer=_init_worker, initargs=(settings.PDN_RUNTIME_DIR,))
+        return _pool
+
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
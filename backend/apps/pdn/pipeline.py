@@ -0,0 +1,290 @@
+"""
+派生数据流水线：看板结果表按依赖关系增量重算
+
+dashboard_hourly_curve、dashboard_daily_summary、indicator_scores、dimension_scores 都由时序潮流结果
+（时序数据集 <network_id>.summary/.bus_vm_pu/.line_loading_pct）派生。每张表声明为一个节点及其输入，
+按天分区计算，每个 (节点, 日) 的结果存为 <output_dir>/<节点>/<YYYY-MM-DD>.csv：
+
+    - 输入哈希 = 节点名称、版本、参数 + 各输入当天的内容哈希（数据源为分区文件的哈希，上游节点为其结果 csv 的哈希），
+      与 manifest.json 中记录的一致且结果文件存在时跳过，所以只刷新一天的数据时只重算这一天；
+    - 上游重算后结果不变（内容哈希相同）时，下游不再重算；
+    - 数据源分区文件的哈希按 (文件大小, 修改时间) 缓存，文件未变化时不重新读取；
+    - 同一层（互不依赖）的节点、不同的日期在线程池中并行计算。
+
+publish() 将某一天的结果复制为与 frontend/demo_data 同名的 csv。
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from django.conf import settings
+
+from . import scoring, timeseries
+from .network import network_registry
+from .parallel import max_workers
+from .tsdb import TimeSeriesStore, ts_store
+
+# 数据源：时序数据集 <network_id>.<source>，第一个数据源的日期即需要计算的日期
+SOURCES = ("summary", "bus_vm_pu", "line_loading_pct")
+
+Frames = Dict[str, pd.DataFrame]
+
+
+@dataclass(frozen=True)
+class Node:
+    """派生数据集：由 inputs（数据源或其他节点）当天的数据计算得到一张表"""
+    name: str
+    inputs: Tuple[str, ...]
+    compute: Callable[[Frames, Dict], pd.DataFrame]
+    # 计算逻辑变化时递增，使已有结果失效
+    version: int = 1
+
+
+def _hourly_curve(frames: Frames, params: Dict) -> pd.DataFrame:
+    return timeseries.hourly_summary(frames["summary"])
+
+
+def _daily_summary(frames: Frames, params: Dict) -> pd.DataFrame:
+    return timeseries.daily_summary(frames["summary"], params["step_hours"])
+
+
+def _indicator_scores(frames: Frames, params: Dict) -> pd.DataFrame:
+    """当天的指标得分；光伏装机容量按当天光伏总出力的最大值估计，N-1 通过率不能由时序结果得到（为空）"""
+    summary, vm, loading = frames["summary"], frames["bus_vm_pu"], frames["line_loading_pct"]
+    times = summary.index.intersection(vm.index).intersection(loading.index)
+    if len(times):
+        summary = summary.loc[times]
+        raw = scoring.indicators_from_arrays(
+            vm=vm.loc[times].to_numpy(dtype=float)[None],
+            loading=loading.loc[times].to_numpy(dtype=float)[None],
+            losses=summary["losses_MW"].to_numpy(dtype=float)[None],
+            load=summary["P_MW"].to_numpy(dtype=float)[None],
+            pv=summary["PV_gen_MW"].to_numpy(dtype=float)[None],
+            pv_capacity=np.array([summary["PV_gen_MW"].max()]),
+            step_hours=params["step_hours"],
+        )
+    else:
+        raw = np.full((1, len(scoring.INDICATORS)), np.nan)
+    scores = scoring.score_indicators(raw, params["total_load_mw"])
+    return pd.DataFrame({
+        "indicator": [indicator.name for indicator in scoring.INDICATORS],
+        "raw": raw[0],
+        "larger_is_better": [indicator.larger_is_better for indicator in scoring.INDICATORS],
+        "score_0_100": scores[0],
+    })
+
+
+def _dimension_scores(frames: Frames, params: Dict) -> pd.DataFrame:
+    """等权重的维度得分与综合得分"""
+    scores = (frames["indicator_scores"].set_index("indicator")["score_0_100"]
+              .reindex([indicator.name for indicator in scoring.INDICATORS]).to_numpy(dtype=float))
+    dimension_scores, overall = scoring.aggregate_scores(scores[None])
+    return pd.DataFrame([{
+        **{f"{key}_score_0_100": dimension_scores[0, j] for j, key in enumerate(scoring.DIMENSIONS)},
+        "overall_score_0_100": overall[0],
+    }])
+
+
+NODES: List[Node] = [
+    Node("dashboard_hourly_curve", ("summary",), _hourly_curve),
+    Node("dashboard_daily_summary", ("summary",), _daily_summary),
+    Node("indicator_scores", ("summary", "bus_vm_pu", "line_loading_pct"), _indicator_scores),
+    Node("dimension_scores", ("indicator_scores",), _dimension_scores),
+]
+
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part)
+    return h.hexdigest()
+
+
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    # 与现有 demo_data 保持一致，带 BOM 方便 excel 直接打开
+    return df.to_csv(index=False, date_format="%Y-%m-%d %H:%M:%S").encode("utf-8-sig")
+
+
+def _levels(nodes: Sequence[Node], sources: Sequence[str]) -> List[List[Node]]:
+    """按依赖关系分层：每一层的节点只依赖数据源和之前各层的节点"""
+    by_name = {node.name: node for node in nodes}
+    for node in nodes:
+        unknown = [name for name in node.inputs if name not in by_name and name not in sources]
+        if unknown:
+            raise ValueError(f"节点 {node.name} 的输入不存在：{unknown}")
+    done, levels = set(sources), []
+    pending = list(nodes)
+    while pending:
+        level = [node for node in pending if all(name in done for name in node.inputs)]
+        if not level:
+            raise ValueError(f"节点之间存在循环依赖：{[node.name for node in pending]}")
+        levels.append(level)
+        done.update(node.name for node in level)
+        pending = [node for node in pending if node.name not in done]
+    return levels
+
+
+@dataclass
+class PipelineReport:
+    """一次运行的结果，元素为 <节点>/<日期>"""
+    computed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    # 重算后内容哈希不变的结果（下游因此不需要重算）
+    unchanged: List[str] = field(default_factory=list)
+
+
+class Pipeline:
+    """某个网络的派生数据流水线"""
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, network_id: str, output_dir: Path | None = None, store: TimeSeriesStore = ts_store,
+                 nodes: Sequence[Node] = NODES, sources: Sequence[str] = SOURCES):
+        self.network_id = network_id
+        self.output_dir = Path(output_dir or settings.PDN_RUNTIME_DIR / "derived" / network_id)
+        self.store = store
+        self.nodes = list(nodes)
+        self.sources = tuple(sources)
+        self.levels = _levels(self.nodes, self.sources)
+
+    def _series(self, source: str):
+        return self.store.get(f"{self.network_id}.{source}")
+
+    def days(self) -> List[str]:
+        """需要计算的日期：第一个数据源已有数据的日期"""
+        return [str(day) for day in self._series(self.sources[0]).days()]
+
+    def params(self) -> Dict:
+        """所有节点共用的参数，参与输入哈希"""
+        step_ns = self._series(self.sources[0]).step_ns
+        model = network_registry.get(self.network_id)
+        return {"step_hours": step_ns / 3600e9, "total_load_mw": round(float(model.base_load_p_mw.sum()), 9)}
+
+    # ------ manifest ------ #
+
+    def _load_manifest(self) -> Dict:
+        try:
+            return json.loads((self.output_dir / self.MANIFEST).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"sources": {}, "nodes": {}}
+
+    def _save_manifest(self, manifest: Dict):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.output_dir / f"{self.MANIFEST}.tmp"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.output_dir / self.MANIFEST)
+
+    def _source_hash(self, manifest: Dict, source: str, day: str) -> str:
+        """数据源某一天的内容哈希（列名 + 分区文件），文件大小与修改时间不变时复用记录的哈希"""
+        series = self._series(source)
+        path = series.partition_path(day)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return "missing"
+        key = f"{source}/{day}"
+        entry = manifest["sources"].get(key)
+        fingerprint = [stat.st_size, stat.st_mtime_ns]
+        if entry is None or entry["fingerprint"] != fingerprint:
+            entry = manifest["sources"][key] = {
+                "fingerprint": fingerprint,
+                "hash": _digest(json.dumps(list(series.columns)).encode(), path.read_bytes()),
+            }
+        return entry["hash"]
+
+    # ------ 计算 ------ #
+
+    def _path(self, name: str, day: str) -> Path:
+        return self.output_dir / name / f"{day}.csv"
+
+    def _read_input(self, name: str, day: str, outputs: Dict[Tuple[str, str], pd.DataFrame]) -> pd.DataFrame:
+        if name in self.sources:
+            start = pd.Timestamp(day)
+            return self._series(name).read_frame(start, start + pd.Timedelta("1D")).astype(float)
+        if (name, day) in outputs:
+            return outputs[name, day]
+        return pd.read_csv(self._path(name, day), encoding="utf-8-sig")
+
+    def _compute(self, node: Node, day: str, params: Dict, outputs: Dict) -> Tuple[pd.DataFrame, bytes]:
+        frames = {name: self._read_input(name, day, outputs) for name in node.inputs}
+        df = node.compute(frames, params)
+        return df, _to_csv_bytes(df)
+
+    def run(self, days: Sequence | None = None, force: bool = False, workers: int | None = None) -> PipelineReport:
+        """
+        重算输入有变化的 (节点, 日)
+
+        :param days: 只检查这些日期（没有数据的日期忽略），缺省为全部日期（未变化的日期只比较哈希，不会重算）
+        :param force: 忽略已有结果，全部重算
+        """
+        all_days = self.days()
+        if days is not None:
+            requested = {str(pd.Timestamp(day).date()) for day in days}
+            all_days = [day for day in all_days if day in requested]
+        days = all_days
+        params = self.params()
+        manifest = self._load_manifest()
+        report = PipelineReport()
+        hashes = {(source, day): self._source_hash(manifest, source, day) for source in self.sources for day in days}
+        # 本次运行中重算的结果，下游直接使用，不再读取 csv
+        outputs: Dict[Tuple[str, str], pd.DataFrame] = {}
+
+        with ThreadPoolExecutor(max_workers=workers or max_workers()) as pool:
+            for level in self.levels:
+                futures = {}
+                for node in level:
+                    for day in days:
+                        key = f"{node.name}/{day}"
+                        input_hash = _digest(json.dumps({
+                            "node": node.name, "version": node.version, "params": params,
+                            "inputs": [hashes[name, day] for name in node.inputs],
+                        }, sort_keys=True).encode())
+                        entry = manifest["nodes"].get(key)
+                        if (not force and entry is not None and entry["input_hash"] == input_hash
+                                and self._path(node.name, day).exists()):
+                            hashes[node.name, day] = entry["output_hash"]
+                            report.skipped.append(key)
+                            continue
+                        futures[node, day, input_hash] = pool.submit(self._compute, node, day, params, outputs)
+
+                for (node, day, input_hash), future in futures.items():
+                    key = f"{node.name}/{day}"
+                    df, data = future.result()
+                    output_hash = _digest(data)
+                    path = self._path(node.name, day)
+                    entry = manifest["nodes"].get(key)
+                    if entry is not None and entry["output_hash"] == output_hash and path.exists():
+                        report.unchanged.append(key)
+                    else:
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        path.write_bytes(data)
+                    manifest["nodes"][key] = {"input_hash": input_hash, "output_hash": output_hash}
+                    hashes[node.name, day] = output_hash
+                    outputs[node.name, day] = df
+                    report.computed.append(key)
+
+        self._save_manifest(manifest)
+        logger.info("派生数据 {}：重算 {} 个，跳过 {} 个", self.network_id, len(report.computed), len(report.skipped))
+        return report
+
+    def publish(self, output_dir: Path, day=None) -> Dict[str, Path]:
+        """将某一天（缺省为最后一天）的各节点结果复制为 <节点>.csv，内容不变的文件不改写"""
+        day = self.days()[-1] if day is None else str(pd.Timestamp(day).date())
+        output_dir.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for node in self.nodes:
+            data = self._path(node.name, day).read_bytes()
+            path = output_dir / f"{node.name}.csv"
+            if not path.exists() or path.read_bytes() != data:
+                path.write_bytes(data)
+            paths[node.name] = path
+        return paths
+
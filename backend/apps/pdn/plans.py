@@ -0,0 +1,120 @@
+"""
+规划方案
+
+方案 = 基础网络上的一组参数覆盖（Plan 表的 overrides 字段，均可省略）：
+    - load_scale：负荷缩放系数；
+    - r_scale：线路阻抗缩放系数（线路增容改造）；
+    - close_ties：联络开关是否闭合；line_status：{线路编号（从 1 开始）: 0/1}，单独指定投运状态（网络重构）；
+    - pv_capacity_mw：{母线编号: 光伏装机容量（MW）}。
+方案的计算结果按覆盖参数的内容哈希缓存，与方案名称无关：修改方案后旧结果不再命中，参数相同的方案共用结果。
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .models import Plan
+from .network import NetworkModel
+
+# 内置方案，数据库迁移时写入 Plan 表（0004_plan），也用作不访问数据库时的默认方案
+DEFAULT_PLANS = {
+    "方案一": {"description": "现状网架，联络开关断开（辐射状运行）", "overrides": {"close_ties": False}},
+    "方案二": {"description": "联络开关闭合（弱环网运行）", "overrides": {"close_ties": True}},
+    "方案三": {"description": "现状网架 + 线路增容改造", "overrides": {"close_ties": False, "r_scale": 0.7}},
+}
+
+OVERRIDE_FIELDS = ("load_scale", "r_scale", "close_ties", "line_status", "pv_capacity_mw")
+
+
+@dataclass(frozen=True)
+class PlanDefinition:
+    """校验后的方案参数（不可变，可以直接传给进程池子进程）"""
+    name: str
+    load_scale: float = 1.0
+    r_scale: float = 1.0
+    close_ties: bool = False
+    line_status: Tuple[Tuple[int, bool], ...] = ()
+    # None 表示方案未指定光伏配置
+    pv_capacity_mw: Tuple[Tuple[int, float], ...] | None = None
+
+    @classmethod
+    def from_overrides(cls, name: str, overrides: Dict) -> "PlanDefinition":
+        if not isinstance(overrides, dict):
+            raise ValueError("参数覆盖应为字典")
+        unknown = set(overrides) - set(OVERRIDE_FIELDS)
+        if unknown:
+            raise ValueError(f"未知的方案参数：{'、'.join(sorted(unknown))}，可选：{'、'.join(OVERRIDE_FIELDS)}")
+        try:
+            load_scale = float(overrides.get("load_scale", 1.0))
+            r_scale = float(overrides.get("r_scale", 1.0))
+            line_status = tuple(sorted((int(line), bool(int(status)))
+                                       for line, status in overrides.get("line_status", {}).items()))
+            pv_capacity_mw = overrides.get("pv_capacity_mw")
+            if pv_capacity_mw is not None:
+                pv_capacity_mw = tuple(sorted((int(bus), float(capacity)) for bus, capacity in pv_capacity_mw.items()))
+        except (TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"方案参数格式错误：{e}")
+        if load_scale < 0 or r_scale <= 0:
+            raise ValueError("load_scale 不能为负，r_scale 应为正数")
+        if pv_capacity_mw is not None and any(capacity < 0 for _, capacity in pv_capacity_mw):
+            raise ValueError("光伏装机容量不能为负")
+        return cls(name=name, load_scale=load_scale, r_scale=r_scale, close_ties=bool(overrides.get("close_ties")),
+                   line_status=line_status, pv_capacity_mw=pv_capacity_mw)
+
+    def overrides(self) -> Dict:
+        """规范化后的参数覆盖（json 可序列化）"""
+        data = {"load_scale": self.load_scale, "r_scale": self.r_scale, "close_ties": self.close_ties,
+                "line_status": {str(line): int(status) for line, status in self.line_status}}
+        if self.pv_capacity_mw is not None:
+            data["pv_capacity_mw"] = {str(bus): capacity for bus, capacity in self.pv_capacity_mw}
+        return data
+
+    @property
+    def content_hash(self) -> str:
+        payload = json.dumps(self.overrides(), sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def check(self, model: NetworkModel):
+        """检查方案中的线路、母线编号在网络中存在（from_overrides 只校验与网络无关的格式），不合法时抛出 ValueError"""
+        self.in_service(model)
+        self.pv_capacity(model)
+
+    def in_service(self, model: NetworkModel) -> np.ndarray:
+        in_service = np.ones(model.n_line, dtype=bool) if self.close_ties else model.line_df["status"].to_numpy() == 1
+        for line, status in self.line_status:
+            if not 1 <= line <= model.n_line:
+                raise ValueError(f"方案 {self.name}：线路编号 {line} 超出范围 1~{model.n_line}")
+            in_service[line - 1] = status
+        return in_service
+
+    def pv_capacity(self, model: NetworkModel, default_penetration: float = 0.0) -> np.ndarray:
+        """各母线（位置索引）的光伏装机容量（MW）；方案未指定时按基准负荷的 default_penetration 倍配置"""
+        if self.pv_capacity_mw is None:
+            return model.base_load_p_mw * default_penetration
+        capacity = np.zeros(model.n_bus)
+        if self.pv_capacity_mw:
+            buses, values = zip(*self.pv_capacity_mw)
+            try:
+                capacity[model.bus_positions(buses)] = values
+            except KeyError as e:
+                raise ValueError(f"方案 {self.name}：母线不存在：{e}")
+        return capacity
+
+
+def builtin_plan(name: str = "方案一") -> PlanDefinition:
+    """内置方案（不访问数据库）"""
+    return PlanDefinition.from_overrides(name, DEFAULT_PLANS[name]["overrides"])
+
+
+def get_plan(name: str) -> PlanDefinition:
+    try:
+        plan = Plan.objects.get(name=name)
+    except Plan.DoesNotExist:
+        raise ValueError(f"未知的方案：{name}")
+    return plan.definition()
+
+
+def list_plans() -> List[PlanDefinition]:
+    return [plan.definition() for plan in Plan.objects.all()]
@@ -0,0 +1,104 @@
+"""
+单断面潮流计算
+
+PowerFlowCalculationRetrieveView、参数扫描等都通过 run_powerflow 求解，保证各处的响应结构一致。
+"""
+import numpy as np
+import pandapower as pp
+
+from . import radial
+from .cache import result_cache
+from .network import DEFAULT_NETWORK_ID, NetworkModel, network_registry
+
+ENGINES = ("nr", "sweep")
+
+
+def _make_response_data(model: NetworkModel, vm_pu, loading_percent, p_from_mw, i_from_ka, losses_mw, total_power):
+    """两种求解引擎共用的响应数据结构"""
+    fbus = model.line_df["fbus"].to_numpy(dtype=int)
+    tbus = model.line_df["tbus"].to_numpy(dtype=int)
+    return {
+        "voltages": np.round(vm_pu, 4).tolist(),
+        "loading": np.round(loading_percent, 2).tolist(),
+        "total_power": round(total_power, 2),
+        "max_loading": round(loading_percent.max(), 2),
+        "voltage_deviation": round((1 - vm_pu.min()) * 100, 2),
+        "network_loss": round(losses_mw.sum() / total_power * 100, 2) if total_power != 0 else 0,
+        "line_details": [
+            {
+                "name": f"线{i + 1}",
+                "from": int(fbus[i]),
+                "to": int(tbus[i]),
+                "loading": round(loading_percent[i], 2),
+                "power": round(p_from_mw[i], 2),
+                "current": round(i_from_ka[i] * 1000, 2)
+            }
+            for i in range(len(loading_percent))
+        ],
+        "converged": True
+    }
+
+
+def _run_newton_raphson(model: NetworkModel, load_scale, r_scale):
+    with model.lock:
+        model.apply_parameters(load_scale=load_scale, r_scale=r_scale)
+        net = model.net
+        try:
+            pp.runpp(net, max_iteration=50)
+        except Exception as e:
+            return {"converged": False, "error": str(e)}
+        return _make_response_data(
+            model,
+            vm_pu=net.res_bus.vm_pu.to_numpy(),
+            loading_percent=net.res_line.loading_percent.to_numpy(),
+            p_from_mw=net.res_line.p_from_mw.to_numpy(),
+            i_from_ka=net.res_line.i_from_ka.to_numpy(),
+            losses_mw=net.res_line.pl_mw.to_numpy(),
+            total_power=net.res_load.p_mw.sum(),
+        )
+
+
+def _run_sweep(model: NetworkModel, load_scale, r_scale):
+    # 求解器按网络模型缓存（BFS 排序、关联矩阵分解只做一次），且不修改 model.net，无需加锁
+    solver = radial.get_sweep_solver(model)
+    s_load_pu = (model.base_load_p_mw + 1j * model.base_load_q_mvar) * load_scale / model.sn_mva
+    try:
+        result = solver.solve(s_load_pu, r_scale=r_scale)
+    except radial.SweepConvergenceError as e:
+        return {"converged": False, "error": str(e)}
+    i_branch = result.i_branch
+    i_from_ka = np.abs(i_branch) * model.current_base_ka()
+    return _make_response_data(
+        model,
+        vm_pu=np.abs(result.v),
+        loading_percent=i_from_ka / model.max_i_ka * 100,
+        p_from_mw=(result.v[model.f_pos] * np.conj(i_branch)).real * model.sn_mva,
+        i_from_ka=i_from_ka,
+        losses_mw=np.abs(i_branch) ** 2 * model.branch_impedance_pu(r_scale).real * model.sn_mva,
+        total_power=model.base_load_p_mw.sum() * load_scale,
+    )
+
+
+def run_powerflow(load_scale=0.001, r_scale=1.0, engine="nr", network_id=DEFAULT_NETWORK_ID):
+    """
+    单断面潮流计算
+
+    :param load_scale: 负荷缩放系数
+    :param r_scale: 线路阻抗缩放系数
+    :param engine: nr - pandapower 牛顿-拉夫逊法；sweep - 前推回代法
+    :param network_id: 网络编号
+    """
+    # 网络常驻内存，此处只修补负荷/阻抗列，不再每次请求都重新读取 csv 并逐行构建网络
+    model = network_registry.get(network_id)
+
+    def compute():
+        if engine == "sweep":
+            return _run_sweep(model, load_scale, r_scale)
+        return _run_newton_raphson(model, load_scale, r_scale)
+
+    # 相同网络、相同参数的结果直接取缓存；未收敛的结果不缓存。返回值是共享的，调用方不要原地修改
+    return result_cache.get_or_compute(
+        model.content_hash, "powerflow",
+        {"engine": engine, "load_scale": float(load_scale), "r_scale": float(r_scale)},
+        compute, cacheable=lambda data: data["converged"],
+    )
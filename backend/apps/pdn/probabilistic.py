@@ -0,0 +1,276 @@
+"""
+蒙特卡洛概率潮流
+
+确定性潮流只给出一个断面，光伏出力波动大的馈线需要知道越限的概率：
+    - 负荷：各母线按 基准负荷 × 场景负荷系数 × 典型日曲线 的正态分布抽样（系统公共分量 + 母线独立分量，功率因数不变）；
+    - 光伏：出力系数（相对装机容量）服从 Beta 分布，均值为 天气 × 季节 × 出力曲线，同样由公共分量（云层）与母线独立分量混合；
+    - 样本按批（batch_size 个一批）组成 (母线数, 样本数) 的注入矩阵，前推回代一次求解整批；
+      批与批之间相互独立，可用核数大于 1 时分发到进程池。
+第 k 批的随机数只由 SeedSequence(seed).spawn 的第 k 个子序列决定，按批的顺序汇总并判断收敛，
+因此同一 seed 的结果与进程数、完成顺序无关。越限概率（Wilson 区间）与线路平均负载率的置信区间半宽
+都小于容差后提前停止。
+"""
+import math
+from dataclasses import asdict, dataclass, fields
+from typing import Callable, Dict, List
+
+import numpy as np
+from scipy.stats import norm
+
+from . import radial
+from .cache import result_cache
+from .hosting import PV_SHAPE, Scenario
+from .network import DEFAULT_NETWORK_ID, LOADING_MAX_PERCENT, VM_MAX_PU, VM_MIN_PU, NetworkModel, network_registry
+from .parallel import get_process_pool, max_workers
+from .scoring import PV_PENETRATION
+from .timeseries import TYPICAL_DAILY_LOAD_SHAPE
+
+# 负载率分位数（%）
+LOADING_PERCENTILES = (5, 50, 95, 99)
+
+
+@dataclass(frozen=True)
+class SamplingConfig:
+    """抽样与停止条件"""
+    hour: int = 12
+    load_std: float = 0.1  # 负荷相对标准差
+    load_correlation: float = 0.5  # 各母线负荷波动的相关系数
+    pv_cv: float = 0.3  # 光伏出力系数的变异系数
+    pv_correlation: float = 0.8  # 各母线光伏出力波动的相关系数
+    batch_size: int = 250
+    min_samples: int = 500
+    max_samples: int = 10000
+    confidence: float = 0.95
+    probability_tolerance: float = 0.01  # 越限概率置信区间半宽
+    loading_tolerance: float = 0.5  # 线路平均负载率置信区间半宽（%）
+
+    @classmethod
+    def from_params(cls, params: Dict) -> "SamplingConfig":
+        """从请求/任务参数中取出抽样配置（忽略其余参数）"""
+        return cls(**{f.name: params[f.name] for f in fields(cls) if f.name in params})
+
+
+def _beta_parameters(mean: np.ndarray, cv: float):
+    """给定均值与变异系数的 Beta 分布参数（方差超出 Beta 分布可表示的范围时截断）"""
+    mean = np.clip(mean, 1e-6, 1 - 1e-6)
+    var = np.minimum((cv * mean) ** 2, mean * (1 - mean) * 0.99)
+    common = mean * (1 - mean) / var - 1
+    return mean * common, (1 - mean) * common
+
+
+class ScenarioSampler:
+    """某一场景下的负荷/光伏抽样，以及整批样本的前推回代求解"""
+
+    def __init__(self, model: NetworkModel, scenario: Scenario, config: SamplingConfig):
+        self.model = model
+        self.scenario = scenario
+        self.config = config
+        self.solver = radial.get_sweep_solver(model, scenario.in_service(model))
+        load_factor = TYPICAL_DAILY_LOAD_SHAPE[config.hour] * scenario.load_factor
+        self.s_load_pu = (model.base_load_p_mw + 1j * model.base_load_q_mvar) * load_factor / model.sn_mva
+        self.pv_capacity_pu = scenario.plan.pv_capacity(model, PV_PENETRATION) / model.sn_mva
+        self.pv_mean = PV_SHAPE[config.hour] * scenario.pv_factor
+        self.pv_buses = np.flatnonzero(self.pv_capacity_pu > 0) if self.pv_mean > 0 else np.array([], dtype=int)
+        self._current_base_ka = model.current_base_ka()[:, None]
+        self._max_i_ka = model.max_i_ka[:, None]
+        self._r_pu = model.branch_impedance_pu(scenario.r_scale).real[:, None]
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """size 个样本的各母线净负荷（标幺值），(母线数, size)"""
+        config = self.config
+        n = self.model.n_bus
+        rho = config.load_correlation
+        z = math.sqrt(rho) * rng.standard_normal((1, size)) + math.sqrt(1 - rho) * rng.standard_normal((n, size))
+        s = self.s_load_pu[:, None] * np.clip(1 + config.load_std * z, 0, None)
+        if len(self.pv_buses):
+            a, b = _beta_parameters(np.array(self.pv_mean), config.pv_cv)
+            common = rng.beta(a, b, size=(1, size))
+            individual = rng.beta(a, b, size=(len(self.pv_buses), size))
+            # 混合后均值不变，相关系数约为 pv_correlation
+            w = config.pv_correlation
+            factor = w * common + (1 - w) * individual
+            s[self.pv_buses] -= self.pv_capacity_pu[self.pv_buses, None] * factor
+        return s
+
+    def _solve(self, s: np.ndarray):
+        result = self.solver.solve(s, r_scale=self.scenario.r_scale)
+        return np.abs(result.v), np.abs(result.i_branch)
+
+    def run_batch(self, seed: np.random.SeedSequence, size: int) -> Dict[str, np.ndarray]:
+        """
+        抽样并整批求解；整批不收敛时逐个样本求解，不收敛的样本结果为 nan
+
+        :return: {"vm_pu": (母线数, size), "loading_percent": (线路数, size), "losses_mw": (size,)}
+        """
+        s = self.sample(np.random.default_rng(seed), size)
+        try:
+            vm, i_abs = self._solve(s)
+        except radial.SweepConvergenceError:
+            vm = np.full((self.model.n_bus, size), np.nan)
+            i_abs = np.full((self.model.n_line, size), np.nan)
+            for k in range(size):
+                try:
+                    vm[:, k], i_abs[:, k] = self._solve(s[:, k])
+                except radial.SweepConvergenceError:
+                    pass
+        return {
+            "vm_pu": vm,
+            "loading_percent": i_abs * self._current_base_ka / self._max_i_ka * 100,
+            "losses_mw": (i_abs ** 2 * self._r_pu).sum(axis=0) * self.model.sn_mva,
+        }
+
+
+def _run_batch_in_worker(network_id: str, scenario: Scenario, config: SamplingConfig,
+                         seed: np.random.SeedSequence, size: int) -> Dict[str, np.ndarray]:
+    """进程池中执行：抽样并求解一批"""
+    return ScenarioSampler(network_registry.get(network_id), scenario, config).run_batch(seed, size)
+
+
+def wilson_half_width(successes: np.ndarray, n: int, z: float) -> np.ndarray:
+    """二项分布比例的 Wilson 置信区间半宽（比例为 0 时仍不为 0，避免样本太少时误判收敛）"""
+    p = successes / n
+    return z / (1 + z ** 2 / n) * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))
+
+
+class _Accumulator:
+    """按批的顺序累计样本，并判断置信区间是否已满足容差"""
+
+    def __init__(self, model: NetworkModel, config: SamplingConfig):
+        self.config = config
+        self.z = float(norm.ppf(0.5 + config.confidence / 2))
+        self.batches: List[Dict[str, np.ndarray]] = []
+        self.n = 0
+        self.violations = np.zeros(model.n_bus + model.n_line + 1)
+        self.loading_sum = np.zeros(model.n_line)
+        self.loading_sq_sum = np.zeros(model.n_line)
+
+    def add(self, batch: Dict[str, np.ndarray]):
+        self.batches.append(batch)
+        vm, loading = batch["vm_pu"], batch["loading_percent"]
+        self.n += vm.shape[1]
+        # 不收敛的样本计为越限
+        bus_violation = ~((vm >= VM_MIN_PU) & (vm <= VM_MAX_PU))
+        line_violation = ~(loading <= LOADING_MAX_PERCENT)
+        self.violations[:-1] += np.concatenate([bus_violation.sum(axis=1), line_violation.sum(axis=1)])
+        self.violations[-1] += (bus_violation.any(axis=0) | line_violation.any(axis=0)).sum()
+        loading = np.nan_to_num(loading)
+        self.loading_sum += loading.sum(axis=1)
+        self.loading_sq_sum += (loading ** 2).sum(axis=1)
+
+    def half_widths(self):
+        """(越限概率置信区间最大半宽, 平均负载率置信区间最大半宽)"""
+        probability = float(wilson_half_width(self.violations, self.n, self.z).max())
+        mean = self.loading_sum / self.n
+        var = np.clip(self.loading_sq_sum / self.n - mean ** 2, 0, None) * self.n / max(self.n - 1, 1)
+        loading = float((self.z * np.sqrt(var / self.n)).max())
+        return probability, loading
+
+    def converged(self) -> bool:
+        if self.n < self.config.min_samples:
+            return False
+        probability, loading = self.half_widths()
+        return probability <= self.config.probability_tolerance and loading <= self.config.loading_tolerance
+
+
+def _batch_sizes(config: SamplingConfig) -> List[int]:
+    full, rest = divmod(config.max_samples, config.batch_size)
+    return [config.batch_size] * full + ([rest] if rest else [])
+
+
+def run_probabilistic_power_flow(model: NetworkModel, scenario: Scenario, config: SamplingConfig = SamplingConfig(),
+                                 seed: int = 0, network_id: str = DEFAULT_NETWORK_ID,
+                                 progress: Callable[[float], None] | None = None) -> Dict:
+    """
+    蒙特卡洛概率潮流
+
+    :param seed: 随机种子，同一 seed 与参数的结果完全相同
+    :param progress: 进度回调（已抽样数 / max_samples）
+    """
+    sizes = _batch_sizes(config)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    accumulator = _Accumulator(model, config)
+    workers = max_workers()
+
+    if workers <= 1:
+        sampler = ScenarioSampler(model, scenario, config)
+        for batch_seed, size in zip(seeds, sizes):
+            accumulator.add(sampler.run_batch(batch_seed, size))
+            if progress is not None:
+                progress(accumulator.n / config.max_samples)
+            if accumulator.converged():
+                break
+    else:
+        # 最多提前提交 2 × 进程数 批，按批的顺序汇总；收敛后取消其余的批
+        pool = get_process_pool()
+        futures = {}
+        try:
+            for k in range(len(sizes)):
+                for j in range(k, min(k + 2 * workers, len(sizes))):
+                    if j not in futures:
+                        futures[j] = pool.submit(_run_batch_in_worker, network_id, scenario, config, seeds[j], sizes[j])
+                accumulator.add(futures.pop(k).result())
+                if progress is not None:
+                    progress(accumulator.n / config.max_samples)
+                if accumulator.converged():
+                    break
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+    return _summarize(model, accumulator, seed)
+
+
+def _summarize(model: NetworkModel, accumulator: _Accumulator, seed: int) -> Dict:
+    vm = np.concatenate([b["vm_pu"] for b in accumulator.batches], axis=1)
+    loading = np.concatenate([b["loading_percent"] for b in accumulator.batches], axis=1)
+    losses = np.concatenate([b["losses_mw"] for b in accumulator.batches])
+    n = accumulator.n
+    probability = accumulator.violations / n
+    probability_half_width, loading_half_width = accumulator.half_widths()
+    undervoltage = (vm < VM_MIN_PU).mean(axis=1)
+    overvoltage = (vm > VM_MAX_PU).mean(axis=1)
+    vm_percentiles = np.nanpercentile(vm, [5, 50, 95], axis=1)
+    loading_percentiles = np.nanpercentile(loading, LOADING_PERCENTILES, axis=1)
+
+    def rounded(values, digits):
+        return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+    return {
+        "seed": seed,
+        "n_samples": n,
+        "n_batches": len(accumulator.batches),
+        "converged": accumulator.converged(),
+        "non_converged_samples": int(np.isnan(vm).any(axis=0).sum()),
+        "probability_ci_half_width": round(probability_half_width, 6),
+        "loading_ci_half_width_pct": round(loading_half_width, 4),
+        "p_any_violation": round(float(probability[-1]), 6),
+        "losses_mw": dict(zip(("p5", "p50", "p95"), rounded(np.nanpercentile(losses, [5, 50, 95]), 6))),
+        "buses": [{
+            "bus": int(model.bus_i[k]),
+            "vm_mean_pu": rounded([np.nanmean(vm[k])], 4)[0],
+            **dict(zip(("vm_p5_pu", "vm_p50_pu", "vm_p95_pu"), rounded(vm_percentiles[:, k], 4))),
+            "p_undervoltage": round(float(undervoltage[k]), 6),
+            "p_overvoltage": round(float(overvoltage[k]), 6),
+            "p_violation": round(float(probability[k]), 6),
+        } for k in range(model.n_bus)],
+        "lines": [{
+            "line": k,
+            "name": f"线{k + 1}",
+            "loading_mean_pct": round(float(accumulator.loading_sum[k] / n), 2),
+            **{f"loading_p{q}_pct": v for q, v in zip(LOADING_PERCENTILES, rounded(loading_percentiles[:, k], 2))},
+            "p_overload": round(float(probability[model.n_bus + k]), 6),
+        } for k in range(model.n_line)],
+    }
+
+
+def compute_probabilistic_power_flow(scenario: Scenario, config: SamplingConfig = SamplingConfig(), seed: int = 0,
+                                     network_id: str = DEFAULT_NETWORK_ID,
+                                     progress: Callable[[float], None] | None = None) -> Dict:
+    """概率潮流（结果缓存，同一 seed 与参数的结果相同）"""
+    model = network_registry.get(network_id)
+    params = {"plan": scenario.plan.content_hash, "weather": scenario.weather, "season": scenario.season,
+              "config": asdict(config), "seed": seed, "pv_penetration": PV_PENETRATION,
+              "limits": [VM_MIN_PU, VM_MAX_PU, LOADING_MAX_PERCENT]}
+    return result_cache.get_or_compute(
+        model.content_hash, "probabilistic", params,
+        lambda: run_probabilistic_power_flow(model, scenario, config, seed, network_id, progress))
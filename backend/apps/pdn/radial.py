@@ -0,0 +1,192 @@
+"""
+辐射状配电网的前推回代（backward/forward sweep）潮流求解器
+
+case33bw 是辐射状馈线，不需要每次都跑通用的牛顿-拉夫逊法：
+    1. 以平衡节点为根做一次 BFS，树支按 BFS 深度排序后，支路-节点关联矩阵是下三角矩阵，只需分解一次并缓存；
+    2. 回推（求支路电流）和前推（求节点电压）分别是一次上三角/下三角回代，全部向量化，支持多个场景按列批量求解；
+    3. 弱环网（tie 线闭合）时，非树支视为开环点，用开环点阻抗矩阵做环网补偿（Shirmohammadi 补偿法）。
+"""
+import threading
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from scipy.sparse.csgraph import breadth_first_order
+
+from .network import NetworkModel
+
+
+class SweepConvergenceError(Exception):
+    """前推回代未收敛"""
+
+
+@dataclass
+class SweepResult:
+    """前推回代结果，一维数组为单个场景，二维数组的每一列为一个场景"""
+    v: np.ndarray  # 节点电压（标幺值，复数），(母线数[, 场景数])
+    i_branch: np.ndarray  # 线路电流（标幺值，复数，fbus -> tbus 方向为正），(线路数[, 场景数])
+    iterations: int
+
+    def vm_pu(self) -> np.ndarray:
+        return np.abs(self.v)
+
+
+class SweepSolver:
+    """某一拓扑（线路投运状态）下的前推回代求解器，BFS 排序与关联矩阵分解只做一次"""
+
+    def __init__(self, model: NetworkModel, in_service: np.ndarray | None = None):
+        self.model = model
+        n = model.n_bus
+        in_service = np.ones(model.n_line, dtype=bool) if in_service is None else np.asarray(in_service, dtype=bool)
+        self.in_service = in_service
+        root = model.slack_pos
+
+        # BFS 生成树
+        lines = np.flatnonzero(in_service)
+        f, t = model.f_pos[lines], model.t_pos[lines]
+        graph = sp.csr_matrix((np.ones(len(lines)), (f, t)), shape=(n, n))
+        order, predecessors = breadth_first_order(graph, root, directed=False, return_predecessors=True)
+        if len(order) != n:
+            raise ValueError(f"网络不连通，{n - len(order)} 条母线与平衡节点之间没有投运线路")
+
+        # 按 BFS 顺序为每个非根节点挑选一条连接其父节点的线路作为树支，其余投运线路都是开环点
+        candidates = defaultdict(list)
+        for line, a, b in zip(lines, f, t):
+            candidates[(min(a, b), max(a, b))].append(line)
+        children = order[1:]
+        parents = predecessors[children]
+        tree_lines = np.array([candidates[(min(p, c), max(p, c))].pop(0) for p, c in zip(parents, children)],
+                              dtype=int)
+        tie_lines = np.array(sorted(line for remaining in candidates.values() for line in remaining), dtype=int)
+
+        # 节点在 BFS 序中的位置（根节点为 -1），树支 k 的子节点即 BFS 序中第 k 个非根节点
+        position = np.full(n, -1)
+        position[children] = np.arange(n - 1)
+        self.children = children
+        self.tree_lines = tree_lines
+        # 树支方向与线路 fbus -> tbus 方向一致时为 +1
+        self.tree_sign = np.where(model.f_pos[tree_lines] == parents, 1.0, -1.0)
+        self.tie_lines = tie_lines
+        self.tie_from = position[model.f_pos[tie_lines]]
+        self.tie_to = position[model.t_pos[tie_lines]]
+
+        # 关联矩阵 A（下三角）：A[k, k] = 1，A[k, 父支路] = -1
+        parent_position = position[parents]
+        has_parent = parent_position >= 0
+        k = np.arange(n - 1)
+        a = sp.csc_matrix(
+            (np.concatenate([np.ones(n - 1), -np.ones(has_parent.sum())]),
+             (np.concatenate([k, k[has_parent]]), np.concatenate([k, parent_position[has_parent]]))),
+            shape=(n - 1, n - 1),
+            dtype=complex,
+        )
+        # 三角矩阵，按自然顺序分解且不选主元，分解结果就是 A 本身
+        self._lu = spla.splu(a, permc_spec="NATURAL", diag_pivot_thresh=0)
+        self._root_children = ~has_parent
+        self._zb_inv: Dict[float, np.ndarray] = {}
+
+    @property
+    def is_radial(self) -> bool:
+        return len(self.tie_lines) == 0
+
+    def _tree_impedance(self, r_scale: float) -> np.ndarray:
+        return self.model.branch_impedance_pu(r_scale)[self.tree_lines]
+
+    def _sweep(self, i_node: np.ndarray, z_tree: np.ndarray, v_root: complex) -> tuple[np.ndarray, np.ndarray]:
+        """回推 + 前推：节点注入电流 -> 树支电流 -> 节点电压（均按 BFS 序，不含根节点）"""
+        i_tree = self._lu.solve(i_node, trans="T")
+        drop = z_tree.reshape(-1, *([1] * (i_tree.ndim - 1))) * i_tree
+        rhs = -drop
+        rhs[self._root_children] += v_root
+        return self._lu.solve(rhs), i_tree
+
+    def _breakpoint_matrix(self, r_scale: float):
+        """开环点阻抗矩阵 Zb = D^T A^-1 Z A^-T D + diag(z_tie) 的逆，按 r_scale 缓存"""
+        if r_scale not in self._zb_inv:
+            n_tie = len(self.tie_lines)
+            d = np.zeros((len(self.children), n_tie), dtype=complex)
+            ties = np.arange(n_tie)
+            d[self.tie_from[self.tie_from >= 0], ties[self.tie_from >= 0]] = 1
+            d[self.tie_to[self.tie_to >= 0], ties[self.tie_to >= 0]] = -1
+            z_tree = self._tree_impedance(r_scale)
+            # 以零根电压、单位注入求电压变化量，即可得到树网络的转移阻抗
+            dv, _ = self._sweep(d, z_tree, 0)
+            zb = -(d.T @ dv) + np.diag(self.model.branch_impedance_pu(r_scale)[self.tie_lines])
+            self._zb_inv[r_scale] = np.linalg.inv(zb)
+        return self._zb_inv[r_scale]
+
+    def solve(self, s_load_pu: np.ndarray, r_scale: float = 1.0, v_root: complex = 1.0 + 0j,
+              v_init: np.ndarray | None = None, tol: float = 1e-8, max_iteration: int = 100) -> SweepResult:
+        """
+        前推回代求解
+
+        :param s_load_pu: 各母线的负荷（标幺值，复数，光伏等电源为负），(母线数[, 场景数])
+        :param r_scale: 线路阻抗缩放系数
+        :param v_root: 平衡节点电压
+        :param v_init: 电压初值（热启动），缺省为平启动
+        :param tol: 收敛判据（标幺值）
+        :param max_iteration: 最大迭代次数
+        """
+        s_load_pu = np.asarray(s_load_pu, dtype=complex)
+        batch_shape = s_load_pu.shape[1:]
+        s = s_load_pu[self.children]
+        z_tree = self._tree_impedance(r_scale)
+
+        if v_init is None:
+            v = np.full(s.shape, v_root, dtype=complex)
+        else:
+            v = np.array(np.broadcast_to(np.asarray(v_init)[self.children], s.shape), dtype=complex)
+
+        n_tie = len(self.tie_lines)
+        j_tie = np.zeros((n_tie, *batch_shape), dtype=complex)
+        if n_tie:
+            zb_inv = self._breakpoint_matrix(r_scale)
+            z_tie = self.model.branch_impedance_pu(r_scale)[self.tie_lines].reshape(-1, *([1] * len(batch_shape)))
+            from_mask, to_mask = self.tie_from >= 0, self.tie_to >= 0
+
+        for iteration in range(1, max_iteration + 1):
+            i_node = np.conj(s / v)
+            if n_tie:
+                # 开环点电流：首端相当于负荷 +J，末端相当于负荷 -J
+                np.add.at(i_node, self.tie_from[from_mask], j_tie[from_mask])
+                np.subtract.at(i_node, self.tie_to[to_mask], j_tie[to_mask])
+            v_new, i_tree = self._sweep(i_node, z_tree, v_root)
+            delta = np.abs(v_new - v).max()
+            v = v_new
+
+            if n_tie:
+                v_full = np.concatenate([np.full((1, *batch_shape), v_root), v])
+                mismatch = v_full[self.tie_from + 1] - v_full[self.tie_to + 1] - z_tie * j_tie
+                j_tie = j_tie + np.tensordot(zb_inv, mismatch, axes=1)
+                delta = max(delta, np.abs(mismatch).max())
+
+            if delta < tol:
+                break
+        else:
+            raise SweepConvergenceError(f"前推回代 {max_iteration} 次迭代后未收敛（最大偏差 {delta:.3e}）")
+
+        v_bus = np.empty((self.model.n_bus, *batch_shape), dtype=complex)
+        v_bus[self.model.slack_pos] = v_root
+        v_bus[self.children] = v
+        i_branch = np.zeros((self.model.n_line, *batch_shape), dtype=complex)
+        i_branch[self.tree_lines] = self.tree_sign.reshape(-1, *([1] * len(batch_shape))) * i_tree
+        i_branch[self.tie_lines] = j_tie
+        return SweepResult(v=v_bus, i_branch=i_branch, iterations=iteration)
+
+
+_solvers: "weakref.WeakKeyDictionary[NetworkModel, Dict[bytes, SweepSolver]]" = weakref.WeakKeyDictionary()
+_solvers_lock = threading.Lock()
+
+
+def get_sweep_solver(model: NetworkModel, in_service: np.ndarray | None = None) -> SweepSolver:
+    """按网络模型和线路投运状态缓存求解器（即缓存 BFS 排序和关联矩阵分解）"""
+    key = b"" if in_service is None else np.asarray(in_service, dtype=bool).tobytes()
+    with _solvers_lock:
+        solvers = _solvers.setdefault(model, {})
+        if key not in solvers:
+            solvers[key] = SweepSolver(model, in_service)
+        return solvers[key]
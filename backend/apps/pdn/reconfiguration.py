@@ -0,0 +1,318 @@
+"""
+配电网络重构：搜索开关（线路投运状态）组合，使网损或电压偏差最小
+
+37 条线路的开关组合无法穷举，这里用支路交换（branch exchange）+ 禁忌搜索：
+    - 邻域：当前辐射状拓扑中断开一条闭合的线路、同时闭合一条断开的线路；
+    - 求解前先用并查集过滤掉非辐射状的候选：断开线路 l 后剩余的树只需建一次并查集，
+      再逐个查询各断开线路的两端是否已连通（已连通即成环、不连通即重新连成一棵树），每个候选 O(1)；
+    - 求过的拓扑按 网络版本 + 投运状态 + 参数 记忆（进程内 LRU），禁忌搜索反复经过同一拓扑时不再求解；
+    - 同一轮的候选互相独立，可用核数大于 1 时分块分发到进程池并行求解。
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from . import radial
+from .cache import result_cache
+from .network import DEFAULT_NETWORK_ID, LOADING_MAX_PERCENT, VM_MAX_PU, VM_MIN_PU, NetworkModel, network_registry
+from .parallel import get_process_pool, max_workers
+
+OBJECTIVES = {"loss": "网损最小", "voltage_deviation": "电压偏差最小"}
+
+# 候选数不超过该值时直接在当前进程求解
+INLINE_THRESHOLD = 16
+
+
+class UnionFind:
+    """并查集（路径减半 + 按大小合并）"""
+
+    def __init__(self, n: int):
+        self.parent = np.arange(n)
+        self.size = np.ones(n, dtype=int)
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> bool:
+        """合并 a、b 所在的集合，二者已在同一集合（即成环）时返回 False"""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+
+def is_radial(model: NetworkModel, in_service: np.ndarray) -> bool:
+    """投运线路是否构成连通所有母线的树（n-1 条线路且无环）"""
+    lines = np.flatnonzero(in_service)
+    if len(lines) != model.n_bus - 1:
+        return False
+    uf = UnionFind(model.n_bus)
+    return all(uf.union(a, b) for a, b in zip(model.f_pos[lines], model.t_pos[lines]))
+
+
+def radial_swaps(model: NetworkModel, in_service: np.ndarray, switchable: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    当前辐射状拓扑的所有可行交换 (断开的线路, 闭合的线路)，结果仍为辐射状
+
+    断开线路 l 后剩余的森林只建一次并查集，闭合线路 t 可行当且仅当 t 的两端分属两棵树。
+    """
+    closed = np.flatnonzero(in_service & switchable)
+    opened = np.flatnonzero(~in_service & switchable)
+    tree = np.flatnonzero(in_service)
+    f, t = model.f_pos, model.t_pos
+    swaps = []
+    for line in closed:
+        uf = UnionFind(model.n_bus)
+        for other in tree:
+            if other != line:
+                uf.union(f[other], t[other])
+        swaps.extend((int(line), int(tie)) for tie in opened if uf.find(f[tie]) != uf.find(t[tie]))
+    return swaps
+
+
+def evaluate_configuration(model: NetworkModel, in_service: np.ndarray, load_scale: float = 1.0,
+                           r_scale: float = 1.0) -> Dict:
+    """求解某一辐射状拓扑的潮流，返回网损与电压/负载率指标"""
+    solver = radial.SweepSolver(model, in_service)
+    s_load_pu = (model.base_load_p_mw + 1j * model.base_load_q_mvar) * load_scale / model.sn_mva
+    try:
+        result = solver.solve(s_load_pu, r_scale=r_scale)
+    except radial.SweepConvergenceError:
+        return {"converged": False, "feasible": False, "losses_mw": np.inf, "voltage_deviation_pct": np.inf}
+    vm = np.abs(result.v)
+    i_abs = np.abs(result.i_branch)
+    loading = i_abs * model.current_base_ka() / model.max_i_ka * 100
+    losses = float((i_abs ** 2 * model.branch_impedance_pu(r_scale).real).sum() * model.sn_mva)
+    return {
+        "converged": True,
+        "feasible": bool(vm.min() >= VM_MIN_PU and vm.max() <= VM_MAX_PU and loading.max() <= LOADING_MAX_PERCENT),
+        "losses_mw": losses,
+        "voltage_deviation_pct": float(np.abs(1 - vm).max() * 100),
+        "min_vm_pu": float(vm.min()),
+        "max_loading": float(loading.max()),
+    }
+
+
+def _evaluate_in_worker(network_id: str, load_scale: float, r_scale: float, configurations: List[bytes]) -> List[Dict]:
+    """进程池中执行：求解一块候选拓扑"""
+    model = network_registry.get(network_id)
+    return [evaluate_configuration(model, np.frombuffer(c, dtype=bool), load_scale, r_scale) for c in configurations]
+
+
+class ConfigurationMemo:
+    """已求解拓扑的进程内 LRU 缓存，附带命中计数"""
+
+    def __init__(self, maxsize: int = 4096):
+        self._maxsize = maxsize
+        self._store: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._store:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return self._store[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value: Dict):
+        with self._lock:
+            self._store[key] = value
+            while len(self._store) > self._maxsize:
+                self._store.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self.hits = self.misses = 0
+
+
+configuration_memo = ConfigurationMemo()
+
+
+class Reconfigurator:
+    """某一 网络 + 负荷水平 + 阻抗缩放 下的重构搜索"""
+
+    def __init__(self, model: NetworkModel, objective: str = "loss", load_scale: float = 1.0, r_scale: float = 1.0,
+                 switchable: np.ndarray | None = None, network_id: str = DEFAULT_NETWORK_ID,
+                 memo: ConfigurationMemo = configuration_memo):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"未知的优化目标：{objective}，可选：{'、'.join(OBJECTIVES)}")
+        self.model = model
+        self.objective = objective
+        self.load_scale = float(load_scale)
+        self.r_scale = float(r_scale)
+        self.switchable = np.ones(model.n_line, dtype=bool) if switchable is None else np.asarray(switchable, bool)
+        self.network_id = network_id
+        self.memo = memo
+        self.evaluations = 0
+        self.memo_hits = 0
+
+    def _key(self, configuration: bytes):
+        return self.model.content_hash, self.load_scale, self.r_scale, configuration
+
+    def score(self, metrics: Dict) -> Tuple[bool, float]:
+        """越小越好：先比较是否越限，再比较目标值"""
+        return not metrics["feasible"], metrics["losses_mw" if self.objective == "loss" else "voltage_deviation_pct"]
+
+    def evaluate(self, configurations: List[np.ndarray]) -> List[Dict]:
+        """批量求解候选拓扑（已求解的直接取记忆结果，其余在进程池中并行求解）"""
+        keys = [np.asarray(c, dtype=bool).tobytes() for c in configurations]
+        results: Dict[bytes, Dict] = {}
+        pending = []
+        for key in dict.fromkeys(keys):
+            cached = self.memo.get(self._key(key))
+            if cached is None:
+                pending.append(key)
+            else:
+                results[key] = cached
+                self.memo_hits += 1
+
+        workers = max_workers()
+        if len(pending) <= INLINE_THRESHOLD or workers <= 1:
+            solved = _evaluate_in_worker(self.network_id, self.load_scale, self.r_scale, pending)
+        else:
+            chunk_size = -(-len(pending) // workers)
+            pool = get_process_pool()
+            futures = [pool.submit(_evaluate_in_worker, self.network_id, self.load_scale, self.r_scale,
+                                   pending[i:i + chunk_size]) for i in range(0, len(pending), chunk_size)]
+            solved = [metrics for future in futures for metrics in future.result()]
+        for key, metrics in zip(pending, solved):
+            self.memo.put(self._key(key), metrics)
+            results[key] = metrics
+        self.evaluations += len(pending)
+        return [results[key] for key in keys]
+
+    def search(self, initial: np.ndarray, max_iterations: int = 50, tabu_tenure: int = 7,
+               patience: int = 8) -> Dict:
+        """
+        禁忌搜索：每轮移动到邻域中最好的非禁忌拓扑（优于历史最优时不受禁忌限制），
+        连续 patience 轮没有改进或达到 max_iterations 后停止
+        """
+        if not is_radial(self.model, initial):
+            raise ValueError("初始拓扑不是辐射状网络")
+        current = np.asarray(initial, dtype=bool).copy()
+        current_metrics = self.evaluate([current])[0]
+        best, best_metrics = current.copy(), current_metrics
+        tabu = deque(maxlen=tabu_tenure)
+        history = [{"iteration": 0, **self._summary_metrics(current_metrics)}]
+        stall = 0
+        candidates_total = rejected_total = 0
+
+        for iteration in range(1, max_iterations + 1):
+            swaps = radial_swaps(self.model, current, self.switchable)
+            candidates_total += len(swaps)
+            rejected_total += int((current & self.switchable).sum() * (~current & self.switchable).sum()) - len(swaps)
+            if not swaps:
+                break
+            configurations = []
+            for line, tie in swaps:
+                configuration = current.copy()
+                configuration[line], configuration[tie] = False, True
+                configurations.append(configuration)
+            metrics = self.evaluate(configurations)
+
+            choice = None
+            for (line, tie), configuration, m in sorted(zip(swaps, configurations, metrics),
+                                                         key=lambda item: self.score(item[2])):
+                if (line not in tabu and tie not in tabu) or self.score(m) < self.score(best_metrics):
+                    choice = (line, tie), configuration, m
+                    break
+            if choice is None:
+                break
+            (line, tie), current, current_metrics = choice
+            tabu.extend([line, tie])
+            history.append({"iteration": iteration, **self._summary_metrics(current_metrics)})
+            if self.score(current_metrics) < self.score(best_metrics):
+                best, best_metrics = current.copy(), current_metrics
+                stall = 0
+            else:
+                stall += 1
+                if stall >= patience:
+                    break
+
+        return {
+            "initial": self._describe(initial, history[0]),
+            "best": self._describe(best, self._summary_metrics(best_metrics)),
+            "iterations": len(history) - 1,
+            "candidates": candidates_total,
+            "rejected_non_radial": rejected_total,
+            "evaluations": self.evaluations,
+            "memo_hits": self.memo_hits,
+            "history": history,
+        }
+
+    @staticmethod
+    def _summary_metrics(metrics: Dict) -> Dict:
+        # 未收敛时搜索用的 inf 不能 json 序列化（DRF 默认 STRICT_JSON），输出为 None
+        return {k: ((round(v, 6) if np.isfinite(v) else None) if isinstance(v, float) else v)
+                for k, v in metrics.items()}
+
+    def _describe(self, in_service: np.ndarray, metrics: Dict) -> Dict:
+        open_lines = np.flatnonzero(~np.asarray(in_service, dtype=bool))
+        model = self.model
+        return {
+            **{k: v for k, v in metrics.items() if k != "iteration"},
+            "open_lines": [{"line": int(k) + 1, "name": f"线{k + 1}", "fbus": int(model.bus_i[model.f_pos[k]]),
+                            "tbus": int(model.bus_i[model.t_pos[k]])} for k in open_lines],
+        }
+
+
+def compute_reconfiguration(objective: str = "loss", load_scale: float = 1.0, r_scale: float = 1.0,
+                            switchable: Iterable[int] | None = None, max_iterations: int = 50,
+                            network_id: str = DEFAULT_NETWORK_ID) -> Dict:
+    """
+    从 line.csv 的开关状态出发搜索最优辐射状拓扑（结果缓存）
+
+    :param switchable: 可操作的线路编号（从 1 开始），缺省为全部线路
+    :return: 初始/最优拓扑的指标与断开的线路，line_status 可直接作为规划方案的参数覆盖；
+        cached、elapsed_s、evaluations、memo_hits 为本次调用的统计（不写入缓存，命中缓存时 evaluations 为 0）
+    """
+    model = network_registry.get(network_id)
+    initial = model.line_df["status"].to_numpy() == 1
+    mask = np.ones(model.n_line, dtype=bool)
+    if switchable is not None:
+        lines = np.asarray(sorted(set(switchable)), dtype=int)
+        if len(lines) and (lines.min() < 1 or lines.max() > model.n_line):
+            raise ValueError(f"线路编号超出范围 1~{model.n_line}")
+        mask = np.zeros(model.n_line, dtype=bool)
+        mask[lines - 1] = True
+
+    start = time.perf_counter()
+    # 本次调用的统计，不写入缓存
+    call_stats = {"cached": True, "evaluations": 0, "memo_hits": 0}
+
+    def compute():
+        result = Reconfigurator(model, objective, load_scale, r_scale, mask, network_id).search(
+            initial, max_iterations=max_iterations)
+        call_stats.update(cached=False, evaluations=result.pop("evaluations"), memo_hits=result.pop("memo_hits"))
+        best_open = {line["line"] for line in result["best"]["open_lines"]}
+        initial_open = {line["line"] for line in result["initial"]["open_lines"]}
+        return {
+            "objective": objective,
+            "objective_name": OBJECTIVES[objective],
+            **result,
+            # 相对 line.csv 需要改变状态的线路，可直接保存为规划方案
+            "line_status": {str(line): int(line not in best_open)
+                            for line in sorted(best_open ^ initial_open)},
+        }
+
+    params = {"objective": objective, "load_scale": float(load_scale), "r_scale": float(r_scale),
+              "switchable": np.flatnonzero(mask).tolist(), "max_iterations": max_iterations,
+              "limits": [VM_MIN_PU, VM_MAX_PU, LOADING_MAX_PERCENT]}
+    result = result_cache.get_or_compute(model.content_hash, "reconfiguration", params, compute)
+    return {**result, **call_stats, "elapsed_s": round(time.perf_counter() - start, 4)}
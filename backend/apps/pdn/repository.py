@@ -0,0 +1,84 @@
+"""
+数据库中的网络数据（按列读取为 numpy 数组）
+
+整张表通过 values_list 一次读出（每张表一条查询，不实例化模型对象），再按列转换为 numpy 数组，
+列名与 demo_data 中的 bus.csv/line.csv 一致，可以直接交给 network.NetworkModel 构建网络。
+"""
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from django.db import connection
+
+from .models import BranchData, BusData
+
+BUS_COLUMNS = ("bus_i", "type", "Pd", "Qd", "Gs", "Bs", "area", "Vm", "Va", "baseKV", "zone", "Vmax", "Vmin")
+# 线路编号（从 1 开始）按主键顺序，即导入顺序
+BRANCH_COLUMNS = ("fbus", "tbus", "r", "x", "b", "rateA", "rateB", "ratio", "angle", "status", "angmin", "angmax")
+INT_COLUMNS = {"bus_i", "type", "area", "zone", "fbus", "tbus", "status"}
+
+
+class EmptyNetworkError(LookupError):
+    """数据库中没有网络数据"""
+
+
+@dataclass(frozen=True)
+class NetworkArrays:
+    """按列存放的网络数据：列名 -> 一维数组"""
+    bus: Dict[str, np.ndarray]
+    branch: Dict[str, np.ndarray]
+
+    @property
+    def n_bus(self) -> int:
+        return len(self.bus["bus_i"])
+
+    @property
+    def n_branch(self) -> int:
+        return len(self.branch["fbus"])
+
+    def to_frames(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """转换为与 bus.csv/line.csv 同结构的 (bus_df, line_df)"""
+        return pd.DataFrame(self.bus, columns=BUS_COLUMNS), pd.DataFrame(self.branch, columns=BRANCH_COLUMNS)
+
+
+def _to_columns(rows: list, columns: tuple) -> Dict[str, np.ndarray]:
+    # BusData.type 是字符型，整体按 float 转换后再还原整数列
+    table = np.array(rows, dtype=float).reshape(len(rows), len(columns))
+    return {
+        name: table[:, k].astype(np.int64) if name in INT_COLUMNS else table[:, k].copy()
+        for k, name in enumerate(columns)
+    }
+
+
+def load_network_arrays() -> NetworkArrays:
+    """读取数据库中的整个网络（两条查询）"""
+    bus_rows = list(BusData.objects.order_by("bus_i").values_list(*BUS_COLUMNS))
+    if not bus_rows:
+        raise EmptyNetworkError("数据库中没有网络数据，请先执行 manage.py import_network 导入")
+    # values_list 取外键字段得到的是 fbus_id/tbus_id，不会联表
+    branch_rows = list(BranchData.objects.order_by("id").values_list(*BRANCH_COLUMNS))
+    return NetworkArrays(bus=_to_columns(bus_rows, BUS_COLUMNS), branch=_to_columns(branch_rows, BRANCH_COLUMNS))
+
+
+def network_stamp() -> tuple:
+    """
+    两张表的行数与最大主键（一条查询），作为网络指纹的一部分
+
+    bulk_create、executemany（迁移、导入）不触发信号、不递增数据版本号，但会改变行数或最大主键；
+    QuerySet.update() 之类的原地修改仍需手动调用 result_cache.invalidate()。
+    """
+    quote = connection.ops.quote_name
+    parts = []
+    for model in (BusData, BranchData):
+        table, pk = quote(model._meta.db_table), quote(model._meta.pk.column)
+        parts += [f"(SELECT COUNT(*) FROM {table})", f"(SELECT MAX({pk}) FROM {table})"]
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(parts)}")
+        return tuple(cursor.fetchone())
+
+
+def load_network_frames() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """读取数据库中的整个网络，返回 (bus_df, line_df)"""
+    return load_network_arrays().to_frames()
@@ -0,0 +1,207 @@
+"""
+时序数据的预聚合（rollup）与按 (时间范围, 数据频率) 查询
+
+每个原始数据集 <name> 维护 1h、1d 两级预聚合，每级 min/max/sum/count 四个统计量，各存为一个时序数据集
+<name>@<freq>.<stat>（与原始数据集同样按天分区、按列存放），mean = sum / count。
+
+- 写入原始数据时（write/write_frame）只重算受影响的时间桶：1h 由原始数据聚合，1d 再由 1h 聚合；
+- 查询时选择能整除所需频率的最粗一级（原始数据、1h、1d），只在该级数据上再做少量合并，
+  例如一个月的 1 天分辨率只读 30 行日聚合，不需要扫描原始数据重新降采样。
+
+注意直接调用 TimeSeries.write 写入原始数据不会更新预聚合。
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .tsdb import TimeSeries, TimeSeriesStore, ts_store
+
+ROLLUP_FREQS = ("1h", "1d")
+STATS = ("min", "max", "sum", "count")
+# 查询支持的统计量
+QUERY_STATS = ("mean", "min", "max", "sum")
+# 查询支持的数据频率
+QUERY_FREQS = ("15min", "30min", "1h", "6h", "1d")
+# 时间范围 -> 以数据最后时刻所在的 日/周/月 为准
+RANGES = {"今日": "D", "本周": "W", "本月": "M"}
+
+
+def rollup_name(name: str, freq: str, stat: str) -> str:
+    return f"{name}@{freq}.{stat}"
+
+
+def _ns(freq: str) -> int:
+    return int(pd.Timedelta(freq).value)
+
+
+Stats = Dict[str, np.ndarray]
+
+
+def _aggregate(times: np.ndarray, stats: Stats, freq: str) -> Tuple[np.ndarray, Stats]:
+    """
+    将 (时间, 列) 的统计量合并到更粗的时间桶
+
+    :param times: 升序的时间（int64 ns）
+    :param stats: min/max/sum/count，形状均为 (n_t, 列数)，原始数据时 min = max = sum = 值、count = 1
+    """
+    buckets = times - times % _ns(freq)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    # NaN（未写入或未收敛）不参与统计
+    with np.errstate(invalid="ignore"):
+        valid = stats["count"] > 0
+        merged = {
+            "min": np.fmin.reduceat(np.where(valid, stats["min"], np.nan), starts, axis=0),
+            "max": np.fmax.reduceat(np.where(valid, stats["max"], np.nan), starts, axis=0),
+            "sum": np.add.reduceat(np.where(valid, stats["sum"], 0), starts, axis=0),
+            "count": np.add.reduceat(np.where(valid, stats["count"], 0), starts, axis=0),
+        }
+    return buckets[starts], merged
+
+
+def _raw_stats(values: np.ndarray) -> Stats:
+    values = values.astype(np.float64)
+    return {"min": values, "max": values, "sum": np.nan_to_num(values), "count": (~np.isnan(values)).astype(float)}
+
+
+def _empty_stats(n_t: int, n_columns: int) -> Stats:
+    """没有有效数据的时间桶的统计量"""
+    return {stat: np.full((n_t, n_columns), np.nan if stat in ("min", "max") else 0.0) for stat in STATS}
+
+
+def _runs(buckets: np.ndarray, step_ns: int) -> List[Tuple[int, int]]:
+    """升序、不重复的时间桶 -> 连续的 [start, end) 区间"""
+    breaks = np.flatnonzero(np.diff(buckets) != step_ns) + 1
+    return [(int(run[0]), int(run[-1]) + step_ns) for run in np.split(buckets, breaks)]
+
+
+def _read_stats(store: TimeSeriesStore, name: str, freq: str | None, start_ns: int | None, end_ns: int | None,
+                columns: Sequence[str]) -> Tuple[np.ndarray, Stats]:
+    """读取原始数据（freq 为 None）或某一级预聚合，返回 (时间, 统计量)"""
+    if freq is None:
+        times, values = store.get(name).read(start_ns, end_ns, columns)
+        return times.asi8, _raw_stats(values)
+    # count、sum 总是写入数值；全部为 NaN 的时间桶 min/max 为 NaN，读取时不返回，需要按 count 的时间对齐
+    times, count = store.get(rollup_name(name, freq, "count")).read(start_ns, end_ns, columns)
+    times = times.asi8
+    stats = {"count": count.astype(np.float64)}
+    for stat in ("min", "max", "sum"):
+        stat_times, values = store.get(rollup_name(name, freq, stat)).read(start_ns, end_ns, columns)
+        stats[stat] = np.full(count.shape, np.nan)
+        stats[stat][np.searchsorted(times, stat_times.asi8)] = values
+    return times, stats
+
+
+class RollupManager:
+    """原始数据集的写入与预聚合维护"""
+
+    def __init__(self, store: TimeSeriesStore):
+        self.store = store
+
+    def _rollup(self, name: str, freq: str, stat: str, columns: Sequence[str]) -> TimeSeries:
+        return self.store.get_or_create(rollup_name(name, freq, stat), columns, freq=freq, dtype="float32")
+
+    def update(self, name: str, times, columns: Sequence[str]):
+        """重算 times 所在时间桶的各级预聚合"""
+        raw_step_ns = self.store.get(name).step_ns
+        source_ns = pd.DatetimeIndex(times).asi8
+        source_freq = None
+        for freq in ROLLUP_FREQS:
+            step_ns = _ns(freq)
+            # 不比原始数据粗的一级不需要预聚合
+            if step_ns <= raw_step_ns:
+                continue
+            buckets = np.unique(source_ns - source_ns % step_ns)
+            for start_ns, end_ns in _runs(buckets, step_ns):
+                stats_times, stats = _read_stats(self.store, name, source_freq, start_ns, end_ns, columns)
+                # 数据全部为 NaN 的时间桶同样要覆盖写入（min/max 为 NaN、count 为 0），不能保留之前的预聚合
+                run = buckets[(buckets >= start_ns) & (buckets < end_ns)]
+                merged = _empty_stats(len(run), len(columns))
+                if len(stats_times):
+                    bucket_times, bucket_stats = _aggregate(stats_times, stats, freq)
+                    positions = np.searchsorted(run, bucket_times)
+                    for stat in STATS:
+                        merged[stat][positions] = bucket_stats[stat]
+                for stat in STATS:
+                    self._rollup(name, freq, stat, columns).write(run, merged[stat], columns=columns)
+            # 下一级由本级聚合
+            source_ns, source_freq = buckets, freq
+
+    def write(self, name: str, times, values, columns: Sequence[str], freq: str = "15min", dtype: str = "float32"):
+        """写入原始数据（数据集不存在时创建）并更新预聚合"""
+        self.store.get_or_create(name, columns, freq=freq, dtype=dtype).write(times, values, columns=columns)
+        self.update(name, times, columns)
+
+    def write_frame(self, name: str, df: pd.DataFrame, freq: str = "15min", dtype: str = "float32"):
+        """写入以时间为索引的宽表"""
+        self.write(name, df.index, df.to_numpy(dtype=float), [str(c) for c in df.columns], freq=freq, dtype=dtype)
+
+    def rebuild(self, name: str):
+        """由原始数据重建全部预聚合"""
+        series = self.store.get(name)
+        for day in series.days():
+            times, _ = series.read(day, day + np.timedelta64(1, "D"))
+            if len(times):
+                self.update(name, times, series.columns)
+
+
+@dataclass
+class QueryResult:
+    """查询结果：values 的形状为 (n_t, 列数)"""
+    times: pd.DatetimeIndex
+    columns: List[str]
+    values: np.ndarray
+    # 实际读取的数据：raw 或预聚合的频率
+    source: str
+
+
+def resolve_range(series: TimeSeries, range_: str) -> Tuple[pd.Timestamp, pd.Timestamp] | None:
+    """今日/本周/本月 -> [start, end)，以数据最后时刻为准（没有数据时返回 None）"""
+    days = series.days()
+    if not len(days):
+        return None
+    last = pd.Timestamp(days[-1])
+    period = last.to_period(RANGES[range_])
+    return period.start_time, period.end_time.floor("D") + pd.Timedelta("1D")
+
+
+def query(store: TimeSeriesStore, name: str, start=None, end=None, freq: str = "1h",
+          columns: Sequence[str] | None = None, stat: str = "mean") -> QueryResult:
+    """
+    按 [start, end) 时间范围、数据频率查询统计量，选择能整除 freq 的最粗一级数据
+
+    :param freq: 数据频率，不能比原始数据更细
+    :param stat: mean/min/max/sum
+    """
+    raw = store.get(name)
+    columns = list(columns) if columns is not None else list(raw.columns)
+    freq_ns = _ns(freq)
+    if freq_ns < raw.step_ns or freq_ns % raw.step_ns:
+        raise ValueError(f"数据频率 {freq} 应为原始数据频率 {raw.freq} 的整数倍")
+    start_ns = pd.Timestamp(start).value if start is not None else None
+    end_ns = pd.Timestamp(end).value if end is not None else None
+
+    source = None
+    for rollup_freq in ROLLUP_FREQS:
+        if _ns(rollup_freq) > raw.step_ns and freq_ns % _ns(rollup_freq) == 0:
+            try:
+                store.get(rollup_name(name, rollup_freq, "count"))
+            except KeyError:
+                break
+            source = rollup_freq
+    times, stats = _read_stats(store, name, source, start_ns, end_ns, columns)
+    if source is None or _ns(source) != freq_ns:
+        times, stats = _aggregate(times, stats, freq) if len(times) else (times, stats)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if stat == "mean":
+            values = np.where(stats["count"] > 0, stats["sum"] / stats["count"], np.nan)
+        elif stat == "sum":
+            values = np.where(stats["count"] > 0, stats["sum"], np.nan)
+        else:
+            values = stats[stat]
+    return QueryResult(times=pd.DatetimeIndex(times), columns=columns, values=values, source=source or "raw")
+
+
+rollup_manager = RollupManager(ts_store)
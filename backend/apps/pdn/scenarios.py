@@ -0,0 +1,75 @@
+"""
+load_scale / r_scale 参数扫描
+
+参数组合分块后分发到进程池，各块求解完成后立即返回（流式），全部完成后汇总成电压偏差率、网损率曲面。
+"""
+import itertools
+import math
+from concurrent.futures import as_completed
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+from .network import DEFAULT_NETWORK_ID
+from .parallel import get_process_pool, max_workers
+from .powerflow import run_powerflow
+
+# 参数组合数不超过该值时直接在当前进程求解，不值得分发到进程池
+INLINE_THRESHOLD = 4
+
+SUMMARY_KEYS = ("converged", "total_power", "max_loading", "voltage_deviation", "network_loss", "error")
+
+
+def expand_grid(load_scales: Iterable[float], r_scales: Iterable[float]) -> List[Tuple[float, float]]:
+    """网格 -> 参数组合列表"""
+    return list(itertools.product(load_scales, r_scales))
+
+
+def _solve_points(network_id: str, engine: str, points: List[Tuple[int, float, float]]) -> List[Dict]:
+    """进程池中执行：求解一块参数组合，只返回汇总指标"""
+    results = []
+    for index, load_scale, r_scale in points:
+        data = run_powerflow(load_scale=load_scale, r_scale=r_scale, engine=engine, network_id=network_id)
+        result = {"index": index, "load_scale": load_scale, "r_scale": r_scale}
+        result.update({k: float(data[k]) if k not in ("converged", "error") else data[k]
+                       for k in SUMMARY_KEYS if k in data})
+        results.append(result)
+    return results
+
+
+def iter_sweep(points: List[Tuple[float, float]], engine: str = "nr",
+               network_id: str = DEFAULT_NETWORK_ID) -> Iterator[Dict]:
+    """按完成顺序逐个产出各参数组合的结果"""
+    indexed = [(i, float(load_scale), float(r_scale)) for i, (load_scale, r_scale) in enumerate(points)]
+    workers = max_workers()
+    if len(indexed) <= INLINE_THRESHOLD or workers <= 1:
+        for point in indexed:
+            yield from _solve_points(network_id, engine, [point])
+        return
+
+    # 每个进程分到若干块，块太小则进程间通信开销占比高，块太大则结果返回不够及时
+    chunk_size = max(1, math.ceil(len(indexed) / (workers * 4)))
+    pool = get_process_pool()
+    futures = [pool.submit(_solve_points, network_id, engine, indexed[i:i + chunk_size])
+               for i in range(0, len(indexed), chunk_size)]
+    try:
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        # 客户端提前断开时，取消尚未开始的块
+        for future in futures:
+            future.cancel()
+
+
+def build_surfaces(results: List[Dict]) -> Dict:
+    """汇总为 load_scale × r_scale 的曲面，缺失或未收敛的组合为 None"""
+    load_scales = sorted({r["load_scale"] for r in results})
+    r_scales = sorted({r["r_scale"] for r in results})
+    row = {v: i for i, v in enumerate(load_scales)}
+    col = {v: j for j, v in enumerate(r_scales)}
+    surfaces = {key: [[None] * len(r_scales) for _ in load_scales] for key in ("voltage_deviation", "network_loss")}
+    for r in results:
+        if not r.get("converged"):
+            continue
+        for key, surface in surfaces.items():
+            surface[row[r["load_scale"]]][col[r["r_scale"]]] = r[key]
+    return {"load_scales": load_scales, "r_scales": r_scales, **surfaces}
@@ -0,0 +1,242 @@
+import pandas as pd
+from rest_framework import serializers
+
+from . import hosting, plans, powerflow, reconfiguration, rollups, scoring
+from .network import DEFAULT_NETWORK_ID, network_registry
+from .tsdb import ts_store
+
+
+class PowerFlowCalculationIn(serializers.Serializer):
+    # nr: pandapower 牛顿-拉夫逊法；sweep: 前推回代法（辐射状/弱环网配电网更快）
+    engine = serializers.ChoiceField(choices=powerflow.ENGINES, default="nr")
+
+
+class PowerFlowSweepPointIn(serializers.Serializer):
+    load_scale = serializers.FloatField(min_value=0)
+    r_scale = serializers.FloatField(min_value=0)
+
+
+class PowerFlowSweepIn(serializers.Serializer):
+    # 二选一：load_scales × r_scales 网格，或者直接给出参数组合列表 points
+    load_scales = serializers.ListField(child=serializers.FloatField(min_value=0), required=False)
+    r_scales = serializers.ListField(child=serializers.FloatField(min_value=0), required=False)
+    points = PowerFlowSweepPointIn(many=True, required=False)
+    engine = serializers.ChoiceField(choices=powerflow.ENGINES, default="nr")
+
+    MAX_POINTS = 10000
+
+    def validate(self, attrs):
+        if "points" in attrs:
+            points = [(p["load_scale"], p["r_scale"]) for p in attrs["points"]]
+        elif "load_scales" in attrs and "r_scales" in attrs:
+            points = [(ls, rs) for ls in attrs["load_scales"] for rs in attrs["r_scales"]]
+        else:
+            raise serializers.ValidationError("需要提供 load_scales 和 r_scales，或者 points")
+        if not points:
+            raise serializers.ValidationError("参数组合不能为空")
+        if len(points) > self.MAX_POINTS:
+            raise serializers.ValidationError(f"参数组合数不能超过 {self.MAX_POINTS}")
+        attrs["expanded_points"] = points
+        return attrs
+
+
+def _resolve_plan(name: str) -> plans.PlanDefinition:
+    """方案名称 -> 方案参数（Plan 表中不存在、参数不合法或与网络不符时报校验错误）"""
+    try:
+        plan = plans.get_plan(name)
+        plan.check(network_registry.get())
+        return plan
+    except ValueError as e:
+        raise serializers.ValidationError(str(e))
+
+
+class PvHostingCapacityIn(serializers.Serializer):
+    plan = serializers.CharField(default="方案一")
+    weather = serializers.ChoiceField(choices=list(hosting.WEATHER_PV_FACTORS), default="晴天")
+    season = serializers.ChoiceField(choices=list(hosting.SEASON_FACTORS), default="夏季")
+    # region: 按区域 A~F；bus: 按母线
+    by = serializers.ChoiceField(choices=["region", "bus"], default="region")
+
+    def validate_plan(self, value):
+        return _resolve_plan(value)
+
+
+class ProbabilisticPowerFlowIn(serializers.Serializer):
+    plan = serializers.CharField(default="方案一")
+    weather = serializers.ChoiceField(choices=list(hosting.WEATHER_PV_FACTORS), default="晴天")
+    season = serializers.ChoiceField(choices=list(hosting.SEASON_FACTORS), default="夏季")
+    hour = serializers.IntegerField(min_value=0, max_value=23, default=12)
+    seed = serializers.IntegerField(min_value=0, default=0)
+    load_std = serializers.FloatField(min_value=0, max_value=1, default=0.1)
+    load_correlation = serializers.FloatField(min_value=0, max_value=1, default=0.5)
+    pv_cv = serializers.FloatField(min_value=0, max_value=2, default=0.3)
+    pv_correlation = serializers.FloatField(min_value=0, max_value=1, default=0.8)
+    batch_size = serializers.IntegerField(min_value=1, max_value=5000, default=250)
+    min_samples = serializers.IntegerField(min_value=1, default=500)
+    max_samples = serializers.IntegerField(min_value=1, max_value=200000, default=10000)
+    confidence = serializers.FloatField(min_value=0.5, max_value=0.999, default=0.95)
+    probability_tolerance = serializers.FloatField(min_value=1e-4, max_value=0.5, default=0.01)
+    loading_tolerance = serializers.FloatField(min_value=1e-3, default=0.5)
+
+    def validate_plan(self, value):
+        # 参数可能作为任务参数写入 Job 表，这里只校验，保留方案名称
+        _resolve_plan(value)
+        return value
+
+    def validate(self, attrs):
+        if attrs["min_samples"] > attrs["max_samples"]:
+            raise serializers.ValidationError("min_samples 不能大于 max_samples")
+        return attrs
+
+
+class ReconfigurationIn(serializers.Serializer):
+    objective = serializers.ChoiceField(choices=list(reconfiguration.OBJECTIVES), default="loss")
+    load_scale = serializers.FloatField(min_value=0, default=1.0)
+    r_scale = serializers.FloatField(min_value=0, default=1.0)
+    # 可操作的线路编号（从 1 开始），缺省为全部线路
+    switchable = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    max_iterations = serializers.IntegerField(min_value=1, max_value=500, default=50)
+
+
+class TimeSeriesQueryIn(serializers.Serializer):
+    series = serializers.CharField()
+    # 二选一：时间范围（以数据最后时刻所在的 日/周/月 为准），或者 [start, end)；都不给时为全部数据
+    range = serializers.ChoiceField(choices=list(rollups.RANGES), required=False)
+    start = serializers.CharField(required=False)
+    end = serializers.CharField(required=False)
+    # 缺省为原始数据频率
+    freq = serializers.ChoiceField(choices=rollups.QUERY_FREQS, required=False)
+    stat = serializers.ChoiceField(choices=rollups.QUERY_STATS, default="mean")
+    # 逗号分隔的列名，缺省为全部列
+    columns = serializers.CharField(required=False)
+    # 每条曲线最多返回的点数（一般为图表的像素宽度），超过时按 LTTB 降采样
+    max_points = serializers.IntegerField(min_value=3, max_value=10000, required=False)
+
+    def validate_series(self, value):
+        # 不带网络编号的数据集名称（如 summary）为当前网络的数据集
+        if "." not in value:
+            value = f"{DEFAULT_NETWORK_ID}.{value}"
+        try:
+            return ts_store.get(value)
+        except (KeyError, ValueError) as e:
+            raise serializers.ValidationError(e.args[0])
+
+    def _validate_time(self, value):
+        try:
+            return pd.Timestamp(value)
+        except ValueError:
+            raise serializers.ValidationError(f"无法识别的时间：{value}")
+
+    def validate_start(self, value):
+        return self._validate_time(value)
+
+    def validate_end(self, value):
+        return self._validate_time(value)
+
+    def validate_columns(self, value):
+        return [c.strip() for c in value.split(",") if c.strip()]
+
+    def validate(self, attrs):
+        series = attrs["series"]
+        if "range" in attrs:
+            if "start" in attrs or "end" in attrs:
+                raise serializers.ValidationError("range 与 start/end 不能同时给出")
+            attrs["start"], attrs["end"] = rollups.resolve_range(series, attrs["range"]) or (None, None)
+        missing = [c for c in attrs.get("columns", []) if c not in series.columns]
+        if missing:
+            raise serializers.ValidationError({"columns": f"不存在的列：{missing[:5]}"})
+        attrs.setdefault("freq", series.freq)
+        if pd.Timedelta(attrs["freq"]) < pd.Timedelta(series.freq):
+            raise serializers.ValidationError({"freq": f"不能比原始数据频率 {series.freq} 更细"})
+        return attrs
+
+
+class N1ContingencyIn(serializers.Serializer):
+    load_scale = serializers.FloatField(min_value=0, default=1.0)
+    r_scale = serializers.FloatField(min_value=0, default=1.0)
+    # True: 所有线路投运（与潮流计算一致）；False: 联络线按 line.csv 的 status 断开
+    close_ties = serializers.BooleanField(default=True)
+
+
+class PlanEvaluationIn(serializers.Serializer):
+    # 缺省为全部方案
+    plans = serializers.ListField(child=serializers.CharField(), required=False)
+    weighting = serializers.ChoiceField(choices=scoring.WEIGHTINGS, default="等权重")
+
+    def validate_plans(self, value):
+        return [_resolve_plan(name) for name in value]
+
+
+class LoadChangeIn(serializers.Serializer):
+    bus = serializers.IntegerField()
+    dp_mw = serializers.FloatField(default=0.0)
+    dq_mvar = serializers.FloatField(default=0.0)
+
+
+class WhatIfIn(serializers.Serializer):
+    # 负荷变化量（增加为正），按母线编号
+    changes = LoadChangeIn(many=True)
+    load_scale = serializers.FloatField(min_value=0, default=1.0)
+    r_scale = serializers.FloatField(min_value=0, default=1.0)
+    close_ties = serializers.BooleanField(default=True)
+    # 线性估计的最大电压变化量超过该值（标幺值）时退回精确求解
+    tolerance_pu = serializers.FloatField(min_value=0, default=0.01)
+    exact = serializers.BooleanField(default=False)
+
+
+class PowerFlowJobIn(serializers.Serializer):
+    load_scale = serializers.FloatField(min_value=0, default=0.001)
+    r_scale = serializers.FloatField(min_value=0, default=1.0)
+    engine = serializers.ChoiceField(choices=powerflow.ENGINES, default="nr")
+
+
+class TimeSeriesJobIn(serializers.Serializer):
+    start = serializers.CharField(default="2023-01-01 00:00:00")
+    # 最多一整年（闰年）的 15 分钟分辨率
+    periods = serializers.IntegerField(min_value=1, max_value=366 * 96, default=24)
+    freq = serializers.ChoiceField(choices=["15min", "30min", "1h"], default="1h")
+    load_scale = serializers.FloatField(min_value=0, default=1.0)
+    r_scale = serializers.FloatField(min_value=0, default=1.0)
+    # 母线编号 -> 光伏装机容量（MW）
+    pv_capacity_mw = serializers.DictField(child=serializers.FloatField(min_value=0), default=dict)
+
+    def validate_start(self, value):
+        try:
+            return pd.Timestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            raise serializers.ValidationError(f"无法识别的时间：{value}")
+
+    def validate_pv_capacity_mw(self, value):
+        bus_i = set(network_registry.get(DEFAULT_NETWORK_ID).bus_i.tolist())
+        capacities = {}
+        for bus, capacity in value.items():
+            try:
+                bus = int(bus)
+            except ValueError:
+                raise serializers.ValidationError(f"母线编号应为整数：{bus}")
+            if bus not in bus_i:
+                raise serializers.ValidationError(f"不存在的母线：{bus}")
+            capacities[str(bus)] = capacity
+        return capacities
+
+
+# 任务类型 -> 参数校验
+JOB_PARAMS_IN = {
+    "powerflow": PowerFlowJobIn,
+    "time_series": TimeSeriesJobIn,
+    "sweep": PowerFlowSweepIn,
+    "n1": N1ContingencyIn,
+    "probabilistic": ProbabilisticPowerFlowIn,
+}
+
+
+class JobSubmitIn(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=list(JOB_PARAMS_IN))
+    params = serializers.DictField(default=dict)
+
+    def validate(self, attrs):
+        params_in = JOB_PARAMS_IN[attrs["kind"]](data=attrs["params"])
+        if not params_in.is_valid():
+            raise serializers.ValidationError({"params": params_in.errors})
+        attrs["params"] = {**params_in.validated_data, "network": DEFAULT_NETWORK_ID}
+        return attrs
@@ -0,0 +1,352 @@
+"""
+多维度评估：指标计算与赋权打分
+
+指标（indicator_scores.csv 中的各项）由各方案典型日的时序潮流结果计算：
+    - 一批方案的时序结果堆叠为 (方案数, 时间步数, 母线数/线路数) 的数组，所有指标一次数组运算得到；
+    - 各方案的原始指标按方案参数的内容哈希缓存（result_cache），未命中的方案分块分发到进程池并行计算，
+      比较 N 个方案的耗时随核数而不是 N 增长；
+    - 切换赋权方法（等权重/专家权重/熵权法/AHP）只重新打分，不重新计算潮流。
+
+打分沿用 indicator_scores.csv 的口径：越大越好 100·x/(x+r)，越小越好 100·r/(x+r)，r 为指标的参考值（得 50 分时的取值，
+r=1 即原 csv 的算法）；参考值为 None 的百分比指标直接以原始值（越小越好时为 100 - 原始值）作为得分。
+三相不平衡度、谐波、主变负载等数据不可得的指标原始值为 None，不参与打分（同维度内其余指标的权重重新归一化）。
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from . import contingency
+from .cache import result_cache
+from .hosting import Scenario
+from .network import DEFAULT_NETWORK_ID, LOADING_MAX_PERCENT, NetworkModel, network_registry
+from .parallel import get_process_pool, max_workers
+from .plans import PlanDefinition, list_plans
+from .timeseries import Profiles, run_time_series
+
+# 维度：键 -> 名称（dimension_scores.csv 的列为 <键>_score_0_100）
+DIMENSIONS = {"safety": "安全性", "reliability": "可靠性", "economic": "经济性", "environment": "环保性"}
+
+# 典型日：15 分钟分辨率，光伏按各母线基准负荷的一定比例配置
+STEPS_PER_DAY = 96
+STEP_HOURS = 24 / STEPS_PER_DAY
+PV_PENETRATION = 0.5
+
+# 经济/环境参数
+ELECTRICITY_PRICE_YUAN_PER_MWH = 450.0
+# 全国电网平均排放因子（tCO2/MWh）与碳价（元/t）
+EMISSION_FACTOR_T_PER_MWH = 0.5703
+CARBON_PRICE_YUAN_PER_T = 80.0
+# 光伏运维费用（元/MW/天）
+PV_OM_COST_YUAN_PER_MW_DAY = 110.0
+
+
+@dataclass(frozen=True)
+class Indicator:
+    name: str  # <维度>.<指标>，与 indicator_scores.csv 一致
+    label: str
+    larger_is_better: bool
+    # 得 50 分时的原始值；scale_with_load 为 True 时为每 MW 基准负荷的值
+    reference: float | None = 1.0
+    scale_with_load: bool = False
+
+    @property
+    def dimension(self) -> str:
+        return self.name.split(".")[0]
+
+
+INDICATORS: List[Indicator] = [
+    Indicator("safety.MLF_pct", "线路负载率", False, 50.0),
+    Indicator("safety.Sline_overload_rate_pct", "线路过载率", False, 1.0),
+    Indicator("safety.Ssub_overload_rate_pct", "主变过载率", False, 1.0),
+    Indicator("safety.LN1_pass_pct", "N-1通过率", True, None),
+    Indicator("reliability.voltage_deviation_pct", "电压偏差", False, 3.5),
+    Indicator("reliability.voltage_fluctuation_pct", "电压波动度", False, 2.0),
+    Indicator("reliability.unbalance_pct", "三相不平衡度", False, 2.0),
+    Indicator("reliability.THD_pct", "谐波畸变率", False, 5.0),
+    Indicator("economic.loss_rate_pct", "网损率", False, 5.0),
+    Indicator("economic.revenue_yuan", "光伏收益", True, 1500.0, scale_with_load=True),
+    Indicator("economic.carbon_benefit_yuan", "碳减排收益", True, 150.0, scale_with_load=True),
+    Indicator("economic.OM_cost_yuan", "运行费用", False, 100.0, scale_with_load=True),
+    Indicator("environment.RPG_pct", "可再生能源渗透率", True, 30.0),
+    Indicator("environment.Fgen_pct", "灵活电源占比", True, None),
+    Indicator("environment.AQ_index", "空气质量指数", True, None),
+    Indicator("environment.land_use_index", "土地利用指数", True, None),
+]
+INDICATOR_INDEX = {indicator.name: i for i, indicator in enumerate(INDICATORS)}
+
+# 专家权重：维度权重与维度内的指标权重（未列出的指标权重为 0）
+EXPERT_DIMENSION_WEIGHTS = {"safety": 0.35, "reliability": 0.3, "economic": 0.2, "environment": 0.15}
+EXPERT_INDICATOR_WEIGHTS = {
+    "safety.MLF_pct": 0.3, "safety.Sline_overload_rate_pct": 0.2, "safety.Ssub_overload_rate_pct": 0.1,
+    "safety.LN1_pass_pct": 0.4,
+    "reliability.voltage_deviation_pct": 0.4, "reliability.voltage_fluctuation_pct": 0.3,
+    "reliability.unbalance_pct": 0.15, "reliability.THD_pct": 0.15,
+    "economic.loss_rate_pct": 0.3, "economic.revenue_yuan": 0.3, "economic.carbon_benefit_yuan": 0.2,
+    "economic.OM_cost_yuan": 0.2,
+    "environment.RPG_pct": 0.5, "environment.Fgen_pct": 0.2, "environment.AQ_index": 0.15,
+    "environment.land_use_index": 0.15,
+}
+# AHP 维度两两比较矩阵（1~9 标度，顺序同 DIMENSIONS）：安全性 > 可靠性 > 经济性 > 环保性
+AHP_DIMENSION_MATRIX = [
+    [1, 2, 3, 4],
+    [1 / 2, 1, 2, 3],
+    [1 / 3, 1 / 2, 1, 2],
+    [1 / 4, 1 / 3, 1 / 2, 1],
+]
+# 平均随机一致性指标 RI（n = 1~9）
+AHP_RANDOM_INDEX = [0, 0, 0, 0.58, 0.90, 1.12, 1.24, 1.32, 1.41, 1.45]
+
+WEIGHTINGS = ["等权重", "专家权重", "熵权法", "AHP"]
+
+
+def _plan_results(model: NetworkModel, plans: List[PlanDefinition]):
+    """各方案典型日时序潮流（方案未配置光伏时按各母线基准负荷的 PV_PENETRATION 倍配置）"""
+    results = []
+    for plan in plans:
+        scenario = Scenario(plan=plan)
+        pv_capacity_mw = plan.pv_capacity(model, PV_PENETRATION) * scenario.pv_factor
+        profiles = Profiles.typical(model, periods=STEPS_PER_DAY, freq="15min", load_scale=scenario.load_factor,
+                                    pv_capacity_mw={int(bus): capacity for bus, capacity
+                                                    in zip(model.bus_i, pv_capacity_mw) if capacity > 0})
+        results.append(run_time_series(model, profiles, r_scale=scenario.r_scale,
+                                       in_service=scenario.in_service(model)))
+    return results
+
+
+def indicators_from_arrays(vm: np.ndarray, loading: np.ndarray, losses: np.ndarray, load: np.ndarray, pv: np.ndarray,
+                           pv_capacity: np.ndarray, step_hours: float = STEP_HOURS) -> np.ndarray:
+    """
+    由时序潮流结果计算原始指标矩阵 (方案数, 指标数)，N-1 通过率等不能由时序结果得到的指标为 nan
+
+    :param vm: 母线电压 (方案, 时间步, 母线)
+    :param loading: 线路负载率 (方案, 时间步, 线路)
+    :param losses: 网损 (方案, 时间步)，load、pv 同，分别为负荷与光伏出力，单位 MW
+    :param pv_capacity: 光伏装机容量 (方案,)，单位 MW
+    """
+    # 平衡节点倒送的部分视为未被消纳
+    p_slack = load - pv + losses
+    pv_consumed_mwh = (pv - np.clip(-p_slack, 0, None)).sum(axis=1) * step_hours
+    load_mwh = load.sum(axis=1) * step_hours
+    losses_mwh = losses.sum(axis=1) * step_hours
+    # 与平衡节点不连通（电压为 0）的母线不计入电压偏差
+    deviation = np.where(vm > 0, np.abs(1 - vm), 0)
+
+    raw = np.full((len(vm), len(INDICATORS)), np.nan)
+
+    def put(name, values):
+        raw[:, INDICATOR_INDEX[name]] = values
+
+    put("safety.MLF_pct", loading.max(axis=(1, 2)))
+    put("safety.Sline_overload_rate_pct", (loading > LOADING_MAX_PERCENT).mean(axis=(1, 2)) * 100)
+    # 各时刻最大电压偏差的日平均；各母线日内电压最大变化量的最大值
+    put("reliability.voltage_deviation_pct", deviation.max(axis=2).mean(axis=1) * 100)
+    put("reliability.voltage_fluctuation_pct", (vm.max(axis=1) - vm.min(axis=1)).max(axis=1) * 100)
+    put("economic.loss_rate_pct", losses_mwh / load_mwh * 100)
+    put("economic.revenue_yuan", pv_consumed_mwh * ELECTRICITY_PRICE_YUAN_PER_MWH)
+    put("economic.carbon_benefit_yuan", pv_consumed_mwh * EMISSION_FACTOR_T_PER_MWH * CARBON_PRICE_YUAN_PER_T)
+    put("economic.OM_cost_yuan",
+        losses_mwh * ELECTRICITY_PRICE_YUAN_PER_MWH + pv_capacity * PV_OM_COST_YUAN_PER_MW_DAY)
+    put("environment.RPG_pct", pv_consumed_mwh / load_mwh * 100)
+    return raw
+
+
+def compute_raw_indicators(model: NetworkModel, plans: List[PlanDefinition]) -> np.ndarray:
+    """原始指标矩阵 (方案数, 指标数)，不可得的指标为 nan"""
+    results = _plan_results(model, plans)
+    # (方案, 时间步, 母线/线路)
+    raw = indicators_from_arrays(
+        vm=np.stack([r.vm_pu for r in results]),
+        loading=np.stack([r.loading_percent for r in results]),
+        losses=np.stack([r.line_losses_mw.sum(axis=1) for r in results]),
+        load=np.stack([r.profiles.load_p_mw.sum(axis=1) for r in results]),
+        pv=np.stack([r.profiles.pv_p_mw.sum(axis=1) for r in results]),
+        pv_capacity=np.array([r.profiles.pv_p_mw.max(axis=0).sum() for r in results]),
+    )
+    raw[:, INDICATOR_INDEX["safety.LN1_pass_pct"]] = [
+        contingency.run_n1(model, load_scale=Scenario(plan=plan).load_factor, r_scale=plan.r_scale,
+                           in_service=plan.in_service(model))["LN1_pass_pct"]
+        for plan in plans]
+    return raw
+
+
+def _compute_raw_indicators_in_worker(network_id: str, plans: List[PlanDefinition]) -> np.ndarray:
+    """进程池中执行：计算一块方案的原始指标"""
+    return compute_raw_indicators(network_registry.get(network_id), plans)
+
+
+def _indicator_params(plan: PlanDefinition) -> Dict:
+    return {"plan": plan.content_hash, "pv_penetration": PV_PENETRATION, "steps": STEPS_PER_DAY}
+
+
+def get_raw_indicators(plans: List[PlanDefinition], network_id: str = DEFAULT_NETWORK_ID) -> np.ndarray:
+    """原始指标矩阵；各方案按参数内容哈希缓存，未缓存的方案分块在进程池中并行计算"""
+    model = network_registry.get(network_id)
+    rows: Dict[str, np.ndarray] = {}
+    missing: Dict[str, PlanDefinition] = {}
+    for plan in plans:
+        if plan.content_hash in rows or plan.content_hash in missing:
+            continue
+        row = result_cache.get(model.content_hash, "plan_indicators", _indicator_params(plan))
+        if row is None:
+            missing[plan.content_hash] = plan
+        else:
+            rows[plan.content_hash] = row
+
+    if missing:
+        pending = list(missing.values())
+        workers = max_workers()
+        if workers <= 1 or len(pending) == 1:
+            chunks = [pending]
+            raws = [compute_raw_indicators(model, pending)]
+        else:
+            chunk_size = math.ceil(len(pending) / workers)
+            chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+            pool = get_process_pool()
+            futures = [pool.submit(_compute_raw_indicators_in_worker, network_id, chunk) for chunk in chunks]
+            raws = [future.result() for future in futures]
+        for chunk, raw in zip(chunks, raws):
+            for plan, row in zip(chunk, raw):
+                result_cache.set(model.content_hash, "plan_indicators", _indicator_params(plan), row)
+                rows[plan.content_hash] = row
+    return np.stack([rows[plan.content_hash] for plan in plans])
+
+
+def score_indicators(raw: np.ndarray, total_load_mw: float, indicators: List[Indicator] = INDICATORS) -> np.ndarray:
+    """原始指标 -> 0~100 得分，形状同 raw"""
+    larger = np.array([indicator.larger_is_better for indicator in indicators])
+    reference = np.array([np.nan if indicator.reference is None else
+                          indicator.reference * (total_load_mw if indicator.scale_with_load else 1)
+                          for indicator in indicators])
+    x = np.clip(raw, 0, None)
+    hyperbolic = np.where(larger, 100 * x / (x + reference), 100 * reference / (x + reference))
+    identity = np.clip(np.where(larger, x, 100 - x), 0, 100)
+    return np.where(np.isnan(reference), identity, hyperbolic)
+
+
+def ahp_weights(matrix) -> tuple[np.ndarray, float]:
+    """AHP：判断矩阵的主特征向量为权重，返回 (权重, 一致性比率 CR)"""
+    matrix = np.asarray(matrix, dtype=float)
+    n = len(matrix)
+    eigenvalues, eigenvectors = np.linalg.eig(matrix)
+    k = np.argmax(eigenvalues.real)
+    weights = np.abs(eigenvectors[:, k].real)
+    weights /= weights.sum()
+    random_index = AHP_RANDOM_INDEX[n] if n < len(AHP_RANDOM_INDEX) else AHP_RANDOM_INDEX[-1]
+    consistency_index = (eigenvalues[k].real - n) / (n - 1) if n > 1 else 0.0
+    return weights, consistency_index / random_index if random_index else 0.0
+
+
+def entropy_weights(scores: np.ndarray) -> np.ndarray:
+    """熵权法：各方案得分差异越大的指标权重越大；(方案数, 指标数) -> (指标数,)，nan 列权重为 0"""
+    available = ~np.isnan(scores).any(axis=0)
+    weights = np.zeros(scores.shape[1])
+    m = scores.shape[0]
+    if m < 2 or not available.any():
+        weights[available] = 1
+        return weights
+    x = scores[:, available] + 1e-12
+    p = x / x.sum(axis=0)
+    entropy = -(p * np.log(p)).sum(axis=0) / math.log(m)
+    divergence = np.clip(1 - entropy, 0, None)
+    # 各方案所有指标都相同时退化为等权重
+    weights[available] = divergence if divergence.sum() > 1e-9 else 1
+    return weights
+
+
+def _indicator_weights(weighting: str, scores: np.ndarray) -> tuple[np.ndarray, np.ndarray, float | None]:
+    """(指标权重（维度内归一化前）, 维度权重, AHP 一致性比率)"""
+    dimension_keys = list(DIMENSIONS)
+    consistency_ratio = None
+    if weighting == "等权重":
+        indicator_weights = np.ones(len(INDICATORS))
+        dimension_weights = np.ones(len(DIMENSIONS))
+    elif weighting == "专家权重":
+        indicator_weights = np.array([EXPERT_INDICATOR_WEIGHTS.get(i.name, 0.0) for i in INDICATORS])
+        dimension_weights = np.array([EXPERT_DIMENSION_WEIGHTS[key] for key in dimension_keys])
+    elif weighting == "熵权法":
+        indicator_weights = entropy_weights(scores)
+        # 维度权重为维度内指标熵权之和
+        dimension_weights = np.array([indicator_weights[[i.dimension == key for i in INDICATORS]].sum()
+                                      for key in dimension_keys])
+    elif weighting == "AHP":
+        indicator_weights = np.ones(len(INDICATORS))
+        dimension_weights, consistency_ratio = ahp_weights(AHP_DIMENSION_MATRIX)
+    else:
+        raise ValueError(f"未知的赋权方法：{weighting}，可选：{'、'.join(WEIGHTINGS)}")
+    return indicator_weights, dimension_weights, consistency_ratio
+
+
+def _weighted_mean(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """按行加权平均，忽略 nan（权重重新归一化）；全部为 nan 的行为 nan"""
+    mask = ~np.isnan(values) & (weights > 0)
+    total = (mask * weights).sum(axis=1)
+    weighted = np.where(mask, values, 0) @ weights
+    return np.divide(weighted, total, out=np.full(len(values), np.nan), where=total > 0)
+
+
+def _membership() -> np.ndarray:
+    """(维度数, 指标数) 的布尔矩阵：指标是否属于该维度"""
+    return np.array([[i.dimension == key for i in INDICATORS] for key in DIMENSIONS])
+
+
+def aggregate_scores(scores: np.ndarray, indicator_weights: np.ndarray | None = None,
+                     dimension_weights: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """指标得分 (方案, 指标) -> (维度得分 (方案, 维度), 综合得分 (方案,))，权重缺省为等权重"""
+    if indicator_weights is None:
+        indicator_weights = np.ones(len(INDICATORS))
+    if dimension_weights is None:
+        dimension_weights = np.ones(len(DIMENSIONS))
+    dimension_scores = np.stack([_weighted_mean(scores, indicator_weights * member) for member in _membership()],
+                                axis=1)
+    return dimension_scores, _weighted_mean(dimension_scores, dimension_weights)
+
+
+def evaluate_plans(plans: List[PlanDefinition] | None = None, weighting: str = "等权重",
+                   network_id: str = DEFAULT_NETWORK_ID) -> Dict:
+    """各方案的指标得分、维度得分与综合得分，plans 缺省为 Plan 表中的全部方案"""
+    plans = list_plans() if not plans else plans
+    model = network_registry.get(network_id)
+    raw = get_raw_indicators(plans, network_id)
+    scores = score_indicators(raw, float(model.base_load_p_mw.sum()))
+    indicator_weights, dimension_weights, consistency_ratio = _indicator_weights(weighting, scores)
+
+    dimension_keys = list(DIMENSIONS)
+    membership = _membership()
+    dimension_scores, overall = aggregate_scores(scores, indicator_weights, dimension_weights)
+    # 维度内归一化后的指标权重（不可得的指标为 0）
+    available = ~np.isnan(scores).all(axis=0)
+    normalized = np.zeros(len(INDICATORS))
+    for member in membership:
+        w = indicator_weights * member * available
+        if w.sum() > 0:
+            normalized += w / w.sum()
+    dimension_total = dimension_weights.sum()
+
+    def value(x):
+        return None if np.isnan(x) else round(float(x), 4)
+
+    return {
+        "weighting": weighting,
+        "consistency_ratio": None if consistency_ratio is None else round(float(consistency_ratio), 4),
+        "dimensions": [{"key": key, "name": name,
+                        "weight": round(float(dimension_weights[j] / dimension_total), 4) if dimension_total else None}
+                       for j, (key, name) in enumerate(DIMENSIONS.items())],
+        "plans": [{
+            "plan": plan.name,
+            "indicators": [{
+                "indicator": indicator.name,
+                "label": indicator.label,
+                "dimension": DIMENSIONS[indicator.dimension],
+                "raw": value(raw[p, i]),
+                "larger_is_better": indicator.larger_is_better,
+                "score_0_100": value(scores[p, i]),
+                "weight": round(float(normalized[i]), 4),
+            } for i, indicator in enumerate(INDICATORS)],
+            "dimension_scores": {
+                **{f"{key}_score_0_100": value(dimension_scores[p, j]) for j, key in enumerate(dimension_keys)},
+                "overall_score_0_100": value(overall[p]),
+            },
+        } for p, plan in enumerate(plans)],
+    }
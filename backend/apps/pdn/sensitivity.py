@@ -0,0 +1,182 @@
+"""
+电压/潮流灵敏度矩阵与 what-if 查询
+
+由基态收敛潮流的雅可比矩阵求逆得到：
+    - dVm/dP、dVm/dQ：各母线注入功率变化对各母线电压幅值的影响；
+    - 线路有功、负载率对各母线注入功率的灵敏度。
+"母线 k 负荷增加 X" 之类的问题只需取对应列做一次矩阵-向量乘法；变化量过大（线性化误差不可忽略）时退回精确求解。
+
+矩阵以 版本号 = 网络内容哈希 + 线路投运状态 + 基态参数 标识，网络或拓扑变化后自动重算（result_cache 中按版本缓存）。
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from . import radial
+from .cache import result_cache
+from .network import DEFAULT_NETWORK_ID, NetworkModel, network_registry
+from .numerics import factorization_cache
+
+# 线性估计的电压变化量超过该值（标幺值）时退回精确求解
+DEFAULT_TOLERANCE_PU = 0.01
+
+
+@dataclass
+class SensitivityMatrices:
+    """基态与灵敏度矩阵，列对应 PQ 母线（pq 为其位置索引），单位为 标幺电压/MW、%/MW 等"""
+    version: str
+    pq: np.ndarray
+    v: np.ndarray  # 基态电压（复数）
+    loading_percent: np.ndarray  # 基态线路负载率
+    p_from_mw: np.ndarray  # 基态线路首端有功
+    dvm_dp: np.ndarray  # (母线数, PQ 母线数)
+    dvm_dq: np.ndarray
+    dloading_dp: np.ndarray  # (线路数, PQ 母线数)
+    dloading_dq: np.ndarray
+    dpfrom_dp: np.ndarray
+    dpfrom_dq: np.ndarray
+
+
+def sensitivity_version(model: NetworkModel, in_service: np.ndarray, load_scale: float, r_scale: float) -> str:
+    h = hashlib.sha256()
+    h.update(model.content_hash.encode())
+    h.update(np.asarray(in_service, dtype=bool).tobytes())
+    h.update(np.array([load_scale, r_scale], dtype=float).tobytes())
+    return h.hexdigest()[:16]
+
+
+def _jacobian(ybus: sp.csr_matrix, v: np.ndarray, pq: np.ndarray) -> sp.csc_matrix:
+    """极坐标潮流雅可比矩阵 [[dP/dθ, dP/dVm], [dQ/dθ, dQ/dVm]]（只含 PQ 母线）"""
+    i_bus = ybus @ v
+    diag_v = sp.diags(v)
+    diag_i = sp.diags(i_bus)
+    diag_v_norm = sp.diags(v / np.abs(v))
+    ds_dvm = diag_v @ (ybus @ diag_v_norm).conj() + diag_i.conj() @ diag_v_norm
+    ds_dva = 1j * diag_v @ (diag_i - ybus @ diag_v).conj()
+    ds_dvm = ds_dvm.tocsr()[pq][:, pq]
+    ds_dva = ds_dva.tocsr()[pq][:, pq]
+    return sp.bmat([[ds_dva.real, ds_dvm.real], [ds_dva.imag, ds_dvm.imag]], format="csc")
+
+
+def compute_sensitivities(model: NetworkModel, in_service: np.ndarray | None = None, load_scale: float = 1.0,
+                          r_scale: float = 1.0) -> SensitivityMatrices:
+    """求解基态潮流并由雅可比矩阵计算灵敏度矩阵"""
+    in_service = np.ones(model.n_line, dtype=bool) if in_service is None else np.asarray(in_service, dtype=bool)
+    solver = radial.get_sweep_solver(model, in_service)
+    s_load_pu = (model.base_load_p_mw + 1j * model.base_load_q_mvar) * load_scale / model.sn_mva
+    v = solver.solve(s_load_pu, r_scale=r_scale).v
+
+    n = model.n_bus
+    pq = np.flatnonzero(np.arange(n) != model.slack_pos)
+    ybus = factorization_cache.ybus(model, r_scale, in_service)
+    jacobian = _jacobian(ybus, v, pq)
+    # J^-1 的各列即单位注入变化下的 [dθ; dVm]
+    j_inv = spla.splu(jacobian).solve(np.eye(2 * len(pq)))
+    n_pq = len(pq)
+    dva = np.zeros((n, 2 * n_pq))
+    dvm = np.zeros((n, 2 * n_pq))
+    dva[pq] = j_inv[:n_pq]
+    dvm[pq] = j_inv[n_pq:]
+
+    # 线路电流 I = y (V_f - V_t)，dV = e^jθ (dVm + j Vm dθ)
+    y = 1 / model.branch_impedance_pu(r_scale)
+    y[~in_service] = 0
+    dv = (v / np.abs(v))[:, None] * (dvm + 1j * np.abs(v)[:, None] * dva)
+    f, t = model.f_pos, model.t_pos
+    i_branch = y * (v[f] - v[t])
+    di = y[:, None] * (dv[f] - dv[t])
+    i_abs = np.abs(i_branch)
+    di_abs = np.real(np.conj(i_branch)[:, None] * di) / np.where(i_abs > 0, i_abs, 1)[:, None]
+    current_base_ka = model.current_base_ka()
+    loading_scale = (current_base_ka / model.max_i_ka * 100)[:, None]
+    dloading = di_abs * loading_scale
+    # 首端有功 P_f = Re(V_f conj(I))
+    dpfrom = np.real(dv[f] * np.conj(i_branch)[:, None] + v[f][:, None] * np.conj(di)) * model.sn_mva
+
+    # 每 MW（MVAr）注入变化
+    per_mw = 1 / model.sn_mva
+    return SensitivityMatrices(
+        version=sensitivity_version(model, in_service, load_scale, r_scale),
+        pq=pq,
+        v=v,
+        loading_percent=i_abs * loading_scale.ravel(),
+        p_from_mw=np.real(v[f] * np.conj(i_branch)) * model.sn_mva,
+        dvm_dp=dvm[:, :n_pq] * per_mw,
+        dvm_dq=dvm[:, n_pq:] * per_mw,
+        dloading_dp=dloading[:, :n_pq] * per_mw,
+        dloading_dq=dloading[:, n_pq:] * per_mw,
+        dpfrom_dp=dpfrom[:, :n_pq] * per_mw,
+        dpfrom_dq=dpfrom[:, n_pq:] * per_mw,
+    )
+
+
+def get_sensitivities(load_scale: float = 1.0, r_scale: float = 1.0, close_ties: bool = True,
+                      network_id: str = DEFAULT_NETWORK_ID) -> SensitivityMatrices:
+    """按版本缓存的灵敏度矩阵（两级缓存，所有 worker 共享）"""
+    model = network_registry.get(network_id)
+    in_service = np.ones(model.n_line, dtype=bool) if close_ties else model.line_df["status"].to_numpy() == 1
+    version = sensitivity_version(model, in_service, load_scale, r_scale)
+    return result_cache.get_or_compute(
+        model.content_hash, "sensitivity", {"version": version},
+        lambda: compute_sensitivities(model, in_service, load_scale, r_scale),
+    )
+
+
+def what_if(changes: List[Dict], load_scale: float = 1.0, r_scale: float = 1.0, close_ties: bool = True,
+            tolerance_pu: float = DEFAULT_TOLERANCE_PU, exact: bool = False,
+            network_id: str = DEFAULT_NETWORK_ID) -> Dict:
+    """
+    负荷变化的 what-if 查询
+
+    :param changes: [{"bus": 母线编号, "dp_mw": 有功负荷增量, "dq_mvar": 无功负荷增量}, ...]
+    :param tolerance_pu: 线性估计的最大电压变化量超过该值时退回精确求解
+    :param exact: 强制精确求解
+    """
+    model = network_registry.get(network_id)
+    matrices = get_sensitivities(load_scale, r_scale, close_ties, network_id)
+
+    dp_load = np.zeros(model.n_bus)
+    dq_load = np.zeros(model.n_bus)
+    positions = model.bus_positions([c["bus"] for c in changes]) if changes else np.array([], dtype=int)
+    np.add.at(dp_load, positions, [c.get("dp_mw", 0.0) for c in changes])
+    np.add.at(dq_load, positions, [c.get("dq_mvar", 0.0) for c in changes])
+    if (dp_load[model.slack_pos] != 0) or (dq_load[model.slack_pos] != 0):
+        raise ValueError("平衡节点不能设置负荷变化")
+
+    # 负荷增加即注入减少
+    dp_inj, dq_inj = -dp_load[matrices.pq], -dq_load[matrices.pq]
+    nonzero = np.flatnonzero((dp_inj != 0) | (dq_inj != 0))
+    dvm = matrices.dvm_dp[:, nonzero] @ dp_inj[nonzero] + matrices.dvm_dq[:, nonzero] @ dq_inj[nonzero]
+    max_delta = float(np.abs(dvm).max()) if len(nonzero) else 0.0
+
+    if exact or max_delta > tolerance_pu:
+        in_service = np.ones(model.n_line, dtype=bool) if close_ties else model.line_df["status"].to_numpy() == 1
+        solver = radial.get_sweep_solver(model, in_service)
+        s_load_pu = ((model.base_load_p_mw + 1j * model.base_load_q_mvar) * load_scale
+                     + dp_load + 1j * dq_load) / model.sn_mva
+        result = solver.solve(s_load_pu, r_scale=r_scale, v_init=matrices.v)
+        loading = np.abs(result.i_branch) * model.current_base_ka() / model.max_i_ka * 100
+        p_from = (result.v[model.f_pos] * np.conj(result.i_branch)).real * model.sn_mva
+        vm, method = np.abs(result.v), "exact"
+    else:
+        loading = (matrices.loading_percent + matrices.dloading_dp[:, nonzero] @ dp_inj[nonzero]
+                   + matrices.dloading_dq[:, nonzero] @ dq_inj[nonzero])
+        p_from = (matrices.p_from_mw + matrices.dpfrom_dp[:, nonzero] @ dp_inj[nonzero]
+                  + matrices.dpfrom_dq[:, nonzero] @ dq_inj[nonzero])
+        vm, method = np.abs(matrices.v) + dvm, "linear"
+
+    return {
+        "version": matrices.version,
+        "method": method,
+        "max_linear_delta_vm_pu": round(max_delta, 6),
+        "voltages": np.round(vm, 4).tolist(),
+        "loading": np.round(loading, 2).tolist(),
+        "line_power": np.round(p_from, 4).tolist(),
+        "min_vm_pu": round(float(vm.min()), 4),
+        "max_loading": round(float(loading.max()), 2),
+        "voltage_deviation": round((1 - float(vm.min())) * 100, 2),
+    }
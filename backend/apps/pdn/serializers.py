@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+from . import models
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Job
+        fields = ["id", "kind", "params", "status", "progress", "message", "error", "created_at", "started_at",
+                  "finished_at"]
+
+
+class JobResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Job
+        fields = ["id", "kind", "status", "result", "error"]
+
+
+class PlanSerializer(serializers.ModelSerializer):
+    # 方案参数的内容哈希（计算结果按它缓存）
+    content_hash = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Plan
+        fields = ["id", "name", "description", "overrides", "content_hash", "updated_at"]
+
+    def get_content_hash(self, obj) -> str:
+        return obj.definition().content_hash
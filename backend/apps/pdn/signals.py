@@ -0,0 +1,16 @@
+"""
+拓扑数据变化时使计算结果缓存失效
+
+注意 QuerySet.update()/bulk_create() 不会触发信号，批量修改后需手动调用 result_cache.invalidate()。
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import result_cache
+from .models import BranchData, BusData
+
+
+@receiver([post_save, post_delete], sender=BusData)
+@receiver([post_save, post_delete], sender=BranchData)
+def invalidate_result_cache(sender, **kwargs):
+    result_cache.invalidate()
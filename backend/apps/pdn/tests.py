@@ -1,3 +1,877 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+import pandapower as pp
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import (contingency, downsample, hosting, jobs, network, pipeline, plans, powerflow, probabilistic, radial,
+               reconfiguration, repository, rollups, schemas, scoring, sensitivity, timeseries, views)
+from .cache import ResultCache, result_cache
+from .importers import NetworkImportError, import_network
+from .jobs import JobRunner
+from .models import BranchData, BusData, GeneratorData, Job, Plan
+from .numerics import FactorizationCache
+from .tsdb import TimeSeriesStore
+from .network import DB_NETWORK_ID, DEFAULT_NETWORK_ID, DEMO_DATA_PATH, network_registry
+from .views import PowerFlowCalculationRetrieveView
+
+
+def setUpModule():
+    # 结果缓存、网络快照等运行期文件写到临时目录，不读写 media/pdn
+    tmp_dir = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(tmp_dir.cleanup)
+    runtime_settings = override_settings(PDN_RUNTIME_DIR=Path(tmp_dir.name))
+    runtime_settings.enable()
+    unittest.addModuleCleanup(runtime_settings.disable)
+
+
+class SweepSolverTestCase(SimpleTestCase):
+    """前推回代求解器以 pandapower 牛顿-拉夫逊法的结果为基准进行校验"""
+    # PowerFlowCalculationRetrieveView 在 PDN_NETWORK_ID 为 "db" 时从数据库读取网络（只读）
+    databases = {"default"}
+
+    def setUp(self):
+        self.model = network_registry.get()
+
+    def _run_pandapower(self, load_scale, r_scale, in_service):
+        model = self.model
+        with model.lock:
+            model.apply_parameters(load_scale=load_scale, r_scale=r_scale)
+            model.net.line["in_service"] = True if in_service is None else in_service
+            try:
+                pp.runpp(model.net, max_iteration=50, tolerance_mva=1e-10)
+                return model.net.res_bus.vm_pu.to_numpy(), model.net.res_line.i_from_ka.to_numpy()
+            finally:
+                model.net.line["in_service"] = True
+
+    def _assert_matches_pandapower(self, in_service):
+        model = self.model
+        solver = radial.get_sweep_solver(model, in_service)
+        for load_scale, r_scale in [(0.001, 1.0), (1.0, 1.0), (2.0, 0.5), (3.0, 1.0)]:
+            with self.subTest(load_scale=load_scale, r_scale=r_scale):
+                s_load_pu = (model.base_load_p_mw + 1j * model.base_load_q_mvar) * load_scale / model.sn_mva
+                result = solver.solve(s_load_pu, r_scale=r_scale)
+                vm_pu, i_ka = self._run_pandapower(load_scale, r_scale, in_service)
+                np.testing.assert_allclose(np.abs(result.v), vm_pu, atol=1e-7)
+                np.testing.assert_allclose(np.abs(result.i_branch) * model.current_base_ka(), i_ka, atol=1e-7)
+
+    def test_radial(self):
+        in_service = self.model.line_df["status"].to_numpy() == 1
+        self.assertTrue(radial.get_sweep_solver(self.model, in_service).is_radial)
+        self._assert_matches_pandapower(in_service)
+
+    def test_weakly_meshed(self):
+        # 所有 tie 线闭合，共 5 个环
+        self.assertEqual(len(radial.get_sweep_solver(self.model).tie_lines), 5)
+        self._assert_matches_pandapower(None)
+
+    def test_batch(self):
+        model = self.model
+        solver = radial.get_sweep_solver(model)
+        scales = np.array([0.5, 1.0, 2.0])
+        s_load_pu = np.outer(model.base_load_p_mw + 1j * model.base_load_q_mvar, scales) / model.sn_mva
+        batch = solver.solve(s_load_pu)
+        for k, scale in enumerate(scales):
+            single = solver.solve(s_load_pu[:, k])
+            np.testing.assert_allclose(batch.v[:, k], single.v, atol=1e-8)
+
+    def test_response_schema(self):
+        view = PowerFlowCalculationRetrieveView()
+        nr = view._run_powerflow(load_scale=1.0, engine="nr")
+        sweep = view._run_powerflow(load_scale=1.0, engine="sweep")
+        self.assertEqual(nr.keys(), sweep.keys())
+        self.assertEqual(nr["line_details"][0].keys(), sweep["line_details"][0].keys())
+        np.testing.assert_allclose(nr["voltages"], sweep["voltages"], atol=1e-4)
+        np.testing.assert_allclose(nr["loading"], sweep["loading"], atol=1e-2)
+        self.assertAlmostEqual(nr["network_loss"], sweep["network_loss"], places=2)
+
+
+class TimeSeriesTestCase(SimpleTestCase):
+    def setUp(self):
+        self.model = network_registry.get()
+
+    def test_matches_pandapower(self):
+        model = self.model
+        profiles = timeseries.Profiles.typical(model, periods=4, freq="6h", load_scale=1.5)
+        result = timeseries.run_time_series(model, profiles, tol=1e-12)
+        self.assertTrue(result.converged.all())
+        for step in range(len(profiles.times)):
+            load_scale = profiles.load_p_mw[step].sum() / model.base_load_p_mw.sum()
+            with self.subTest(step=step), model.lock:
+                model.apply_parameters(load_scale=load_scale, r_scale=1.0)
+                pp.runpp(model.net, max_iteration=50, tolerance_mva=1e-12)
+                np.testing.assert_allclose(result.vm_pu[step], model.net.res_bus.vm_pu, atol=1e-10)
+                np.testing.assert_allclose(result.loading_percent[step], model.net.res_line.loading_percent,
+                                           atol=1e-6)
+        model.apply_parameters(load_scale=1.0, r_scale=1.0)
+
+    def test_command(self):
+        model = self.model
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            load_p = pd.DataFrame([model.base_load_p_mw] * 2, columns=[f"Bus{i}" for i in model.bus_i])
+            load_p.insert(0, "time", pd.date_range("2023-01-01", periods=2, freq="1h"))
+            load_p.to_csv(tmp / "load_p.csv", index=False)
+            with mock.patch("apps.pdn.management.commands.run_time_series.rollup_manager",
+                            rollups.RollupManager(TimeSeriesStore(tmp / "tsdb"))):
+                call_command("run_time_series", "--load-profile", str(tmp / "load_p.csv"), "--load-scale", "2",
+                             "--output-dir", str(tmp / "results"), stdout=io.StringIO())
+            line_loading = pd.read_csv(tmp / "results" / "pf_line_loading.csv", encoding="utf-8-sig")
+            hourly = pd.read_csv(tmp / "results" / "dashboard_hourly_curve.csv", encoding="utf-8-sig")
+        self.assertEqual(list(line_loading.columns), ["时间"] + [f"Line{k}" for k in range(1, model.n_line + 1)])
+        # --load-scale 同样作用于给出的负荷曲线
+        np.testing.assert_allclose(hourly["P_MW"], 2 * model.base_load_p_mw.sum())
+
+
+class ResultCacheTestCase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = Path(self.tmp_dir.name) / "cache.sqlite3"
+        # 版本号不在进程内缓存，其他实例（进程）的失效立即生效
+        self.cache = ResultCache(path=self.path, maxsize=2, version_ttl=0)
+
+    def test_tiers(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"value": len(calls)}
+
+        params = {"load_scale": 1.0}
+        self.assertEqual(self.cache.get_or_compute("net", "powerflow", params, compute), {"value": 1})
+        self.assertEqual(self.cache.get_or_compute("net", "powerflow", params, compute), {"value": 1})
+        # 其他进程（新的缓存实例，共享同一个 SQLite 文件）
+        other = ResultCache(path=self.path, version_ttl=0)
+        self.assertEqual(other.get_or_compute("net", "powerflow", params, compute), {"value": 1})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()["memory_hits"], 1)
+        self.assertEqual(other.stats()["disk_hits"], 1)
+
+        # 网络内容变化
+        self.assertEqual(self.cache.get_or_compute("net2", "powerflow", params, compute), {"value": 2})
+        # 失效对所有实例生效
+        other.invalidate()
+        self.assertEqual(self.cache.get_or_compute("net", "powerflow", params, compute), {"value": 3})
+
+    def test_version_ttl(self):
+        cache = ResultCache(path=self.path, version_ttl=60)
+        compute = lambda: {"value": 1}
+        cache.get_or_compute("net", "powerflow", {}, compute)
+        # 进程内 LRU 命中时不读 SQLite
+        with mock.patch.object(cache, "_read_data_version", side_effect=AssertionError("SQLite 被访问")):
+            for _ in range(3):
+                self.assertEqual(cache.get_or_compute("net", "powerflow", {}, compute), {"value": 1})
+        self.assertEqual(cache.stats()["memory_hits"], 3)
+
+        # 其他进程的失效在版本号过期后生效，本进程的失效立即生效
+        ResultCache(path=self.path).invalidate()
+        self.assertEqual(cache.get_or_compute("net", "powerflow", {}, lambda: {"value": 2}), {"value": 1})
+        with mock.patch("apps.pdn.cache.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertEqual(cache.get_or_compute("net", "powerflow", {}, lambda: {"value": 2}), {"value": 2})
+        version = cache.data_version()
+        cache.invalidate()
+        self.assertEqual(cache.data_version(), version + 1)
+
+    def test_not_cacheable(self):
+        compute = lambda: {"converged": False}
+        for _ in range(2):
+            self.cache.get_or_compute("net", "powerflow", {}, compute, cacheable=lambda data: data["converged"])
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_stats_disk_error(self):
+        # SQLite 出错时与读写一致，只记录日志，条目数返回 None
+        self.cache._connect().execute("DROP TABLE result")
+        stats = self.cache.stats()
+        self.assertIsNone(stats["disk_entries"])
+        self.assertEqual(stats["memory_entries"], 0)
+
+    def test_invalidate_on_model_change(self):
+        version = result_cache.data_version()
+        BusData.objects.create(bus_i=34, type="1", Pd=0, Qd=0, Gs=0, Bs=0, area=1, Vm=1, Va=0, baseKV=12.66,
+                               zone=1, Vmax=1.1, Vmin=0.9)
+        self.assertGreater(result_cache.data_version(), version)
+
+
+@override_settings(PDN_JOB_RUNNER_AUTOSTART=False)
+class JobTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="operator"))
+        self.runner = JobRunner(max_workers=1)
+
+    def _run_pending(self):
+        """在当前线程中认领并执行排队中的任务"""
+        while (job := self.runner._claim()) is not None:
+            self.runner._running += 1
+            self.runner._execute(job)
+
+    def _submit(self, kind, params):
+        response = self.client.post("/pdn/submit_job/", {"kind": kind, "params": params}, format="json")
+        self.assertEqual(response.status_code, 202, response.data)
+        return response.data["id"]
+
+    def test_time_series(self):
+        job_id = self._submit("time_series", {"periods": 48, "freq": "30min"})
+        self.assertEqual(self.client.get(f"/pdn/get_job_result/{job_id}/").status_code, 409)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = TimeSeriesStore(Path(tmp))
+            with mock.patch.object(jobs, "rollup_manager", rollups.RollupManager(store)):
+                self._run_pending()
+            times, vm_pu = store.get("case33bw.bus_vm_pu").read(columns=["Bus1", "Bus18"])
+            self.assertEqual(len(times), 48)
+            np.testing.assert_allclose(vm_pu[:, 0], 1.0, atol=1e-6)
+        status = self.client.get(f"/pdn/get_job_status/{job_id}/").data
+        self.assertEqual(status["status"], Job.Status.SUCCEEDED)
+        result = self.client.get(f"/pdn/get_job_result/{job_id}/").data["result"]
+        self.assertEqual(result["n_steps"], 48)
+        self.assertEqual(len(result["hourly_summary"]), 24)
+
+    def test_sweep_and_events(self):
+        job_id = self._submit("sweep", {"load_scales": [0.5, 1.0], "r_scales": [1.0], "engine": "sweep"})
+        self._run_pending()
+        result = self.client.get(f"/pdn/get_job_result/{job_id}/").data["result"]
+        self.assertEqual([p["load_scale"] for p in result["points"]], [0.5, 1.0])
+        response = self.client.get(f"/pdn/stream_job_events/{job_id}/", HTTP_ACCEPT="text/event-stream")
+        body = b"".join(response.streaming_content).decode()
+        self.assertTrue(body.startswith("event: finished"))
+
+    def test_cancel_and_invalid_params(self):
+        job_id = self._submit("powerflow", {})
+        self.assertEqual(self.client.post(f"/pdn/cancel_job/{job_id}/").data["status"], Job.Status.CANCELLED)
+        response = self.client.post("/pdn/submit_job/", {"kind": "sweep", "params": {}}, format="json")
+        self.assertEqual(response.status_code, 400)
+        for pv_capacity_mw in ({"abc": 1}, {"999": 1}):
+            response = self.client.post("/pdn/submit_job/", {"kind": "time_series",
+                                                             "params": {"pv_capacity_mw": pv_capacity_mw}},
+                                        format="json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_result_not_written_after_requeue(self):
+        for status in (Job.Status.PENDING, Job.Status.CANCELLED):
+            with self.subTest(status=status):
+                job_id = self._submit("powerflow", {})
+                job = self.runner._claim()
+
+                def handler(params, context):
+                    # 执行期间任务被重新排队（心跳超时）或被取消
+                    Job.objects.filter(pk=job_id).update(status=status, worker="")
+                    return {}
+
+                with mock.patch.dict(jobs.JOB_HANDLERS, {"powerflow": handler}):
+                    self.runner._running += 1
+                    self.runner._execute(job)
+                self.assertEqual(Job.objects.get(pk=job_id).status, status)
+                Job.objects.filter(pk=job_id).delete()
+
+
+class HostingCapacityTestCase(SimpleTestCase):
+    def test_capacity_is_limit(self):
+        model = network_registry.get()
+        evaluator = hosting.HostingCapacityEvaluator(model, hosting.Scenario())
+        buses = hosting.NETWORK_REGIONS["case33bw"]["C"]
+        capacity = evaluator.hosting_capacity(buses)["hosting_capacity_mw"]
+        positions = model.bus_positions(buses)
+        weights = model.base_load_p_mw[positions] / model.base_load_p_mw[positions].sum()
+        self.assertFalse(evaluator.evaluate(positions, weights, capacity)[0])
+        self.assertTrue(evaluator.evaluate(positions, weights, capacity + 2 * hosting.CAPACITY_TOLERANCE_MW)[0])
+
+
+class ContingencyTestCase(SimpleTestCase):
+    def setUp(self):
+        self.model = network_registry.get()
+
+    def test_bridges(self):
+        model = self.model
+        radial_lines = np.flatnonzero(model.line_df["status"].to_numpy() == 1)
+        self.assertTrue(contingency.find_bridges(model.n_bus, model.f_pos[radial_lines],
+                                                 model.t_pos[radial_lines]).all())
+        # 所有线路投运时只有首端线路是桥
+        bridges = contingency.find_bridges(model.n_bus, model.f_pos, model.t_pos)
+        np.testing.assert_array_equal(np.flatnonzero(bridges), [0])
+
+    def test_matches_full_solves(self):
+        model = self.model
+        for load_scale in (1.0, 1.5):
+            with self.subTest(load_scale=load_scale):
+                result = contingency.run_n1(model, load_scale=load_scale)
+                case = contingency.ContingencyCase(model, np.ones(model.n_line, dtype=bool), load_scale, 1.0)
+                for outage in result["outages"]:
+                    exact = case.outage_result(outage["line"], case.solve_outage(outage["line"]), method="ac")
+                    self.assertEqual(outage["passed"], exact["passed"], outage["name"])
+                    self.assertAlmostEqual(outage["min_vm_pu"], exact["min_vm_pu"], delta=2e-3)
+
+
+class FactorizationCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.model = network_registry.get()
+        self.cache = FactorizationCache(maxsize=4)
+
+    def test_solve_matches_dense(self):
+        model = self.model
+        for in_service in (None, model.line_df["status"].to_numpy() == 1):
+            factorization = self.cache.factorize(model, 1.3, in_service)
+            pq = factorization.pq
+            y_pp = model.build_ybus(1.3, in_service).toarray()[np.ix_(pq, pq)]
+            rhs = np.random.default_rng(0).normal(size=(len(pq), 3)) + 0j
+            np.testing.assert_allclose(factorization.solve(rhs), np.linalg.solve(y_pp, rhs), rtol=1e-10)
+
+    def test_reuse_and_islands(self):
+        model = self.model
+        self.cache.factorize(model)
+        self.cache.factorize(model)
+        # r_scale 变化只需数值分解，符号分析复用
+        self.cache.factorize(model, r_scale=2.0)
+        stats = self.cache.stats()
+        self.assertEqual((stats["numeric_factorizations"], stats["numeric_reuses"]), (2, 1))
+        self.assertEqual((stats["symbolic_analyses"], stats["symbolic_reuses"]), (1, 1))
+        # 首端线路断开后所有母线都与平衡节点不连通
+        in_service = np.ones(model.n_line, dtype=bool)
+        in_service[0] = False
+        self.assertEqual(len(self.cache.factorize(model, in_service=in_service, cache=False).pq), 0)
+        self.assertEqual(self.cache.stats()["numeric_entries"], 2)
+
+
+class SensitivityTestCase(SimpleTestCase):
+    def test_linear_matches_exact(self):
+        changes = [{"bus": 18, "dp_mw": 0.05, "dq_mvar": 0.02}, {"bus": 25, "dp_mw": -0.03}]
+        linear = sensitivity.what_if(changes, tolerance_pu=1)
+        exact = sensitivity.what_if(changes, exact=True)
+        self.assertEqual((linear["method"], exact["method"]), ("linear", "exact"))
+        np.testing.assert_allclose(linear["voltages"], exact["voltages"], atol=2e-4)
+        np.testing.assert_allclose(linear["loading"], exact["loading"], atol=0.1)
+
+    def test_fallback_and_version(self):
+        model = network_registry.get()
+        self.assertEqual(sensitivity.what_if([{"bus": 18, "dp_mw": 1.0}])["method"], "exact")
+        radial_version = sensitivity.get_sensitivities(close_ties=False).version
+        self.assertNotEqual(radial_version, sensitivity.get_sensitivities().version)
+        self.assertEqual(radial_version, sensitivity.sensitivity_version(
+            model, model.line_df["status"].to_numpy() == 1, 1.0, 1.0))
+
+    def test_not_converged(self):
+        client = APIClient()
+        # SimpleTestCase 不回滚数据库，使用未保存的用户
+        client.force_authenticate(User(username="operator"))
+        for body in ({"changes": [{"bus": 18, "dp_mw": 0.1}], "load_scale": 10},
+                     {"changes": [{"bus": 18, "dp_mw": 50}]}):
+            with self.subTest(body=body):
+                response = client.post("/pdn/what_if_power_flow/", body, format="json")
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.data["converged"])
+
+
+class ScoringTestCase(TestCase):
+    def test_scores_match_csv_rule(self):
+        # 参考值为 1 时即 indicator_scores.csv 的打分算法
+        raw = np.full((1, len(scoring.INDICATORS)), np.nan)
+        raw[0, scoring.INDICATOR_INDEX["reliability.voltage_deviation_pct"]] = 3.9562848488026976
+        raw[0, scoring.INDICATOR_INDEX["economic.revenue_yuan"]] = 27019.36036427623
+        indicators = [scoring.Indicator(i.name, i.label, i.larger_is_better) for i in scoring.INDICATORS]
+        scores = scoring.score_indicators(raw, total_load_mw=1.0, indicators=indicators)
+        self.assertAlmostEqual(scores[0, scoring.INDICATOR_INDEX["reliability.voltage_deviation_pct"]],
+                               20.17640290068422)
+        self.assertAlmostEqual(scores[0, scoring.INDICATOR_INDEX["economic.revenue_yuan"]], 99.99629908710868)
+
+    def test_weightings(self):
+        weights, consistency_ratio = scoring.ahp_weights(scoring.AHP_DIMENSION_MATRIX)
+        self.assertAlmostEqual(weights.sum(), 1)
+        self.assertLess(consistency_ratio, 0.1)
+        # 各方案相同的指标熵权为 0
+        entropy = scoring.entropy_weights(np.array([[50.0, 10.0, np.nan], [50.0, 90.0, np.nan]]))
+        self.assertEqual((entropy[0], entropy[2]), (0, 0))
+        self.assertGreater(entropy[1], 0)
+
+        for weighting in scoring.WEIGHTINGS:
+            with self.subTest(weighting=weighting):
+                result = scoring.evaluate_plans(weighting=weighting)
+                self.assertEqual([p["plan"] for p in result["plans"]], list(plans.DEFAULT_PLANS))
+                for plan in result["plans"]:
+                    overall = plan["dimension_scores"]["overall_score_0_100"]
+                    self.assertTrue(0 <= overall <= 100)
+
+
+class ProbabilisticPowerFlowTestCase(SimpleTestCase):
+    def setUp(self):
+        self.model = network_registry.get()
+
+    def test_reproducible_and_early_stopping(self):
+        scenario = hosting.Scenario(season="冬季")
+        config = probabilistic.SamplingConfig(batch_size=200, max_samples=4000)
+        result = probabilistic.run_probabilistic_power_flow(self.model, scenario, config, seed=7)
+        self.assertEqual(result, probabilistic.run_probabilistic_power_flow(self.model, scenario, config, seed=7))
+        self.assertNotEqual(result["buses"], probabilistic.run_probabilistic_power_flow(
+            self.model, scenario, config, seed=8)["buses"])
+        # 低负荷断面几乎不越限，达到最少样本数（500）所在的批后即满足容差
+        light = probabilistic.run_probabilistic_power_flow(self.model, hosting.Scenario(), config, seed=7)
+        self.assertTrue(light["converged"])
+        self.assertEqual(light["n_samples"], 600)
+
+    def test_degenerate_matches_deterministic(self):
+        # 负荷无波动、夜间无光伏时所有样本即确定性潮流
+        model = self.model
+        config = probabilistic.SamplingConfig(hour=0, load_std=0, max_samples=300, min_samples=300)
+        result = probabilistic.run_probabilistic_power_flow(model, hosting.Scenario(), config)
+        load_factor = probabilistic.TYPICAL_DAILY_LOAD_SHAPE[0]
+        s = (model.base_load_p_mw + 1j * model.base_load_q_mvar) * load_factor / model.sn_mva
+        v = radial.get_sweep_solver(model, model.line_df["status"].to_numpy() == 1).solve(s).v
+        np.testing.assert_allclose([b["vm_p50_pu"] for b in result["buses"]], np.abs(v), atol=1e-4)
+        self.assertEqual(result["p_any_violation"], 0)
+
+
+class ReconfigurationTestCase(SimpleTestCase):
+    def setUp(self):
+        self.model = network_registry.get()
+        self.initial = self.model.line_df["status"].to_numpy() == 1
+
+    def test_radial_swaps_match_full_check(self):
+        model = self.model
+        switchable = np.ones(model.n_line, dtype=bool)
+        swaps = set(reconfiguration.radial_swaps(model, self.initial, switchable))
+        for line in np.flatnonzero(self.initial):
+            for tie in np.flatnonzero(~self.initial):
+                configuration = self.initial.copy()
+                configuration[line], configuration[tie] = False, True
+                self.assertEqual((line, tie) in swaps, reconfiguration.is_radial(model, configuration))
+
+    def test_finds_known_optimum(self):
+        # case33bw 网损最小的拓扑：断开线路 7、9、14、32、37，网损 139.55 kW
+        memo = reconfiguration.ConfigurationMemo()
+        result = reconfiguration.Reconfigurator(self.model, "loss", memo=memo).search(self.initial)
+        self.assertEqual([line["line"] for line in result["best"]["open_lines"]], [7, 9, 14, 32, 37])
+        self.assertAlmostEqual(result["best"]["losses_mw"], 0.13955, places=5)
+        self.assertAlmostEqual(result["initial"]["losses_mw"], 0.20268, places=5)
+        self.assertGreater(result["memo_hits"], 0)
+        self.assertEqual(result["evaluations"], memo.misses)
+
+    def test_not_converged_serializable(self):
+        # 负荷过重时所有拓扑都不收敛：指标为 None（inf 不能严格 json 序列化），接口不返回 500
+        self.addCleanup(result_cache.invalidate)
+        result = reconfiguration.compute_reconfiguration(load_scale=50, switchable=[7, 9, 33, 34], max_iterations=2)
+        self.assertFalse(result["initial"]["converged"])
+        self.assertIsNone(result["initial"]["losses_mw"])
+        json.dumps(result, allow_nan=False)
+        client = APIClient()
+        # SimpleTestCase 不回滚数据库，使用未保存的用户
+        client.force_authenticate(User(username="operator"))
+        response = client.get("/pdn/get_reconfiguration/", {"load_scale": 50, "max_iterations": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["best"]["voltage_deviation_pct"])
+
+    def test_call_stats_not_cached(self):
+        self.addCleanup(result_cache.invalidate)
+        result_cache.invalidate()
+        first = reconfiguration.compute_reconfiguration(switchable=[7, 9, 33, 34], max_iterations=2)
+        self.assertFalse(first["cached"])
+        self.assertGreater(first["evaluations"], 0)
+        second = reconfiguration.compute_reconfiguration(switchable=[7, 9, 33, 34], max_iterations=2)
+        # 命中缓存：统计为本次调用的（没有求解），结果与首次相同
+        self.assertTrue(second["cached"])
+        self.assertEqual((second["evaluations"], second["memo_hits"]), (0, 0))
+        stats = ("cached", "evaluations", "memo_hits", "elapsed_s")
+        self.assertEqual({k: v for k, v in second.items() if k not in stats},
+                         {k: v for k, v in first.items() if k not in stats})
+
+
+class TimeSeriesStoreTestCase(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.columns = [f"Bus{i}" for i in range(1, 41)]
+        self.series = TimeSeriesStore(self.root).get_or_create("test.bus_vm_pu", self.columns)
+        # 跨越两天的 15 分钟数据
+        self.times = pd.date_range("2023-01-01 12:00", periods=96, freq="15min")
+        self.values = np.random.default_rng(0).random((96, 40))
+        self.series.write(self.times, self.values)
+
+    def test_range_and_column_reads(self):
+        self.assertEqual([str(d) for d in self.series.days()], ["2023-01-01", "2023-01-02"])
+        self.assertEqual(self.series.dtype, np.float32)
+        times, values = self.series.read()
+        self.assertTrue(times.equals(self.times))
+        np.testing.assert_allclose(values, self.values, rtol=1e-6)
+        # 少数几列（pread）与多列（内存映射）两种读取方式
+        for columns in (["Bus7", "Bus3", "Bus4"], self.columns[::-1]):
+            times, values = self.series.read("2023-01-01 23:00", "2023-01-02 01:00", columns=columns)
+            self.assertEqual(len(times), 8)
+            positions = [self.columns.index(c) for c in columns]
+            np.testing.assert_allclose(values, self.values[44:52][:, positions], rtol=1e-6)
+        with self.assertRaises(KeyError):
+            self.series.read(columns=["Bus99"])
+
+    def test_append_and_new_columns(self):
+        store = TimeSeriesStore(self.root)
+        store.get("test.bus_vm_pu").write(["2023-01-02 12:00"], np.ones((1, 2)), columns=["Bus1", "Bus41"])
+        with self.assertRaises(ValueError):
+            store.get("test.bus_vm_pu").write(["2023-01-02 12:05"], np.ones((1, 40)))
+
+        # 另一个进程（新的存储实例）读到新增的列和时间步，旧的时间步在新列上为 NaN
+        df = TimeSeriesStore(self.root).get("test.bus_vm_pu").read_frame(columns=["Bus1", "Bus2", "Bus41"])
+        self.assertEqual(len(df), 97)
+        self.assertEqual(df.index[-1], pd.Timestamp("2023-01-02 12:00"))
+        self.assertEqual(df["Bus1"].iloc[-1], 1)
+        self.assertTrue(np.isnan(df["Bus2"].iloc[-1]))
+        self.assertEqual(df["Bus41"].count(), 1)
+
+
+class RollupTestCase(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.store = TimeSeriesStore(Path(tmp_dir.name))
+        manager = rollups.RollupManager(self.store)
+        times = pd.date_range("2023-03-28", periods=10 * 96, freq="15min")
+        values = np.random.default_rng(0).random((len(times), 3))
+        values[5, 0] = np.nan
+        values[500, 0] = 2.0
+        self.df = pd.DataFrame(values, index=times, columns=["P_MW", "losses_MW", "U_min_pu"])
+        # 按天追加，预聚合随写入更新
+        for day in range(10):
+            manager.write_frame("test.summary", self.df.iloc[day * 96:(day + 1) * 96])
+
+    def test_query_matches_resample(self):
+        start, end = rollups.resolve_range(self.store.get("test.summary"), "本月")
+        self.assertEqual((start, end), (pd.Timestamp("2023-04-01"), pd.Timestamp("2023-05-01")))
+        expected_source = {"15min": "raw", "30min": "raw", "1h": "1h", "6h": "1h", "1d": "1d"}
+        for freq, source in expected_source.items():
+            for stat in ("mean", "min", "sum"):
+                with self.subTest(freq=freq, stat=stat):
+                    result = rollups.query(self.store, "test.summary", "2023-03-30", "2023-04-03", freq,
+                                           ["P_MW", "U_min_pu"], stat)
+                    self.assertEqual(result.source, source)
+                    expected = getattr(self.df.loc["2023-03-30":"2023-04-02", ["P_MW", "U_min_pu"]]
+                                       .astype(np.float32).resample(freq), stat)()
+                    self.assertTrue(result.times.equals(expected.index))
+                    np.testing.assert_allclose(result.values, expected, rtol=1e-5)
+        with self.assertRaises(ValueError):
+            rollups.query(self.store, "test.summary", freq="5min")
+
+    def test_overwrite_with_nan(self):
+        # 某小时的数据被改写为全部 NaN（如重算后未收敛），该小时及所在日的预聚合随之更新
+        manager = rollups.RollupManager(self.store)
+        hour = pd.date_range("2023-04-02 10:00", periods=4, freq="15min")
+        manager.write("test.summary", hour, np.full((4, 1), np.nan), ["P_MW"])
+        result = rollups.query(self.store, "test.summary", "2023-04-02 09:00", "2023-04-02 12:00", "1h", ["P_MW"])
+        self.assertEqual(result.source, "1h")
+        self.assertTrue(np.isnan(result.values[1, 0]))
+        expected = self.df.loc["2023-04-02 09:00":"2023-04-02 11:45", "P_MW"].astype(np.float32)
+        expected.loc[hour] = np.nan
+        np.testing.assert_allclose(result.values[[0, 2], 0], expected.resample("1h").mean().iloc[[0, 2]], rtol=1e-5)
+        remaining = self.df.loc["2023-04-02", "P_MW"].astype(np.float32).drop(hour)
+        for stat in ("mean", "sum"):
+            day = rollups.query(self.store, "test.summary", "2023-04-02", "2023-04-03", "1d", ["P_MW"], stat)
+            self.assertEqual(day.source, "1d")
+            np.testing.assert_allclose(day.values[0, 0], getattr(remaining, stat)(), rtol=1e-5)
+
+    def test_api(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="operator"))
+        with mock.patch.object(schemas, "ts_store", self.store), mock.patch.object(views, "ts_store", self.store):
+            data = client.get("/pdn/get_time_series/", {"series": "test.summary", "range": "今日", "freq": "1h",
+                                                        "columns": "P_MW,losses_MW", "stat": "max"}).json()
+            self.assertEqual((data["source"], len(data["times"])), ("1h", 24))
+            self.assertEqual(data["times"][0], "2023-04-06 00:00:00")
+            self.assertAlmostEqual(data["values"]["P_MW"][0], self.df["P_MW"]["2023-04-06 00"].max(), places=5)
+            # 缺省为原始数据频率（P_MW 有一个 NaN 点），按 LTTB 降采样，峰值被保留
+            data = client.get("/pdn/get_time_series/", {"series": "test.summary", "columns": "P_MW",
+                                                        "max_points": 100}).json()
+            self.assertEqual((data["freq"], data["total_points"], len(data["times"])), ("15min", 959, 100))
+            self.assertTrue(data["downsampled"])
+            self.assertEqual(max(data["values"]["P_MW"]), 2.0)
+            response = client.get("/pdn/get_time_series/", {"series": "test.summary", "columns": "Q_MVAr"})
+            self.assertEqual(response.status_code, 400)
+            response = client.get("/pdn/get_time_series/", {"series": "missing"})
+            self.assertEqual(response.status_code, 400)
+            # 不带网络编号的数据集名称为当前网络（PDN_NETWORK_ID）的数据集
+            with mock.patch.object(schemas, "DEFAULT_NETWORK_ID", "test"):
+                data = client.get("/pdn/get_time_series/", {"series": "summary", "range": "今日"}).json()
+            self.assertEqual(data["series"], "test.summary")
+
+
+class DownsampleTestCase(SimpleTestCase):
+    def test_lttb(self):
+        x = np.arange(10000, dtype=float)
+        y = np.sin(x / 300) + np.random.default_rng(0).normal(0, 0.01, len(x))
+        y[5000] = 5
+        y[100:200] = np.nan
+        selected = downsample.lttb(x, y, 200)
+        self.assertEqual(len(selected), 200)
+        self.assertEqual((selected[0], selected[-1]), (0, 9999))
+        self.assertTrue((np.diff(selected) > 0).all())
+        self.assertIn(5000, selected)
+        self.assertFalse(np.isnan(y[selected]).any())
+        np.testing.assert_array_equal(downsample.lttb(x[:50], y[:50], 200), np.arange(50))
+
+
+class PipelineTestCase(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp = Path(tmp_dir.name)
+        self.store = TimeSeriesStore(self.tmp / "tsdb")
+        self.model = network_registry.get()
+        self.write_days("2023-05-01", 3)
+        self.pipeline = pipeline.Pipeline(self.model.network_id, output_dir=self.tmp / "derived", store=self.store)
+
+    def write_days(self, start, days, load_scale=1.0):
+        profiles = timeseries.Profiles.typical(self.model, start=start, periods=96 * days, freq="15min",
+                                               load_scale=load_scale, pv_capacity_mw={18: 0.3})
+        result = timeseries.run_time_series(self.model, profiles)
+        result.write_store(rollups.RollupManager(self.store), self.model.network_id)
+        return result
+
+    def test_incremental(self):
+        report = self.pipeline.run(workers=2)
+        self.assertEqual((len(report.computed), len(report.skipped)), (12, 0))
+        self.assertEqual(len(self.pipeline.run().skipped), 12)
+
+        # 只有改写的一天重算；内容相同的改写（文件修改时间变化）不重算
+        result = self.write_days("2023-05-02", 1, load_scale=1.2)
+        report = self.pipeline.run()
+        self.assertEqual(sorted(report.computed), sorted(f"{node.name}/2023-05-02" for node in pipeline.NODES))
+        self.write_days("2023-05-02", 1, load_scale=1.2)
+        self.assertEqual(self.pipeline.run().computed, [])
+
+        paths = self.pipeline.publish(self.tmp / "published", "2023-05-02")
+        hourly = pd.read_csv(paths["dashboard_hourly_curve"], encoding="utf-8-sig")
+        expected = result.hourly_summary()
+        self.assertEqual(list(hourly.columns), list(expected.columns))
+        np.testing.assert_allclose(hourly["P_MW"], expected["P_MW"], rtol=1e-6)
+        indicators = pd.read_csv(paths["indicator_scores"], encoding="utf-8-sig").set_index("indicator")
+        self.assertGreater(indicators.loc["safety.MLF_pct", "raw"], 0)
+        dimensions = pd.read_csv(paths["dimension_scores"], encoding="utf-8-sig")
+        self.assertIn("overall_score_0_100", dimensions.columns)
+
+    def test_invalid_graph(self):
+        node = pipeline.Node("a", ("b",), lambda frames, params: pd.DataFrame())
+        with self.assertRaises(ValueError):
+            pipeline.Pipeline("x", store=self.store, nodes=[node])
+
+
+class NetworkRegistryTestCase(SimpleTestCase):
+    """网络模型的磁盘快照：数据源或 pandapower 版本不变时直接恢复，变化时重新构建"""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp = Path(tmp_dir.name)
+        sources = []
+        for name in ("bus.csv", "line.csv"):
+            path = self.tmp / name
+            path.write_bytes((DEMO_DATA_PATH / name).read_bytes())
+            sources.append(path)
+        self.bus_path = sources[0]
+        patcher = mock.patch.dict(network.NETWORK_SOURCES, {"test": tuple(sources)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self):
+        """新的注册表（相当于重启的 worker），返回 (模型, 是否重新构建)"""
+        registry = network.NetworkRegistry(snapshot_dir=self.tmp / "snapshots")
+        with mock.patch.object(registry, "_build", wraps=registry._build) as build:
+            return registry.get("test"), build.called
+
+    def test_snapshot(self):
+        model, built = self._get()
+        self.assertTrue(built)
+        self.assertTrue((self.tmp / "snapshots" / "test.pkl").exists())
+
+        restored, built = self._get()
+        self.assertFalse(built)
+        self.assertEqual(restored.content_hash, model.content_hash)
+
+        # 数据源修改时间变化
+        stat = self.bus_path.stat()
+        os.utime(self.bus_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        _, built = self._get()
+        self.assertTrue(built)
+        _, built = self._get()
+        self.assertFalse(built)
+
+        # pandapower 版本变化
+        with mock.patch.object(network.pp, "__version__", "0.0.0"):
+            _, built = self._get()
+        self.assertTrue(built)
+
+
+class NetworkImportTestCase(TestCase):
+    def setUp(self):
+        # 测试结束时事务回滚不会触发信号，这里让数据库网络的常驻模型失效
+        self.addCleanup(result_cache.invalidate)
+
+    def _assert_matches_demo_csv(self, rtol=1e-9):
+        bus_df = pd.read_csv(DEMO_DATA_PATH / "bus.csv")
+        line_df = pd.read_csv(DEMO_DATA_PATH / "line.csv")
+        buses = list(BusData.objects.order_by("bus_i").values_list("bus_i", "Pd", "Qd", "baseKV"))
+        np.testing.assert_allclose(np.array(buses, dtype=float), bus_df[["bus_i", "Pd", "Qd", "baseKV"]], rtol=rtol)
+        branches = list(BranchData.objects.order_by("id").values_list("fbus", "tbus", "r", "x", "status"))
+        np.testing.assert_allclose(np.array(branches, dtype=float), line_df[["fbus", "tbus", "r", "x", "status"]],
+                                   rtol=rtol)
+
+    def test_matpower_and_csv(self):
+        # 迁移已导入 demo_data 中的网络
+        self._assert_matches_demo_csv()
+        with self.assertRaises(NetworkImportError):
+            import_network(DEMO_DATA_PATH)
+        # case33bw.txt 的矩阵本身是 kW 与 Ω，文件末尾的换算语句不执行
+        stats = import_network(DEMO_DATA_PATH / "case33bw.txt", units="raw", replace=True, batch_size=10)
+        self.assertEqual((stats.buses, stats.generators, stats.branches, stats.islands), (33, 1, 37, 0))
+        self.assertEqual(len(stats.warnings), 2)
+        self._assert_matches_demo_csv()
+        self.assertEqual(GeneratorData.objects.count(), 1)
+        import_network(DEMO_DATA_PATH, replace=True)
+        self._assert_matches_demo_csv()
+        self.assertEqual(GeneratorData.objects.count(), 0)
+
+    def test_pandapower_json(self):
+        import pandapower.networks as pn
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "case33bw.json"
+            pp.to_json(pn.case33bw(), str(path))
+            stats = import_network(path, replace=True)
+        self.assertEqual((stats.buses, stats.branches), (33, 37))
+        self._assert_matches_demo_csv(rtol=1e-3)
+
+    def test_validation_rolls_back(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "case.m"
+            path.write_text("mpc.baseMVA = 10;\nmpc.bus = [\n1 3 0 0 0 0 1 1 0 10 1 1 1;\n"
+                            "2 1 1 0 0 0 1 1 0 10 1 1 1;\n3 1 1 0 0 0 1 1 0 10 1 1 1;\n];\n"
+                            "mpc.branch = [\n1 2 0.01 0.01 0 0 0 0 0 0 1 -360 360;\n"
+                            "2 3 0.01 0.01 0 0 0 0 0 0 0 -360 360;\n];\n")
+            with self.assertRaisesRegex(NetworkImportError, "孤岛"):
+                import_network(path, replace=True, batch_size=1)
+            # 整体回滚，原有网络保持不变
+            self._assert_matches_demo_csv()
+            stats = import_network(path, replace=True, allow_islands=True)
+            self.assertEqual(stats.islands, 1)
+            # 标幺值 -> Ω：Z_base = 10² / 10
+            self.assertAlmostEqual(BranchData.objects.first().r, 0.1)
+
+
+class NetworkRepositoryTestCase(TestCase):
+    def setUp(self):
+        self.addCleanup(result_cache.invalidate)
+
+    def test_db_network_matches_csv(self):
+        with self.assertNumQueries(2):
+            arrays = repository.load_network_arrays()
+        self.assertEqual((arrays.n_bus, arrays.n_branch), (33, 37))
+        self.assertEqual(arrays.bus["type"].dtype, np.int64)
+        db_model = network_registry.get(DB_NETWORK_ID)
+        csv_model = network_registry.get()
+        np.testing.assert_array_equal(db_model.f_pos, csv_model.f_pos)
+        np.testing.assert_allclose(db_model.base_load_p_mw, csv_model.base_load_p_mw)
+        np.testing.assert_allclose(db_model.branch_impedance_pu(), csv_model.branch_impedance_pu())
+        # 常驻内存，数据未变化时只查询行数与最大主键，不再读取网络
+        with self.assertNumQueries(1):
+            self.assertIs(network_registry.get(DB_NETWORK_ID), db_model)
+
+    def test_bulk_changes_invalidate_db_snapshot(self):
+        # 不触发信号的批量写入（迁移 0006 的 bulk_create、import_network 的 executemany）同样使常驻模型失效
+        db_model = network_registry.get(DB_NETWORK_ID)
+        BranchData.objects.filter(pk=BranchData.objects.order_by("-pk").values("pk")[:1])._raw_delete("default")
+        model = network_registry.get(DB_NETWORK_ID)
+        self.assertIsNot(model, db_model)
+        self.assertEqual(model.n_line, 36)
+
+    def test_views_use_default_network(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="operator"))
+        self.assertEqual(DEFAULT_NETWORK_ID, "case33bw")
+        # 数据库中的网络与 csv 不同时，接口仍与其他计算接口一致使用 csv
+        BusData.objects.filter(bus_i=18).update(Pd=900)
+        result_cache.invalidate()
+        nodes = client.get("/pdn/get_topology_structure/").json()["nodes"]
+        self.assertEqual(nodes[17]["power"], network_registry.get().bus_df["Pd"].round(2).iloc[17])
+        self.assertEqual(PowerFlowCalculationRetrieveView()._run_powerflow(load_scale=1.0, engine="sweep"),
+                         powerflow.run_powerflow(load_scale=1.0, engine="sweep"))
+
+    @mock.patch.object(views, "DEFAULT_NETWORK_ID", DB_NETWORK_ID)
+    def test_views_follow_db_changes(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="operator"))
+        edges = client.get("/pdn/get_topology_structure/").json()["edges"]
+        self.assertEqual(len(edges), 37)
+        self.assertEqual(edges[32], {"line": 33, "source": 21, "target": 8, "status": 0})
+        before = PowerFlowCalculationRetrieveView()._run_powerflow(load_scale=1.0, engine="sweep")
+
+        # 信号使常驻模型失效
+        bus = BusData.objects.get(bus_i=18)
+        bus.Pd *= 10
+        bus.save()
+        nodes = client.get("/pdn/get_topology_structure/").json()["nodes"]
+        self.assertEqual(nodes[17]["power"], 900)
+        after = PowerFlowCalculationRetrieveView()._run_powerflow(load_scale=1.0, engine="sweep")
+        self.assertLess(after["voltages"][17], before["voltages"][17])
+
+
+class PlanTestCase(TestCase):
+    def test_seeded_plans_and_validation(self):
+        self.assertEqual([p.name for p in plans.list_plans()], list(plans.DEFAULT_PLANS))
+        self.assertEqual(plans.get_plan("方案二"), plans.builtin_plan("方案二"))
+        with self.assertRaises(ValueError):
+            plans.get_plan("不存在的方案")
+        with self.assertRaises(ValidationError):
+            Plan(name="方案四", overrides={"r_scale": -1}).full_clean()
+        with self.assertRaises(ValidationError):
+            Plan(name="方案四", overrides={"unknown": 1}).full_clean()
+        # 线路、母线编号需在默认网络中存在
+        for overrides in ({"line_status": {"99": 0}}, {"pv_capacity_mw": {"999": 1}}):
+            with self.subTest(overrides=overrides), self.assertRaises(ValidationError):
+                Plan(name="方案四", overrides=overrides).full_clean()
+
+    def test_invalid_plan_returns_400(self):
+        # 绕过 clean 直接写入（如网络变化后方案中的线路已不存在）：接口返回 400 而不是 500
+        Plan.objects.create(name="失效方案", overrides={"line_status": {"99": 0}})
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="planner"))
+        for url, field in (("/pdn/get_pv_hosting_capacity/?plan=失效方案", "plan"),
+                           ("/pdn/get_probabilistic_power_flow/?plan=失效方案", "plan"),
+                           ("/pdn/get_plan_evaluation/?plans=失效方案", "plans"),
+                           ("/pdn/get_plan_evaluation/", "plans")):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(field, response.data)
+
+    def test_content_hash_memoization(self):
+        # 内容哈希只与参数有关：同参数不同名称的方案共用缓存结果
+        renamed = plans.PlanDefinition.from_overrides("方案一副本", {"close_ties": False, "load_scale": 1})
+        self.assertEqual(renamed.content_hash, plans.builtin_plan("方案一").content_hash)
+        raw = scoring.get_raw_indicators([plans.builtin_plan("方案一")])
+        with mock.patch.object(scoring, "compute_raw_indicators") as compute:
+            np.testing.assert_array_equal(scoring.get_raw_indicators([renamed]), raw)
+            compute.assert_not_called()
+
+    def test_overrides_change_results(self):
+        model = network_registry.get()
+        # 断开主干线路 7、闭合联络线 33（8-21）后仍为辐射状网络
+        base = plans.builtin_plan("方案一")
+        reconfigured = plans.PlanDefinition.from_overrides("重构", {"line_status": {"7": 0, "33": 1}})
+        in_service = reconfigured.in_service(model)
+        self.assertEqual((in_service[6], in_service[32]), (False, True))
+        self.assertNotEqual(reconfigured.content_hash, base.content_hash)
+
+        with_pv = plans.PlanDefinition.from_overrides("光伏", {"pv_capacity_mw": {"18": 0.5}})
+        capacity = with_pv.pv_capacity(model)
+        self.assertEqual(capacity.sum(), 0.5)
+        self.assertEqual(capacity[model.bus_positions([18])[0]], 0.5)
+        raw = scoring.get_raw_indicators([base, reconfigured, with_pv])
+        revenue = scoring.INDICATOR_INDEX["economic.revenue_yuan"]
+        self.assertFalse(np.allclose(raw[0], raw[1], equal_nan=True))
+        self.assertLess(raw[2, revenue], raw[0, revenue])
@@ -0,0 +1,288 @@
+"""
+时序潮流计算
+
+按时间步求解 24 h ~ 8760 h（15 分钟分辨率）的潮流，并输出潮流计算页面使用的结果表：
+pf_bus_voltages.csv、pf_line_loading.csv、dashboard_hourly_curve.csv。
+
+与逐时刻调用 pp.runpp 不同，这里只组装一次节点导纳矩阵并分解一次，所有时间步复用同一个分解结果；
+时间步按块（chunk）批量迭代（Z-bus 隐式高斯法，一次回代求解整块的所有时间步），每一块以上一块的解作为初值。
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .network import NetworkModel
+from .numerics import factorization_cache
+from .rollups import RollupManager
+
+# 典型日负荷曲线（标幺值，24 个整点），用于未提供负荷曲线时
+TYPICAL_DAILY_LOAD_SHAPE = np.array([
+    0.73, 0.76, 0.71, 0.68, 0.67, 0.69, 0.75, 0.84, 0.92, 0.96, 0.98, 1.00,
+    0.97, 0.94, 0.93, 0.94, 0.96, 0.99, 1.00, 0.98, 0.95, 0.90, 0.84, 0.78,
+])
+
+
+@dataclass
+class Profiles:
+    """各母线的负荷/光伏曲线，形状均为 (时间步数, 母线数)，单位 MW/MVAr"""
+    times: pd.DatetimeIndex
+    load_p_mw: np.ndarray
+    load_q_mvar: np.ndarray
+    pv_p_mw: np.ndarray
+
+    def __post_init__(self):
+        shape = (len(self.times), self.load_p_mw.shape[1])
+        for name in ("load_p_mw", "load_q_mvar", "pv_p_mw"):
+            if getattr(self, name).shape != shape:
+                raise ValueError(f"{name} 的形状应为 {shape}，实际为 {getattr(self, name).shape}")
+
+    @classmethod
+    def typical(cls, model: NetworkModel, start="2023-01-01", periods=24, freq="1h", load_scale=1.0,
+                pv_capacity_mw: Dict[int, float] | None = None) -> "Profiles":
+        """典型曲线：基准负荷 × 典型日负荷曲线，光伏按 6~18 时的正弦出力曲线"""
+        times = pd.date_range(start=start, periods=periods, freq=freq)
+        hours = times.hour + times.minute / 60
+        shape = np.interp(hours, np.arange(25), np.append(TYPICAL_DAILY_LOAD_SHAPE, TYPICAL_DAILY_LOAD_SHAPE[0]))
+        load_p = np.outer(shape, model.base_load_p_mw) * load_scale
+        load_q = np.outer(shape, model.base_load_q_mvar) * load_scale
+
+        pv_p = np.zeros_like(load_p)
+        if pv_capacity_mw:
+            pv_shape = np.clip(np.sin((hours - 6) / 12 * np.pi), 0, None)
+            positions = model.bus_positions(list(pv_capacity_mw.keys()))
+            pv_p[:, positions] = np.outer(pv_shape, list(pv_capacity_mw.values()))
+        return cls(times=times, load_p_mw=load_p, load_q_mvar=load_q, pv_p_mw=pv_p)
+
+    @classmethod
+    def from_csv(cls, model: NetworkModel, load_p_path: Path, load_q_path: Path | None = None,
+                 pv_path: Path | None = None, time_column="time", load_scale=1.0) -> "Profiles":
+        """
+        从宽表 csv 读取曲线，每行一个时间步，列为 time, Bus1, Bus2, ...（MW/MVAr）
+        未给出无功曲线时，按基准负荷的功率因数由有功曲线折算。负荷曲线（有功、无功）再乘以 load_scale。
+        """
+
+        def read(path: Path) -> pd.DataFrame:
+            df = pd.read_csv(path, parse_dates=[time_column], encoding="utf-8-sig")
+            return df.set_index(time_column)
+
+        def to_matrix(df: pd.DataFrame) -> np.ndarray:
+            matrix = np.zeros((len(df), model.n_bus))
+            bus_i = [int(str(c).removeprefix("Bus")) for c in df.columns]
+            matrix[:, model.bus_positions(bus_i)] = df.to_numpy(dtype=float)
+            return matrix
+
+        load_p_df = read(load_p_path)
+        load_p = to_matrix(load_p_df)
+        if load_q_path is not None:
+            load_q = to_matrix(read(load_q_path).reindex(load_p_df.index))
+        else:
+            ratio = np.divide(model.base_load_q_mvar, model.base_load_p_mw,
+                              out=np.zeros(model.n_bus), where=model.base_load_p_mw != 0)
+            load_q = load_p * ratio
+        pv_p = np.zeros_like(load_p)
+        if pv_path is not None:
+            pv_p = to_matrix(read(pv_path).reindex(load_p_df.index).fillna(0))
+        return cls(times=pd.DatetimeIndex(load_p_df.index), load_p_mw=load_p * load_scale,
+                   load_q_mvar=load_q * load_scale, pv_p_mw=pv_p)
+
+
+def line_columns(model: NetworkModel):
+    """线路列名，从 1 起编号（Line1 对应 线1，与 contingency/reconfiguration 等结果中的线路名称一致）"""
+    return [f"Line{k + 1}" for k in range(model.n_line)]
+
+
+@dataclass
+class TimeSeriesResult:
+    """时序潮流结果，(时间步数, 母线数/线路数) 的数组"""
+    model: NetworkModel
+    profiles: Profiles
+    vm_pu: np.ndarray
+    va_degree: np.ndarray
+    loading_percent: np.ndarray
+    p_from_mw: np.ndarray
+    line_losses_mw: np.ndarray
+    converged: np.ndarray
+
+    @property
+    def times(self) -> pd.DatetimeIndex:
+        return self.profiles.times
+
+    def summary(self) -> pd.DataFrame:
+        """各时间步的汇总曲线（dashboard_hourly_curve 的逐时间步版本）"""
+        p_load = self.profiles.load_p_mw.sum(axis=1)
+        q_load = self.profiles.load_q_mvar.sum(axis=1)
+        pv_gen = self.profiles.pv_p_mw.sum(axis=1)
+        losses = self.line_losses_mw.sum(axis=1)
+        # 平衡节点注入为负即为倒送，倒送部分视为未被消纳
+        p_slack = p_load - pv_gen + losses
+        u_avg = self.vm_pu.mean(axis=1)
+        return pd.DataFrame({
+            "time": self.times,
+            "P_MW": p_load,
+            "Q_MVAr": q_load,
+            "S_MVA": np.hypot(p_load, q_load),
+            "U_avg_pu": u_avg,
+            "U_min_pu": self.vm_pu.min(axis=1),
+            "U_max_pu": self.vm_pu.max(axis=1),
+            "max_line_loading_pct": self.loading_percent.max(axis=1),
+            "voltage_deviation_pct": (1 - u_avg) * 100,
+            "losses_MW": losses,
+            "loss_rate_pct": np.divide(losses, p_load, out=np.zeros_like(losses), where=p_load != 0) * 100,
+            "PV_gen_MW": pv_gen,
+            "PV_consumed_MW": pv_gen - np.clip(-p_slack, 0, None),
+        })
+
+    def hourly_summary(self) -> pd.DataFrame:
+        """按小时聚合的汇总曲线（dashboard_hourly_curve.csv）"""
+        return hourly_summary(self.summary().set_index("time"))
+
+    def to_tables(self) -> Dict[str, pd.DataFrame]:
+        """与 frontend/demo_data 中同名 csv 相同结构的结果表（前端按列的位置读取线路负载率，列名见 line_columns）"""
+        bus_voltages = pd.DataFrame(self.vm_pu, columns=[f"Bus{i}" for i in self.model.bus_i])
+        bus_voltages.insert(0, "时间", self.times)
+        line_loading = pd.DataFrame(self.loading_percent, columns=line_columns(self.model))
+        line_loading.insert(0, "时间", self.times)
+        return {
+            "pf_bus_voltages.csv": bus_voltages,
+            "pf_line_loading.csv": line_loading,
+            "dashboard_hourly_curve.csv": self.hourly_summary(),
+        }
+
+    def write_store(self, rollups: RollupManager, network_id: str) -> Dict[str, str]:
+        """
+        写入时序数据存储（同时更新预聚合），数据集按网络区分：<network_id>.bus_vm_pu、<network_id>.line_loading_pct、
+        <network_id>.summary（列与 summary() 一致），已有时间步的数据被覆盖
+        """
+        frames = {
+            "bus_vm_pu": pd.DataFrame(self.vm_pu, index=self.times, columns=[f"Bus{i}" for i in self.model.bus_i]),
+            "line_loading_pct": pd.DataFrame(self.loading_percent, index=self.times, columns=line_columns(self.model)),
+            "summary": self.summary().set_index("time"),
+        }
+        names = {}
+        for suffix, df in frames.items():
+            name = f"{network_id}.{suffix}"
+            rollups.write_frame(name, df)
+            names[suffix] = name
+        return names
+
+    def write_tables(self, output_dir: Path) -> Dict[str, Path]:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for filename, df in self.to_tables().items():
+            path = output_dir / filename
+            # 与现有 demo_data 保持一致，带 BOM 方便 excel 直接打开
+            df.to_csv(path, index=False, encoding="utf-8-sig", date_format="%Y-%m-%d %H:%M:%S")
+            paths[filename] = path
+        return paths
+
+
+def hourly_summary(summary: pd.DataFrame) -> pd.DataFrame:
+    """逐时间步的汇总曲线（以时间为索引，列同 TimeSeriesResult.summary）按小时聚合，time 为第一列"""
+    hourly = summary.resample("1h").mean()
+    hourly["U_min_pu"] = summary["U_min_pu"].resample("1h").min()
+    hourly["U_max_pu"] = summary["U_max_pu"].resample("1h").max()
+    hourly["max_line_loading_pct"] = summary["max_line_loading_pct"].resample("1h").max()
+    hourly["voltage_deviation_pct"] = (1 - hourly["U_avg_pu"]) * 100
+    hourly["loss_rate_pct"] = (hourly["losses_MW"] / hourly["P_MW"].where(hourly["P_MW"] != 0)).fillna(0) * 100
+    return hourly.dropna(how="all").rename_axis("time").reset_index()
+
+
+def daily_summary(summary: pd.DataFrame, step_hours: float) -> pd.DataFrame:
+    """一天的汇总曲线 -> 日汇总指标（dashboard_daily_summary.csv，一行）"""
+    e_load = summary["P_MW"].sum() * step_hours
+    e_loss = summary["losses_MW"].sum() * step_hours
+    return pd.DataFrame([{
+        "P_peak_MW": summary["P_MW"].max(),
+        "U_min_pu": summary["U_min_pu"].min(),
+        "U_max_pu": summary["U_max_pu"].max(),
+        "max_loading_pct": summary["max_line_loading_pct"].max(),
+        "avg_voltage_deviation_pct": summary["voltage_deviation_pct"].mean(),
+        "loss_rate_pct_day": e_loss / e_load * 100 if e_load else 0.0,
+        "E_pv_gen_MWh": summary["PV_gen_MW"].sum() * step_hours,
+        "E_pv_consumed_MWh": summary["PV_consumed_MW"].sum() * step_hours,
+        "E_load_MWh": e_load,
+        "E_loss_MWh": e_loss,
+    }])
+
+
+def run_time_series(model: NetworkModel,
+                    profiles: Profiles,
+                    r_scale: float = 1.0,
+                    in_service: np.ndarray | None = None,
+                    tol: float = 1e-8,
+                    max_iteration: int = 100,
+                    chunk_size: int = 96,
+                    progress: Callable[[float], None] | None = None) -> TimeSeriesResult:
+    """
+    求解时序潮流
+
+    :param model: 网络模型
+    :param profiles: 各母线的负荷/光伏曲线
+    :param r_scale: 线路阻抗缩放系数
+    :param in_service: 线路投运状态，默认全部投运（与 _run_powerflow 一致）
+    :param tol: 收敛判据，相邻两次迭代电压变化量的最大值（标幺值）
+    :param max_iteration: 每一块的最大迭代次数
+    :param chunk_size: 每一块的时间步数，默认 96（15 分钟分辨率下为一天）
+    :param progress: 进度回调，每求解完一块调用一次，参数为已完成的比例
+    """
+    n, n_steps = model.n_bus, len(profiles.times)
+    slack = model.slack_pos
+
+    # 导纳矩阵的分解在同一拓扑、r_scale 的多次求解之间复用
+    factorization = factorization_cache.factorize(model, r_scale, in_service)
+    pq = factorization.pq
+    v_slack = 1.0 + 0j
+    # 平衡节点对 PQ 节点的贡献是常数项
+    rhs_slack = (factorization.y_ps * v_slack)[:, None]
+
+    # 注入功率（标幺值）：光伏 - 负荷
+    s_inj = ((profiles.pv_p_mw - profiles.load_p_mw) - 1j * profiles.load_q_mvar)[:, pq].T / model.sn_mva
+
+    # 与平衡节点不连通的母线电压为 0
+    v = np.zeros((n, n_steps), dtype=complex)
+    v[slack] = v_slack
+    converged = np.zeros(n_steps, dtype=bool)
+    v_init = np.ones(len(pq), dtype=complex)
+    for start in range(0, n_steps, chunk_size):
+        stop = min(start + chunk_size, n_steps)
+        s = s_inj[:, start:stop]
+        v_pq = np.repeat(v_init[:, None], stop - start, axis=1)
+        for _ in range(max_iteration):
+            v_new = factorization.solve(np.conj(s / v_pq) - rhs_slack)
+            delta = np.abs(v_new - v_pq).max(axis=0)
+            v_pq = v_new
+            if delta.max() < tol:
+                break
+        converged[start:stop] = delta < tol
+        v[pq, start:stop] = v_pq
+        # 下一块以本块最后一个时间步的解作为初值
+        v_init = v_pq[:, -1]
+        if progress is not None:
+            progress(stop / n_steps)
+
+    if not converged.all():
+        logger.warning("时序潮流有 {} 个时间步未收敛", int((~converged).sum()))
+        v[:, ~converged] = np.nan
+
+    # 线路潮流
+    z = model.branch_impedance_pu(r_scale)
+    v_f, v_t = v[model.f_pos].T, v[model.t_pos].T
+    i_pu = (v_f - v_t) / z
+    if in_service is not None:
+        i_pu[:, ~in_service] = 0
+    i_ka = np.abs(i_pu) * model.current_base_ka()
+
+    return TimeSeriesResult(
+        model=model,
+        profiles=profiles,
+        vm_pu=np.abs(v).T,
+        va_degree=np.angle(v, deg=True).T,
+        loading_percent=i_ka / model.max_i_ka * 100,
+        p_from_mw=(v_f * np.conj(i_pu)).real * model.sn_mva,
+        line_losses_mw=np.abs(i_pu) ** 2 * z.real * model.sn_mva,
+        converged=converged,
+    )
@@ -0,0 +1,308 @@
+"""
+时序数据存储（按天分区、按列存放的内存映射数组）
+
+母线电压、线路负载率、光伏出力等时序数据不再存成宽表 csv（每次访问都要整表重新解析），而是：
+
+    <root>/<series>/meta.json        列名、时间分辨率、数据类型
+    <root>/<series>/YYYY-MM-DD.bin   一天的数据，形状为 (列数, 每天时间步数)，按列连续存放，未写入的位置为 NaN
+
+- 按时间范围读取只打开涉及的分区，按列读取只访问对应列的连续区域，不需要加载整个文件；
+- 写入新的时间步只改写分区内对应的位置（新的一天才创建分区文件）；
+- 新增的列追加在 meta.json 的列名末尾，旧分区在下一次写入时才在文件末尾补齐，读取时缺少的列为 NaN。
+"""
+import bisect
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from django.conf import settings
+
+DAY_NS = 86400 * 10 ** 9
+DTYPES = ("float32", "float64")
+_DAY_FILE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.bin$")
+# 预聚合数据集的名称为 <name>@<freq>.<stat>（见 rollups.py）
+_SERIES_NAME = re.compile(r"^[\w.@\-]+$")
+
+
+class TimeSeries:
+    """一个时序数据集（固定的时间分辨率和数据类型，列可以增加）"""
+
+    # 常驻的只读内存映射分区数（每个占用一个文件描述符）
+    MAX_OPEN_PARTITIONS = 64
+    # 读取的列数不超过该值时直接 pread，否则使用内存映射
+    PREAD_MAX_COLUMNS = 32
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta_mtime_ns = (path / "meta.json").stat().st_mtime_ns
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.freq: str = meta["freq"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.columns: List[str] = meta["columns"]
+        self._column_index = {name: k for k, name in enumerate(self.columns)}
+        self.step_ns = int(pd.Timedelta(self.freq).value)
+        self.slots_per_day = DAY_NS // self.step_ns
+        self._column_bytes = self.slots_per_day * self.dtype.itemsize
+        # 分区日期 -> (文件大小, 只读内存映射)
+        self._partitions: "OrderedDict[str, Tuple[int, np.ndarray]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"TimeSeries({self.path.name!r}, freq={self.freq!r}, columns={len(self.columns)})"
+
+    # ------ 元数据 ------ #
+
+    @staticmethod
+    def write_meta(path: Path, columns: Sequence[str], freq: str, dtype: str):
+        step_ns = int(pd.Timedelta(freq).value)
+        if step_ns <= 0 or DAY_NS % step_ns:
+            raise ValueError(f"时间分辨率 {freq} 应能整除一天")
+        if dtype not in DTYPES:
+            raise ValueError(f"数据类型应为 {DTYPES} 之一")
+        if len(set(columns)) != len(columns):
+            raise ValueError("列名不能重复")
+        path.mkdir(parents=True, exist_ok=True)
+        tmp_path = path / f"meta.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path.write_text(json.dumps({"freq": freq, "dtype": dtype, "columns": list(columns)}, ensure_ascii=False),
+                            encoding="utf-8")
+        tmp_path.replace(path / "meta.json")
+
+    def add_columns(self, columns: Sequence[str]):
+        """增加新列（已有的列忽略）"""
+        with self._lock:
+            new = [c for c in dict.fromkeys(columns) if c not in self._column_index]
+            if not new:
+                return
+            self.write_meta(self.path, self.columns + new, self.freq, self.dtype.name)
+            self.meta_mtime_ns = (self.path / "meta.json").stat().st_mtime_ns
+            for name in new:
+                self._column_index[name] = len(self.columns)
+                self.columns.append(name)
+
+    def column_positions(self, columns: Sequence[str] | None) -> np.ndarray:
+        if columns is None:
+            return np.arange(len(self.columns))
+        missing = [c for c in columns if c not in self._column_index]
+        if missing:
+            raise KeyError(f"{self.path.name} 中没有这些列：{missing[:5]}")
+        return np.fromiter((self._column_index[c] for c in columns), dtype=np.int64, count=len(columns))
+
+    # ------ 分区 ------ #
+
+    def partition_path(self, day) -> Path:
+        """某一天的分区文件（不一定存在）"""
+        return self.path / f"{day}.bin"
+
+    def _day_names(self) -> List[str]:
+        # 文件名 YYYY-MM-DD 按字符串排序即按日期排序
+        return sorted(m.group(1) for name in os.listdir(self.path) if (m := _DAY_FILE.match(name)))
+
+    def days(self) -> np.ndarray:
+        """已有数据的日期（升序，datetime64[D]）"""
+        return np.array(self._day_names(), dtype="datetime64[D]")
+
+    def _open_for_read(self, day: str) -> np.ndarray | None:
+        """分区的只读内存映射，形状为 (分区中的列数, 每天时间步数)"""
+        path = os.path.join(self.path, f"{day}.bin")
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._partitions.get(day)
+            # 文件大小变化（补齐了新列）后重新映射
+            if cached is not None and cached[0] == size:
+                self._partitions.move_to_end(day)
+                return cached[1]
+            n_columns = size // self._column_bytes
+            if n_columns == 0:
+                return None
+            # 直接使用 mmap + frombuffer，比 np.memmap 的开销小得多（一年的数据有 365 个分区）
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), n_columns * self._column_bytes, access=mmap.ACCESS_READ)
+            array = np.frombuffer(buffer, dtype=self.dtype).reshape(n_columns, self.slots_per_day)
+            self._partitions[day] = (size, array)
+            while len(self._partitions) > self.MAX_OPEN_PARTITIONS:
+                self._partitions.popitem(last=False)
+            return array
+
+    def _pread_columns(self, day: str, positions: np.ndarray, out: np.ndarray):
+        """按列直接读取分区文件（只取少数几列时比建立内存映射快）"""
+        try:
+            fd = os.open(os.path.join(self.path, f"{day}.bin"), os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            # 相邻的列合并为一次读取
+            breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+            for lo, hi in zip([0, *breaks.tolist()], [*breaks.tolist(), len(positions)]):
+                buffer = os.pread(fd, (hi - lo) * self._column_bytes, int(positions[lo]) * self._column_bytes)
+                # 分区中还没有的列（新增列尚未补齐）保持 NaN
+                n = len(buffer) // self._column_bytes
+                if n:
+                    block = np.frombuffer(buffer, dtype=self.dtype, count=n * self.slots_per_day)
+                    out[lo:lo + n] = block.reshape(n, self.slots_per_day)
+        finally:
+            os.close(fd)
+
+    def _open_for_write(self, day: np.datetime64) -> np.memmap:
+        """打开分区用于写入，不存在时创建；列数不足时在文件末尾补 NaN"""
+        path = self.partition_path(day)
+        expected = len(self.columns) * self._column_bytes
+        with open(path, "ab") as f:
+            size = f.tell()
+            if size % self._column_bytes:
+                raise ValueError(f"分区文件 {path} 已损坏")
+            if size < expected:
+                f.write(np.full((expected - size) // self.dtype.itemsize, np.nan, dtype=self.dtype).tobytes())
+        return np.memmap(path, dtype=self.dtype, mode="r+", shape=(len(self.columns), self.slots_per_day))
+
+    # ------ 读写 ------ #
+
+    def _split_times(self, times) -> Tuple[np.ndarray, np.ndarray]:
+        """时间 -> (日期, 当天的时间步序号)"""
+        ns = pd.DatetimeIndex(times).asi8
+        if (ns % self.step_ns).any():
+            raise ValueError(f"时间应对齐到 {self.freq}")
+        return (ns // DAY_NS).astype("datetime64[D]"), (ns % DAY_NS) // self.step_ns
+
+    def write(self, times, values, columns: Sequence[str] | None = None):
+        """
+        写入（覆盖）若干时间步
+
+        :param times: 时间，长度 n_t
+        :param values: 形状为 (n_t, 列数) 的数组
+        :param columns: 列名，缺省为全部列；不存在的列自动增加
+        """
+        values = np.asarray(values, dtype=self.dtype)
+        if values.ndim == 1:
+            values = values[None, :]
+        if columns is not None:
+            self.add_columns(columns)
+        positions = self.column_positions(columns)
+        days, slots = self._split_times(times)
+        if values.shape != (len(days), len(positions)):
+            raise ValueError(f"values 的形状应为 {(len(days), len(positions))}，实际为 {values.shape}")
+        with self._lock:
+            for day in np.unique(days):
+                mask = days == day
+                mm = self._open_for_write(day)
+                mm[positions[:, None], slots[mask][None, :]] = values[mask].T
+                mm.flush()
+                del mm
+
+    def read(self, start=None, end=None, columns: Sequence[str] | None = None) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        读取 [start, end) 时间范围内的若干列
+
+        :return: (时间, 形状为 (n_t, 列数) 的数组)，所选列全部未写入的时间步不返回
+        """
+        positions = self.column_positions(columns)
+        start_ns = pd.Timestamp(start).value if start is not None else None
+        end_ns = pd.Timestamp(end).value if end is not None else None
+        names = self._day_names()
+        # 只打开时间范围涉及的分区
+        if start_ns is not None:
+            names = names[bisect.bisect_left(names, str(np.datetime64(start_ns, "ns").astype("datetime64[D]"))):]
+        if end_ns is not None:
+            names = names[:bisect.bisect_right(names, str(np.datetime64(end_ns, "ns").astype("datetime64[D]")))]
+
+        # (列, 日, 时间步)，整天读出后再按时间范围截取（最多多读首尾两天）
+        values = np.full((len(positions), len(names), self.slots_per_day), np.nan, dtype=self.dtype)
+        if 0 < len(positions) <= self.PREAD_MAX_COLUMNS:
+            for d, name in enumerate(names):
+                self._pread_columns(name, positions, values[:, d])
+        elif len(positions):
+            last = positions.max()
+            for d, name in enumerate(names):
+                partition = self._open_for_read(name)
+                if partition is None:
+                    continue
+                if last < partition.shape[0]:
+                    values[:, d] = partition[positions]
+                else:
+                    present = positions < partition.shape[0]
+                    values[present, d] = partition[positions[present]]
+        values = values.reshape(len(positions), -1)
+
+        times = (np.array(names, dtype="datetime64[D]").astype("datetime64[ns]").astype(np.int64)[:, None]
+                 + np.arange(self.slots_per_day, dtype=np.int64) * self.step_ns).ravel()
+        mask = ~np.isnan(values).all(axis=0)
+        if start_ns is not None:
+            mask &= times >= start_ns
+        if end_ns is not None:
+            mask &= times < end_ns
+        return pd.DatetimeIndex(times[mask]), values[:, mask].T
+
+    def read_frame(self, start=None, end=None, columns: Sequence[str] | None = None) -> pd.DataFrame:
+        times, values = self.read(start, end, columns)
+        return pd.DataFrame(values, index=times.rename("time"),
+                            columns=list(columns) if columns is not None else list(self.columns))
+
+    def write_frame(self, df: pd.DataFrame):
+        """写入以时间为索引的宽表（列名即列）"""
+        self.write(df.index, df.to_numpy(dtype=float), columns=[str(c) for c in df.columns])
+
+
+class TimeSeriesStore:
+    """时序数据集的集合，一个数据集一个目录"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._series: Dict[str, TimeSeries] = {}
+        self._lock = threading.Lock()
+
+    def _series_path(self, name: str) -> Path:
+        if not _SERIES_NAME.match(name):
+            raise ValueError(f"数据集名称只能包含字母、数字、下划线、点、@ 和短横线：{name}")
+        return self.root / name
+
+    def list_series(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / "meta.json").exists())
+
+    def get(self, name: str) -> TimeSeries:
+        """已有的数据集，不存在时抛出 KeyError"""
+        path = self._series_path(name)
+        try:
+            mtime_ns = (path / "meta.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            raise KeyError(f"时序数据集不存在：{name}")
+        with self._lock:
+            series = self._series.get(name)
+            # 其他进程修改了元数据（增加了列）
+            if series is None or series.meta_mtime_ns != mtime_ns:
+                series = self._series[name] = TimeSeries(path)
+            return series
+
+    def get_or_create(self, name: str, columns: Sequence[str] = (), freq: str = "15min",
+                      dtype: str = "float32") -> TimeSeries:
+        """获得数据集，不存在时创建；已存在时补充缺少的列（时间分辨率和数据类型不变）"""
+        try:
+            series = self.get(name)
+        except KeyError:
+            TimeSeries.write_meta(self._series_path(name), list(columns), freq, dtype)
+            series = self.get(name)
+        series.add_columns(columns)
+        return series
+
+    def delete(self, name: str):
+        with self._lock:
+            self._series.pop(name, None)
+            path = self._series_path(name)
+            if path.exists():
+                for child in path.iterdir():
+                    child.unlink()
+                path.rmdir()
+
+
+ts_store = TimeSeriesStore(settings.PDN_TSDB_DIR)
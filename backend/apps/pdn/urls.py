@@ -6,4 +6,20 @@ urlpatterns = [
     # 【知识点】restful 风格主要将互联网都视为资源，不够灵活和自由，当然可以推荐练习 restful，但是暂时我的想法是将 http 请求视为云函数比较自由。
     path("get_topology_structure/", views.TopologyStructureRetrieveView.as_view()),
     path("get_power_flow_calculation_result/", views.PowerFlowCalculationRetrieveView.as_view()),
+    path("sweep_power_flow/", views.PowerFlowSweepView.as_view()),
+    path("get_pv_hosting_capacity/", views.PvHostingCapacityRetrieveView.as_view()),
+    path("get_probabilistic_power_flow/", views.ProbabilisticPowerFlowRetrieveView.as_view()),
+    path("get_n1_contingency/", views.N1ContingencyRetrieveView.as_view()),
+    path("get_reconfiguration/", views.ReconfigurationRetrieveView.as_view()),
+    path("get_time_series/", views.TimeSeriesQueryRetrieveView.as_view()),
+    path("get_plans/", views.PlanListView.as_view()),
+    path("get_plan_evaluation/", views.PlanEvaluationRetrieveView.as_view()),
+    path("what_if_power_flow/", views.WhatIfPowerFlowView.as_view()),
+    path("get_result_cache_stats/", views.ResultCacheStatsRetrieveView.as_view()),
+    path("get_factorization_stats/", views.FactorizationStatsRetrieveView.as_view()),
+    path("submit_job/", views.JobSubmitView.as_view()),
+    path("get_job_status/<uuid:job_id>/", views.JobStatusRetrieveView.as_view()),
+    path("get_job_result/<uuid:job_id>/", views.JobResultRetrieveView.as_view()),
+    path("cancel_job/<uuid:job_id>/", views.JobCancelView.as_view()),
+    path("stream_job_events/<uuid:job_id>/", views.JobEventsStreamView.as_view()),
 ]
@@ -1,108 +1,295 @@
+import json
+import time
 from pathlib import Path
 
-import pandas as pd
-import pandapower as pp
+import numpy as np
 
 from django.conf import settings
-from rest_framework import views, generics, viewsets
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import views, generics, viewsets, status
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
 
-DEMO_DATA_PATH = settings.BASE_DIR / "apps" / "pdn" / "demo_data"
+from . import (contingency, downsample, hosting, jobs, powerflow, probabilistic, radial, reconfiguration, rollups,
+               scenarios, schemas, scoring, sensitivity, serializers)
+from .cache import result_cache
+from .models import Job, Plan
+from .numerics import factorization_cache
+from .tsdb import ts_store
+from .network import DEFAULT_NETWORK_ID, network_registry
 
 
 class PowerFlowCalculationRetrieveView(views.APIView):
-    def _run_powerflow(self, load_scale=0.001, r_scale=1.0):
-        # 加载数据
-        bus_df = pd.read_csv(DEMO_DATA_PATH / "bus.csv")
-        line_df = pd.read_csv(DEMO_DATA_PATH / "line.csv")
-
-        net = pp.create_empty_network()
-
-        # -----------------------
-        # 添加母线，bus_i -1
-        # -----------------------
-        for _, row in bus_df.iterrows():
-            pp.create_bus(
-                net,
-                vn_kv=row["baseKV"],
-                name=f"Bus{int(row["bus_i"])}",
-                index=int(row["bus_i"]) - 1
-            )
-
-        # -----------------------
-        # 添加平衡节点
-        # -----------------------
-        slack_bus = int(bus_df[bus_df["type"] == 3]["bus_i"].values[0]) - 1
-        pp.create_ext_grid(net, bus=slack_bus, vm_pu=1.0, name="Slack")
-
-        # -----------------------
-        # 添加负荷
-        # -----------------------
-        for _, row in bus_df.iterrows():
-            if row["type"] != 3:
-                pp.create_load(
-                    net,
-                    bus=int(row["bus_i"]) - 1,
-                    p_mw=row["Pd"] / 1000 * load_scale,
-                    q_mvar=row["Qd"] / 1000 * load_scale
-                )
-
-        # -----------------------
-        # 添加线路，fbus/tbus -1
-        # -----------------------
-        for _, row in line_df.iterrows():
-            pp.create_line_from_parameters(
-                net,
-                from_bus=int(row["fbus"]) - 1,
-                to_bus=int(row["tbus"]) - 1,
-                length_km=1,
-                r_ohm_per_km=row["r"] * r_scale,
-                x_ohm_per_km=row["x"] * r_scale,
-                c_nf_per_km=0,
-                max_i_ka=0.5
-            )
-
-        # -----------------------
-        # 潮流计算
-        # -----------------------
+    def _run_powerflow(self, load_scale=0.001, r_scale=1.0, engine="nr"):
+        # 与其他计算接口使用同一网络（settings.PDN_NETWORK_ID）
+        return powerflow.run_powerflow(load_scale=load_scale, r_scale=r_scale, engine=engine,
+                                       network_id=DEFAULT_NETWORK_ID)
+
+    @extend_schema(parameters=[schemas.PowerFlowCalculationIn])
+    def get(self, request: Request):
+        schema_in = schemas.PowerFlowCalculationIn(data=request.query_params)
+        schema_in.is_valid(raise_exception=True)
+        data = self._run_powerflow(engine=schema_in.validated_data["engine"])
+        return Response(data=data)
+
+
+class PowerFlowSweepView(views.APIView):
+    """
+    load_scale / r_scale 参数扫描
+
+    响应为 NDJSON 流：每求解完一个参数组合输出一行 {"type": "point", ...}，最后一行为 {"type": "surface", ...}
+    """
+
+    @extend_schema(request=schemas.PowerFlowSweepIn)
+    def post(self, request: Request):
+        schema_in = schemas.PowerFlowSweepIn(data=request.data)
+        schema_in.is_valid(raise_exception=True)
+        points = schema_in.validated_data["expanded_points"]
+        engine = schema_in.validated_data["engine"]
+
+        def stream():
+            results = []
+            for result in scenarios.iter_sweep(points, engine=engine):
+                results.append(result)
+                yield json.dumps({"type": "point", **result}, ensure_ascii=False) + "\n"
+            yield json.dumps({"type": "surface", **scenarios.build_surfaces(results)}, ensure_ascii=False) + "\n"
+
+        return StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+
+
+class PvHostingCapacityRetrieveView(views.APIView):
+    """光伏承载力：各区域/母线在不越限前提下可接入的最大光伏容量（按 方案/天气/季节 缓存）"""
+
+    @extend_schema(parameters=[schemas.PvHostingCapacityIn])
+    def get(self, request: Request):
+        schema_in = schemas.PvHostingCapacityIn(data=request.query_params)
+        schema_in.is_valid(raise_exception=True)
+        data = schema_in.validated_data
+        scenario = hosting.Scenario(plan=data["plan"], weather=data["weather"], season=data["season"])
         try:
-            pp.runpp(net, max_iteration=50)
-            converged = True
-        except Exception as e:
-            return {"converged": False, "error": str(e)}
-
-        # -----------------------
-        # 返回数据
-        # -----------------------
-        return {
-            "voltages": net.res_bus.vm_pu.round(4).tolist(),
-            "loading": net.res_line.loading_percent.round(2).tolist(),
-            "total_power": round(net.res_load.p_mw.sum(), 2),
-            "max_loading": round(net.res_line.loading_percent.max(), 2),
-            "voltage_deviation": round((1 - net.res_bus.vm_pu.min()) * 100, 2),
-            "network_loss": round(net.res_line.pl_mw.sum() / net.res_load.p_mw.sum() * 100, 2)
-            if net.res_load.p_mw.sum() != 0 else 0,
-            "line_details": [
-                {
-                    "name": f"线{i + 1}",
-                    "from": int(line_df.iloc[i]["fbus"]),
-                    "to": int(line_df.iloc[i]["tbus"]),
-                    "loading": round(net.res_line.loading_percent[i], 2),
-                    "power": round(net.res_line.p_from_mw[i], 2),
-                    "current": round(net.res_line.i_from_ka[i] * 1000, 2)
-                }
-                for i in range(len(net.res_line))
-            ],
-            "converged": converged
-        }
+            return Response(data=hosting.compute_hosting_capacity(scenario, by=data["by"]))
+        except ValueError as e:
+            # 方案与网络不符（如网络变化后方案中的线路、母线已不存在）
+            raise ValidationError({"plan": str(e)})
+
 
+class ProbabilisticPowerFlowRetrieveView(views.APIView):
+    """
+    蒙特卡洛概率潮流：各母线电压越限概率、各线路负载率分位数（同一 seed 的结果相同，结果缓存）
+
+    样本数较多时建议通过 submit_job 提交 probabilistic 任务
+    """
+
+    @extend_schema(parameters=[schemas.ProbabilisticPowerFlowIn])
     def get(self, request: Request):
-        data = self._run_powerflow()
+        schema_in = schemas.ProbabilisticPowerFlowIn(data=request.query_params)
+        schema_in.is_valid(raise_exception=True)
+        data = schema_in.validated_data
+        scenario = hosting.Scenario(plan=data["plan"], weather=data["weather"], season=data["season"])
+        try:
+            return Response(data=probabilistic.compute_probabilistic_power_flow(
+                scenario, probabilistic.SamplingConfig.from_params(data), seed=data["seed"]))
+        except ValueError as e:
+            raise ValidationError({"plan": str(e)})
+
+
+class N1ContingencyRetrieveView(views.APIView):
+    """N-1 静态安全分析：各断线的越限明细与 N-1 通过率（大网络建议通过 submit_job 提交 n1 任务）"""
+
+    @extend_schema(parameters=[schemas.N1ContingencyIn])
+    def get(self, request: Request):
+        schema_in = schemas.N1ContingencyIn(data=request.query_params)
+        schema_in.is_valid(raise_exception=True)
+        try:
+            data = contingency.compute_n1(**schema_in.validated_data)
+        except contingency.ContingencyConvergenceError as e:
+            data = {"converged": False, "error": f"基态潮流未收敛：{e}"}
+        return Response(data=data)
+
+
+class ReconfigurationRetrieveView(views.APIView):
+    """网络重构：搜索网损/电压偏差最小的辐射状开关组合（结果缓存）"""
+
+    @extend_schema(parameters=[schemas.ReconfigurationIn])
+    def get(self, request: Request):
+        schema_in = schemas.ReconfigurationIn(data=request.query_params)
+        schema_in.is_valid(raise_exception=True)
+        try:
+            data = reconfiguration.compute_reconfiguration(**schema_in.validated_data)
+        except ValueError as e:
+            raise ValidationError({"switchable": str(e)})
         return Response(data=data)
 
 
+class TimeSeriesQueryRetrieveView(views.APIView):
+    """时序数据查询：按 (时间范围, 数据频率) 从最粗的可用预聚合读取，点数超过 max_points 时按 LTTB 降采样"""
+
+    @extend_schema(parameters=[schemas.TimeSeriesQueryIn])
+    def get(self, request: Request):
+        schema_in = schemas.TimeSeriesQueryIn(data=request.query_params)
+        schema_in.is_valid(raise_exception=True)
+        params = schema_in.validated_data
+        series = params["series"]
+        result = rollups.query(ts_store, series.path.name, start=params.get("start"), end=params.get("end"),
+                               freq=params["freq"], columns=params.get("columns"), stat=params["stat"])
+        times, values = result.times, result.values.astype(float)
+        total_points = len(times)
+        if "max_points" in params and total_points > params["max_points"]:
+            # 各列分别降采样后取并集，保留每条曲线的峰谷
+            selected = downsample.lttb_union(times.asi8, list(values.T), params["max_points"])
+            times, values = times[selected], values[selected]
+        values = np.round(values, 6)
+        return Response(data={
+            "series": series.path.name,
+            "freq": params["freq"],
+            "stat": params["stat"],
+            "source": result.source,
+            "total_points": total_points,
+            "downsampled": len(times) < total_points,
+            "times": times.strftime("%Y-%m-%d %H:%M:%S").tolist(),
+            # NaN（无数据）-> null
+            "values": {column: np.where(np.isnan(values[:, k]), None, values[:, k]).tolist()
+                       for k, column in enumerate(result.columns)},
+        })
+
+
+class PlanListView(generics.ListAPIView):
+    """规划方案列表（方案的增删改在 admin 中进行）"""
+    queryset = Plan.objects.all()
+    serializer_class = serializers.PlanSerializer
+    pagination_class = None
+
+
+class PlanEvaluationRetrieveView(views.APIView):
+    """多维度评估：各方案的指标得分、维度得分与综合得分（各方案的原始指标按参数内容哈希缓存，未命中的方案并行计算）"""
+
+    @extend_schema(parameters=[schemas.PlanEvaluationIn])
+    def get(self, request: Request):
+        schema_in = schemas.PlanEvaluationIn(data=request.query_params)
+        schema_in.is_valid(raise_exception=True)
+        try:
+            return Response(data=scoring.evaluate_plans(**schema_in.validated_data))
+        except ValueError as e:
+            # 未指定方案时评估全部方案，其中某个方案的参数不合法
+            raise ValidationError({"plans": str(e)})
+
+
+class WhatIfPowerFlowView(views.APIView):
+    """负荷变化的 what-if 查询：由缓存的灵敏度矩阵线性估计，变化量较大时退回精确求解"""
+
+    @extend_schema(request=schemas.WhatIfIn)
+    def post(self, request: Request):
+        schema_in = schemas.WhatIfIn(data=request.data)
+        schema_in.is_valid(raise_exception=True)
+        try:
+            data = sensitivity.what_if(**schema_in.validated_data)
+        except KeyError as e:
+            raise ValidationError({"changes": f"母线不存在：{e}"})
+        except ValueError as e:
+            raise ValidationError({"changes": str(e)})
+        except radial.SweepConvergenceError as e:
+            # 与潮流计算接口一致：负荷过重时潮流无解，返回未收敛而不是 500
+            data = {"converged": False, "error": str(e)}
+        return Response(data=data)
+
+
+class JobSubmitView(views.APIView):
+    """提交后台计算任务，立即返回任务编号（耗时计算不再占用请求）"""
+
+    @extend_schema(request=schemas.JobSubmitIn, responses=serializers.JobSerializer)
+    def post(self, request: Request):
+        schema_in = schemas.JobSubmitIn(data=request.data)
+        schema_in.is_valid(raise_exception=True)
+        job = jobs.submit_job(schema_in.validated_data["kind"], schema_in.validated_data["params"],
+                              owner=request.user)
+        return Response(data=serializers.JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class _JobMixin:
+    def get_job(self, request: Request, job_id) -> Job:
+        return get_object_or_404(Job, pk=job_id, owner=request.user)
+
+
+class JobStatusRetrieveView(_JobMixin, views.APIView):
+    @extend_schema(responses=serializers.JobSerializer)
+    def get(self, request: Request, job_id):
+        return Response(data=serializers.JobSerializer(self.get_job(request, job_id)).data)
+
+
+class JobResultRetrieveView(_JobMixin, views.APIView):
+    @extend_schema(responses=serializers.JobResultSerializer)
+    def get(self, request: Request, job_id):
+        job = self.get_job(request, job_id)
+        if not job.is_finished:
+            return Response(data={"detail": "任务尚未结束", "status": job.status}, status=status.HTTP_409_CONFLICT)
+        return Response(data=serializers.JobResultSerializer(job).data)
+
+
+class JobCancelView(_JobMixin, views.APIView):
+    @extend_schema(request=None, responses=serializers.JobSerializer)
+    def post(self, request: Request, job_id):
+        job = jobs.cancel_job(self.get_job(request, job_id))
+        return Response(data=serializers.JobSerializer(job).data)
+
+
+class _EventStreamRenderer(BaseRenderer):
+    """使 Accept: text/event-stream 的请求通过 drf 的内容协商，错误响应仍输出 json"""
+    media_type = "text/event-stream"
+    format = "sse"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode()
+
+
+class JobEventsStreamView(_JobMixin, views.APIView):
+    """
+    以 SSE（text/event-stream）推送任务进度：进度变化时输出 progress 事件，任务结束时输出 finished 事件并断开
+
+    注意每个订阅会占用一个 worker 线程直到任务结束，轮询 get_job_status 则不会。
+    """
+
+    POLL_INTERVAL = 0.5
+    renderer_classes = [_EventStreamRenderer, JSONRenderer]
+
+    def get(self, request: Request, job_id):
+        job = self.get_job(request, job_id)
+
+        def stream():
+            last = None
+            while True:
+                data = serializers.JobSerializer(Job.objects.get(pk=job.pk)).data
+                event = "finished" if data["status"] in Job.FINISHED_STATUSES else "progress"
+                if data != last:
+                    yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+                    last = data
+                if event == "finished":
+                    return
+                time.sleep(self.POLL_INTERVAL)
+
+        response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class ResultCacheStatsRetrieveView(views.APIView):
+    """计算结果缓存的命中/未命中计数（计数为处理本次请求的 worker 进程的计数）"""
+
+    def get(self, request: Request):
+        return Response(data=result_cache.stats())
+
+
+class FactorizationStatsRetrieveView(views.APIView):
+    """导纳矩阵/LU 分解缓存的复用计数（处理本次请求的 worker 进程）"""
+
+    def get(self, request: Request):
+        return Response(data=factorization_cache.stats())
+
+
 class TopologyStructureRetrieveView(views.APIView):
     """
     获取结构信息
@@ -110,39 +297,28 @@ class TopologyStructureRetrieveView(views.APIView):
     RESTful 风格命名：Retrieve 强调检索功能，Detail 适合返回详细拓扑，List 返回的是拓扑列表
     """
 
-    def _load_network_data(self):
-        bus_df = pd.read_csv(DEMO_DATA_PATH / "bus.csv")
-        line_df = pd.read_csv(DEMO_DATA_PATH / "line.csv")
-        return bus_df, line_df
+    # 母线类型 -> 节点类型
+    NODE_TYPES = {3: "变电站", 2: "发电机"}
 
     def get(self, request: Request):
-        bus_df, line_df = self._load_network_data()
-
-        # 构造节点
-        nodes = []
-        for _, row in bus_df.iterrows():
-            # 不同 type 代表不同节点
-            if row["type"] == 3:
-                btype = "变电站"
-            elif row["type"] == 2:
-                btype = "发电机"
-            else:
-                btype = "负载"
-
-            # node 数据结构，为了灵活，单纯 dict
-            nodes.append({
-                "id": int(row["bus_i"]),
-                "name": f"Bus{int(row["bus_i"])}",
-                "type": btype,
-                "power": round(row.get("Pd", 0), 2)
-            })
-
-        # 构造边
-        edges = []
-        for _, row in line_df.iterrows():
-            edges.append({
-                "source": int(row["fbus"]),
-                "target": int(row["tbus"])
-            })
+        # 常驻内存的网络，数据源（csv 或数据库）变化后自动重新读取
+        model = network_registry.get(DEFAULT_NETWORK_ID)
+        bus_df, line_df = model.bus_df, model.line_df
+
+        # 构造节点（node 数据结构，为了灵活，单纯 dict）
+        bus_i = bus_df["bus_i"].to_numpy(dtype=int).tolist()
+        power = bus_df["Pd"].to_numpy(dtype=float).round(2).tolist()
+        nodes = [
+            {"id": i, "name": f"Bus{i}", "type": self.NODE_TYPES.get(t, "负载"), "power": p}
+            for i, t, p in zip(bus_i, bus_df["type"].to_numpy(dtype=int).tolist(), power)
+        ]
+
+        # 构造边（status 为 0 的是断开的联络开关）
+        edges = [
+            {"line": k + 1, "source": f, "target": t, "status": st}
+            for k, (f, t, st) in enumerate(zip(line_df["fbus"].to_numpy(dtype=int).tolist(),
+                                               line_df["tbus"].to_numpy(dtype=int).tolist(),
+                                               line_df["status"].to_numpy(dtype=int).tolist()))
+        ]
 
         return Response(data={"nodes": nodes, "edges": edges})
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -193,9 +194,46 @@ SPECTACULAR_SETTINGS = {
 }
 
 # ====== simple_jwt ====== #
+# 令牌的签名密钥（HS256），与前端共享：前端用同一密钥在本地校验 access_token，不再每次连接都调用 verify 接口。
+# 依次取环境变量 JWT_SIGNING_KEY、密钥文件（由 `manage.py create_jwt_signing_key` 生成），都没有时使用 SECRET_KEY
+# （此时前端取不到密钥，退回到调用 verify 接口）。加载设置时只读不写，生成或更换密钥后需重启后端
+JWT_SIGNING_KEY_FILE = BASE_DIR.parent / "conf" / "jwt_signing_key"
+
+
+def _read_signing_key(path: Path) -> str | None:
+    key = os.environ.get("JWT_SIGNING_KEY")
+    if key:
+        return key
+    try:
+        return path.read_text(encoding="utf-8").strip() or None
+    except OSError:
+        return None
+
+
 SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,  # 刷新令牌时，将旧刷新令牌加入黑名单
     'BLACKLIST_AFTER_ROTATION': True,  # 启用黑名单功能
+    'ALGORITHM': 'HS256',
+    'SIGNING_KEY': _read_signing_key(JWT_SIGNING_KEY_FILE) or SECRET_KEY,
     # 'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     # 'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
+
+# ====== pdn ====== #
+# 各计算接口使用的配电网络："case33bw" 为 demo_data 中的 csv，"db" 为数据库中的网络（BusData/BranchData，
+# 可用 `manage.py import_network` 导入）；时序数据集 <网络编号>.summary 等同样按此编号命名
+PDN_NETWORK_ID = "case33bw"
+# 配电网络运行期文件（网络快照等），可随时删除，删除后会自动重建
+PDN_RUNTIME_DIR = BASE_DIR / "media" / "pdn"
+# 时序数据（母线电压、线路负载率、光伏出力等，按天分区的内存映射数组，见 apps/pdn/tsdb.py），不可随意删除
+PDN_TSDB_DIR = BASE_DIR / "media" / "tsdb"
+# 多核并行计算（参数扫描等）使用的进程数，默认与 CPU 核数相同
+PDN_MAX_WORKERS = os.cpu_count() or 1
+# 潮流计算结果的进程内 LRU 缓存条目数（另有所有 worker 共享的 SQLite 缓存，位于 PDN_RUNTIME_DIR 下）
+PDN_RESULT_CACHE_SIZE = 256
+# 导纳矩阵及其 LU 分解的进程内缓存条目数（按 网络版本 + 拓扑 + r_scale）
+PDN_FACTORIZATION_CACHE_SIZE = 32
+# 后台计算任务的并发数
+PDN_JOB_WORKERS = 2
+# 是否在 django 进程内自动启动任务执行者；单独运行 `manage.py run_jobs` 时应设为 False
+PDN_JOB_RUNNER_AUTOSTART = True
@@ -0,0 +1,212 @@
+"""
+前端调用后端接口的 HTTP 客户端
+
+整个应用共用一个 aiohttp.ClientSession（应用启动时创建、关闭时释放），连接池复用 keep-alive 连接，
+页面加载时连续的多个后端请求不再各自建立 TCP 连接。
+
+- 超时按接口配置（settings.BACKEND_TIMEOUTS），耗时的计算接口可以单独放宽；
+- 幂等请求（GET 等）遇到连接错误、超时、502/503/504 时按指数退避重试，非幂等请求（POST）默认不重试；
+- 超时统一抛出 aiohttp.ServerTimeoutError（aiohttp.ClientError 的子类），调用方按 ClientError 处理即可；
+- get_shared() 合并相同的并发 GET 请求（single-flight）：多个客户端同时打开同一页面时只向后端发一次请求，
+  完整读取的响应分发给所有等待方，并在短时间（BACKEND_COALESCE_FRESH_SECONDS）内直接复用。
+"""
+import asyncio
+import contextlib
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Hashable, Tuple
+
+import aiohttp
+from aiohttp.client import ClientResponse
+from loguru import logger
+
+import settings
+from caches import SingleFlight
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+
+
+@dataclass(frozen=True)
+class SharedResponse:
+    """完整读取后的响应，可以分发给多个调用方（json()/text() 与 ClientResponse 的用法一致）"""
+    status: int
+    content_type: str
+    charset: str | None
+    body: bytes
+
+    async def json(self):
+        # 每个调用方各自解析，拿到的对象互不影响
+        return json.loads(self.body)
+
+    async def text(self) -> str:
+        return self.body.decode(self.charset or "utf-8", errors="replace")
+
+
+def _params_key(params) -> Hashable:
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(sorted((str(k), str(v)) for k, v in params.items()))
+    # [(key, value), ...] 中同名参数的顺序有意义，不排序
+    return tuple((str(k), str(v)) for k, v in params)
+
+
+def _auth_scope(headers: Dict[str, str] | None) -> str:
+    """认证范围：Authorization 请求头的哈希，不同令牌的请求不会合并"""
+    authorization = (headers or {}).get("Authorization", "")
+    return hashlib.sha256(authorization.encode()).hexdigest()[:16] if authorization else ""
+
+
+class BackendClient:
+    """后端 HTTP 客户端（连接池、keep-alive、按接口超时、重试）"""
+
+    def __init__(self, base_url: str, timeouts: Dict[str, float] | None = None, default_timeout: float = 10,
+                 connect_timeout: float = 3, pool_size: int = 100, keepalive_timeout: float = 30,
+                 retries: int = 2, backoff: float = 0.2, fresh_seconds: float = 2):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.connect_timeout = connect_timeout
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.fresh_seconds = fresh_seconds
+        self._session: aiohttp.ClientSession | None = None
+        # get_shared：进行中的请求、近期完成的 200 响应（过期时间, 响应）
+        self._inflight = SingleFlight()
+        self._fresh: Dict[Hashable, Tuple[float, SharedResponse]] = {}
+        self._counters = {"requests": 0, "upstream": 0, "coalesced": 0, "fresh_hits": 0}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # 未经 start()（如脚本中直接调用）时在当前事件循环中懒加载
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size,
+                                             keepalive_timeout=self.keepalive_timeout, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, raise_for_status=False)
+        return self._session
+
+    async def start(self):
+        _ = self.session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def timeout_for(self, path: str) -> float:
+        return self.timeouts.get(path, self.default_timeout)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # 指数退避，加随机抖动避免多个客户端同时重试
+        return self.backoff * 2 ** attempt * (0.5 + random.random() / 2)
+
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, path: str, *, timeout: float | None = None, retries: int | None = None,
+                      **kwargs) -> AsyncIterator[ClientResponse]:
+        """
+        请求后端接口，用法同 session.request：async with backend_client.get(path) as response: ...
+
+        :param path: 以 / 开头的接口路径（也可以是完整 url）
+        :param timeout: 总超时（秒），缺省按 settings.BACKEND_TIMEOUTS 中该接口的配置
+        :param retries: 重试次数，缺省幂等请求为 self.retries，其余为 0
+        """
+        method = method.upper()
+        url = path if "://" in path else self.base_url + path
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout_for(path), connect=self.connect_timeout)
+        if retries is None:
+            retries = self.retries if method in IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        while True:
+            try:
+                response = await self.session.request(method, url, timeout=client_timeout, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= retries:
+                    if isinstance(e, aiohttp.ClientError):
+                        raise
+                    raise aiohttp.ServerTimeoutError(f"{method} {path} 超时（{client_timeout.total} s）") from e
+                logger.debug("[backend_client] {} {} 失败（{!r}），第 {} 次重试", method, path, e, attempt + 1)
+            else:
+                if response.status not in RETRY_STATUSES or attempt >= retries:
+                    break
+                response.release()
+                logger.debug("[backend_client] {} {} 返回 {}，第 {} 次重试", method, path, response.status, attempt + 1)
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+        try:
+            yield response
+        finally:
+            response.release()
+
+    def get(self, path: str, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    # ------ 请求合并 ------ #
+
+    def _prune_fresh(self, now: float):
+        """清理过期的响应"""
+        for expired in [k for k, (expires, _) in self._fresh.items() if expires <= now]:
+            del self._fresh[expired]
+
+    async def _fetch_shared(self, key: Hashable, path: str, fresh_seconds: float, kwargs: Dict) -> SharedResponse:
+        async with self.get(path, **kwargs) as response:
+            shared = SharedResponse(status=response.status, content_type=response.content_type,
+                                    charset=response.charset, body=await response.read())
+        if shared.status == 200 and fresh_seconds > 0:
+            now = time.monotonic()
+            self._prune_fresh(now)
+            self._fresh[key] = (now + fresh_seconds, shared)
+        return shared
+
+    async def get_shared(self, path: str, *, params=None, headers: Dict[str, str] | None = None,
+                         fresh_seconds: float | None = None, **kwargs) -> SharedResponse:
+        """
+        合并相同的 GET 请求：键为 接口 + 参数 + 认证范围，同一个键同时只向后端请求一次，响应分发给所有等待方；
+        请求完成后 fresh_seconds 秒内（缺省为 self.fresh_seconds，只缓存 200 响应）相同的请求直接复用
+        """
+        key = (path, _params_key(params), _auth_scope(headers))
+        fresh_seconds = self.fresh_seconds if fresh_seconds is None else fresh_seconds
+        self._counters["requests"] += 1
+
+        fresh = self._fresh.get(key)
+        if fresh is not None:
+            now = time.monotonic()
+            if fresh[0] > now:
+                self._counters["fresh_hits"] += 1
+                return fresh[1]
+            # 读到过期的响应时同样清理（只读不写的键不会一直占用内存）
+            self._prune_fresh(now)
+        kwargs = dict(kwargs, params=params, headers=headers)
+        result, started = self._inflight.run(key, lambda: self._fetch_shared(key, path, fresh_seconds, kwargs))
+        self._counters["upstream" if started else "coalesced"] += 1
+        return await result
+
+    def stats(self) -> Dict:
+        """get_shared 的统计：被合并（等待进行中的请求或复用近期响应）的请求数与比例"""
+        counters = dict(self._counters)
+        collapsed = counters["coalesced"] + counters["fresh_hits"]
+        return {
+            **counters,
+            "collapsed": collapsed,
+            "collapse_rate": round(collapsed / counters["requests"], 4) if counters["requests"] else None,
+            "inflight": len(self._inflight),
+        }
+
+
+backend_client = BackendClient(settings.BACKEND_BASE_URL,
+                               timeouts=settings.BACKEND_TIMEOUTS,
+                               default_timeout=settings.BACKEND_DEFAULT_TIMEOUT,
+                               pool_size=settings.BACKEND_POOL_SIZE,
+                               keepalive_timeout=settings.BACKEND_KEEPALIVE_TIMEOUT,
+                               retries=settings.BACKEND_RETRIES,
+                               fresh_seconds=settings.BACKEND_COALESCE_FRESH_SECONDS)
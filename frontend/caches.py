@@ -0,0 +1,172 @@
+"""
+数据服务的进程内缓存（所有客户端共享）
+
+- 文件数据按 (修改时间, 大小) 校验，变化后再比较内容哈希，内容不变时继续使用已解析的数据；
+- 同一个键的同一版本同时只加载一次（SingleFlight），并发的客户端等待同一次读取；
+- 按 LRU 淘汰，条目数不超过 max_entries，总大小（估算）不超过 max_bytes；
+- stats() 返回命中率等统计。
+
+缓存的 DataFrame 由所有调用方共享，不要原地修改。
+"""
+import asyncio
+import hashlib
+import io
+import os
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+import pandas as pd
+from loguru import logger
+from nicegui import run
+
+import settings
+
+
+def _sizeof(value) -> int:
+    """估算缓存值占用的内存"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    return sys.getsizeof(value)
+
+
+def _read_csv(path: Path, kwargs: Dict, old_digest: str | None) -> Tuple[pd.DataFrame | None, str]:
+    """在线程中执行：读取文件并计算内容哈希，内容与 old_digest 相同时不解析（返回 None）"""
+    data = path.read_bytes()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if digest == old_digest:
+        return None, digest
+    return pd.read_csv(io.BytesIO(data), **kwargs), digest
+
+
+class SingleFlight:
+    """同一个键同时只执行一次的异步调用，并发的调用方等待同一个任务"""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def _run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]):
+        try:
+            return await factory()
+        finally:
+            self._tasks.pop(key, None)
+
+    def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Awaitable[Any], bool]:
+        """返回 (等待结果的 awaitable, 是否新启动了 factory())；进行中的同一个键直接等待已有的任务"""
+        task = self._tasks.get(key)
+        started = task is None
+        if started:
+            task = self._tasks[key] = asyncio.create_task(self._run(key, factory))
+            # 所有等待方都被取消时，避免 "exception was never retrieved"
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        # 某个等待方被取消（客户端断开）不影响其他等待方
+        return asyncio.shield(task), started
+
+
+@dataclass
+class _Entry:
+    value: Any
+    version: Hashable
+    size: int
+    # 文件数据的内容哈希
+    digest: str | None = None
+
+
+class AsyncDataCache:
+    """进程内的异步数据缓存，LRU + single-flight"""
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 256 * 1024 * 1024):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        # (键, 版本) -> 加载任务：版本不同的请求不合并（文件在加载过程中变化时，新请求不能拿到旧内容）
+        self._inflight = SingleFlight()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "revalidated": 0, "invalidations": 0,
+                          "evictions": 0}
+
+    def _put(self, key: Hashable, entry: _Entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        # 至少保留刚放入的一条
+        while len(self._entries) > 1 and (len(self._entries) > self._max_entries or self._bytes > self._max_bytes):
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._counters["evictions"] += 1
+            logger.debug("[data_cache] 淘汰 {}（{} bytes）", evicted_key, evicted.size)
+
+    async def _load_and_store(self, key: Hashable, version: Hashable,
+                              load: Callable[[_Entry | None], Awaitable[Tuple[Any, str | None]]]):
+        old = self._entries.get(key)
+        value, digest = await load(old)
+        if value is None and old is not None:
+            # 文件被改写但内容不变
+            self._counters["revalidated"] += 1
+            value = old.value
+        elif old is not None:
+            self._counters["invalidations"] += 1
+        self._put(key, _Entry(value=value, version=version, size=_sizeof(value), digest=digest))
+        return value
+
+    async def _get(self, key: Hashable, version: Hashable,
+                   load: Callable[[_Entry | None], Awaitable[Tuple[Any, str | None]]]):
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry.value
+        result, started = self._inflight.run((key, version), lambda: self._load_and_store(key, version, load))
+        self._counters["misses" if started else "coalesced"] += 1
+        return await result
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], version: Hashable = None):
+        """缓存的 loader() 结果，version 与缓存时不一致时重新加载"""
+
+        async def load(_old):
+            return await loader(), None
+
+        return await self._get(key, version, load)
+
+    async def read_csv(self, path: Path, **kwargs) -> pd.DataFrame:
+        """带缓存的 pd.read_csv（在线程中读取与解析）"""
+        path = Path(path)
+        key = ("csv", str(path), tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+        stat = os.stat(path)
+
+        async def load(old: _Entry | None):
+            return await run.io_bound(_read_csv, path, kwargs, old.digest if old is not None else None)
+
+        return await self._get(key, (stat.st_mtime_ns, stat.st_size), load)
+
+    def invalidate(self, key: Hashable | None = None):
+        """使某个键（缺省为全部）失效"""
+        if key is None:
+            self._entries.clear()
+            self._bytes = 0
+        elif key in self._entries:
+            self._bytes -= self._entries.pop(key).size
+
+    def stats(self) -> Dict:
+        counters = dict(self._counters)
+        requests = counters["hits"] + counters["misses"] + counters["coalesced"]
+        # 未重新解析的请求都算命中：直接命中、等待同一次加载、内容不变的重新校验
+        served = counters["hits"] + counters["coalesced"] + counters["revalidated"]
+        return {
+            **counters,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_rate": round(served / requests, 4) if requests else None,
+        }
+
+
+data_cache = AsyncDataCache(max_entries=settings.DATA_CACHE_MAX_ENTRIES, max_bytes=settings.DATA_CACHE_MAX_BYTES)
@@ -7,7 +7,12 @@ from pyecharts import options as opts
 from pyecharts.commons.utils import JsCode
 
 
-def render_regional_capacity_distribution() -> Tuple[str, Dict]:
+def render_regional_capacity_distribution(regions: List[Dict] | None = None) -> Tuple[str, Dict]:
+    """
+    渲染 光伏容量区域分布
+
+    :param regions: [{"name": "区域A", "capacity": 装机/承载力 MW, "power": 当前出力 MW}, ...]，缺省为示例数据
+    """
     def make_liquid_card(idx: int, name: str, capacity: float, power: float) -> Liquid:
         ratio = 0.0 if not capacity else max(0.0, power / capacity)
         color = palette[idx % len(palette)]
@@ -45,7 +50,7 @@ def render_regional_capacity_distribution() -> Tuple[str, Dict]:
     # ------------------------------------------------------------------------ #
 
     # ===== 数据（单位 MW）=====
-    regions = [
+    regions = regions or [
         {"name": "区域A", "capacity": 120.5, "power": 97.3},
         {"name": "区域B", "capacity": 95.8, "power": 92.0},
         {"name": "区域C", "capacity": 150.2, "power": 123.8},
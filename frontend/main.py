@@ -5,10 +5,14 @@ from loguru import logger
 
 from nicegui import ui, app
 
+import caches
 import settings
 import pages
 import utils
 import models
+import watchers
+import tokens
+from backend_client import backend_client
 
 # 【知识点】精确控制警告来源，仅显示 deprecation.DeprecatedWarning（加入其他第三方库也使用了 deprecation 库呢？）
 warnings.filterwarnings("default", category=deprecation.DeprecatedWarning)
@@ -24,6 +28,36 @@ app.add_static_files("/static", str(settings.SOURCE_DIR / "static"))
 # 初始化数据库
 models.tortoise_init()
 
+# 后端 HTTP 客户端的连接池随应用创建和关闭
+app.on_startup(backend_client.start)
+app.on_shutdown(backend_client.close)
+
+# demo_data 文件变化后推送给订阅的页面组件
+app.on_startup(watchers.demo_data_watcher.start)
+app.on_shutdown(watchers.demo_data_watcher.stop)
+
+# 访问令牌的撤销列表定期从后端同步
+app.on_startup(tokens.token_verifier.start)
+app.on_shutdown(tokens.token_verifier.stop)
+
+
+@app.get("/_stats/data_cache")
+def data_cache_stats():
+    """数据服务缓存的命中率等统计"""
+    return caches.data_cache.stats()
+
+
+@app.get("/_stats/backend_client")
+def backend_client_stats():
+    """后端请求合并的统计"""
+    return backend_client.stats()
+
+
+@app.get("/_stats/token_verifier")
+def token_verifier_stats():
+    """访问令牌本地校验的统计"""
+    return tokens.token_verifier.stats()
+
 
 # todo: 什么函数是在所有 ui 逻辑触发前执行的？且可以拿到 ui.context.client.id，依旧是 app.on_connect 吗？
 
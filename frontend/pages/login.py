@@ -1,13 +1,12 @@
-import aiohttp
 from loguru import logger
 
 from nicegui import ui, app
 from nicegui.elements.icon import Icon
 
-import settings
 import dialogs
 import utils
 import models
+from backend_client import backend_client
 
 
 @ui.page("/login", title="用户登录")
@@ -40,48 +39,46 @@ def page_login():
                     # todo: 确定一下，假如这个存储越来越大怎么办？尤其 python 打包成一个 .exe 后，岂不是一直变大？
                     # todo: 是不是可以去学习一下 windows 的软件安装和分发？
 
-                    login_url = settings.BACKEND_BASE_URL + "/authentication/login/"
+                    login_path = "/authentication/login/"
 
                     # todo: 【知识点】为了避免网络问题影响用户直观体验，在点击后，就应该出来加载动画给予用户反馈
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(login_url, json={
-                            "username": username.value,
-                            "password": password.value,
-                        }) as response:
-                            # todo: 确定一下响应是否会出现不为 json 格式的情况？（确实会...）
-                            if response.status != 200:
-                                ui.notify("账号不存在/账号错误/密码错误", type="negative")
-                                # todo: 能否将 \n 也视为原始字符
-                                logger.error(f"status: {response.status}, json: {await response.json()}")
-                                return
-                            # 登录成功，全局存储。此处有必要了解一下 nicegui 如何实现一个登录系统
-                            # version 1.0: 通过客户端 id 作为全局存储 或者 存储在 cookie 中
-                            #   - app.storage.user: 基于服务端存储，通过浏览器会话 cookie 中的唯一标识符关联用户。
-                            #   - app.storage.browser：直接存储为浏览器会话 cookie，同用户的所有标签页共享。
-                            ui.notify("登录成功！", type="positive")
-                            resp_data = await response.json()
-                            utils.auth_manager.store_access_token(resp_data["access"])
-                            utils.auth_manager.store_refresh_token(resp_data["refresh"])
-                            utils.auth_manager.store_user_info({"username": username.value})
-                            await models.ClientCache.get_or_create(defaults={
-                                "client_id": ui.context.client.id,
-                                "username": username.value
-                            })
-                            # 延迟重定向至首页
-                            ui.timer(0.5, lambda: ui.navigate.to("/"), once=True)
+                    async with backend_client.post(login_path, json={
+                        "username": username.value,
+                        "password": password.value,
+                    }) as response:
+                        # todo: 确定一下响应是否会出现不为 json 格式的情况？（确实会...）
+                        if response.status != 200:
+                            ui.notify("账号不存在/账号错误/密码错误", type="negative")
+                            # todo: 能否将 \n 也视为原始字符
+                            logger.error(f"status: {response.status}, json: {await response.json()}")
+                            return
+                        # 登录成功，全局存储。此处有必要了解一下 nicegui 如何实现一个登录系统
+                        # version 1.0: 通过客户端 id 作为全局存储 或者 存储在 cookie 中
+                        #   - app.storage.user: 基于服务端存储，通过浏览器会话 cookie 中的唯一标识符关联用户。
+                        #   - app.storage.browser：直接存储为浏览器会话 cookie，同用户的所有标签页共享。
+                        ui.notify("登录成功！", type="positive")
+                        resp_data = await response.json()
+                        utils.auth_manager.store_access_token(resp_data["access"])
+                        utils.auth_manager.store_refresh_token(resp_data["refresh"])
+                        utils.auth_manager.store_user_info({"username": username.value})
+                        await models.ClientCache.get_or_create(defaults={
+                            "client_id": ui.context.client.id,
+                            "username": username.value
+                        })
+                        # 延迟重定向至首页
+                        ui.timer(0.5, lambda: ui.navigate.to("/"), once=True)
 
                 async def register():
-                    resgister_url = settings.BACKEND_BASE_URL + "/authentication/register/"
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(resgister_url, json={
-                            "username": username.value,
-                            "password": password.value,
-                        }) as response:
-                            if response.status != 200:
-                                await dialogs.show_error_dialog(str(await response.json()))
-                                return
-                            logger.info("用户 {} 注册成功", await response.json())
-                            ui.notify("注册成功！", type="positive")
+                    resgister_path = "/authentication/register/"
+                    async with backend_client.post(resgister_path, json={
+                        "username": username.value,
+                        "password": password.value,
+                    }) as response:
+                        if response.status != 200:
+                            await dialogs.show_error_dialog(str(await response.json()))
+                            return
+                        logger.info("用户 {} 注册成功", await response.json())
+                        ui.notify("注册成功！", type="positive")
 
                 ui.button("登录", icon="login", on_click=lambda: login()) \
                     .props("unelevated rounded-none") \
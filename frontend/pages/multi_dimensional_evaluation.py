@@ -1,3 +1,5 @@
+from typing import Dict, List, Tuple
+
 from loguru import logger
 
 from nicegui import ui
@@ -5,24 +7,51 @@ from nicegui import ui
 import settings
 import utils
 
-
-def _get_dimensions_and_plans():
-    dimensions = ["安全性", "可靠性", "经济性", "环保性"]
-
-    plans = [
-        {"name": "方案一", "scores": {"安全性": 90, "可靠性": 84, "经济性": 93, "环保性": 80},
-         "overall": 84.6, "tags": ["绿色环保", "负载均衡"]},
-        {"name": "方案二", "scores": {"安全性": 90, "可靠性": 78, "经济性": 80, "环保性": 92},
-         "overall": 85.0, "tags": ["灵活性高", "负载均衡"]},
-        {"name": "方案三", "scores": {"安全性": 76, "可靠性": 84, "经济性": 75, "环保性": 87},
-         "overall": 81.6, "tags": ["综合优势", "灵活性高"]}
-    ]
-    return dimensions, plans
-
-
-async def create_multi_dimensional_evaluation_radar_chart() -> ui.echart:
+# 后端不可用时使用的静态评估结果
+_FALLBACK_PLANS = [
+    {"name": "方案一", "scores": {"安全性": 90, "可靠性": 84, "经济性": 93, "环保性": 80}, "overall": 84.6},
+    {"name": "方案二", "scores": {"安全性": 90, "可靠性": 78, "经济性": 80, "环保性": 92}, "overall": 85.0},
+    {"name": "方案三", "scores": {"安全性": 76, "可靠性": 84, "经济性": 75, "环保性": 87}, "overall": 81.6},
+]
+_FALLBACK_DETAIL_DATA = {
+    "安全性": {"线路负载率": [95, 80, 78], "N-1通过率": [78, 85, 88], "电压越限率": [90, 90, 92],
+               "电压波动度": [86, 78, 85], "潮流不均衡度": [84, 77, 70]},
+    "可靠性": {"供电可靠率": [90, 88, 85], "平均停电时间": [70, 75, 80], "重要负荷覆盖率": [85, 86, 88]},
+    "经济性": {"购电成本": [82, 78, 76], "运行费用": [90, 85, 82], "发电成本": [89, 80, 75]},
+    "环保性": {"碳排放量": [80, 70, 60], "污染物排放": [85, 77, 70], "可再生能源比重": [88, 92, 95]},
+}
+
+
+async def _get_dimensions_and_plans(weighting: str = "等权重",
+                                    onload=False) -> Tuple[List[str], List[Dict], Dict[str, Dict[str, List]]]:
+    """
+    维度、各方案的维度得分与各维度的详细指标得分（后端按所选赋权方法计算）
+
+    :return: (维度名称, [{"name", "scores": {维度: 得分}, "overall"}], {维度: {指标: [各方案得分]}})
+    """
+    evaluation = await utils.data_service.get_plan_evaluation(weighting, onload=onload)
+    if evaluation is None:
+        logger.warning("[多维度评估] 后端评估不可用，使用静态数据")
+        return list(_FALLBACK_DETAIL_DATA), _FALLBACK_PLANS, _FALLBACK_DETAIL_DATA
+
+    dimensions = [d["name"] for d in evaluation["dimensions"]]
+    plans = [{
+        "name": p["plan"],
+        "scores": {d["name"]: p["dimension_scores"][f"{d["key"]}_score_0_100"] for d in evaluation["dimensions"]},
+        "overall": p["dimension_scores"]["overall_score_0_100"],
+    } for p in evaluation["plans"]]
+    # 不可得的指标（所有方案均无得分）不展示
+    detail_data = {d: {} for d in dimensions}
+    for i, indicator in enumerate(evaluation["plans"][0]["indicators"]):
+        scores = [p["indicators"][i]["score_0_100"] for p in evaluation["plans"]]
+        if any(score is not None for score in scores):
+            detail_data[indicator["dimension"]][indicator["label"]] = scores
+    return dimensions, plans, detail_data
+
+
+async def create_multi_dimensional_evaluation_radar_chart(weighting: str = "等权重", evaluation=None) -> ui.echart:
     """创建多维度评估雷达图"""
-    dimensions, plans = _get_dimensions_and_plans()
+    dimensions, plans, _ = evaluation if evaluation is not None else await _get_dimensions_and_plans(weighting)
     return ui.echart({
         "tooltip": {},
         "legend": {
@@ -39,7 +68,7 @@ async def create_multi_dimensional_evaluation_radar_chart() -> ui.echart:
         "series": [{
             "type": "radar",
             "data": [
-                {"value": list(p["scores"].values()), "name": p["name"]} for p in plans
+                {"value": [p["scores"][d] for d in dimensions], "name": p["name"]} for p in plans
             ]
         }]
     }).classes("w-full h-[500px] my-4")
@@ -49,56 +78,52 @@ async def create_multi_dimensional_evaluation_radar_chart() -> ui.echart:
 async def page():
     await utils.create_common_header()
 
-    # 目前只动态生成方案一的数据
-
-    # data = await  utils.data_service.get_multi_dimensional_evaluation_data()
-
-    dimensions, plans = _get_dimensions_and_plans()
-
-    detail_data = {
-        "安全性": {"线路负载率": [95, 80, 78], "N-1通过率": [78, 85, 88], "电压越限率": [90, 90, 92],
-                   "电压波动度": [86, 78, 85], "潮流不均衡度": [84, 77, 70]},
-        "可靠性": {"供电可靠率": [90, 88, 85], "平均停电时间": [70, 75, 80], "重要负荷覆盖率": [85, 86, 88]},
-        "经济性": {"购电成本": [82, 78, 76], "运行费用": [90, 85, 82], "发电成本": [89, 80, 75]},
-        "环保性": {"碳排放量": [80, 70, 60], "污染物排放": [85, 77, 70], "可再生能源比重": [88, 92, 95]},
-    }
-
-    # 顶部控件 + 雷达图
+    # 顶部控件
     with ui.row().classes("items-center justify-between"):
         ui.label("多维度综合评估").classes("text-lg font-bold")
         with ui.row().classes("items-center"):
             ui.select(["综合评估", "维度评估"], value="综合评估").classes("w-32")
-            ui.select(["等权重", "专家权重"], value="等权重").classes("w-32 mx-2")
-            ui.button("重新评估", icon="refresh").classes("bg-blue-500 text-white")
-
-    await create_multi_dimensional_evaluation_radar_chart()
-
-    # 下方：指标分析图
-    with ui.tabs() as tabs:
-        for dim in dimensions:
-            ui.tab(dim)
-
-    with ui.tab_panels(tabs=tabs, value=dimensions[0]).classes("w-full"):
-        ui.label("指标分析图").classes("mb-2")
-        for dim in dimensions:
-            with ui.tab_panel(dim):
-                ui.label("详细指标分析").classes("font-bold mb-2")
-                subs = detail_data[dim]
-                ui.echart({
-                    "tooltip": {},
-                    "legend": {
-                        "data": [p["name"] for p in plans],
-                        "orient": "vertical",
-                        "right": 10,
-                        "top": "center"
-                    },
-                    "xAxis": {"type": "category", "data": list(subs.keys())},
-                    "yAxis": {"type": "value", "max": 100},
-                    "series": [
-                        {
-                            "type": "bar",
-                            "name": plans[i]["name"],
-                            "data": [v[i] for v in subs.values()]
-                        } for i in range(3)
-                    ]
-                }).classes("w-full h-[500px] min-h-[300px]")
+            weighting_select = ui.select(["等权重", "专家权重", "熵权法", "AHP"], value="等权重").classes("w-32 mx-2")
+            reevaluate_button = ui.button("重新评估", icon="refresh").classes("bg-blue-500 text-white")
+
+    @ui.refreshable
+    async def content(onload=False):
+        # 原始指标在后端有缓存，切换赋权方法只重新打分
+        evaluation = await _get_dimensions_and_plans(weighting_select.value, onload=onload)
+        dimensions, plans, detail_data = evaluation
+
+        # 雷达图
+        await create_multi_dimensional_evaluation_radar_chart(evaluation=evaluation)
+
+        # 下方：指标分析图
+        with ui.tabs() as tabs:
+            for dim in dimensions:
+                ui.tab(dim)
+
+        with ui.tab_panels(tabs=tabs, value=dimensions[0]).classes("w-full"):
+            ui.label("指标分析图").classes("mb-2")
+            for dim in dimensions:
+                with ui.tab_panel(dim):
+                    ui.label("详细指标分析").classes("font-bold mb-2")
+                    subs = detail_data[dim]
+                    ui.echart({
+                        "tooltip": {},
+                        "legend": {
+                            "data": [p["name"] for p in plans],
+                            "orient": "vertical",
+                            "right": 10,
+                            "top": "center"
+                        },
+                        "xAxis": {"type": "category", "data": list(subs.keys())},
+                        "yAxis": {"type": "value", "max": 100},
+                        "series": [
+                            {
+                                "type": "bar",
+                                "name": plans[i]["name"],
+                                "data": [v[i] for v in subs.values()]
+                            } for i in range(len(plans))
+                        ]
+                    }).classes("w-full h-[500px] min-h-[300px]")
+
+    await content(onload=True)
+    reevaluate_button.on_click(lambda: content.refresh(onload=False))
@@ -36,6 +36,19 @@ async def create_plot_generation_consumption_curve_chart(
     }).classes("w-full h-96")
 
 
+def summarize_hosting_capacity(hosting_data: Dict) -> Dict:
+    """后端光伏承载力结果 -> 总览指标卡片 数据（与 pv_region_distribution.csv 的汇总口径一致）"""
+    rows = hosting_data["rows"]
+    gen = sum(row["E_region_pv_gen_MWh"] for row in rows)
+    consumed = sum(row["E_region_pv_consumed_MWh"] for row in rows)
+    return {
+        "installed_capacity_MW_approx": sum(row["installed_capacity_MW_approx"] for row in rows),
+        "current_gen_avg_MW": sum(row["current_gen_avg_MW"] for row in rows),
+        "E_region_pv_consumed_MWh": consumed,
+        "consume_rate_pct": consumed / gen * 100 if gen else 0,
+    }
+
+
 @ui.page(TAB_CONFIG["url"], title=TAB_CONFIG["title"], favicon=TAB_CONFIG["favicon"])
 async def page():
     await utils.create_common_header()
@@ -48,59 +61,82 @@ async def page():
         ui.label("光伏发电承载力分析").classes("text-lg font-bold")
         with ui.row().classes("items-center"):
             # todo: 潮流计算也需要有
-            ui.select(["方案一", "方案二", "方案三"], value="方案一", label="选择方案").classes("w-32 ml-2")
-            ui.select(["晴天", "阴天", "多云"], value="晴天", label="天气条件").classes("w-32")
-            ui.select(["春季", "夏季", "秋季", "冬季"], value="夏季", label="季节").classes("w-32 ml-2")
-            ui.button("刷新数据", icon="refresh").classes("ml-2 bg-blue-500 text-white")
-
-    # 发电量与消纳量曲线图
-    await create_plot_generation_consumption_curve_chart(ref_ret=context)
-
-    # 总览指标卡片
-    overall_indicator_data = await utils.data_service.get_overall_indicator_data()
-    with ui.row().classes("w-full mt-6"):
-        for label, value, icon, delta in [
-            ("总装机容量", f"{overall_indicator_data["installed_capacity_MW_approx"]:.2f} MW", "dns", 2.1),
-            ("当前发电量", f"{overall_indicator_data["current_gen_avg_MW"]:.2f} MW", "flash_on", 5.2),
-            ("实际消纳量", f"{overall_indicator_data["E_region_pv_consumed_MWh"]:.2f} MW", "power", 3.8),
-            ("消纳效率", f"{overall_indicator_data["consume_rate_pct"]:.2f} %", "percent", 1.2)
-        ]:
-            with ui.card().classes("flex-1 text-center"):
-                ui.icon(icon).classes("text-yellow-500 text-2xl")
-                ui.label(label).classes("text-sm text-gray-500")
-                ui.label(value).classes("text-2xl font-bold my-1")
-                # fixme: 下面的两个组件内容需要动态生成，目前没有
-                ui.label(f"+{delta:.1f}%").classes("text-green-500 text-xs")
-                ui.linear_progress(value=delta / 10).classes("mt-1")
-
-    # 区域容量分布
-
-    # fixme: 属于当前客户端生成的路由，每次注册后，下次都需要删除掉。总之，后续要处理掉这个问题。
-
-    url = TAB_CONFIG["url"] + f"/{uuid.uuid4()}/"
-    logger.debug("[光伏承载力][光伏容量区域分布] url: {}", url)
-
-    # todo: 目前还是静态数据
-    html_str, _ = echarts.render_regional_capacity_distribution()
-
-    @app.get(url, response_class=HTMLResponse)
-    def register_route():
-        return html_str
-
-    # 获取第一个图表的宽度和高度（假设所有图表大小相同）
-    # first_chart = page.charts[0]
-    # width = first_chart.options["init_opts"].get("width", "100%")  # 默认为 "100%"
-    # height = first_chart.options["init_opts"].get("height", "400px")  # 默认为 "400px"
-    # print(f"图表宽度: {width}, 高度: {height}")
-
-    with ui.card().classes("w-full h-full mt-6"):
-        ui.label("光伏容量区域分布").classes("text-base font-bold mb-2")
-        ui.html(f"""
-                    <iframe 
-                        src="{url}" 
-                        style="width: 100%; height: 100%; border: none;"
-                    ></iframe>
-                """).classes("w-full h-full").style("height: 650px;")  # fixme: 不可使用绝对布局
+            plan_names = await utils.data_service.get_plan_names(onload=True)
+            plan_select = ui.select(plan_names, value=plan_names[0], label="选择方案").classes("w-32 ml-2")
+            weather_select = ui.select(["晴天", "阴天", "多云"], value="晴天", label="天气条件").classes("w-32")
+            season_select = ui.select(["春季", "夏季", "秋季", "冬季"], value="夏季", label="季节").classes("w-32 ml-2")
+            refresh_button = ui.button("刷新数据", icon="refresh").classes("ml-2 bg-blue-500 text-white")
+
+    @ui.refreshable
+    async def content(onload=False):
+        # 承载力由后端按所选场景计算（有缓存），后端不可用时退回 demo_data 中的静态数据
+        hosting_data = await utils.data_service.get_pv_hosting_capacity(
+            plan_select.value, weather_select.value, season_select.value, onload=onload)
+
+        # 发电量与消纳量曲线图
+        if hosting_data is not None:
+            context["hours"] = hosting_data["hourly"]["hours"]
+            ui.echart({
+                "tooltip": {"trigger": "axis"},
+                "legend": {"data": ["发电量", "消纳量"]},
+                "xAxis": {"type": "category", "data": hosting_data["hourly"]["hours"]},
+                "yAxis": {"type": "value", "name": "功率(MW)"},
+                "series": [
+                    {"name": "发电量", "type": "line", "data": hosting_data["hourly"]["gen"], "areaStyle": {}},
+                    {"name": "消纳量", "type": "line", "data": hosting_data["hourly"]["use"], "areaStyle": {}}
+                ]
+            }).classes("w-full h-96")
+        else:
+            await create_plot_generation_consumption_curve_chart(ref_ret=context)
+
+        # 总览指标卡片
+        if hosting_data is not None:
+            overall_indicator_data = summarize_hosting_capacity(hosting_data)
+        else:
+            overall_indicator_data = await utils.data_service.get_overall_indicator_data()
+        with ui.row().classes("w-full mt-6"):
+            for label, value, icon, delta in [
+                ("总装机容量", f"{overall_indicator_data["installed_capacity_MW_approx"]:.2f} MW", "dns", 2.1),
+                ("当前发电量", f"{overall_indicator_data["current_gen_avg_MW"]:.2f} MW", "flash_on", 5.2),
+                ("实际消纳量", f"{overall_indicator_data["E_region_pv_consumed_MWh"]:.2f} MW", "power", 3.8),
+                ("消纳效率", f"{overall_indicator_data["consume_rate_pct"]:.2f} %", "percent", 1.2)
+            ]:
+                with ui.card().classes("flex-1 text-center"):
+                    ui.icon(icon).classes("text-yellow-500 text-2xl")
+                    ui.label(label).classes("text-sm text-gray-500")
+                    ui.label(value).classes("text-2xl font-bold my-1")
+                    # fixme: 下面的两个组件内容需要动态生成，目前没有
+                    ui.label(f"+{delta:.1f}%").classes("text-green-500 text-xs")
+                    ui.linear_progress(value=delta / 10).classes("mt-1")
+
+        # 区域容量分布
+
+        # fixme: 属于当前客户端生成的路由，每次注册后，下次都需要删除掉。总之，后续要处理掉这个问题。
+
+        url = TAB_CONFIG["url"] + f"/{uuid.uuid4()}/"
+        logger.debug("[光伏承载力][光伏容量区域分布] url: {}", url)
+
+        regions = None
+        if hosting_data is not None:
+            regions = [{"name": f"区域{row["region"]}", "capacity": row["installed_capacity_MW_approx"],
+                        "power": row["current_gen_avg_MW"]} for row in hosting_data["rows"]]
+        html_str, _ = echarts.render_regional_capacity_distribution(regions)
+
+        @app.get(url, response_class=HTMLResponse)
+        def register_route():
+            return html_str
+
+        with ui.card().classes("w-full h-full mt-6"):
+            ui.label("光伏容量区域分布").classes("text-base font-bold mb-2")
+            ui.html(f"""
+                        <iframe 
+                            src="{url}" 
+                            style="width: 100%; height: 100%; border: none;"
+                        ></iframe>
+                    """).classes("w-full h-full").style("height: 650px;")  # fixme: 不可使用绝对布局
+
+    await content(onload=True)
+    refresh_button.on_click(lambda: content.refresh(onload=False))
 
     # 未来24小时预测图
     # todo: 待定
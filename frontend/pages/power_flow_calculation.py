@@ -13,6 +13,7 @@ from fastapi.responses import HTMLResponse
 import settings
 import utils
 import echarts
+import watchers
 
 TAB_CONFIG = utils.locate_item(settings.TAB_CONFIGS, "id", "潮流计算")
 
@@ -44,22 +45,21 @@ async def page():
     data = await utils.data_service.get_power_flow_calculation_result(onload=True)
     logger.debug(f"data: {data}")
 
-    total_power = data["total_power"]
-    max_loading = data["max_loading"]
-    voltage_deviation = data["voltage_deviation"]
-    network_loss = data["network_loss"]
+    def format_cards(data: dict) -> dict:
+        return {
+            "总功率": f"{data["total_power"]:.2f} MW",
+            "最大负载率": f"{data["max_loading"]:.4f} %",  # todo: 这个数值太小了...
+            "电压偏差率": f"{data["voltage_deviation"]:.2f} %",
+            "网损率": f"{data["network_loss"]:.2f} %",
+        }
 
     # skeleton - 指标卡
+    card_labels = {}
     with ui.row().classes("w-full mb-4"):
-        for label, value in [
-            ("总功率", f"{total_power:.2f} MW"),
-            ("最大负载率", f"{max_loading:.4f} %"),  # todo: 这个数值太小了...
-            ("电压偏差率", f"{voltage_deviation:.2f} %"),
-            ("网损率", f"{network_loss:.2f} %")
-        ]:
+        for label, value in format_cards(data).items():
             with ui.card().classes("flex-1 text-center mx-2 shadow"):
                 ui.label(label).classes("text-sm text-gray-600")
-                ui.label(value).classes("text-2xl font-bold")
+                card_labels[label] = ui.label(value).classes("text-2xl font-bold")
 
     # skeleton - 多曲线面积图
     # multi_curve_area_data
@@ -70,23 +70,71 @@ async def page():
     power_range = data["power_range"]
     voltage_range = data["voltage_range"]
 
+    # 时间轴 + dataZoom：整体曲线是降采样后的概览，放大到某一时间窗口时按窗口重新查询更细的数据
+    overview = {"times": times, "p_series": p_series, "q_series": q_series, "v_series": v_series}
+
+    def pairs(curve: dict, key: str) -> list:
+        return [[t, v] for t, v in zip(curve["times"], curve[key])]
+
     with ui.card().classes("w-full"):
-        ui.echart({
+        chart = ui.echart({
             "tooltip": {"trigger": "axis"},
             "legend": {"data": ["有功功率", "无功功率", "电压"]},
-            "xAxis": {"type": "category", "data": times},
+            "xAxis": {"type": "time"},
             "yAxis": [
                 {"type": "value", "name": "功率(MW)", "min": power_range[0], "max": power_range[1]},
                 {"type": "value", "name": "电压(pu)", "min": voltage_range[0], "max": voltage_range[1]}
             ],
+            "dataZoom": [{"type": "inside"}, {"type": "slider"}],
             "series": [
                 # todo: 弄明白这些属性的作用
-                {"name": "有功功率", "type": "line", "data": p_series, "areaStyle": {}},
-                {"name": "无功功率", "type": "line", "data": q_series, "areaStyle": {}},
-                {"name": "电压", "type": "line", "yAxisIndex": 1, "data": v_series, "smooth": True}
+                {"name": "有功功率", "type": "line", "data": pairs(overview, "p_series"), "areaStyle": {},
+                 "showSymbol": False},
+                {"name": "无功功率", "type": "line", "data": pairs(overview, "q_series"), "areaStyle": {},
+                 "showSymbol": False},
+                {"name": "电压", "type": "line", "yAxisIndex": 1, "data": pairs(overview, "v_series"), "smooth": True,
+                 "showSymbol": False}
             ]
         }).classes("w-full h-96 mt-4")
 
+    async def on_datazoom(e):
+        # 拖动滑块时参数在 args 中，鼠标滚轮缩放时在 args["batch"][0] 中；start/end 为整体范围的百分比
+        args = e.args.get("batch", [e.args])[0] if isinstance(e.args, dict) else {}
+        if "start" not in args or "end" not in args or len(overview["times"]) < 2:
+            return
+        first, last = pd.Timestamp(overview["times"][0]), pd.Timestamp(overview["times"][-1])
+        start = first + (last - first) * (args["start"] / 100)
+        end = first + (last - first) * (args["end"] / 100)
+        detail = None
+        if args["start"] > 0 or args["end"] < 100:
+            detail = await utils.data_service.get_power_flow_curve(start=start.isoformat(), end=end.isoformat())
+        # 窗口外保留概览数据，窗口内替换为更细的数据
+        fmt = "%Y-%m-%d %H:%M:%S"
+        window = (start.strftime(fmt), end.strftime(fmt))
+        for series, key in zip(chart.options["series"], ("p_series", "q_series", "v_series")):
+            if detail is None:
+                series["data"] = pairs(overview, key)
+                continue
+            outside = [p for p in pairs(overview, key) if not window[0] <= p[0] < window[1]]
+            series["data"] = sorted(outside + pairs(detail, key), key=lambda p: p[0])
+        chart.update()
+
+    chart.on("chart:datazoom", on_datazoom)
+
+    async def on_hourly_curve_change(_changed):
+        """dashboard_hourly_curve.csv 变化时只更新指标卡文本和曲线数据"""
+        new_data = await utils.data_service.get_power_flow_calculation_result()
+        for label, value in format_cards(new_data).items():
+            card_labels[label].set_text(value)
+        overview.update({key: new_data[key] for key in ("times", "p_series", "q_series", "v_series")})
+        for series, key in zip(chart.options["series"], ("p_series", "q_series", "v_series")):
+            series["data"] = pairs(overview, key)
+        chart.options["yAxis"][0].update(min=new_data["power_range"][0], max=new_data["power_range"][1])
+        chart.options["yAxis"][1].update(min=new_data["voltage_range"][0], max=new_data["voltage_range"][1])
+        chart.update()
+
+    watchers.demo_data_watcher.subscribe({"dashboard_hourly_curve.csv"}, on_hourly_curve_change)
+
     # skeleton - 线路负载详情
     line_details = context["line_details"]
 
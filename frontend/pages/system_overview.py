@@ -1,14 +1,13 @@
 import math
-import random
-from typing import Optional
+from typing import Callable, Dict, Optional
 
 from nicegui import ui
 from nicegui.element import Element
-from watchfiles import awatch
 
 import settings
 import utils
 import models
+import watchers
 
 # 警告，特殊操作：此处为系统概览，需要依赖于其他 page 页的内容，为此我选择在此处导入其他 page 页信息
 from .photovoltaic_bearing_capacity import create_plot_generation_consumption_curve_chart
@@ -17,19 +16,36 @@ from .multi_dimensional_evaluation import create_multi_dimensional_evaluation_ra
 # todo: 此处不够明了，根本没必要吧？或者能不能用什么注入的方式？直接在此处定义 page 的时候就将数据注入，似乎可以的
 TAB_CONFIG = utils.locate_item(settings.TAB_CONFIGS, "id", "系统概览")
 
+# 运行曲线：时序潮流的汇总曲线（后端时序数据集 settings.POWER_FLOW_SUMMARY_SERIES，由时序潮流任务写入）
+SUMMARY_COLUMNS = {"P_MW": "负荷(MW)", "PV_gen_MW": "光伏出力(MW)", "losses_MW": "网损(MW)"}
+# 数据频率选项 -> 后端 freq
+FREQS = {"15分钟": "15min", "1小时": "1h", "1天": "1d"}
+
 
 @ui.page(TAB_CONFIG["url"], title=TAB_CONFIG["title"], favicon=TAB_CONFIG["favicon"])
 async def page():
+    # 得分来自后端时与 demo_data 中的 csv 无关，只在退回 csv 时订阅其变化（后端恢复后取消订阅）
+    csv_subscriptions: Dict[str, Callable[[], None]] = {}
+
+    def follow_csv(filename: str, fallback: bool, refresh: Callable[[], None]):
+        unsubscribe = csv_subscriptions.pop(filename, None)
+        if fallback:
+            csv_subscriptions[filename] = unsubscribe or watchers.demo_data_watcher.subscribe(
+                {filename}, lambda _changed: refresh())
+        elif unsubscribe is not None:
+            unsubscribe()
+
     @ui.refreshable
-    def top_statistic_cards():
-        # fixme: 装饰器 @ui.refreshable 修饰的函数似乎无法为 async 函数
-        data = utils.data_service.get_top_statistic_data()
+    async def top_statistic_cards(onload=False):
+        # 得分由后端根据所选方案计算，缺失的维度显示为 -
+        data, fallback = await utils.data_service.get_top_statistic_data(selected_data["plan"], onload=onload)
+        follow_csv("dimension_scores.csv", fallback, top_statistic_cards.refresh)
         cards = [
             {"title": "安全性", "value": data["safety_score_0_100"], "icon": "security", "color": "red",
              "desc": "较昨日↑10.8%"},
-            {"title": "经济性", "value": data["reliability_score_0_100"], "icon": "paid", "color": "green",
+            {"title": "经济性", "value": data["economic_score_0_100"], "icon": "paid", "color": "green",
              "desc": "较昨日↑10.2%"},
-            {"title": "可靠性", "value": data["economic_score_0_100"], "icon": "bolt", "color": "blue",
+            {"title": "可靠性", "value": data["reliability_score_0_100"], "icon": "bolt", "color": "blue",
              "desc": "较昨日↑10.8%"},
             {"title": "环保性", "value": data["environment_score_0_100"], "icon": "eco", "color": "lime",
              "desc": "较昨日↑10.9%"},
@@ -44,19 +60,54 @@ async def page():
             for c in cards:
                 with ui.card().classes("flex-1 mx-2"):
                     ui.icon(c["icon"]).classes(f"text-3xl text-{c["color"]}-500")
-                    ui.label(f"{c["value"]:.2f}").classes("text-2xl font-bold")
+                    ui.label("-" if c["value"] is None else f"{c["value"]:.2f}").classes("text-2xl font-bold")
                     ui.label(c["title"]).classes("text-base text-gray-600")
-                    ui.linear_progress(value=math.trunc(c["value"] / 100.0 * 100) / 100, color=c["color"]).classes(
-                        "my-2")
+                    ui.linear_progress(value=math.trunc((c["value"] or 0) / 100.0 * 100) / 100,
+                                       color=c["color"]).classes("my-2")
                     ui.label(c["desc"]).classes("text-xs text-gray-400")
 
+    @ui.refreshable
+    async def indicator_score_chart(onload=False):
+        indicators, fallback = await utils.data_service.get_indicator_scores(selected_data["plan"], onload=onload)
+        follow_csv("indicator_scores.csv", fallback, indicator_score_chart.refresh)
+        ui.echart({
+            "xAxis": {"type": "value", "max": 100},
+            "yAxis": {"type": "category", "data": [i["label"] for i in indicators]},
+            "series": [{
+                "type": "bar",
+                "data": [round(i["score_0_100"], 2) for i in indicators],
+                "label": {"show": True, "position": "right"}
+            }],
+            "tooltip": {},
+        }).classes("w-full h-64")
+
+    @ui.refreshable
+    async def operation_curve_chart(onload=False):
+        # 按 时间范围 + 数据频率 查询，后端直接读取对应粒度的预聚合，不在前端重采样
+        data = await utils.data_service.get_time_series(settings.POWER_FLOW_SUMMARY_SERIES,
+                                                        selected_data["time_range"], FREQS[selected_data["freq"]],
+                                                        list(SUMMARY_COLUMNS), onload=onload)
+        if not data or not data["times"]:
+            ui.label("暂无运行数据，请先提交时序潮流计算任务").classes("text-sm text-gray-400")
+            return
+        ui.echart({
+            "tooltip": {"trigger": "axis"},
+            "legend": {"data": list(SUMMARY_COLUMNS.values())},
+            "xAxis": {"type": "category", "data": data["times"]},
+            "yAxis": {"type": "value", "name": "功率(MW)"},
+            "series": [{"name": label, "type": "line", "showSymbol": False, "data": data["values"][column]}
+                       for column, label in SUMMARY_COLUMNS.items()],
+        }).classes("w-full h-80")
+
     def on_time_range_change(value):
         selected_data["time_range"] = value
         top_statistic_cards.refresh()
+        operation_curve_chart.refresh()
 
     def on_freq_change(value):
         selected_data["freq"] = value
         top_statistic_cards.refresh()
+        operation_curve_chart.refresh()
 
     # ------------------------------------------------------------------------ #
 
@@ -64,6 +115,7 @@ async def page():
 
     # page 共享区（临时方案）
     selected_data = {
+        "plan": "方案一",
         "time_range": "今日",
         "freq": "15分钟",
     }
@@ -84,12 +136,18 @@ async def page():
                 ui.notify(f"选择了 {e.value}")
                 client_cache.so_plan = e.value
                 await client_cache.save()
+                selected_data["plan"] = e.value
+                top_statistic_cards.refresh()
+                indicator_score_chart.refresh()
 
             client_cache, _ = await models.ClientCache.get_or_create(defaults=dict(client_id=ui.context.client.id))
+            # 方案列表由后端 Plan 表维护，缓存的方案已被删除时退回第一个方案
+            plan_names = await utils.data_service.get_plan_names(onload=True)
+            selected_data["plan"] = client_cache.so_plan if client_cache.so_plan in plan_names else plan_names[0]
 
             ui.label("选择方案").classes("text-sm text-gray-600 mr-1")
-            ui.select(["方案一", "方案二", "方案三"],
-                      value=client_cache.so_plan if client_cache.so_plan else "方案一",
+            ui.select(plan_names,
+                      value=selected_data["plan"],
                       on_change=select_plan).classes("mr-4 w-24")
             ui.label("时间范围").classes("text-sm text-gray-600 mr-1")
             ui.select(["今日", "本周", "本月"], value=selected_data["time_range"],
@@ -97,11 +155,17 @@ async def page():
             ui.label("数据频率").classes("text-sm text-gray-600 mr-1")
             ui.select(["15分钟", "1小时", "1天"], value=selected_data["freq"],
                       on_change=lambda e: on_freq_change(e.value)).classes("mr-4 w-24")
-            ui.button("刷新数据", icon="refresh", on_click=lambda: top_statistic_cards.refresh()).classes(
+            ui.button("刷新数据", icon="refresh",
+                      on_click=lambda: (top_statistic_cards.refresh(), operation_curve_chart.refresh())).classes(
                 "bg-blue-500 text-white")
 
     # 顶部四个统计卡片
-    top_statistic_cards()
+    await top_statistic_cards(onload=True)
+
+    # 运行曲线（随 时间范围、数据频率 切换）
+    with ui.card().classes("w-full mb-6"):
+        ui.label("系统运行曲线").classes("font-bold mb-2")
+        await operation_curve_chart(onload=True)
 
     # todo: 实现放大和缩小不会错位，至少保证相对位置吧？
     # # 中间：左-折线图，右-雷达图
@@ -120,7 +184,7 @@ async def page():
         # 折线图 - 添加 flex-col 和 h-full 确保内部填充
         with ui.card().classes("flex-[3] mr-4"):
             ui.label("光伏发电承载力分析").classes("font-bold mb-2")
-            await create_plot_generation_consumption_curve_chart()
+            generation_consumption_chart = await create_plot_generation_consumption_curve_chart()
 
         # 雷达图 - 添加相同的布局类
         with ui.card().classes("flex-[2]"):
@@ -131,15 +195,14 @@ async def page():
     # fixme: 此处需要选项卡切换
     with ui.card().classes("w-full"):
         ui.label("详细指标得分").classes("font-bold mb-2")
-        bar_labels = ["潮流不均衡度", "电压波动度", "电压越限率", "N-1通过率", "线路负载率"]
-        bar_values = [random.randint(60, 100) for _ in bar_labels]
-        ui.echart({
-            "xAxis": {"type": "value", "max": 100},
-            "yAxis": {"type": "category", "data": bar_labels},
-            "series": [{
-                "type": "bar",
-                "data": bar_values,
-                "label": {"show": True, "position": "right"}
-            }],
-            "tooltip": {},
-        }).classes("w-full h-64")
+        await indicator_score_chart(onload=True)
+
+    # demo_data 文件变化时只刷新依赖该文件的组件（曲线只推送新的 series 数据），不需要手动点击 刷新数据
+    async def update_generation_consumption_chart(_changed):
+        data = await utils.data_service.get_plot_generation_consumption_curve_data()
+        generation_consumption_chart.options["xAxis"]["data"] = data["hours"]
+        generation_consumption_chart.options["series"][0]["data"] = data["gen"]
+        generation_consumption_chart.options["series"][1]["data"] = data["use"]
+        generation_consumption_chart.update()
+
+    watchers.demo_data_watcher.subscribe({"hourly_region_pv.csv"}, update_generation_consumption_chart)
@@ -17,6 +17,9 @@ NODE_TYPE = {
     "发电机": {"symbol": "diamond", "color": "#f68b2c"},
 }
 
+# 网络重构优化目标
+RECONFIGURATION_OBJECTIVES = {"loss": "网损最小", "voltage_deviation": "电压偏差最小"}
+
 MIN_NODE_SIZE = 10
 MAX_NODE_SIZE = 60
 DEFAULT_NODE_SIZE = 30
@@ -24,6 +27,29 @@ DEFAULT_NODE_SIZE = 30
 
 @ui.page(TAB_CONFIG["url"], title=TAB_CONFIG["title"], favicon=TAB_CONFIG["favicon"])
 async def page():
+    def get_edge_line_style(edge) -> dict:
+        """线路样式：断开的开关为灰色虚线；重构后新断开的为红色虚线、新闭合的为绿色"""
+        line = edge.get("line")
+        closed = line not in state["open_lines"]
+        initially_closed = line not in state["initial_open_lines"]
+        if not closed:
+            color = "#FF6E76" if initially_closed else "#bbb"
+            return {"color": color, "type": "dashed", "width": 2, "curveness": 0.1}
+        if not initially_closed:
+            return {"color": "#3BA272", "width": 4, "curveness": 0.1}
+        return {
+            "color": {
+                "type": "linear",
+                "x": 0, "y": 0, "x2": 1, "y2": 0,
+                "colorStops": [
+                    {"offset": 0, "color": "#5470C6"},
+                    {"offset": 1, "color": "#91CC75"}
+                ]
+            },
+            "width": 2.5,
+            "curveness": 0.1  # 轻微弯曲使线路更自然
+        }
+
     def get_topology_chart_options(node_size=DEFAULT_NODE_SIZE):
         """生成电网拓扑图配置"""
         # todo: 仔细学习一下这个拓扑图配置，各个地方的配置！
@@ -145,18 +171,7 @@ async def page():
                     {
                         "source": str(e["source"]),
                         "target": str(e["target"]),
-                        "lineStyle": {
-                            "color": {
-                                "type": "linear",
-                                "x": 0, "y": 0, "x2": 1, "y2": 0,
-                                "colorStops": [
-                                    {"offset": 0, "color": "#5470C6"},
-                                    {"offset": 1, "color": "#91CC75"}
-                                ]
-                            },
-                            "width": 2.5,
-                            "curveness": 0.1  # 轻微弯曲使线路更自然
-                        }
+                        "lineStyle": get_edge_line_style(e),
                     }
                     for e in edges
                 ],
@@ -215,6 +230,42 @@ async def page():
 
     nodes = data.get("nodes", [])
     edges = data.get("edges", [])
+    # 断开的线路编号：初始为 line.csv 中的联络开关，网络重构后为最优开关组合
+    initial_open_lines = {e.get("line") for e in edges if e.get("status", 1) == 0}
+    state = {"open_lines": set(initial_open_lines), "initial_open_lines": initial_open_lines}
+
+    async def run_reconfiguration():
+        reconfigure_button.props("loading")
+        try:
+            result = await utils.data_service.get_reconfiguration(objective_select.value)
+        finally:
+            reconfigure_button.props(remove="loading")
+        if result is None:
+            ui.notify("网络重构计算失败，请稍后重试", type="warning")
+            return
+        initial, best = result["initial"], result["best"]
+        if not best["converged"]:
+            ui.notify("当前负荷下潮流不收敛，无法重构", type="warning")
+            return
+        state["open_lines"] = {line["line"] for line in best["open_lines"]}
+
+        def fmt(metrics, key, scale, digits):
+            # 初始拓扑未收敛时没有指标
+            value = metrics.get(key)
+            return "-" if value is None else f"{value * scale:.{digits}f}"
+
+        result_label.set_text(
+            f"{result['objective_name']}：断开 {'、'.join(line['name'] for line in best['open_lines'])}；"
+            f"网损 {fmt(initial, 'losses_mw', 1000, 2)} → {fmt(best, 'losses_mw', 1000, 2)} kW，"
+            f"最低电压 {fmt(initial, 'min_vm_pu', 1, 4)} → {fmt(best, 'min_vm_pu', 1, 4)} p.u."
+            + (f"（缓存结果，{result['elapsed_s']} s）" if result["cached"]
+               else f"（求解 {result['evaluations']} 个拓扑，{result['elapsed_s']} s）"))
+        update_topology_chart()
+
+    def reset_reconfiguration():
+        state["open_lines"] = set(initial_open_lines)
+        result_label.set_text("")
+        update_topology_chart()
 
     # 控件区
     with ui.row().classes("items-center mb-4"):
@@ -222,6 +273,10 @@ async def page():
         node_size_slider = ui.slider(min=MIN_NODE_SIZE, max=MAX_NODE_SIZE, value=DEFAULT_NODE_SIZE, step=1).classes(
             "w-64 ml-4")
         refresh_button = ui.button("刷新", icon="refresh", on_click=lambda: update_topology_chart()).classes("ml-4")
+        objective_select = ui.select(RECONFIGURATION_OBJECTIVES, value="loss", label="重构目标").classes("w-36 ml-8")
+        reconfigure_button = ui.button("网络重构", icon="alt_route", on_click=run_reconfiguration).classes("ml-2")
+        ui.button("原始拓扑", icon="undo", on_click=reset_reconfiguration).props("flat").classes("ml-2")
+    result_label = ui.label("").classes("text-sm text-gray-600")
 
     chart_container = ui.card().classes("w-full h-screen")
 
@@ -18,6 +18,26 @@ config.read(CONFIG_DIR / "common.ini")
 DEBUG = True
 
 BACKEND_BASE_URL = f"http://localhost:{config.getint("dynamic_settings", "BACKEND_PORT")}"
+# 后端 HTTP 客户端（backend_client.backend_client）：连接池大小、keep-alive 时间、重试次数、超时（秒）
+BACKEND_POOL_SIZE = 100
+BACKEND_KEEPALIVE_TIMEOUT = 30
+BACKEND_RETRIES = 2
+BACKEND_DEFAULT_TIMEOUT = 10
+# 耗时的计算接口单独放宽超时（未缓存时需要求解潮流）
+BACKEND_TIMEOUTS = {
+    "/pdn/get_plan_evaluation/": 120,
+    "/pdn/get_pv_hosting_capacity/": 120,
+    "/pdn/get_reconfiguration/": 120,
+    "/pdn/get_power_flow_calculation_result/": 30,
+}
+# 相同的并发 GET 请求合并为一次后端请求，完成后在这段时间（秒）内直接复用响应
+BACKEND_COALESCE_FRESH_SECONDS = 2
+# 访问令牌在本地校验（tokens.token_verifier）：与后端共享的签名密钥（环境变量 JWT_SIGNING_KEY，或由
+# `manage.py create_jwt_signing_key` 生成的密钥文件）、签名算法，以及从后端同步撤销列表的间隔（秒）
+JWT_SIGNING_KEY = os.environ.get("JWT_SIGNING_KEY") or None
+JWT_SIGNING_KEY_FILE = CONFIG_DIR / "jwt_signing_key"
+JWT_ALGORITHM = "HS256"
+AUTH_REVOCATION_SYNC_SECONDS = 30
 
 TITLE = "贵州山区柔性配电网络多维度评估系统"
 FAVICON = None
@@ -35,6 +55,15 @@ if NATIVE_CONFIGS["native"]:
 
 ON_AIR_TOKEN = None  # 只有预览作用，太卡了。而且不知道为什么，进入后台管理的时候，把我电脑可能是浏览器卡死了，当然更大概率是新电脑自带的系统原因。
 STORAGE_SECRET = "NOSET"
+# 曲线图每条曲线最多的点数（约为图表的像素宽度），更长的时间范围由后端按 LTTB 降采样后再返回
+CHART_MAX_POINTS = 1000
+# 潮流计算页 多曲线面积图 使用的时序数据集（时序潮流的汇总曲线），不带网络编号，后端按 PDN_NETWORK_ID 补全
+POWER_FLOW_SUMMARY_SERIES = "summary"
+# 数据服务的进程内缓存（caches.data_cache）的条目数与总大小上限
+DATA_CACHE_MAX_ENTRIES = 128
+DATA_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# demo_data 目录文件变化的合并时间（毫秒），变化后只刷新订阅了该文件的组件
+DATA_WATCH_DEBOUNCE_MS = 500
 
 # 选项卡的配置信息
 TAB_CONFIGS = [
@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from backend_client import BackendClient
+
+
+class GetSharedTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = 0
+
+        async def handler(request: web.Request):
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return web.json_response({"plan": request.query.get("plan")})
+
+        app = web.Application()
+        app.router.add_get("/pdn/get_plans/", handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.addAsyncCleanup(self.server.close)
+        self.client = BackendClient(str(self.server.make_url("")), fresh_seconds=1)
+        self.addAsyncCleanup(self.client.close)
+
+    async def test_concurrent_identical_gets_share_one_request(self):
+        first, second = await asyncio.gather(self.client.get_shared("/pdn/get_plans/", params={"plan": "方案一"}),
+                                             self.client.get_shared("/pdn/get_plans/", params={"plan": "方案一"}))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(await first.json(), {"plan": "方案一"})
+        self.assertEqual(await second.json(), {"plan": "方案一"})
+        # 参数或令牌不同的请求不合并
+        await asyncio.gather(self.client.get_shared("/pdn/get_plans/", params={"plan": "方案二"}),
+                             self.client.get_shared("/pdn/get_plans/", params={"plan": "方案一"},
+                                                    headers={"Authorization": "Bearer other"}))
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(self.client.stats()["coalesced"], 1)
+
+    async def test_expired_responses_pruned_on_read(self):
+        self.client.fresh_seconds = 0.1
+        await self.client.get_shared("/pdn/get_plans/", params={"plan": "方案一"})
+        await self.client.get_shared("/pdn/get_plans/", params={"plan": "方案二"})
+        self.assertEqual(len(self.client._fresh), 2)
+        # 过期后再读取：过期的响应都被清理，重新请求后端
+        await asyncio.sleep(0.15)
+        task = asyncio.ensure_future(self.client.get_shared("/pdn/get_plans/", params={"plan": "方案一"}))
+        await asyncio.sleep(0)
+        self.assertEqual(len(self.client._fresh), 0)
+        await task
+        self.assertEqual(self.calls, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from caches import AsyncDataCache, SingleFlight
+
+
+class AsyncDataCacheTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_loads_coalesce(self):
+        cache = AsyncDataCache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        values = await asyncio.gather(*(cache.get_or_load("key", loader, version=1) for _ in range(10)))
+        self.assertEqual(values, [1] * 10)
+        self.assertEqual(calls, 1)
+        self.assertEqual((cache.stats()["misses"], cache.stats()["coalesced"]), (1, 9))
+
+    async def test_newer_version_not_coalesced(self):
+        # 加载旧版本的过程中数据变化：新版本的请求不能合并到旧版本的加载中
+        cache = AsyncDataCache()
+        release = asyncio.Event()
+
+        async def old_loader():
+            await release.wait()
+            return "old"
+
+        async def new_loader():
+            return "new"
+
+        old = asyncio.create_task(cache.get_or_load("key", old_loader, version=1))
+        await asyncio.sleep(0)
+        self.assertEqual(await asyncio.wait_for(cache.get_or_load("key", new_loader, version=2), 1), "new")
+        release.set()
+        self.assertEqual(await old, "old")
+        self.assertEqual(cache.stats()["coalesced"], 0)
+
+    async def test_unchanged_content_revalidated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "data.csv"
+            path.write_text("a,b\n1,2\n")
+            cache = AsyncDataCache()
+            df = await cache.read_csv(path)
+            # 文件被改写但内容不变：不重新解析，返回同一个 DataFrame
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self.assertIs(await cache.read_csv(path), df)
+            self.assertEqual(cache.stats()["revalidated"], 1)
+            # 内容变化后重新解析
+            path.write_text("a,b\n3,4\n")
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+            self.assertEqual((await cache.read_csv(path))["a"].tolist(), [3])
+            self.assertEqual(cache.stats()["invalidations"], 1)
+
+    async def test_evicts_by_bytes(self):
+        value = b"x" * 1000
+        size = sys.getsizeof(value)
+        cache = AsyncDataCache(max_entries=100, max_bytes=3 * size)
+        for key in range(5):
+            await cache.get_or_load(key, lambda: asyncio.sleep(0, value))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["evictions"]), (3, 2))
+        self.assertLessEqual(stats["bytes"], 3 * size)
+        # 按 LRU 淘汰最早的两条
+        await cache.get_or_load(2, lambda: asyncio.sleep(0, b""))
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+class SingleFlightTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first, started = flight.run("key", work)
+        second, joined = flight.run("key", work)
+        self.assertEqual((started, joined, len(flight)), (True, False, 1))
+        cancelled = asyncio.ensure_future(first)
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        self.assertEqual(await second, "done")
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(len(flight), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
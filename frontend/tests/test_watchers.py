@@ -0,0 +1,35 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import watchers
+from watchers import DataWatcher
+
+
+class DataWatcherTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_restarts_after_error(self):
+        # 第一次监视出错，重新开始后仍能通知文件变化
+        attempts = 0
+
+        async def awatch(path, debounce, stop_event):
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise OSError("inotify watch limit reached")
+            yield {(1, str(Path(path) / "data.csv"))}
+            await stop_event.wait()
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(watchers, "awatch", awatch):
+            watcher = DataWatcher(Path(tmp), restart_delay=0)
+            changed = asyncio.Event()
+            watcher.subscribe({"data.csv"}, lambda _changed: changed.set())
+            watcher.start()
+            await asyncio.wait_for(changed.wait(), 1)
+            self.assertEqual(attempts, 2)
+            await asyncio.wait_for(watcher.stop(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
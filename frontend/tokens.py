@@ -0,0 +1,131 @@
+"""
+访问令牌的本地校验
+
+客户端连接（包括断线重连）时不再调用后端 verify 接口，而是用与后端共享的签名密钥在本地校验 access_token：
+- 签名密钥取环境变量 JWT_SIGNING_KEY，或由后端 `manage.py create_jwt_signing_key` 生成的密钥文件
+  （conf/jwt_signing_key），读取一次后缓存，文件变化（重新生成）时重新读取；
+- 撤销（登出、刷新令牌轮换）的令牌由后台任务定期从后端同步（settings.AUTH_REVOCATION_SYNC_SECONDS），
+  而不是每次校验都查询后端；同步请求携带由签名密钥派生的 X-Revocation-Secret；
+- 取不到签名密钥（后端使用 SECRET_KEY 签名）时退回到调用 verify 接口。
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+from pathlib import Path
+from typing import Dict, FrozenSet, Tuple
+
+import aiohttp
+import jwt
+from loguru import logger
+
+import settings
+from backend_client import backend_client
+
+
+def revocation_secret(signing_key: str) -> str:
+    """同步撤销列表的请求头 X-Revocation-Secret（与后端 authentication/views.py 一致）"""
+    return hmac.new(signing_key.encode(), b"revoked_tokens", hashlib.sha256).hexdigest()
+
+
+class TokenVerifier:
+    """本地校验 simplejwt 签发的 access_token"""
+
+    def __init__(self, key_file: Path, algorithm: str = "HS256", sync_interval: float = 30,
+                 verify_path: str = "/authentication/login/verify/",
+                 revocation_path: str = "/authentication/revoked_tokens/", key: str | None = None):
+        # key 缺省时读取 key_file
+        self.key = key
+        self.key_file = key_file
+        self.algorithm = algorithm
+        self.sync_interval = sync_interval
+        self.verify_path = verify_path
+        self.revocation_path = revocation_path
+        # (修改时间, 大小), 密钥
+        self._key: Tuple[Tuple[int, int], str] | None = None
+        self._revoked: FrozenSet[str] = frozenset()
+        self._task: asyncio.Task | None = None
+        self._counters = {"local": 0, "remote": 0, "rejected": 0, "syncs": 0, "sync_failures": 0}
+
+    def _signing_key(self) -> str | None:
+        if self.key:
+            return self.key
+        try:
+            stat = os.stat(self.key_file)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        if self._key is None or self._key[0] != version:
+            self._key = version, self.key_file.read_text(encoding="utf-8").strip()
+        return self._key[1] or None
+
+    def verify_locally(self, token: str, key: str) -> bool:
+        """校验签名、有效期、令牌类型，并检查是否已撤销"""
+        try:
+            payload = jwt.decode(token, key, algorithms=[self.algorithm], options={"require": ["exp", "jti"]})
+        except jwt.InvalidTokenError as e:
+            logger.debug("[TokenVerifier] 令牌无效：{}", e)
+            return False
+        return payload.get("token_type") == "access" and payload["jti"] not in self._revoked
+
+    async def verify_remotely(self, token: str) -> bool:
+        # 校验令牌没有副作用，和 GET 请求一样可以重试
+        async with backend_client.post(self.verify_path, json={"token": token},
+                                       retries=backend_client.retries) as response:
+            return response.status == 200
+
+    async def verify(self, token: str | None) -> bool:
+        if not token:
+            return False
+        key = self._signing_key()
+        if key is None:
+            self._counters["remote"] += 1
+            valid = await self.verify_remotely(token)
+        else:
+            self._counters["local"] += 1
+            valid = self.verify_locally(token, key)
+        if not valid:
+            self._counters["rejected"] += 1
+        return valid
+
+    async def sync(self):
+        """从后端同步撤销列表，失败时保留上一次的结果；没有签名密钥时不在本地校验，无需同步"""
+        key = self._signing_key()
+        if key is None:
+            return
+        try:
+            async with backend_client.get(self.revocation_path,
+                                          headers={"X-Revocation-Secret": revocation_secret(key)}) as response:
+                if response.status != 200:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                      status=response.status)
+                self._revoked = frozenset((await response.json())["jtis"])
+            self._counters["syncs"] += 1
+        except aiohttp.ClientError as e:
+            self._counters["sync_failures"] += 1
+            logger.warning("[TokenVerifier] 同步撤销列表失败：{}", e)
+
+    async def _run(self):
+        while True:
+            await self.sync()
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {**self._counters, "revoked": len(self._revoked)}
+
+
+token_verifier = TokenVerifier(settings.JWT_SIGNING_KEY_FILE, algorithm=settings.JWT_ALGORITHM,
+                               sync_interval=settings.AUTH_REVOCATION_SYNC_SECONDS, key=settings.JWT_SIGNING_KEY)
@@ -1,9 +1,7 @@
-import functools
 import math
 import warnings
 from typing import List, Dict, Tuple, Annotated, Iterable
 
-import numpy as np
 import pandas as pd
 import deprecation
 import aiohttp
@@ -11,10 +9,13 @@ import anyio
 from aiohttp.client import ClientResponse  # 客户端（如爬虫、API 调用），用 aiohttp.client.ClientResponse
 from loguru import logger
 from lupa.luajit20 import LuaRuntime
-from nicegui import ui, app, run
+from nicegui import ui, app
 
+import caches
 import exceptions
 import settings
+import tokens
+from backend_client import backend_client
 import typeddicts
 import dialogs
 import i18n
@@ -258,18 +259,17 @@ async def create_common_header():
                             delattr(update_password, "dialog")
 
                         async def save():
-                            url = settings.BACKEND_BASE_URL + "/authentication/change_password/"
-                            async with aiohttp.ClientSession() as session:
-                                async with session.post(url, json={
-                                    "username": auth_manager.get_username(),
-                                    "password": old_password.value,
-                                    "new_password": new_password.value,
-                                    "confirm_password": confirm_password.value,
-                                }) as response:
-                                    if response.status != 200:
-                                        ui.notify(f"修改密码失败！原因：{await response.json()}", type="negative")
-                                        # close_dialog()  # todo: try finally 似乎可以让 return 前继续执行 finally
-                                        return
+                            path = "/authentication/change_password/"
+                            async with backend_client.post(path, json={
+                                "username": auth_manager.get_username(),
+                                "password": old_password.value,
+                                "new_password": new_password.value,
+                                "confirm_password": confirm_password.value,
+                            }) as response:
+                                if response.status != 200:
+                                    ui.notify(f"修改密码失败！原因：{await response.json()}", type="negative")
+                                    # close_dialog()  # todo: try finally 似乎可以让 return 前继续执行 finally
+                                    return
 
                             ui.notify("修改密码成功！", type="positive")
                             close_dialog()
@@ -328,16 +328,19 @@ async def create_common_header():
                             if not refresh_token:
                                 return True
 
-                            url = settings.BACKEND_BASE_URL + "/authentication/logout/"
-                            async with aiohttp.ClientSession() as session:
-                                async with session.post(url, json={"refresh_token": refresh_token}) as response:
-                                    if response.status == 200:
-                                        return True
-                                    reason = "未知"
-                                    if ResponseUtils.is_json_content_type(response):
-                                        reason = await response.json()
-                                    logger.error("退出登录失败，原因：{}", reason)
-                                    return False
+                            path = "/authentication/logout/"
+                            # access_token 也一并撤销，前端本地校验令牌时按同步的撤销列表拒绝
+                            payload = {"refresh_token": refresh_token}
+                            if auth_manager.get_access_token():
+                                payload["access_token"] = auth_manager.get_access_token()
+                            async with backend_client.post(path, json=payload) as response:
+                                if response.status == 200:
+                                    return True
+                                reason = "未知"
+                                if ResponseUtils.is_json_content_type(response):
+                                    reason = await response.json()
+                                logger.error("退出登录失败，原因：{}", reason)
+                                return False
 
                         # 先执行后端，再执行前端。均要执行，但是只要有一个成功就算成功
                         successes = (await logout_by_backend(), logout_by_frontend())
@@ -373,13 +376,11 @@ async def verify_authorization_info() -> bool:
     # 【知识点】对于前端的每个 page，每次访问（刷新等）都将进行一次权限验证。
     #          而对于后端接口调用，我将选择不在前端处理，返回 200 就视为正常，否则就显示空值。
     #          但是说实在的，其实还是需要处理的，
-    verify_url = settings.BACKEND_BASE_URL + "/authentication/login/verify/"
-    async with aiohttp.ClientSession() as session:
-        async with session.post(verify_url, json={"token": auth_manager.get_access_token()}) as response:
-            if response.status != 200:
-                await dialogs.show_unauthorized_dialog()
-                return False
-            return True
+    #          令牌在本地校验（见 tokens.py），断线重连时不再逐个调用后端 verify 接口。
+    if not await tokens.token_verifier.verify(auth_manager.get_access_token()):
+        await dialogs.show_unauthorized_dialog()
+        return False
+    return True
 
 
 class _DataService:
@@ -396,15 +397,100 @@ class _DataService:
         """pandas Timestamp 拿到时分并转为字符串（00:00:00 和 01:00:00 -> 0:00 和 1:00）"""
         return f"{ts.hour}:{ts.minute:02d}"
 
-    def get_top_statistic_data(self):
-        """系统概览 - 顶部四个统计卡片 数据"""
+    async def get_plan_names(self, onload: Annotated[bool, "是否属于加载阶段"] = False) -> List[str]:
+        """规划方案名称列表（方案在后端 Plan 表中维护），后端不可用时返回内置的三个方案"""
+        path = "/pdn/get_plans/"
+        try:
+            response = await backend_client.get_shared(path, headers=await _get_authorization_headers(onload=onload))
+            if response.status == 200 and ResponseUtils.is_json_content_type(response):
+                names = [plan["name"] for plan in await response.json()]
+                if names:
+                    return names
+            else:
+                logger.warning("[get_plan_names] status: {}, response: {}", response.status,
+                               await response.text())
+        except aiohttp.ClientError as e:
+            logger.warning("[get_plan_names] 后端不可用：{}", e)
+        return ["方案一", "方案二", "方案三"]
+
+    async def get_plan_evaluation(self, weighting: str = "等权重", plans: List[str] | None = None,
+                                  onload: Annotated[bool, "是否属于加载阶段"] = False) -> Dict | None:
+        """多维度评估 - 获得 各方案的指标得分、维度得分与综合得分（后端计算），失败时返回 None"""
+        path = "/pdn/get_plan_evaluation/"
+        params = [("weighting", weighting)] + [("plans", plan) for plan in plans or []]
+        try:
+            response = await backend_client.get_shared(path, params=params,
+                                                       headers=await _get_authorization_headers(onload=onload))
+            if response.status != 200 or not ResponseUtils.is_json_content_type(response):
+                logger.warning("[get_plan_evaluation] status: {}, response: {}", response.status,
+                               await response.text())
+                return None
+            return await response.json()
+        except aiohttp.ClientError as e:
+            logger.warning("[get_plan_evaluation] 后端不可用：{}", e)
+            return None
+
+    async def get_top_statistic_data(self, plan: str = "方案一",
+                                     onload=False) -> Tuple[Dict[str, float | None], bool]:
+        """
+        系统概览 - 顶部四个统计卡片 数据（后端不可用时退回 dimension_scores.csv），缺失的得分为 None
+
+        :return: (数据, 是否退回了 csv)
+        """
+        evaluation = await self.get_plan_evaluation(plans=[plan], onload=onload)
+        if evaluation is not None:
+            return evaluation["plans"][0]["dimension_scores"], False
         filepath = settings.DEMO_DATA_DIR / "dimension_scores.csv"
-        df = pd.read_csv(filepath)
+        df = await caches.data_cache.read_csv(filepath, encoding="utf-8-sig")
         # 数据目前只有一行，就将 df 第一行转为字典吧
-        for col in df.columns:
-            # fixme: 空值填充为 90-100 之间的随机数
-            df[col] = df[col].fillna(np.random.uniform(90, 100))
-        return df.iloc[0].to_dict()
+        return {col: None if pd.isna(value) else float(value) for col, value in df.iloc[0].items()}, True
+
+    async def get_indicator_scores(self, plan: str = "方案一", onload=False) -> Tuple[List[Dict], bool]:
+        """
+        系统概览 - 详细指标得分 数据（后端不可用时退回 indicator_scores.csv），只包含有得分的指标
+
+        :return: (数据, 是否退回了 csv)
+        """
+        evaluation = await self.get_plan_evaluation(plans=[plan], onload=onload)
+        fallback = evaluation is None
+        if not fallback:
+            indicators = evaluation["plans"][0]["indicators"]
+        else:
+            filepath = settings.DEMO_DATA_DIR / "indicator_scores.csv"
+            df = await caches.data_cache.read_csv(filepath, encoding="utf-8-sig")
+            indicators = [{"label": row["indicator"].split(".")[-1], "score_0_100": row["score_0_100"]}
+                          for _, row in df.iterrows()]
+        return [{"label": indicator["label"], "score_0_100": float(indicator["score_0_100"])}
+                for indicator in indicators
+                if indicator["score_0_100"] is not None and not pd.isna(indicator["score_0_100"])], fallback
+
+    async def get_time_series(self, series: str, time_range: str | None = None, freq: str | None = "1h",
+                              columns: List[str] | None = None, stat: str = "mean",
+                              start: str | None = None, end: str | None = None,
+                              max_points: int | None = settings.CHART_MAX_POINTS,
+                              onload: Annotated[bool, "是否属于加载阶段"] = False) -> Dict | None:
+        """
+        时序数据 - 按 时间范围（今日/本周/本月，或 [start, end)）和 数据频率 查询，失败时返回 None
+
+        后端从预聚合中读取，每条曲线超过 max_points 个点时按 LTTB 降采样；freq 为 None 时为原始数据频率
+        """
+        path = "/pdn/get_time_series/"
+        params = {"series": series, "stat": stat}
+        optional_params = {"range": time_range, "freq": freq, "start": start, "end": end, "max_points": max_points}
+        params.update({key: value for key, value in optional_params.items() if value is not None})
+        if columns:
+            params["columns"] = ",".join(columns)
+        try:
+            response = await backend_client.get_shared(path, params=params,
+                                                       headers=await _get_authorization_headers(onload=onload))
+            if response.status != 200 or not ResponseUtils.is_json_content_type(response):
+                logger.warning("[get_time_series] status: {}, response: {}", response.status,
+                               await response.text())
+                return None
+            return await response.json()
+        except aiohttp.ClientError as e:
+            logger.warning("[get_time_series] 后端不可用：{}", e)
+            return None
 
     async def get_overall_indicator_data(self):
         """光伏承载力 - 获得 总览指标卡片 数据"""
@@ -412,7 +498,7 @@ class _DataService:
 
         # 总览指标卡片 - 总装机容量、当前发电量、实际消纳量、消纳效率
         filepath = settings.DEMO_DATA_DIR / "pv_region_distribution.csv"
-        df = await run.io_bound(lambda: pd.read_csv(filepath))
+        df = await caches.data_cache.read_csv(filepath)
 
         data.update({
             # fixme: 此处是多个区域啊
@@ -429,8 +515,8 @@ class _DataService:
         data = {}
 
         # 发电量与消纳量曲线图 - 时间、发电量、消纳量
-        filepath = settings.DEMO_DATA_DIR / "hourly_region_pv.csv "
-        df = await run.io_bound(lambda: pd.read_csv(filepath, parse_dates=["time"]))
+        filepath = settings.DEMO_DATA_DIR / "hourly_region_pv.csv"
+        df = await caches.data_cache.read_csv(filepath, parse_dates=["time"])
 
         data.update({
             "hours": [self.format_crossplatform_time(ts) for ts in df["time"]],
@@ -445,7 +531,6 @@ class _DataService:
     async def get_line_loading_details(self):
         """潮流计算 - 获得 线路负载详情 数据（潮流计算页面）"""
 
-        @functools.lru_cache()
         async def get_raw_details():
 
             # 【知识点】parse_dates 目的是将 CSV 文件中指定列自动解析为 Pandas 的 datetime 对象，而不是保留为原始字符串格式。
@@ -454,10 +539,9 @@ class _DataService:
             #           时间          Line0     Line1     ...    Line34  Line35  Line36
             #   2023-01-01 00:00:00  0.000147  0.000131  ...      0.0     0.0     0.0
 
+            # 进程内共享缓存，文件变化后自动重新读取（lru_cache 装饰协程函数只会缓存协程对象，第二次 await 就会报错）
             filepath = settings.DEMO_DATA_DIR / "pf_line_loading.csv"
-            _raw_details = await run.io_bound(lambda: pd.read_csv(filepath, parse_dates=["时间"]))  # 已改为异步读取
-            logger.debug(f"raw_details:\n{_raw_details}")
-            return _raw_details
+            return await caches.data_cache.read_csv(filepath, parse_dates=["时间"])
 
         # todo: 这个 raw_details 数据外界对它的操作很多，其实如果能将其抽为一个类，那会舒服很多
         raw_details: pd.DataFrame = await get_raw_details()
@@ -492,43 +576,92 @@ class _DataService:
 
         return line_loading_details
 
+    async def get_pv_hosting_capacity(self, plan: str, weather: str, season: str,
+                                      onload: Annotated[bool, "是否属于加载阶段"] = False) -> Dict | None:
+        """光伏承载力 - 获得 各区域光伏承载力 数据（后端计算，按 方案/天气/季节 缓存），失败时返回 None"""
+        path = "/pdn/get_pv_hosting_capacity/"
+        params = {"plan": plan, "weather": weather, "season": season}
+        try:
+            response = await backend_client.get_shared(path, params=params,
+                                                       headers=await _get_authorization_headers(onload=onload))
+            if response.status != 200 or not ResponseUtils.is_json_content_type(response):
+                logger.warning("[get_pv_hosting_capacity] status: {}, response: {}", response.status,
+                               await response.text())
+                return None
+            return await response.json()
+        except aiohttp.ClientError as e:
+            logger.warning("[get_pv_hosting_capacity] 后端不可用：{}", e)
+            return None
+
+    async def get_reconfiguration(self, objective: str = "loss",
+                                  onload: Annotated[bool, "是否属于加载阶段"] = False) -> Dict | None:
+        """拓扑结构 - 获得 网络重构（最优开关组合）结果（后端计算并缓存），失败时返回 None"""
+        path = "/pdn/get_reconfiguration/"
+        try:
+            response = await backend_client.get_shared(path, params={"objective": objective},
+                                                       headers=await _get_authorization_headers(onload=onload))
+            if response.status != 200 or not ResponseUtils.is_json_content_type(response):
+                logger.warning("[get_reconfiguration] status: {}, response: {}", response.status,
+                               await response.text())
+                return None
+            return await response.json()
+        except aiohttp.ClientError as e:
+            logger.warning("[get_reconfiguration] 后端不可用：{}", e)
+            return None
+
     async def get_topology_structure_data(self,
                                           onload: Annotated[
                                               bool, "是否属于加载阶段"] = False) -> typeddicts.TopologyStructure:
         """拓扑结构 - 获得 拓扑结构 数据"""
         # internal dependencies
 
-        url = settings.BACKEND_BASE_URL + "/pdn/get_topology_structure/"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=await _get_authorization_headers(onload=onload)) as response:
-                if not ResponseUtils.is_json_content_type(response):
-                    logger.error(f"error response: {response}")
-                    await dialogs.show_error_dialog("非受检异常，请联系维护人员。")
-                    return {"nodes": [], "edges": []}
-                if response.status != 200:
-                    if response.status == 403:
-                        await dialogs.show_unauthorized_dialog(onload=onload)
-                        return {"nodes": [], "edges": []}
-                    await dialogs.show_error_dialog(f"{await response.json()}")
-                    return {"nodes": [], "edges": []}
-                return await response.json()
+        path = "/pdn/get_topology_structure/"
+        response = await backend_client.get_shared(path, headers=await _get_authorization_headers(onload=onload))
+        if not ResponseUtils.is_json_content_type(response):
+            logger.error(f"error response: {response}")
+            await dialogs.show_error_dialog("非受检异常，请联系维护人员。")
+            return {"nodes": [], "edges": []}
+        if response.status != 200:
+            if response.status == 403:
+                await dialogs.show_unauthorized_dialog(onload=onload)
+                return {"nodes": [], "edges": []}
+            await dialogs.show_error_dialog(f"{await response.json()}")
+            return {"nodes": [], "edges": []}
+        return await response.json()
+
+    async def get_power_flow_curve(self, start: str | None = None, end: str | None = None,
+                                   onload: Annotated[bool, "是否属于加载阶段"] = False) -> Dict | None:
+        """
+        潮流计算 - 多曲线面积图 数据（时序潮流的汇总曲线，原始数据频率），后端没有数据时返回 None
+
+        每条曲线最多 CHART_MAX_POINTS 个点（后端 LTTB 降采样，保留峰谷），放大时按 [start, end) 重新查询得到更细的数据
+        """
+        data = await self.get_time_series(settings.POWER_FLOW_SUMMARY_SERIES, freq=None,
+                                          columns=["P_MW", "Q_MVAr", "U_avg_pu"], start=start, end=end, onload=onload)
+        if not data or not data["times"]:
+            return None
+        return {
+            "times": data["times"],
+            "p_series": data["values"]["P_MW"],
+            "q_series": data["values"]["Q_MVAr"],
+            "v_series": data["values"]["U_avg_pu"],
+        }
 
     async def get_power_flow_calculation_result(self, onload: Annotated[bool, "是否属于加载阶段"] = False):
         """潮流计算 - 获得 潮流计算 结果"""
 
         async def version_1_0():
             """旧版本逻辑，直接调用后端接口，现在先走文件数据逻辑，但是旧版本依旧暂时保留（至少可以进行认证校验）"""
-            url = settings.BACKEND_BASE_URL + "/pdn/get_power_flow_calculation_result/"
+            path = "/pdn/get_power_flow_calculation_result/"
             res = {}
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=await _get_authorization_headers(onload=onload)) as response:
-                    if response.status != 200:
-                        if response.status == 403:
-                            await dialogs.show_unauthorized_dialog(onload=onload)
-                            return res
-                        await dialogs.show_error_dialog(f"{await response.json()}")
-                        return res
-                    return await response.json()
+            response = await backend_client.get_shared(path, headers=await _get_authorization_headers(onload=onload))
+            if response.status != 200:
+                if response.status == 403:
+                    await dialogs.show_unauthorized_dialog(onload=onload)
+                    return res
+                await dialogs.show_error_dialog(f"{await response.json()}")
+                return res
+            return await response.json()
 
         data = await version_1_0()
 
@@ -538,7 +671,8 @@ class _DataService:
         #   多曲线面积图 - x 轴的时间列表、有功功率 series、无功功率 series、电压 series
         new_data = {}
 
-        hourly_curve_df = pd.read_csv(settings.DEMO_DATA_DIR / "dashboard_hourly_curve.csv", parse_dates=["time"])
+        hourly_curve_df = await caches.data_cache.read_csv(settings.DEMO_DATA_DIR / "dashboard_hourly_curve.csv",
+                                                           parse_dates=["time"])
 
         # 指标卡 - S_MVA, max_line_loading_pct, voltage_deviation_pct, loss_rate_pct
         # todo: 由于数据是多行数据，我选先计算平均值（对于百分比数据）
@@ -549,24 +683,27 @@ class _DataService:
             "network_loss": hourly_curve_df["loss_rate_pct"].mean(),
         })
 
-        # 多曲线面积图 - time, P_MW, Q_MVAr, U_avg_pu
-        new_data.update({
-            "times": [self.format_crossplatform_time(ts) for ts in hourly_curve_df["time"].tolist()],
-            "p_series": hourly_curve_df["P_MW"].tolist(),
-            "q_series": hourly_curve_df["Q_MVAr"].tolist(),
-            "v_series": hourly_curve_df["U_avg_pu"].tolist(),
-        })
+        # 多曲线面积图 - time, P_MW, Q_MVAr, U_avg_pu（优先使用后端时序数据，点数有上限）
+        curve = await self.get_power_flow_curve(onload=onload)
+        if curve is None:
+            curve = {
+                "times": hourly_curve_df["time"].dt.strftime("%Y-%m-%d %H:%M:%S").tolist(),
+                "p_series": hourly_curve_df["P_MW"].tolist(),
+                "q_series": hourly_curve_df["Q_MVAr"].tolist(),
+                "v_series": hourly_curve_df["U_avg_pu"].tolist(),
+            }
+        new_data.update(curve)
 
         # 多曲线面积图 - 还需要获得动态的功率/电压最小值向下取整，和最大值向上取整（左闭右闭）
         def caculate_range(*args: List[Iterable]):
             values = []
             for arg in args:
-                values.extend(arg)
+                values.extend(v for v in arg if v is not None)
             return [math.floor(min(values)), math.ceil(max(values))]
 
         new_data.update({
-            "power_range": caculate_range(hourly_curve_df["P_MW"], hourly_curve_df["Q_MVAr"]),
-            "voltage_range": caculate_range(hourly_curve_df["U_avg_pu"]),
+            "power_range": caculate_range(curve["p_series"], curve["q_series"]),
+            "voltage_range": caculate_range(curve["v_series"]),
         })
 
         logger.debug(f"new_data:\n{new_data}")
@@ -0,0 +1,113 @@
+"""
+数据文件监视：文件变化后只刷新订阅了该文件的页面组件
+
+一个进程只有一个后台监视任务（而不是每个客户端轮询），变化按 debounce 合并后通知订阅方；
+订阅方刷新时经 caches.data_cache 读取，同一次文件更新只解析一次（并发的读取共享同一次加载）。
+"""
+import asyncio
+import inspect
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, Set
+
+from loguru import logger
+from nicegui import Client, ui
+from watchfiles import awatch
+
+import settings
+
+Callback = Callable[[Set[str]], Awaitable[None] | None]
+
+
+class DataWatcher:
+    """监视一个目录，按文件名通知订阅方"""
+
+    def __init__(self, path: Path, debounce_ms: int = 500, restart_delay: float = 5.0):
+        self.path = path
+        self.debounce_ms = debounce_ms
+        # 监视出错（目录被删除、inotify 数量不足等）后重新开始监视的间隔（秒）
+        self.restart_delay = restart_delay
+        self._subscribers: Dict[int, tuple] = {}
+        self._next_id = 0
+        self._task: asyncio.Task | None = None
+        self._stop_event: asyncio.Event | None = None
+
+    def subscribe(self, filenames: Iterable[str], callback: Callback) -> Callable[[], None]:
+        """
+        订阅文件变化，filenames 中任一文件变化时调用 callback(变化的文件名集合)，返回取消订阅的函数
+
+        在页面中调用时，回调在该客户端的上下文中执行，客户端被删除（关闭页面且超过重连时间）后自动取消订阅。
+        """
+        subscriber_id = self._next_id
+        self._next_id += 1
+        try:
+            client = ui.context.client
+        except RuntimeError:
+            client = None
+        self._prune()
+        self._subscribers[subscriber_id] = (frozenset(filenames), callback, client)
+
+        def unsubscribe():
+            self._subscribers.pop(subscriber_id, None)
+
+        return unsubscribe
+
+    def _prune(self):
+        """去掉已删除的客户端的订阅"""
+        for subscriber_id, (_, _, client) in list(self._subscribers.items()):
+            if client is not None and client.id not in Client.instances:
+                del self._subscribers[subscriber_id]
+
+    @staticmethod
+    async def _call(callback: Callback, matched: Set[str], client: Client | None):
+        try:
+            if client is None:
+                result = callback(matched)
+                if inspect.isawaitable(result):
+                    await result
+                return
+            with client:
+                result = callback(matched)
+                if inspect.isawaitable(result):
+                    await result
+        except Exception as e:
+            logger.warning("[DataWatcher] 刷新失败：{}", e)
+
+    async def _notify(self, changed: Set[str]):
+        self._prune()
+        # 各订阅方并发刷新，读取同一文件时共享一次加载
+        await asyncio.gather(*(self._call(callback, changed & filenames, client)
+                               for filenames, callback, client in list(self._subscribers.values())
+                               if changed & filenames))
+
+    async def _watch(self):
+        logger.info("[DataWatcher] 开始监视 {}", self.path)
+        async for changes in awatch(self.path, debounce=self.debounce_ms, stop_event=self._stop_event):
+            changed = {Path(path).name for _, path in changes}
+            logger.debug("[DataWatcher] 文件变化：{}", changed)
+            await self._notify(changed)
+
+    async def _run(self):
+        # 监视出错时记录并稍后重新开始，而不是让后台任务静默退出（之后的文件变化都不再通知）
+        while not self._stop_event.is_set():
+            try:
+                await self._watch()
+            except Exception as e:
+                logger.error("[DataWatcher] 监视 {} 出错，{} 秒后重新开始：{}", self.path, self.restart_delay, e)
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), self.restart_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        if self._task is None and self.path.is_dir():
+            self._stop_event = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stop_event.set()
+            await self._task
+            self._task = None
+
+
+demo_data_watcher = DataWatcher(settings.DEMO_DATA_DIR, debounce_ms=settings.DATA_WATCH_DEBOUNCE_MS)